@@ -6,10 +6,13 @@ RESTful endpoints for bangsal (hospital ward) management
 
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from database.session import get_db
 from services.bangsal_service import BangsalService
+from services.occupancy_index import occupancy_index
+from services.occupancy_stream import occupancy_stream
 from schemas.bangsal import (
     BangsalCreate, BangsalUpdate, BangsalResponse, BangsalList, BangsalSummary,
     KamarBangsalCreate, KamarBangsalUpdate, KamarBangsalResponse,
@@ -81,6 +84,7 @@ async def get_bangsal_list(
     departemen: Optional[str] = Query(None, description="Filter by departemen"),
     is_emergency_ready: Optional[bool] = Query(None, description="Filter by emergency ready status"),
     min_available_beds: Optional[int] = Query(None, ge=0, description="Minimum available beds"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)"),
     # TODO: Re-enable authentication for production
     # current_user: User = Depends(get_current_user),
     service: BangsalService = Depends(get_bangsal_service)
@@ -88,6 +92,9 @@ async def get_bangsal_list(
     """
     Get paginated list of bangsal with optional filters and search
     
+    Use `cursor` (next_cursor of the previous response) instead of `page`
+    to walk deep pages without OFFSET scans.
+    
     Requires: Any authenticated user
     """
     try:
@@ -105,8 +112,11 @@ async def get_bangsal_list(
             per_page=per_page,
             include_inactive=include_inactive,
             search=search,
-            filters=filters
+            filters=filters,
+            cursor=cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to get bangsal list")
 
@@ -219,10 +229,15 @@ async def bulk_update_capacity(
         {"bangsal_id": 2, "tempat_tidur_terisi": 15}
     ]
     
+    The batch is applied atomically: if any update fails validation,
+    no bangsal is changed.
+
     Requires: Admin, Doctor, or Nurse role
     """
     try:
         return await service.bulk_update_capacity(capacity_updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to bulk update capacity")
 
@@ -290,6 +305,28 @@ async def get_department_statistics(
     """
     return await service.get_department_statistics()
 
+# Real-time Occupancy Stream
+@router.get("/stream/occupancy")
+async def stream_occupancy(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of bed occupancy
+
+    The first event (`snapshot`) carries the current hospital occupancy;
+    subsequent `occupancy` events carry only the wards that changed, and
+    `room` events carry room availability changes.
+
+    Requires: Any authenticated user
+    """
+    occupancy_index.ensure_loaded(db)
+    return StreamingResponse(
+        occupancy_stream.event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Room Management Endpoints
 @router.get("/{bangsal_id}/rooms", response_model=List[KamarBangsalResponse])
 async def get_bangsal_rooms(
@@ -6,6 +6,8 @@ from datetime import date, timedelta
 
 from database.session import get_db
 from models.sensus import SensusHarian
+from services.sensus_audit import sensus_audit
+from core.logging_config import log_error
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
@@ -131,6 +133,16 @@ def get_dashboard_stats(
         elif recent_bor < older_bor - 2:
             trend_bor = "menurun"
 
+    # Konsistensi data periode ini (indeks audit di memori, tanpa query tambahan setelah dimuat)
+    audit = None
+    try:
+        sensus_audit.ensure_loaded(db)
+        audit = sensus_audit.summary(start_date, end_date)
+        if not audit["consistent"]:
+            peringatan.append(f"{audit['dates_with_issues']} hari data sensus tidak konsisten - cek /sensus/audit")
+    except Exception as e:
+        log_error("SENSUS_AUDIT", str(e))
+
     return {
         "stats": {
             "tanggal_terakhir": latest.tanggal.isoformat(),
@@ -148,7 +160,8 @@ def get_dashboard_stats(
         },
         "peringatan": peringatan,
         "periode": f"{bulan:02d}/{tahun}",
-        "trend_bor": trend_bor
+        "trend_bor": trend_bor,
+        "audit": audit
     }
 
 @router.get("/chart-data")
@@ -3,15 +3,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, date
-import pandas as pd
-from io import BytesIO
-from typing import Optional
-import joblib
+from io import BytesIO, StringIO
+from typing import Iterator, Optional
+import calendar
+import csv
 import os
+import zlib
 
-from database.session import get_db
+from database.session import get_db, SessionLocal
 from models.sensus import SensusHarian
 from services.indikator_service import hitung_indikator_bulanan
+from ml.shared_cache import load_pickle
 
 router = APIRouter(prefix="/export", tags=["export"])
 
@@ -23,6 +25,9 @@ def export_to_excel(
     db: Session = Depends(get_db)
 ):
     """Export data sensus ke format Excel"""
+    # pandas/xlsxwriter hanya dimuat saat export Excel dipakai
+    import pandas as pd
+    
     try:
         # Default ke bulan dan tahun sekarang
         if not bulan:
@@ -112,6 +117,8 @@ def export_excel_dengan_prediksi(
     db: Session = Depends(get_db)
 ):
     """Export data sensus lengkap dengan prediksi BOR ke Excel"""
+    import pandas as pd
+    
     try:
         # Default ke bulan dan tahun sekarang
         if not bulan:
@@ -161,7 +168,7 @@ def export_excel_dengan_prediksi(
         
         if os.path.exists(model_path):
             try:
-                model = joblib.load(model_path)
+                model = load_pickle(model_path)
                 forecast = model.forecast(steps=hari_prediksi)
                 
                 # Generate tanggal prediksi
@@ -267,58 +274,121 @@ def export_excel_dengan_prediksi(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+# Baris per fetch dari cursor dan per chunk CSV pada export streaming
+CSV_FETCH_SIZE = 1000
+
+CSV_COLUMNS = [
+    ("tanggal", SensusHarian.tanggal),
+    ("pasien_awal", SensusHarian.jml_pasien_awal),
+    ("masuk", SensusHarian.jml_masuk),
+    ("keluar", SensusHarian.jml_keluar),
+    ("pasien_akhir", SensusHarian.jml_pasien_akhir),
+    ("tt_tersedia", SensusHarian.tempat_tidur_tersedia),
+    ("bor_persen", SensusHarian.bor),
+]
+
+def _sensus_date_filter(query, start_date: date, end_date: date):
+    return query.filter(SensusHarian.tanggal >= start_date, SensusHarian.tanggal <= end_date)
+
+def _iter_sensus_csv(start_date: date, end_date: date, compress: bool = False) -> Iterator[bytes]:
+    """
+    Encode sensus rows as CSV chunks straight from a server-side cursor
+
+    Uses its own session: the request session is closed before the
+    response body is streamed. Memory stays at one fetch batch.
+
+    Values are written as stored. Unlike the former DataFrame.to_csv export,
+    an integer column that contains NULLs is not widened to float, so counts
+    stay "12" instead of "12.0" and NULL is an empty field.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    compressor = zlib.compressobj(wbits=31) if compress else None  # gzip container
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk) if compressor else chunk
+
+    db = SessionLocal()
+    try:
+        writer.writerow([name for name, _ in CSV_COLUMNS])
+        query = _sensus_date_filter(
+            db.query(*[column for _, column in CSV_COLUMNS]), start_date, end_date
+        ).order_by(SensusHarian.tanggal)
+
+        rows = query.execution_options(stream_results=True).yield_per(CSV_FETCH_SIZE)
+        for i, row in enumerate(rows, start=1):
+            writer.writerow((row[0].strftime('%Y-%m-%d'),) + tuple(row[1:]))
+            if i % CSV_FETCH_SIZE == 0:
+                chunk = flush()
+                if chunk:
+                    yield chunk
+
+        chunk = flush()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
 @router.get("/csv")
 def export_to_csv(
     bulan: Optional[int] = Query(None, description="Bulan (1-12)"),
     tahun: Optional[int] = Query(None, description="Tahun"),
+    start_date: Optional[date] = Query(None, description="Tanggal awal (YYYY-MM-DD), menggantikan bulan/tahun"),
+    end_date: Optional[date] = Query(None, description="Tanggal akhir (YYYY-MM-DD), inklusif"),
+    compress: bool = Query(False, description="Kompres output dengan gzip (.csv.gz)"),
     db: Session = Depends(get_db)
 ):
-    """Export data sensus ke format CSV"""
+    """
+    Export data sensus ke format CSV
+
+    Data di-stream per batch dari database, sehingga memori tetap konstan
+    berapapun panjang rentang tanggalnya.
+    """
     try:
-        # Default ke bulan dan tahun sekarang
-        if not bulan:
-            bulan = datetime.now().month
-        if not tahun:
-            tahun = datetime.now().year
-            
-        # Query data
-        query = db.query(SensusHarian)
-        if bulan and tahun:
-            query = query.filter(
-                SensusHarian.tanggal >= date(tahun, bulan, 1)
-            )
-            if bulan == 12:
-                next_month = date(tahun + 1, 1, 1)
-            else:
-                next_month = date(tahun, bulan + 1, 1)
-            query = query.filter(SensusHarian.tanggal < next_month)
+        if start_date or end_date:
+            # Rentang tanggal bebas
+            start_date = start_date or date.min
+            end_date = end_date or date.today()
+            if start_date > end_date:
+                raise HTTPException(status_code=400, detail="start_date tidak boleh setelah end_date")
+            nama_file = f"sensus_{start_date:%Y%m%d}_{end_date:%Y%m%d}"
+            if start_date == date.min:
+                nama_file = f"sensus_sampai_{end_date:%Y%m%d}"
+        else:
+            # Default ke bulan dan tahun sekarang
+            if not bulan:
+                bulan = datetime.now().month
+            if not tahun:
+                tahun = datetime.now().year
+            start_date = date(tahun, bulan, 1)
+            end_date = date(tahun, bulan, calendar.monthrange(tahun, bulan)[1])
+            nama_file = f"sensus_{bulan:02d}_{tahun}"
         
-        data_sensus = query.order_by(SensusHarian.tanggal).all()
-        
-        if not data_sensus:
+        has_data = _sensus_date_filter(
+            db.query(SensusHarian.id), start_date, end_date
+        ).first()
+        if not has_data:
             raise HTTPException(status_code=404, detail="Tidak ada data")
         
-        # Buat DataFrame
-        df = pd.DataFrame([
-            {
-                "tanggal": d.tanggal.strftime('%Y-%m-%d'),
-                "pasien_awal": d.jml_pasien_awal,
-                "masuk": d.jml_masuk,
-                "keluar": d.jml_keluar,
-                "pasien_akhir": d.jml_pasien_akhir,
-                "tt_tersedia": d.tempat_tidur_tersedia,
-                "bor_persen": d.bor
-            } for d in data_sensus
-        ])
-        
-        # Convert ke CSV
-        csv_data = df.to_csv(index=False)
+        if compress:
+            media_type = 'application/gzip'
+            nama_file += ".csv.gz"
+        else:
+            media_type = 'text/csv'
+            nama_file += ".csv"
         
         return StreamingResponse(
-            BytesIO(csv_data.encode('utf-8')),
-            media_type='text/csv',
-            headers={"Content-Disposition": f"attachment; filename=sensus_{bulan:02d}_{tahun}.csv"}
+            _iter_sensus_csv(start_date, end_date, compress=compress),
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={nama_file}"}
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -1,12 +1,17 @@
 # backend/api/v1/indikator_router.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import Dict, Any
 
 from database.session import get_db
 from models.sensus import SensusHarian
+from models.user import User
+from core.auth import get_current_user
+from core.logging_config import log_error
 from services.indikator_service import hitung_indikator_bulanan
+from tasks import indikator_backfill
 
 router = APIRouter(prefix="/indikator", tags=["indikator"])
 
@@ -56,3 +61,31 @@ def get_indikator_bulanan(
             "toi": "Turn Over Interval - Rata-rata hari kosong tempat tidur"
         }
     }
+
+@router.get("/backfill")
+def get_backfill_status(db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """Checkpoint backfill indikator terakhir (posisi, jumlah baris, throughput)"""
+    return {"checkpoint": indikator_backfill.get_checkpoint(db)}
+
+@router.post("/backfill")
+async def run_indikator_backfill(
+    chunk_size: int = Query(indikator_backfill.CHUNK_SIZE, ge=1, le=50000),
+    restart: bool = False,
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Hitung ulang bor/los/bto/toi seluruh sensus_harian dengan rumus saat ini
+
+    Melanjutkan dari checkpoint jika run sebelumnya terputus; hanya baris
+    yang berubah yang ditulis.
+    """
+    try:
+        return await run_in_threadpool(
+            indikator_backfill.run_backfill, chunk_size=chunk_size, restart=restart, dry_run=dry_run
+        )
+    except indikator_backfill.BackfillRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        log_error("INDIKATOR_BACKFILL", str(e))
+        raise HTTPException(status_code=500, detail=f"Backfill indikator gagal: {str(e)}")
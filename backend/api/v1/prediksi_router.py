@@ -1,30 +1,34 @@
 # backend/api/v1/prediksi_router.py
-from fastapi import APIRouter, HTTPException, Request, Body
-import joblib
-import pandas as pd
+from fastapi import APIRouter, HTTPException, Request, Body, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 import numpy as np
-from typing import List, Dict, Any, Optional
-import os
-import json
-from datetime import datetime
+from typing import List, Dict, Any, Literal, Optional
+from datetime import datetime, date, timedelta
 from pydantic import BaseModel, Field
 
-from schemas.prediksi import PrediksiResponse, RetrainResponse
+from schemas.prediksi import PrediksiResponse, RetrainResponse, WhatIfRequest
 from core.logging_config import log_prediction, log_error
+from ml.forecast_engine import ForecastEngine
+from ml import capacity_scenarios, ensemble, multi_indicator, patient_flow_sim
+from database.session import get_db
+from services import forecast_ledger
+from services.forecast_service import (
+    clear_model_cache, forecast_dates, forecast_with_interval, load_ensemble_with_cache,
+    load_model_with_cache, model_loaded_at, record_forecast_safely, retrain_served_model
+)
+from services.occupancy_index import occupancy_index
+from models.sensus import SensusHarian
+from core.auth import get_current_user
+from models.user import User
 
 router = APIRouter(prefix="/prediksi", tags=["prediksi"])
 
-# Global model cache untuk menghindari load berulang
-_MODEL_CACHE = {
-    "model": None,
-    "model_info": None,
-    "loaded_at": None
-}
-
 # NEW: Request schema untuk endpoint POST /api/v1/prediksi
 class PrediksiRequest(BaseModel):
     n_days: int = Field(default=7, ge=1, le=30, description="Jumlah hari prediksi (1-30)")
     confidence_interval: float = Field(default=0.95, ge=0.80, le=0.99, description="Confidence interval (0.80-0.99)")
+    mode: Literal["sarima", "ensemble"] = Field(default="sarima", description="sarima (satu model) atau ensemble (naive, MA, ARIMA, SARIMA berbobot)")
     
     class Config:
         schema_extra = {
@@ -54,73 +58,10 @@ class PrediksiResponseNew(BaseModel):
     status: str = Field(default="success")
     error: Optional[str] = Field(None)
 
-def load_model_with_cache():
-    """Load SARIMA model dengan caching untuk performa optimal"""
-    global _MODEL_CACHE
-    
-    # Cek apakah model sudah di-cache
-    if _MODEL_CACHE["model"] is not None:
-        return _MODEL_CACHE["model"], _MODEL_CACHE["model_info"]
-    
-    # Load model dari file (support relative dan absolute path)
-    possible_paths = [
-        "backend/models/sarima_model.pkl",
-        "models/sarima_model.pkl",
-        os.path.join(os.path.dirname(__file__), "../../models/sarima_model.pkl")
-    ]
-    
-    model_path = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            model_path = path
-            break
-    
-    if model_path is None:
-        raise FileNotFoundError("Model SARIMA belum dilatih. Jalankan training terlebih dahulu.")
-    
-    # Training log path
-    training_log_path = model_path.replace("sarima_model.pkl", "training_log.json")
-    
-    # Load model
-    model = joblib.load(model_path)
-    
-    # Load model info dari training log
-    model_info = None
-    if os.path.exists(training_log_path):
-        with open(training_log_path, 'r') as f:
-            training_log = json.load(f)
-            model_info = {
-                "model_type": training_log.get("model_info", {}).get("model_formula", "SARIMA"),
-                "mape": round(training_log.get("model_performance", {}).get("mape", 0), 2),
-                "rmse": round(training_log.get("model_performance", {}).get("rmse", 0), 2),
-                "mae": round(training_log.get("model_performance", {}).get("mae", 0), 2),
-                "last_trained": training_log.get("training_timestamp", "unknown"),
-                "aic": round(training_log.get("model_statistics", {}).get("aic", 0), 2),
-                "bic": round(training_log.get("model_statistics", {}).get("bic", 0), 2)
-            }
-    else:
-        # Default model info jika training log tidak ada
-        model_info = {
-            "model_type": "SARIMA(1,1,1)(1,0,1)7",
-            "mape": 0.0,
-            "rmse": 0.0,
-            "mae": 0.0,
-            "last_trained": datetime.now().isoformat(),
-            "aic": 0.0,
-            "bic": 0.0
-        }
-    
-    # Cache model dan info
-    _MODEL_CACHE["model"] = model
-    _MODEL_CACHE["model_info"] = model_info
-    _MODEL_CACHE["loaded_at"] = datetime.now()
-    
-    return model, model_info
-
 # NEW: POST endpoint sesuai requirement dengan confidence interval
 @router.post("", response_model=PrediksiResponseNew, name="Prediksi BOR (SARIMA)", 
             description="Endpoint utama untuk prediksi BOR dengan model SARIMA")
-async def predict_with_confidence_interval(request: PrediksiRequest = Body(...)):
+async def predict_with_confidence_interval(request: PrediksiRequest = Body(...), db: Session = Depends(get_db)):
     """
     Prediksi BOR untuk n_days ke depan dengan confidence interval
     
@@ -131,30 +72,29 @@ async def predict_with_confidence_interval(request: PrediksiRequest = Body(...))
     """
     try:
         # Load model dengan caching
-        model, model_info = load_model_with_cache()
+        if request.mode == "ensemble":
+            model, model_info = load_ensemble_with_cache()
+        else:
+            model, model_info = load_model_with_cache()
         
         # Prediksi dengan confidence interval
-        forecast_result = model.get_forecast(steps=request.n_days)
-        predicted_mean = forecast_result.predicted_mean
-        
-        # Get confidence interval
-        conf_int = forecast_result.conf_int(alpha=1-request.confidence_interval)
+        predicted_mean, lower, upper = forecast_with_interval(
+            model, request.n_days, alpha=1-request.confidence_interval
+        )
         
         # Generate dates
-        dates = pd.date_range(
-            start=pd.Timestamp.now().date() + pd.Timedelta(days=1),
-            periods=request.n_days,
-            freq='D'
-        )
+        dates = forecast_dates(model_info, request.n_days)
+        
+        record_forecast_safely(db, model_info, predicted_mean, lower, upper, request.confidence_interval)
         
         # Build response
         predictions = []
         for i in range(request.n_days):
             prediction_item = PredictionItem(
-                date=dates[i].strftime("%Y-%m-%d"),
-                predicted_value=round(float(predicted_mean.iloc[i]), 1),
-                lower_bound=round(float(conf_int.iloc[i, 0]), 1),
-                upper_bound=round(float(conf_int.iloc[i, 1]), 1)
+                date=dates[i],
+                predicted_value=round(float(predicted_mean[i]), 1),
+                lower_bound=round(float(lower[i]), 1),
+                upper_bound=round(float(upper[i]), 1)
             )
             predictions.append(prediction_item)
         
@@ -188,7 +128,7 @@ async def predict_with_confidence_interval(request: PrediksiRequest = Body(...))
         log_error("PREDICT_SARIMA", f"Model not found: {str(e)}")
         raise HTTPException(
             status_code=404,
-            detail="Model SARIMA belum dilatih. Jalankan training melalui endpoint /retrain"
+            detail=str(e) if request.mode == "ensemble" else "Model SARIMA belum dilatih. Jalankan training melalui endpoint /retrain"
         )
     except Exception as e:
         log_error("PREDICT_SARIMA", f"Prediction error: {str(e)}")
@@ -200,7 +140,7 @@ async def predict_with_confidence_interval(request: PrediksiRequest = Body(...))
 
 # LEGACY: Endpoint lama (backward compatibility)
 @router.get("/bor", response_model=PrediksiResponse)
-def predict_bor_next_days(hari: int = 3):
+def predict_bor_next_days(hari: int = 3, db: Session = Depends(get_db)):
     """[LEGACY] Prediksi BOR untuk beberapa hari ke depan - gunakan POST /prediksi untuk fitur lengkap"""
     model_path = "backend/models/sarima_model.pkl"
     
@@ -217,11 +157,9 @@ def predict_bor_next_days(hari: int = 3):
         model, model_info = load_model_with_cache()
         
         # Prediksi menggunakan SARIMA
-        forecast = model.forecast(steps=hari)
-        dates = pd.date_range(
-            pd.Timestamp.now().date() + pd.Timedelta(days=1),
-            periods=hari
-        ).strftime("%Y-%m-%d").tolist()
+        forecast = np.asarray(model.forecast(steps=hari))
+        dates = forecast_dates(model_info, hari)
+        record_forecast_safely(db, model_info, forecast)
 
         prediksi = [
             {"tanggal": dates[i], "bor": max(0.0, min(100.0, round(float(forecast[i]), 1)))}
@@ -270,12 +208,7 @@ def retrain_model():
     """Endpoint untuk melatih ulang model SARIMA dengan logging"""
     try:
         # Clear model cache
-        global _MODEL_CACHE
-        _MODEL_CACHE = {
-            "model": None,
-            "model_info": None,
-            "loaded_at": None
-        }
+        clear_model_cache()
         
         # Import training function
         from ml.train import train_sarima_and_save
@@ -321,7 +254,7 @@ def get_model_status():
             "status": "ready",
             "model_loaded": True,
             "model_info": model_info,
-            "cached_at": _MODEL_CACHE["loaded_at"].isoformat() if _MODEL_CACHE["loaded_at"] else None,
+            "cached_at": model_loaded_at().isoformat() if model_loaded_at() else None,
             "message": "Model SARIMA siap untuk prediksi"
         }
     except FileNotFoundError:
@@ -339,4 +272,202 @@ def get_model_status():
             "model_info": None,
             "cached_at": None,
             "message": f"Error: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+# Ensemble: bobot member dari error backtest, disajikan lewat POST /prediksi (mode=ensemble)
+def _served_sarima_order():
+    """Order SARIMA model yang sedang disajikan /prediksi (None jika belum ada)"""
+    try:
+        model, _ = load_model_with_cache()
+    except FileNotFoundError:
+        return None
+    if isinstance(model, ForecastEngine):
+        return (model.order, model.seasonal_order) if model.seasonal_order else None
+    return tuple(model.model.order), tuple(model.model.seasonal_order)
+
+@router.post("/ensemble/train", name="Train Forecast Ensemble")
+def train_forecast_ensemble(
+    weighting: Literal["inverse_mse", "stacking"] = Query("inverse_mse", description="Metode bobot dari error backtest"),
+    horizon: int = Query(ensemble.DEFAULT_HORIZON, ge=7, le=60, description="Horizon backtest (hari)"),
+    folds: int = Query(ensemble.BACKTEST_FOLDS, ge=2, le=26, description="Jumlah origin backtest (mingguan)"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Backtest naive, MA(7), ARIMA dan SARIMA lalu simpan ensemble berbobot"""
+    # Imported here: training needs pandas/statsmodels, serving does not
+    from ml.train import load_data_from_db
+    
+    df = load_data_from_db(db)
+    if df is None:
+        raise HTTPException(status_code=400, detail="Tidak ada data BOR yang valid untuk training ensemble")
+    try:
+        meta = ensemble.build_ensemble(df["bor"], _served_sarima_order(), weighting, horizon, folds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        # Nothing was published; the previous ensemble keeps serving
+        log_error("ENSEMBLE_TRAIN", str(e))
+        raise HTTPException(status_code=500, detail=f"Training ensemble gagal: {str(e)}")
+    
+    log_prediction(0, [{"action": "ENSEMBLE_TRAIN", "version": meta["version"], "by": current_user.get("sub")}])
+    return {"status": "success", "ensemble": meta}
+
+@router.get("/ensemble", name="Forecast Ensemble Info")
+def get_forecast_ensemble():
+    """Member, bobot dan error backtest ensemble yang sedang aktif"""
+    try:
+        forecaster = ensemble.EnsembleForecaster.load()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"status": "success", "ensemble": forecaster.meta}
+
+# Forecast accuracy ledger: akurasi nyata dari forecast yang pernah dikeluarkan
+@router.get("/accuracy", name="Forecast Accuracy")
+def get_forecast_accuracy(
+    source: Optional[str] = Query(None, description="prediksi (model file) atau sarima (model registry)"),
+    model_version: Optional[str] = Query(None, description="Default: versi terbaru per source"),
+    db: Session = Depends(get_db)
+):
+    """MAE/MAPE/RMSE dan coverage interval per horizon, dihitung dari BOR aktual yang sudah masuk"""
+    if source is not None and source not in forecast_ledger.SOURCES:
+        raise HTTPException(status_code=400, detail=f"source harus salah satu dari {list(forecast_ledger.SOURCES)}")
+    if model_version is not None and source is None:
+        raise HTTPException(status_code=400, detail="model_version membutuhkan parameter source")
+    
+    return {
+        "status": "success",
+        "accuracy": forecast_ledger.get_accuracy(db, source, model_version)
+    }
+
+@router.post("/accuracy/retrain", name="Retrain on Accuracy Drift")
+async def retrain_on_accuracy_drift(
+    force: bool = Query(False, description="Retrain meskipun tidak ada drift"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Retrain model yang akurasinya drift (menurut forecast ledger)"""
+    try:
+        report = forecast_ledger.get_accuracy(db)
+        drifted = {item["source"] for item in report if item["drift_detected"]}
+        if force:
+            drifted = set(forecast_ledger.SOURCES)
+        
+        retrained = {}
+        if "prediksi" in drifted:
+            # Refit the served spec and replace sarima_forecast_state.npz (new model_version)
+            try:
+                retrained["prediksi"] = await run_in_threadpool(retrain_served_model, db)
+            except (FileNotFoundError, ValueError) as e:
+                retrained["prediksi"] = {"status": "error", "error": str(e)}
+        if "sarima" in drifted:
+            # Imported here to avoid a circular router import
+            from api.v1.sarima_router import train_sarima_model
+            from schemas.prediksi import SARIMATrainingRequest
+            result = await train_sarima_model(SARIMATrainingRequest(), db)
+            retrained["sarima"] = {"status": result["status"], "model_version": result["model_version"]}
+        
+        log_prediction(0, [{"action": "DRIFT_CHECK", "drifted": sorted(drifted), "by": current_user.get("sub")}])
+        return {
+            "status": "success",
+            "drifted_sources": sorted(drifted),
+            "retrained": retrained,
+            "accuracy": report
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        log_error("DRIFT_RETRAIN", str(e))
+        raise HTTPException(status_code=500, detail=f"Error retrain: {str(e)}")
+
+def _flow_parameters_and_wards(db: Session, history_days: int, bangsal_id: Optional[List[int]]):
+    """Flow distributions fitted on recent sensus rows and the active wards (occupancy snapshot)"""
+    rows = db.query(
+        SensusHarian.tanggal, SensusHarian.jml_pasien_awal, SensusHarian.jml_masuk,
+        SensusHarian.jml_keluar, SensusHarian.tempat_tidur_tersedia
+    ).order_by(SensusHarian.tanggal.desc()).limit(history_days).all()
+    rows = [row for row in rows if None not in row]
+
+    occupancy_index.ensure_loaded(db)
+    wards = [ward for ward in occupancy_index.snapshot()["wards"] if ward["is_active"]]
+    if bangsal_id:
+        wards = [ward for ward in wards if ward["id"] in set(bangsal_id)]
+        if not wards:
+            raise HTTPException(status_code=404, detail="Bangsal tidak ditemukan atau tidak aktif")
+
+    if not rows:
+        raise ValueError(f"Minimum {patient_flow_sim.MIN_HISTORY_DAYS} hari data sensus diperlukan untuk simulasi")
+    return patient_flow_sim.fit_flow_parameters(*zip(*reversed(rows))), wards
+
+
+def _admission_forecast(start_date: date, days: int) -> Dict[str, float]:
+    """Forecast jml_masuk per ISO date from the multi-indicator model (empty when not trained)"""
+    if "jml_masuk" not in multi_indicator.available_indicators():
+        return {}
+    engine = ForecastEngine.load(multi_indicator.state_path("jml_masuk"), shared=True)
+    last_date = engine.meta.get("last_date")
+    if not last_date:
+        return {}
+    steps = (start_date + timedelta(days=days - 1) - date.fromisoformat(last_date)).days
+    if not 1 <= steps <= 366:
+        return {}
+    forecast = multi_indicator.forecast_indicators(steps, ["jml_masuk"])["forecasts"]["jml_masuk"]
+    return dict(zip(forecast["dates"], forecast["values"]))
+
+
+# Monte Carlo patient flow: peluang bangsal penuh, bukan hanya prediksi titik BOR
+@router.get("/bed-shortage", name="Bed Shortage Probability")
+def get_bed_shortage_probability(
+    days: int = Query(patient_flow_sim.DEFAULT_DAYS, ge=1, le=30, description="Horizon simulasi (hari)"),
+    paths: int = Query(patient_flow_sim.DEFAULT_PATHS, ge=1000, le=patient_flow_sim.MAX_PATHS, description="Jumlah jalur Monte Carlo"),
+    bangsal_id: Optional[List[int]] = Query(None, description="Subset bangsal (default: semua bangsal aktif)"),
+    threshold: Optional[float] = Query(None, ge=1, le=100, description="Juga hitung P(BOR bangsal > threshold %)"),
+    history_days: int = Query(180, ge=patient_flow_sim.MIN_HISTORY_DAYS, le=1095, description="Hari sensus untuk fitting distribusi"),
+    seed: Optional[int] = Query(None, description="Seed untuk hasil yang bisa direproduksi"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Peluang tiap bangsal penuh (terisi >= kapasitas) per hari dan dalam horizon
+
+    Pasien masuk/keluar diambil dari distribusi yang di-fit pada sensus harian
+    terakhir; okupansi awal (hari ini) dari data bangsal saat ini.
+    """
+    try:
+        params, wards = _flow_parameters_and_wards(db, history_days, bangsal_id)
+        result = patient_flow_sim.simulate_bed_shortage(
+            params, wards, date.today(), days, paths, threshold, seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "success", **result}
+
+
+@router.post("/what-if", name="Capacity What-If Scenarios")
+def evaluate_what_if_scenarios(
+    request: WhatIfRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Proyeksi BOR/TOI dan status standar medis untuk banyak skenario sekaligus
+
+    Skenario mengubah kapasitas dan pengali pasien masuk/keluar per bangsal;
+    semua skenario dihitung bersama dari okupansi saat ini dan forecast pasien
+    masuk, tanpa menulis ke database. Skenario "baseline" selalu disertakan.
+    """
+    try:
+        params, wards = _flow_parameters_and_wards(db, request.history_days, request.bangsal_id)
+        start_date = date.today()
+        result = capacity_scenarios.project_scenarios(
+            params,
+            wards,
+            [scenario.model_dump() for scenario in request.scenarios],
+            start_date,
+            request.days,
+            admission_forecast=_admission_forecast(start_date, request.days)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "success", **result}
@@ -6,10 +6,16 @@ Endpoints:
 - POST /sarima/train: Training model dengan data SHRI
 - GET /sarima/predict: Prediksi BOR periode mendatang  
 - GET /sarima/diagnostics: Diagnostik model dan residual analysis
+- GET /sarima/diagnostics/residuals: Residual lengkap (paged JSON atau .npy)
 - GET /sarima/performance: Evaluasi performa model (RMSE, MAE, MAPE)
+- POST /sarima/rollback: Kembalikan snapshot model sebelumnya
+- POST /sarima/indicators/train: Training BOR, LOS, BTO, TOI, pasien masuk/keluar sekaligus
+- GET /sarima/indicators/predict: Prediksi semua indikator dalam satu response
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
@@ -18,8 +24,14 @@ import logging
 # Internal imports
 from database.session import get_db
 from models.sensus import SensusHarian
-from ml.sarima_model import sarima_predictor
-from schemas.prediksi import SARIMAPredictionResponse, SARIMATrainingRequest
+from ml.model_registry import model_registry
+from ml.diagnostics_artifact import DEFAULT_MAX_POINTS, MAX_PAGE_SIZE
+from ml.calendar_features import DEFAULT_FOURIER_ORDER, normalize_spec
+from ml import multi_indicator
+from services import forecast_ledger, sensus_anomaly
+from services.forecast_service import load_offline_diagnostics
+from core.logging_config import log_error
+from schemas.prediksi import SARIMAPredictionResponse, SARIMATrainingRequest, MultiIndicatorTrainingRequest
 from core.auth import get_current_user
 from models.user import User
 
@@ -29,6 +41,66 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/sarima", tags=["SARIMA Prediction"])
 
+# Kolom data training -> indikator detektor anomali
+ANOMALY_COLUMNS = {"pasien_masuk": "jml_masuk", "pasien_keluar": "jml_keluar"}
+
+def _fit_new_predictor(data_list: List[Dict[str, Any]], target_column: str, optimize_params: bool,
+                       exog_features: Optional[Dict[str, Any]] = None, outlier_dates=None):
+    """
+    Training lengkap pada predictor baru (dijalankan di thread pool)
+
+    Model yang sedang dilayani tidak disentuh; hasilnya baru terlihat oleh
+    endpoint prediksi setelah dipublikasikan ke model_registry.
+    """
+    # statsmodels is imported on first training, not at API startup
+    from ml.sarima_model import SARIMAPredictor
+    
+    predictor = SARIMAPredictor()
+    
+    # Prepare data untuk time series
+    series = predictor.prepare_data(data_list, target_column, outlier_dates=outlier_dates)
+    
+    # Check stationarity
+    stationarity_test = predictor.check_stationarity(series)
+    
+    # Fit model
+    model_info = predictor.fit_model(series, optimize=optimize_params, exog_features=exog_features)
+    
+    # Diagnostic tests
+    diagnostics = predictor.diagnostic_tests()
+    
+    # Evaluate performance on training data
+    fitted_values = predictor.fitted_model.fittedvalues
+    performance = predictor.evaluate_performance(series, fitted_values)
+    
+    return predictor, model_info, stationarity_test, diagnostics, performance
+
+def _record_forecast(db: Session, snapshot, prediction_result: Dict[str, Any]):
+    """Catat forecast ke ledger; origin = hari terakhir data training"""
+    try:
+        first_date = datetime.strptime(prediction_result['forecast_dates'][0], '%Y-%m-%d').date()
+        interval = prediction_result.get('confidence_interval') or {}
+        forecast_ledger.record_forecast(
+            db,
+            "sarima",
+            f"v{snapshot.version}@{snapshot.trained_at.isoformat(timespec='seconds')}",
+            first_date - timedelta(days=1),
+            prediction_result['predictions'],
+            interval.get('lower'),
+            interval.get('upper'),
+            0.95 if interval else None  # get_forecast().conf_int() default alpha
+        )
+    except Exception as e:
+        db.rollback()
+        log_error("FORECAST_LEDGER", f"Failed to record SARIMA forecast: {str(e)}")
+
+def _require_snapshot(detail: str = "Model belum di-training. Silakan training model terlebih dahulu."):
+    """Snapshot model yang sedang dilayani, atau 400 jika belum ada"""
+    snapshot = model_registry.current()
+    if snapshot is None:
+        raise HTTPException(status_code=400, detail=detail)
+    return snapshot
+
 @router.post("/train", response_model=Dict[str, Any])
 async def train_sarima_model(
     training_request: SARIMATrainingRequest = Body(...),
@@ -50,7 +122,7 @@ async def train_sarima_model(
         
         # Validate training parameters
         days_back = training_request.days_back or 90
-        optimize_params = training_request.optimize_parameters or True
+        optimize_params = training_request.optimize_parameters if training_request.optimize_parameters is not None else True
         target_column = training_request.target_column or 'bor'
         
         if days_back < 30:
@@ -59,6 +131,17 @@ async def train_sarima_model(
                 detail="Minimum 30 hari data diperlukan untuk training yang efektif"
             )
         
+        # Regressor kalender (SARIMAX dengan exog), divalidasi sebelum training
+        exog_features = None
+        if training_request.exog_features:
+            try:
+                exog_features = normalize_spec({
+                    "features": training_request.exog_features,
+                    "fourier_order": training_request.fourier_order if training_request.fourier_order is not None else DEFAULT_FOURIER_ORDER
+                })
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
         # Ambil data SHRI dari database
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
@@ -84,40 +167,42 @@ async def train_sarima_model(
                 'bor': float(record.bor) if record.bor else 0.0,
                 'pasien_masuk': record.jml_masuk or 0,
                 'pasien_keluar': record.jml_keluar or 0,
-                'pasien_dirawat': record.jml_dirawat or 0
+                'pasien_dirawat': record.jml_pasien_akhir or 0
             })
         
         logger.info(f"Retrieved {len(data_list)} records for training")
         
-        # Prepare data untuk time series
-        series = sarima_predictor.prepare_data(data_list, target_column)
-        
-        # Check stationarity
-        stationarity_test = sarima_predictor.check_stationarity(series)
+        # Outlier yang sudah ditandai detektor anomali menggantikan IQR
+        anomaly_column = ANOMALY_COLUMNS.get(target_column, target_column)
+        outlier_dates = sensus_anomaly.anomaly_dates(
+            db, [anomaly_column], start_date.date(), end_date.date()
+        ).get(anomaly_column)
         
-        # Fit model
-        model_info = sarima_predictor.fit_model(series, optimize=optimize_params)
+        # Training off the event loop; predictions keep using the current snapshot
+        predictor, model_info, stationarity_test, diagnostics, performance = await run_in_threadpool(
+            _fit_new_predictor, data_list, target_column, optimize_params, exog_features, outlier_dates
+        )
         
-        # Diagnostic tests
-        diagnostics = sarima_predictor.diagnostic_tests()
+        training_info = {
+            "data_points": len(data_list),
+            "date_range": {
+                "start": data_list[0]['tanggal'].strftime('%Y-%m-%d'),
+                "end": data_list[-1]['tanggal'].strftime('%Y-%m-%d')
+            },
+            "target_column": target_column,
+            "optimization_enabled": optimize_params,
+            "exog_features": model_info.get('exog_features', [])
+        }
         
-        # Evaluate performance on training data
-        fitted_values = sarima_predictor.fitted_model.fittedvalues
-        performance = sarima_predictor.evaluate_performance(series, fitted_values)
+        # Atomic swap: new requests see the new model from here on
+        snapshot = model_registry.publish(predictor, training_info)
         
         # Prepare response
         response = {
             "status": "success",
             "message": "Model SARIMA berhasil di-training",
-            "training_info": {
-                "data_points": len(data_list),
-                "date_range": {
-                    "start": data_list[0]['tanggal'].strftime('%Y-%m-%d'),
-                    "end": data_list[-1]['tanggal'].strftime('%Y-%m-%d')
-                },
-                "target_column": target_column,
-                "optimization_enabled": optimize_params
-            },
+            "model_version": snapshot.version,
+            "training_info": training_info,
             "model_info": model_info,
             "stationarity_test": stationarity_test,
             "performance_metrics": performance,
@@ -165,18 +250,15 @@ async def predict_bor(
     try:
         logger.info(f"BOR prediction requested for {days_ahead} days")
         
-        # Check if model is trained
-        if not sarima_predictor.fitted_model:
-            raise HTTPException(
-                status_code=400,
-                detail="Model belum di-training. Silakan training model terlebih dahulu."
-            )
+        # One snapshot for the whole request (never torn by a concurrent retrain)
+        snapshot = _require_snapshot()
         
         # Generate predictions
-        prediction_result = sarima_predictor.predict(
+        prediction_result = snapshot.predict(
             steps=days_ahead, 
             return_conf_int=include_confidence
         )
+        _record_forecast(db, snapshot, prediction_result)
         
         # Prepare response sesuai schema
         response = {
@@ -190,12 +272,13 @@ async def predict_bor(
             },
             "interpretation": prediction_result['interpretation'],
             "model_performance": {
-                "last_training_mape": sarima_predictor.performance_metrics.get('mape', 0),
-                "meets_journal_criteria": sarima_predictor.performance_metrics.get('mape', 100) < 10,
+                "last_training_mape": snapshot.performance_metrics.get('mape', 0),
+                "meets_journal_criteria": snapshot.performance_metrics.get('mape', 100) < 10,
                 "model_parameters": {
-                    "order": sarima_predictor.order,
-                    "seasonal_order": sarima_predictor.seasonal_order
-                }
+                    "order": snapshot.order,
+                    "seasonal_order": snapshot.seasonal_order
+                },
+                "model_version": snapshot.version
             },
             "clinical_alerts": {
                 "high_occupancy_warning": prediction_result['interpretation']['warnings']['overutilization_risk'],
@@ -217,31 +300,61 @@ async def predict_bor(
             detail=f"Error generating predictions: {str(e)}"
         )
 
+def _offline_diagnostics_response(artifact, max_points: int) -> Dict[str, Any]:
+    """Respons /diagnostics dari artifact training offline (tanpa fitted model di memori)"""
+    meta = artifact.meta
+    return {
+        "source": "offline_training",
+        "trained_at": meta.get("trained_at"),
+        "model_identification": {
+            "order": meta.get("order"),
+            "seasonal_order": meta.get("seasonal_order"),
+            "methodology": "Box-Jenkins SARIMA",
+            "estimation_method": "Maximum Likelihood Estimation (MLE)"
+        },
+        "model_statistics": {
+            "aic": meta.get("aic"),
+            "bic": meta.get("bic")
+        },
+        "residual_diagnostics": artifact.summary(max_points),
+        "model_validation": {
+            "white_noise_residuals": meta.get("white_noise", False)
+        }
+    }
+
 @router.get("/diagnostics")
 async def get_model_diagnostics(
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=10, le=5000, description="Jumlah maksimum titik residual (downsampled)"),
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
     Diagnostik lengkap model SARIMA
     
     Mencakup:
-    - Uji residual (Ljung-Box test)
+    - Uji residual (Ljung-Box test), statistik dan histogram residual
+    - ACF/PACF
     - Statistik model (AIC, BIC, Log-likelihood)
     - Parameter significance
     - Model summary
+    
+    Residual dikembalikan dalam bentuk downsampled (min/max per bucket);
+    residual lengkap tersedia di /sarima/diagnostics/residuals. Selama belum
+    ada model yang di-training lewat API, diagnostik residual dari training
+    offline (models/train_sarima.py) yang dikembalikan.
     """
     try:
-        if not sarima_predictor.fitted_model:
-            raise HTTPException(
-                status_code=400,
-                detail="Model belum di-training"
-            )
+        if model_registry.current() is None:
+            offline = load_offline_diagnostics()
+            if offline is not None:
+                return _offline_diagnostics_response(offline, max_points)
+        snapshot = _require_snapshot("Model belum di-training")
+        artifact = snapshot.diagnostics_artifact
         
         # Get comprehensive model summary
-        model_summary = sarima_predictor.get_model_summary()
+        model_summary = snapshot.get_model_summary()
         
         # Additional diagnostics
-        fitted_model = sarima_predictor.fitted_model
+        fitted_model = snapshot.fitted_model
         
         diagnostics = {
             "model_identification": {
@@ -256,7 +369,7 @@ async def get_model_diagnostics(
                 "log_likelihood": model_summary['model_info']['log_likelihood'],
                 "parameters_count": len(fitted_model.params)
             },
-            "residual_diagnostics": model_summary.get('diagnostics', {}),
+            "residual_diagnostics": artifact.summary(max_points) if artifact is not None else model_summary.get('diagnostics', {}),
             "performance_metrics": model_summary.get('performance_metrics', {}),
             "data_information": model_summary.get('data_info', {}),
             "model_validation": {
@@ -277,6 +390,39 @@ async def get_model_diagnostics(
             detail=f"Error retrieving diagnostics: {str(e)}"
         )
 
+@router.get("/diagnostics/residuals")
+async def get_model_residuals(
+    offset: int = Query(0, ge=0, description="Indeks residual pertama"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Jumlah residual per halaman"),
+    format: str = Query("json", description="json (paged) atau npy (seluruh residual, NumPy structured array)"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Residual model SARIMA dengan resolusi penuh
+
+    - format=json: halaman [offset, offset + limit) beserta next_offset
+    - format=npy: seluruh residual sebagai .npy dengan field (tanggal, residual),
+      dibaca dengan numpy.load(file)
+    """
+    snapshot = model_registry.current()
+    artifact = snapshot.diagnostics_artifact if snapshot is not None else load_offline_diagnostics()
+    if snapshot is None and artifact is None:
+        raise HTTPException(status_code=400, detail="Model belum di-training")
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Diagnostik residual tidak tersedia untuk model ini")
+    model_version = snapshot.version if snapshot is not None else "offline"
+
+    if format == "npy":
+        return Response(
+            content=artifact.to_npy_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename=sarima_residuals_v{model_version}.npy"}
+        )
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format harus 'json' atau 'npy'")
+
+    return {"model_version": model_version, **artifact.page(offset, limit)}
+
 @router.get("/performance")
 async def get_model_performance(
     current_user: User = Depends(get_current_user)
@@ -291,13 +437,14 @@ async def get_model_performance(
     - R-squared
     """
     try:
-        if not sarima_predictor.fitted_model or not sarima_predictor.performance_metrics:
+        snapshot = _require_snapshot("Model belum di-training atau belum dievaluasi")
+        if not snapshot.performance_metrics:
             raise HTTPException(
                 status_code=400,
                 detail="Model belum di-training atau belum dievaluasi"
             )
         
-        metrics = sarima_predictor.performance_metrics
+        metrics = snapshot.performance_metrics
         
         performance_report = {
             "evaluation_metrics": {
@@ -327,14 +474,14 @@ async def get_model_performance(
                 "target_mape": "< 10%",
                 "achieved_mape": f"{metrics.get('mape', 0):.2f}%",
                 "meets_criteria": metrics.get('mape', 100) < 10,
-                "performance_level": self._get_performance_level(metrics.get('mape', 100))
+                "performance_level": _get_performance_level(metrics.get('mape', 100))
             },
             "model_quality": {
                 "sample_size": metrics.get('n_observations', 0),
                 "data_quality": "Good" if metrics.get('n_observations', 0) > 60 else "Limited",
                 "prediction_reliability": "High" if metrics.get('mape', 100) < 5 else "Medium" if metrics.get('mape', 100) < 10 else "Low"
             },
-            "recommendations": self._get_performance_recommendations(metrics)
+            "recommendations": _get_performance_recommendations(metrics)
         }
         
         return performance_report
@@ -352,23 +499,23 @@ async def get_model_performance(
 async def retrain_model(
     retrain_request: SARIMATrainingRequest = Body(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
     Re-training model dengan data terbaru
     Digunakan untuk update model berkala
+    
+    Model lama tetap melayani prediksi selama training berjalan dan
+    tetap tersedia untuk rollback.
     """
     try:
-        logger.info(f"Model retraining requested by {current_user.username}")
-        
-        # Reset existing model
-        sarima_predictor.fitted_model = None
-        sarima_predictor.performance_metrics = {}
-        sarima_predictor.diagnostics = {}
+        logger.info(f"Model retraining requested by {current_user.get('sub')}")
         
         # Call training endpoint
-        return await train_sarima_model(retrain_request, db, current_user)
+        return await train_sarima_model(retrain_request, db)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retraining model: {str(e)}")
         raise HTTPException(
@@ -382,20 +529,23 @@ async def get_model_status() -> Dict[str, Any]:
     Status model SARIMA saat ini - Public endpoint untuk status check
     """
     try:
-        is_trained = sarima_predictor.fitted_model is not None
+        snapshot = model_registry.current()
+        is_trained = snapshot is not None
         
         status = {
             "model_trained": is_trained,
-            "last_training": None,  # Could be stored in database
+            "model_version": snapshot.version if is_trained else None,
+            "last_training": snapshot.trained_at.isoformat() if is_trained else None,
             "model_parameters": {
-                "order": sarima_predictor.order,
-                "seasonal_order": sarima_predictor.seasonal_order
+                "order": snapshot.order,
+                "seasonal_order": snapshot.seasonal_order
             } if is_trained else None,
             "performance_summary": {
-                "mape": sarima_predictor.performance_metrics.get('mape', 0),
-                "meets_journal_criteria": sarima_predictor.performance_metrics.get('mape', 100) < 10
+                "mape": snapshot.performance_metrics.get('mape', 0),
+                "meets_journal_criteria": snapshot.performance_metrics.get('mape', 100) < 10
             } if is_trained else None,
-            "ready_for_prediction": is_trained
+            "ready_for_prediction": is_trained,
+            "rollback_available": model_registry.history()
         }
         
         return status
@@ -407,6 +557,118 @@ async def get_model_status() -> Dict[str, Any]:
             detail=f"Error retrieving model status: {str(e)}"
         )
 
+@router.post("/rollback")
+async def rollback_model(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Kembalikan model ke snapshot sebelumnya (tanpa training ulang)
+    """
+    try:
+        logger.info(f"Model rollback requested by {current_user.get('sub')}")
+        snapshot = model_registry.rollback()
+        logger.info(f"Model rolled back to version {snapshot.version}")
+        
+        return {
+            "status": "success",
+            "message": f"Model dikembalikan ke versi {snapshot.version}",
+            "model": snapshot.to_status()
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rolling back model: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error rolling back model: {str(e)}"
+        )
+
+@router.post("/indicators/train")
+async def train_indicator_models(
+    training_request: MultiIndicatorTrainingRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Training model SARIMA/ETS untuk beberapa indikator dalam satu job
+
+    Data dimuat sekali untuk semua indikator; tiap indikator di-fit di
+    worker process terpisah secara paralel. engine=auto memilih ETS atau
+    SARIMA per indikator (panjang data, budget waktu fit, akurasi backtest). Model yang gagal dilaporkan per
+    indikator tanpa menggagalkan indikator lain.
+    """
+    try:
+        indicators = multi_indicator.validate_indicators(training_request.indicators)
+        exog_features = None
+        if training_request.exog_features:
+            exog_features = normalize_spec({
+                "features": training_request.exog_features,
+                "fourier_order": training_request.fourier_order if training_request.fourier_order is not None else DEFAULT_FOURIER_ORDER
+            })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        history = multi_indicator.load_indicator_history(db, training_request.days_back or 365, indicators)
+        if len(history["dates"]) < multi_indicator.MIN_TRAINING_POINTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Data tidak mencukupi: {len(history['dates'])} records. Minimum {multi_indicator.MIN_TRAINING_POINTS} records diperlukan."
+            )
+
+        logger.info(f"Multi-indicator training {indicators} by {current_user.get('sub')}")
+        result = await run_in_threadpool(
+            multi_indicator.train_indicators,
+            history,
+            indicators,
+            bool(training_request.optimize_parameters),
+            exog_features,
+            engine=training_request.engine,
+            fit_budget_seconds=training_request.fit_budget_seconds
+        )
+        return {
+            "status": "success" if result["failed"] == 0 else "partial" if result["trained"] else "error",
+            **result
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in multi-indicator training: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error training indicator models: {str(e)}"
+        )
+
+@router.get("/indicators/predict")
+async def predict_indicators(
+    days_ahead: int = Query(7, ge=1, le=30, description="Jumlah hari prediksi (1-30)"),
+    indicators: Optional[List[str]] = Query(None, description="Subset indikator (kosong = semua yang sudah di-training)")
+) -> Dict[str, Any]:
+    """
+    Prediksi BOR, LOS, BTO, TOI, pasien masuk dan keluar dalam satu response - Public endpoint
+
+    Memakai forecast state hasil /sarima/indicators/train (NumPy, tanpa statsmodels).
+    """
+    try:
+        result = multi_indicator.forecast_indicators(days_ahead, indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error predicting indicators: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating indicator predictions: {str(e)}"
+        )
+
+    if not result["forecasts"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Model indikator belum di-training. Jalankan /sarima/indicators/train terlebih dahulu."
+        )
+    return {"status": "success", **result}
+
 def _get_performance_level(mape: float) -> str:
     """Helper function to categorize model performance"""
     if mape < 5:
@@ -0,0 +1,37 @@
+# backend/api/v1/scheduler_router.py
+"""
+Scheduler API Router
+Registered background jobs and their persisted run state (tasks/scheduler.py)
+"""
+
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+
+from core.auth import get_current_user
+from tasks import scheduler
+
+router = APIRouter(prefix="/scheduler", tags=["scheduler"])
+
+@router.get("/jobs")
+def get_scheduler_jobs(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Jadwal, batas konkurensi dan run terakhir/berikutnya setiap job
+
+    State (durasi, outcome, runner) hanya disimpan untuk job leader; job per
+    worker (leader_only false) tidak punya state bersama.
+    """
+    states = {state["job_name"]: state for state in scheduler.get_job_states()}
+    return {
+        "worker": scheduler.leader_lock.identity,
+        "is_leader": scheduler.leader_lock.is_leader,
+        "jobs": [
+            {
+                "name": job.name,
+                "schedule": job.description,
+                "max_concurrent": job.max_concurrent,
+                "leader_only": job.leader_only,
+                "state": states.get(job.name)
+            }
+            for job in scheduler.get_registered_jobs()
+        ]
+    }
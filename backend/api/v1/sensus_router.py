@@ -1,18 +1,17 @@
 # backend/api/v1/sensus_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from datetime import date
-from typing import List
+from typing import List, Optional
 
 from database.session import get_db
-from models.sensus import Base, SensusHarian
-from database.engine import engine
+from models.sensus import SensusHarian
 from schemas.sensus import SensusCreate, SensusResponse, SensusStats
 from core.logging_config import log_sensus_activity, log_error
 from utils.indikator_calculator import indikator_calculator
-
-# Buat tabel jika belum ada
-Base.metadata.create_all(bind=engine)
+from services import sensus_anomaly
+from services.sensus_audit import CHECKS as AUDIT_CHECKS, sensus_audit
+from services.sensus_service import after_write, sensus_values
 
 router = APIRouter(prefix="/sensus", tags=["sensus"])
 
@@ -28,37 +27,19 @@ def create_sensus(data: SensusCreate, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Data untuk tanggal ini sudah ada")
         
         # Hitung indikator menggunakan centralized calculator
-        indikator = indikator_calculator.hitung_indikator_harian(
-            data.jml_pasien_awal, 
-            data.jml_masuk, 
-            data.jml_keluar, 
-            data.tempat_tidur_tersedia, 
-            data.hari_rawat
-        )
-        
-        sensus = SensusHarian(
-            tanggal=tgl,
-            jml_pasien_awal=data.jml_pasien_awal,
-            jml_masuk=data.jml_masuk,
-            jml_keluar=data.jml_keluar,
-            jml_pasien_akhir=indikator["pasien_akhir"],
-            tempat_tidur_tersedia=data.tempat_tidur_tersedia,
-            hari_rawat=data.hari_rawat,  # Simpan hari_rawat untuk LOS
-            bor=indikator["bor"],
-            los=indikator["los"],
-            bto=indikator["bto"],
-            toi=indikator["toi"]
-        )
+        values = sensus_values(data)
+        sensus = SensusHarian(**values)
         
         db.add(sensus)
         db.commit()
         db.refresh(sensus)
+        after_write(db, scored=sensus)
         
         # Log aktivitas
         log_sensus_activity("CREATE", {
             "tanggal": data.tanggal,
-            "bor": indikator["bor"],
-            "los": indikator["los"]
+            "bor": values["bor"],
+            "los": values["los"]
         })
         
         # Auto re-train model setelah data baru
@@ -90,6 +71,59 @@ def get_sensus(limit: int = 30, db: Session = Depends(get_db)):
         log_error("GET_SENSUS", str(e))
         raise HTTPException(status_code=500, detail="Gagal mengambil data")
 
+@router.get("/anomalies")
+def get_sensus_anomalies(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    indicator: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Data sensus yang ditandai detektor anomali (terbaru di atas)"""
+    if indicator and indicator not in sensus_anomaly.INDICATORS:
+        raise HTTPException(status_code=400, detail=f"Indikator tidak dikenal: {indicator}")
+    try:
+        return {
+            "anomalies": sensus_anomaly.list_flags(db, start_date, end_date, indicator, limit),
+            "detector": sensus_anomaly.status(db)
+        }
+    except Exception as e:
+        log_error("GET_SENSUS_ANOMALIES", str(e))
+        raise HTTPException(status_code=500, detail="Gagal mengambil data anomali")
+
+@router.get("/audit")
+def get_sensus_audit(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    check: Optional[List[str]] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Audit konsistensi deret sensus: gap, duplikat, kontinuitas, identitas alur dan kapasitas"""
+    unknown = sorted(set(check or []) - set(AUDIT_CHECKS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Pemeriksaan tidak dikenal: {unknown}. Pilihan: {list(AUDIT_CHECKS)}")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date harus sebelum end_date")
+    try:
+        sensus_audit.ensure_loaded(db)
+        return sensus_audit.report(start_date, end_date, check, limit)
+    except Exception as e:
+        log_error("GET_SENSUS_AUDIT", str(e))
+        raise HTTPException(status_code=500, detail="Gagal menjalankan audit data")
+
+@router.post("/anomalies/rebuild")
+def rebuild_sensus_anomalies(db: Session = Depends(get_db)):
+    """Hitung ulang statistik dan flag anomali dari seluruh histori (setelah import massal)"""
+    try:
+        result = sensus_anomaly.rebuild(db)
+        log_sensus_activity("ANOMALY_REBUILD", result)
+        return result
+    except Exception as e:
+        db.rollback()
+        log_error("REBUILD_SENSUS_ANOMALIES", str(e))
+        raise HTTPException(status_code=500, detail="Gagal menghitung ulang anomali")
+
 @router.get("/{sensus_id}", response_model=SensusResponse)
 def get_sensus_by_id(sensus_id: int, db: Session = Depends(get_db)):
     """Ambil data sensus berdasarkan ID"""
@@ -132,6 +166,7 @@ def update_sensus(sensus_id: int, data: SensusCreate, db: Session = Depends(get_
         )
 
         # Update data
+        old_tanggal = sensus.tanggal
         sensus.tanggal = tgl
         sensus.jml_pasien_awal = data.jml_pasien_awal
         sensus.jml_masuk = data.jml_masuk
@@ -145,6 +180,7 @@ def update_sensus(sensus_id: int, data: SensusCreate, db: Session = Depends(get_
 
         db.commit()
         db.refresh(sensus)
+        after_write(db, scored=sensus, removed=old_tanggal if old_tanggal != tgl else None)
         
         # Log aktivitas
         log_sensus_activity("UPDATE", {
@@ -173,8 +209,10 @@ def delete_sensus(sensus_id: int, db: Session = Depends(get_db)):
         if not sensus:
             raise HTTPException(status_code=404, detail="Data tidak ditemukan")
 
+        tanggal = sensus.tanggal
         db.delete(sensus)
         db.commit()
+        after_write(db, removed=tanggal)
         
         # Log aktivitas
         log_sensus_activity("DELETE", {"id": sensus_id, "tanggal": str(sensus.tanggal)})
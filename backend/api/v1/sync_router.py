@@ -0,0 +1,67 @@
+# backend/api/v1/sync_router.py
+"""
+Sync API Router
+Delta sync for ward workstations and dashboards (see services/sync_service.py)
+
+Instead of re-downloading /sensus/ and /bangsal/ on every refresh a client
+keeps the token of its last pull, fetches only what changed after it and
+uploads offline-entered sensus data in idempotent batches.
+"""
+
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database.session import get_db
+from core.auth import get_current_user
+from core.logging_config import log_sensus_activity, log_error
+from schemas.sync import SensusUploadRequest
+from services import sync_service
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("/changes", response_model=Dict[str, Any])
+def get_changes(
+    token: Optional[str] = Query(None, description="token dari pull sebelumnya; kosong untuk snapshot penuh"),
+    tables: Optional[List[str]] = Query(None, description=f"Tabel yang disinkronkan: {list(sync_service.TABLES)}"),
+    limit: int = Query(sync_service.PULL_LIMIT, ge=1, le=5000, description="Maksimal entri change log per pull"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Baris yang berubah setelah token (upserts) dan tombstone baris yang dihapus (deletes)
+
+    Ulangi dengan token baru selama has_more bernilai true. Setiap baris
+    membawa _version untuk base_version saat upload. Token yang lebih tua dari
+    batas pemangkasan change log dijawab dengan snapshot penuh (mode full).
+    """
+    try:
+        return sync_service.pull_changes(db, token, tables, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        log_error("SYNC_CHANGES", str(e))
+        raise HTTPException(status_code=500, detail="Gagal mengambil perubahan data")
+
+@router.post("/sensus/upload", response_model=Dict[str, Any])
+def upload_sensus(
+    request: SensusUploadRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload batch data sensus yang diinput offline
+
+    Item diproses berurutan, masing-masing dalam transaksi sendiri. Status per
+    item: created, updated, deleted, conflict (disertai baris saat ini),
+    invalid, atau error; item yang diulang dengan idempotency_key yang sama
+    mengembalikan hasil sebelumnya (replayed).
+    """
+    keys = [item.idempotency_key for item in request.items]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="idempotency_key dalam satu batch harus unik")
+
+    response = sync_service.upload_sensus(db, request.items, uploaded_by=current_user.get("sub"))
+    # Tanpa retrain sinkron: data baru dipakai oleh job mingguan retrain_sarima
+    log_sensus_activity("SYNC_UPLOAD", {"user": current_user.get("sub"), **response["summary"]})
+    return response
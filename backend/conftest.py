@@ -0,0 +1,99 @@
+"""
+Fixture bersama untuk test backend
+
+Database SQLite, direktori model dan cache diarahkan ke direktori sementara
+sebelum `main` diimport, sehingga test tidak menyentuh db/ atau models/ repo.
+Scheduler dan dispatcher change feed tidak dijalankan (startup event tidak
+dipicu oleh TestClient tanpa context manager).
+"""
+
+import math
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_TMP_DIR = tempfile.mkdtemp(prefix="sensus-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["ENABLE_SCHEDULER"] = "false"
+os.environ["PRELOAD_ML"] = "false"
+os.environ["MULTI_INDICATOR_MODEL_DIR"] = os.path.join(_TMP_DIR, "indicators")
+os.environ["ENSEMBLE_MODEL_DIR"] = os.path.join(_TMP_DIR, "ensemble")
+os.environ["SHARED_CACHE_DIR"] = os.path.join(_TMP_DIR, "shared_cache")
+os.environ["SARIMA_FIT_CACHE_DIR"] = os.path.join(_TMP_DIR, "sarima_fits")
+os.environ["SCHEDULER_LOCK_FILE"] = os.path.join(_TMP_DIR, "scheduler.lock")
+
+TEST_USER = {"sub": "tester", "user_id": 1, "roles": ["admin"]}
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    from core.auth import get_current_user, get_current_user_token
+
+    main.app.dependency_overrides[get_current_user] = lambda: TEST_USER
+    main.app.dependency_overrides[get_current_user_token] = lambda: TEST_USER
+    return main.app
+
+
+@pytest.fixture
+def client(app, db):
+    from fastapi.testclient import TestClient
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(app):
+    """Session pada database test yang dikosongkan sebelum tiap test (tabel dibuat oleh import main)"""
+    from database.session import SessionLocal
+    from models.base import Base
+    from services.occupancy_index import occupancy_index
+    from services.sensus_audit import sensus_audit
+
+    session = SessionLocal()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    sensus_audit._reset()  # In-memory state of the previous test
+    occupancy_index._reset()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def make_sensus(db, days: int, end: date = None, beds: int = 120):
+    """Deret sensus harian sintetis (pola mingguan) yang berakhir pada `end`"""
+    from models.sensus import SensusHarian
+    from utils.indikator_calculator import indikator_calculator
+
+    end = end or date.today()
+    rows = []
+    pasien = 80
+    for i in range(days):
+        tanggal = end - timedelta(days=days - 1 - i)
+        masuk = 18 + int(6 * math.sin(2 * math.pi * i / 7)) + i % 3
+        keluar = min(pasien + masuk, 18 + int(5 * math.cos(2 * math.pi * i / 7)) + (i * 7) % 4)
+        indikator = indikator_calculator.hitung_indikator_harian(pasien, masuk, keluar, beds, None)
+        rows.append(SensusHarian(
+            tanggal=tanggal,
+            jml_pasien_awal=pasien,
+            jml_masuk=masuk,
+            jml_keluar=keluar,
+            jml_pasien_akhir=indikator["pasien_akhir"],
+            tempat_tidur_tersedia=beds,
+            bor=indikator["bor"],
+            los=indikator["los"],
+            bto=indikator["bto"],
+            toi=indikator["toi"]
+        ))
+        pasien = indikator["pasien_akhir"]
+    db.add_all(rows)
+    db.commit()
+    return rows
@@ -6,5 +6,9 @@ load_dotenv()
 
 class Settings:
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./db/sensus.db")
+    # Jalankan scheduler background (retrain mingguan, cek occupancy index)
+    ENABLE_SCHEDULER = os.getenv("ENABLE_SCHEDULER", "true").lower() in ("1", "true", "yes")
+    # Muat modul ML (statsmodels) saat startup, bukan saat request pertama
+    PRELOAD_ML = os.getenv("PRELOAD_ML", "false").lower() in ("1", "true", "yes")
 
 settings = Settings()
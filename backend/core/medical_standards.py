@@ -141,6 +141,45 @@ class MedicalStandards:
                 "recommendation": "Review komprehensif proses operasional"
             }
     
+    @classmethod
+    def evaluate_toi(cls, toi_value: float) -> dict:
+        """Evaluasi status TOI berdasarkan standar medis"""
+        if toi_value >= cls.TOI_CRITICAL_HIGH:
+            return {
+                "status": "critical", 
+                "level": "danger",
+                "message": f"TOI {toi_value:.1f} hari terlalu panjang - Tempat tidur banyak kosong",
+                "recommendation": "Evaluasi alokasi tempat tidur dan strategi rujukan"
+            }
+        elif toi_value > cls.TOI_OPTIMAL_MAX:
+            return {
+                "status": "warning", 
+                "level": "warning",
+                "message": f"TOI {toi_value:.1f} hari di atas optimal",
+                "recommendation": "Monitor utilisasi tempat tidur"
+            }
+        elif toi_value >= cls.TOI_OPTIMAL_MIN:
+            return {
+                "status": "optimal", 
+                "level": "success",
+                "message": f"TOI {toi_value:.1f} hari dalam rentang optimal",
+                "recommendation": "Pertahankan interval pergantian ini"
+            }
+        elif toi_value >= cls.TOI_WARNING_LOW:
+            return {
+                "status": "low", 
+                "level": "info",
+                "message": f"TOI {toi_value:.1f} hari pendek",
+                "recommendation": "Pastikan waktu persiapan tempat tidur mencukupi"
+            }
+        else:
+            return {
+                "status": "critical_low", 
+                "level": "warning",
+                "message": f"TOI {toi_value:.1f} hari sangat pendek - Tempat tidur hampir tidak pernah kosong",
+                "recommendation": "Tambah kapasitas atau percepat discharge"
+            }
+    
     @classmethod
     def get_all_thresholds(cls) -> dict:
         """Ambil semua threshold untuk export ke frontend"""
@@ -0,0 +1,89 @@
+# backend/database/bangsal_search.py
+"""
+Full-text search index for bangsal (SQLite FTS5, trigram tokenizer)
+
+External-content FTS table over bangsal.nama_bangsal/kode_bangsal/departemen,
+kept in sync by triggers. Trigram matching gives the same case-insensitive
+substring semantics as the old ilike '%term%' search, but from an index.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from core.logging_config import logger
+
+FTS_TABLE = "bangsal_fts"
+
+# Trigram tokens are 3 characters; shorter terms fall back to ilike
+MIN_FTS_TERM_LENGTH = 3
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        nama_bangsal, kode_bangsal, departemen,
+        content='bangsal', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bangsal_fts_insert AFTER INSERT ON bangsal BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nama_bangsal, kode_bangsal, departemen)
+        VALUES (new.id, new.nama_bangsal, new.kode_bangsal, new.departemen);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bangsal_fts_delete AFTER DELETE ON bangsal BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_bangsal, kode_bangsal, departemen)
+        VALUES ('delete', old.id, old.nama_bangsal, old.kode_bangsal, old.departemen);
+    END
+    """,
+    # Only searchable columns: capacity updates do not touch the index
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bangsal_fts_update
+    AFTER UPDATE OF nama_bangsal, kode_bangsal, departemen ON bangsal BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_bangsal, kode_bangsal, departemen)
+        VALUES ('delete', old.id, old.nama_bangsal, old.kode_bangsal, old.departemen);
+        INSERT INTO {FTS_TABLE}(rowid, nama_bangsal, kode_bangsal, departemen)
+        VALUES (new.id, new.nama_bangsal, new.kode_bangsal, new.departemen);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# Engines checked so far -> whether the FTS index is usable
+_fts_status = {}
+
+
+def ensure_bangsal_search_index(engine: Engine) -> bool:
+    """
+    Create the FTS table and triggers if missing
+
+    Returns False (search falls back to ilike) on non-SQLite databases or
+    SQLite builds without FTS5/trigram support.
+    """
+    key = id(engine)
+    if key in _fts_status:
+        return _fts_status[key]
+
+    available = False
+    if engine.dialect.name == "sqlite":
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).first()
+                if not exists:
+                    for statement in _FTS_DDL:
+                        conn.execute(text(statement))
+                    logger.info("Bangsal FTS5 search index created")
+            available = True
+        except Exception as e:
+            logger.warning(f"Bangsal FTS5 search index unavailable, using ilike: {str(e)}")
+
+    _fts_status[key] = available
+    return available
+
+
+def fts_match_expression(search_term: str) -> str:
+    """Quote a user term as a single FTS5 phrase"""
+    return '"' + search_term.replace('"', '""') + '"'
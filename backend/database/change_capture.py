@@ -0,0 +1,171 @@
+# backend/database/change_capture.py
+"""
+Change capture for sensus_harian, bangsal and kamar_bangsal
+
+Session events append one change_log row per inserted, updated or deleted
+row, on the session's own connection, so the log entry commits or rolls
+back together with the change:
+
+- after_flush covers unit-of-work writes (db.add, attribute changes,
+  db.delete); updates record {field: [old, new]} for the changed columns;
+- do_orm_execute covers ORM bulk UPDATE/DELETE statements
+  (query(...).update(), db.execute(update(Model), [...])): the affected ids
+  are resolved from the WHERE clause or the executemany parameters, and
+  the rows are read after the update / before the delete.
+
+Raw SQL bypasses both. change_log.seq is an AUTOINCREMENT key, so sequence
+numbers only grow; with SQLite's single writer they also follow commit
+order. Consumers read the log through services/change_feed.py.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event, inspect, insert, select
+
+from models.bangsal import Bangsal, KamarBangsal
+from models.change_log import ChangeLogEntry, ChangeConsumerOffset
+from models.sensus import SensusHarian
+
+TRACKED = (SensusHarian, Bangsal, KamarBangsal)
+
+# Ids per IN (...) lookup for bulk statements (SQLite bound-parameter limit)
+ID_BATCH_SIZE = 500
+
+# session.info flag: this transaction wrote change_log rows
+_PENDING = "change_capture_pending"
+
+_commit_listeners: List[Callable[[], None]] = []
+
+
+def add_commit_listener(listener: Callable[[], None]):
+    """Called after a commit that wrote change_log rows (e.g. to wake up consumers)"""
+    _commit_listeners.append(listener)
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_value)
+
+
+def _column_keys(mapper) -> List[str]:
+    return [attr.key for attr in mapper.column_attrs]
+
+
+def _loaded_snapshot(obj) -> Dict[str, Any]:
+    """Column values already loaded on the instance (never triggers a lazy load)"""
+    state = inspect(obj)
+    return {key: state.dict[key] for key in _column_keys(state.mapper) if key in state.dict}
+
+
+def _row_snapshot(row, keys: List[str]) -> Dict[str, Any]:
+    return {key: getattr(row, key) for key in keys}
+
+
+def _entry(model, row_id: int, operation: str, data: Dict[str, Any], changes=None) -> Dict[str, Any]:
+    return {
+        "table_name": model.__tablename__,
+        "row_id": row_id,
+        "operation": operation,
+        "changes": _dumps(changes) if changes else None,
+        "data": _dumps(data),
+        "created_at": datetime.utcnow()
+    }
+
+
+def _write(session, entries: List[Dict[str, Any]]):
+    if entries:
+        session.connection().execute(insert(ChangeLogEntry.__table__), entries)
+        session.info[_PENDING] = True
+
+
+def _after_flush(session, flush_context):
+    entries = []
+    for obj in session.new:
+        if isinstance(obj, TRACKED):
+            entries.append(_entry(type(obj), obj.id, "insert", _loaded_snapshot(obj)))
+    for obj in session.dirty:
+        if not isinstance(obj, TRACKED):
+            continue
+        state = inspect(obj)
+        changes = {}
+        for key in _column_keys(state.mapper):
+            history = state.attrs[key].history
+            if history.added or history.deleted:
+                old = history.deleted[0] if history.deleted else None
+                new = history.added[0] if history.added else None
+                if old != new:
+                    changes[key] = [old, new]
+        if changes:
+            entries.append(_entry(type(obj), obj.id, "update", _loaded_snapshot(obj), changes))
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED):
+            entries.append(_entry(type(obj), inspect(obj).identity[0], "delete", _loaded_snapshot(obj)))
+    _write(session, entries)
+
+
+def _select_by_ids(session, model, columns, ids: List[int]):
+    rows = []
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        rows.extend(session.execute(select(*columns).where(model.id.in_(ids[start:start + ID_BATCH_SIZE]))).all())
+    return rows
+
+
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in TRACKED:
+        return None
+
+    session = orm_execute_state.session
+    keys = _column_keys(mapper)
+    columns = [getattr(model, key) for key in keys]
+    params = orm_execute_state.parameters
+    if isinstance(params, list) and params and "id" in params[0]:
+        # Bulk UPDATE by primary key (executemany)
+        ids = [p["id"] for p in params]
+    else:
+        where = orm_execute_state.statement.whereclause
+        query = select(model.id) if where is None else select(model.id).where(where)
+        ids = session.execute(query).scalars().all()
+    if not ids:
+        return None
+
+    operation = "delete" if orm_execute_state.is_delete else "update"
+    if operation == "delete":
+        rows = _select_by_ids(session, model, columns, ids)
+        result = orm_execute_state.invoke_statement()
+    else:
+        result = orm_execute_state.invoke_statement()
+        # Read back by id: the WHERE clause may no longer match after the update
+        rows = _select_by_ids(session, model, columns, ids)
+    _write(session, [_entry(model, row.id, operation, _row_snapshot(row, keys)) for row in rows])
+    return result
+
+
+def _after_commit(session):
+    if session.info.pop(_PENDING, False):
+        for listener in _commit_listeners:
+            listener()
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def install_change_capture(session_factory, bind):
+    """Register the capture events on a sessionmaker and make sure the log tables exist"""
+    ChangeLogEntry.__table__.create(bind=bind, checkfirst=True)
+    ChangeConsumerOffset.__table__.create(bind=bind, checkfirst=True)
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
@@ -1,12 +1,16 @@
 # backend/database/session.py
 from sqlalchemy.orm import sessionmaker
 from database.engine import engine
+from database.change_capture import install_change_capture
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Writes to sensus_harian, bangsal and kamar_bangsal are logged to change_log
+install_change_capture(SessionLocal, engine)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -3,7 +3,9 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+import importlib
 import logging
+import threading
 
 # Import router
 from api.v1.sensus_router import router as sensus_router
@@ -15,17 +17,32 @@ from api.v1.standards_router import router as standards_router
 from api.v1.auth_router import router as auth_router
 from api.v1.bangsal_router import router as bangsal_router
 from api.v1.sarima_router import router as sarima_router  # New SARIMA router
+from api.v1.sync_router import router as sync_router
+from api.v1.scheduler_router import router as scheduler_router
 
 # Import untuk database
 from database.engine import engine
+from database.session import SessionLocal
+from database.bangsal_search import ensure_bangsal_search_index
 from models.sensus import Base
 from models.user import User, UserSession, UserLoginLog  
 from models.bangsal import Bangsal, KamarBangsal
+from models.scheduler_job import SchedulerJobState
+from models.forecast_ledger import ForecastLedgerEntry, ForecastAccuracy
+from models.sensus_anomaly import SensusAnomalyState, SensusAnomalyFlag
+from models.backfill_checkpoint import BackfillCheckpoint
+from models.change_log import ChangeLogEntry, ChangeConsumerOffset, ChangeLogRetention
+from models.sync_upload import SyncUploadKey
 from core.logging_config import log_error
+from core.config import settings
 from tasks.scheduler import start_scheduler_thread
+from services.occupancy_index import occupancy_index
+from services.forecast_service import preload_model
+from services.change_feed import change_feed
 
 # Buat tabel saat startup
 Base.metadata.create_all(bind=engine)
+ensure_bangsal_search_index(engine)
 
 app = FastAPI(
     title="Sensus Harian Rawat Inap - SARIMA Prediction System", 
@@ -95,9 +112,52 @@ app.include_router(export_router, prefix="/api/v1")
 app.include_router(standards_router, prefix="/api/v1")
 app.include_router(bangsal_router, prefix="/api/v1")
 app.include_router(sarima_router, prefix="/api/v1")  # SARIMA prediction endpoints
+app.include_router(sync_router, prefix="/api/v1")
+app.include_router(scheduler_router, prefix="/api/v1")
 
-# Start scheduler for weekly model retraining
-start_scheduler_thread()
+# Modul berat yang dimuat saat dipakai pertama kali (lihat PRELOAD_ML)
+ML_MODULES = ("ml.sarima_model", "ml.train")
+
+def _preload_ml_modules():
+    for module in ML_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            log_error("PRELOAD_ML", f"{module}: {str(e)}")
+
+@app.on_event("startup")
+def start_background_services():
+    """Scheduler dan preload ML dijalankan saat server start, bukan saat import"""
+    if settings.ENABLE_SCHEDULER:
+        # Start scheduler for weekly model retraining
+        start_scheduler_thread()
+    if settings.PRELOAD_ML:
+        threading.Thread(target=_preload_ml_modules, daemon=True).start()
+
+@app.on_event("startup")
+def warm_model_cache():
+    """Worker pertama menulis array model ke shared cache, worker lain cukup memory-map"""
+    try:
+        # Pickle legacy butuh statsmodels, hanya dimuat jika PRELOAD_ML
+        preload_model(include_legacy=settings.PRELOAD_ML)
+    except Exception as e:
+        log_error("MODEL_CACHE", f"Startup load failed: {str(e)}")
+
+@app.on_event("startup")
+def start_change_feed():
+    """Dispatcher for in-process change_log consumers (services/change_feed.py)"""
+    change_feed.start()
+
+@app.on_event("startup")
+def load_occupancy_index():
+    """Full re-sync of the in-memory occupancy index"""
+    db = SessionLocal()
+    try:
+        occupancy_index.load(db)
+    except Exception as e:
+        log_error("OCCUPANCY_INDEX", f"Startup load failed: {str(e)}")
+    finally:
+        db.close()
 
 @app.get("/")
 def root():
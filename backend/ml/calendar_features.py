@@ -0,0 +1,178 @@
+"""
+Calendar Features - exogenous regressors for SARIMAX (day-of-week, holidays, annual Fourier)
+
+Daily BOR follows the weekly cycle, Indonesian holiday periods and an annual
+pattern. A seasonal order of s=365 is not feasible to estimate, so the annual
+cycle enters as K sine/cosine pairs instead, next to day-of-week and holiday
+indicators. The holiday calendar is the one the data generators use
+(data/generate_sample_data.py, scripts/generate_1000_data.py).
+
+Rows are computed vectorized one calendar year at a time, cached per year,
+and sliced for any date range or index, so training, grid search and every
+forecast request reuse the same arrays. NumPy only: the API forecast path
+(ml/forecast_engine.py) builds future exog without pandas.
+
+A feature spec is a dict {"features": [...], "fourier_order": K} and is
+stored with the fitted model so forecasts use the same columns.
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FEATURE_GROUPS = ("day_of_week", "weekend", "holiday", "fourier")
+DEFAULT_FEATURES = ("day_of_week", "holiday", "fourier")
+DEFAULT_FOURIER_ORDER = 3
+MAX_FOURIER_ORDER = 10
+
+# Annual cycle length (days) for the Fourier terms
+ANNUAL_PERIOD = 365.25
+
+# (start_month, start_day, end_month, end_day) - may wrap over the new year
+HOLIDAY_PERIODS = [
+    (12, 20, 1, 7),    # Natal / Tahun Baru
+    (6, 15, 7, 31),    # Libur sekolah pertengahan tahun
+    (8, 15, 8, 20),    # Periode Hari Kemerdekaan
+]
+
+# (month, day) libur nasional tanggal tetap
+NATIONAL_HOLIDAYS = [
+    (1, 1),    # Tahun Baru
+    (8, 17),   # Hari Kemerdekaan
+    (12, 25),  # Natal
+]
+
+# Column layout of a cached year block
+_DOW_COLUMNS = [f"dow_{d}" for d in range(1, 7)]  # Selasa..Minggu, Senin = baseline
+_FOURIER_COLUMNS = [
+    name for k in range(1, MAX_FOURIER_ORDER + 1) for name in (f"annual_sin_{k}", f"annual_cos_{k}")
+]
+_ALL_COLUMNS = _DOW_COLUMNS + ["weekend", "holiday_period", "national_holiday"] + _FOURIER_COLUMNS
+_COLUMN_INDEX = {name: i for i, name in enumerate(_ALL_COLUMNS)}
+
+DateLike = Union[str, date, datetime, np.datetime64]
+
+
+def normalize_spec(spec: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Validated copy of a feature spec (defaults for missing keys)"""
+    spec = dict(spec or {})
+    features = list(DEFAULT_FEATURES if spec.get("features") is None else spec["features"])
+    unknown = [name for name in features if name not in FEATURE_GROUPS]
+    if unknown:
+        raise ValueError(f"Unknown calendar features {unknown}; choose from {list(FEATURE_GROUPS)}")
+    fourier_order = int(spec.get("fourier_order", DEFAULT_FOURIER_ORDER))
+    if not 0 <= fourier_order <= MAX_FOURIER_ORDER:
+        raise ValueError(f"fourier_order must be between 0 and {MAX_FOURIER_ORDER}")
+    return {"features": [name for name in FEATURE_GROUPS if name in features], "fourier_order": fourier_order}
+
+
+def spec_for_order(spec: Optional[Dict[str, Any]], seasonal_order: Sequence[int]) -> Dict[str, Any]:
+    """
+    Drop weekly features the seasonal part already absorbs
+
+    With seasonal differencing at a multiple of 7 days, day-of-week
+    regressors are differenced away and their coefficients are not
+    identified.
+    """
+    spec = normalize_spec(spec)
+    if len(seasonal_order) == 4 and seasonal_order[1] > 0 and seasonal_order[3] and seasonal_order[3] % 7 == 0:
+        spec["features"] = [name for name in spec["features"] if name not in ("day_of_week", "weekend")]
+    return spec
+
+
+def feature_columns(spec: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Column names of the matrix for a spec, in matrix order"""
+    spec = normalize_spec(spec)
+    columns = []
+    for name in spec["features"]:
+        if name == "day_of_week":
+            columns.extend(_DOW_COLUMNS)
+        elif name == "weekend":
+            columns.append("weekend")
+        elif name == "holiday":
+            columns.extend(["holiday_period", "national_holiday"])
+        elif name == "fourier":
+            columns.extend(_FOURIER_COLUMNS[:2 * spec["fourier_order"]])
+    return columns
+
+
+def _to_day(value: DateLike) -> np.datetime64:
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+def _in_period(month: np.ndarray, day: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> np.ndarray:
+    key = month * 100 + day
+    start_key, end_key = start[0] * 100 + start[1], end[0] * 100 + end[1]
+    if start_key <= end_key:
+        return (key >= start_key) & (key <= end_key)
+    return (key >= start_key) | (key <= end_key)
+
+
+@lru_cache(maxsize=32)
+def _year_block(year: int) -> np.ndarray:
+    """All feature columns for every day of one calendar year (read-only, cached)"""
+    days = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"), dtype="datetime64[D]")
+    epoch_days = days.astype(np.int64)
+    month = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    day = (days - days.astype("datetime64[M]")).astype(np.int64) + 1
+    # 1970-01-01 was a Thursday; Monday = 0
+    weekday = (epoch_days + 3) % 7
+
+    block = np.zeros((len(days), len(_ALL_COLUMNS)))
+    for d in range(1, 7):
+        block[:, _COLUMN_INDEX[f"dow_{d}"]] = weekday == d
+    block[:, _COLUMN_INDEX["weekend"]] = weekday >= 5
+
+    holiday = np.zeros(len(days), dtype=bool)
+    for start_month, start_day, end_month, end_day in HOLIDAY_PERIODS:
+        holiday |= _in_period(month, day, (start_month, start_day), (end_month, end_day))
+    block[:, _COLUMN_INDEX["holiday_period"]] = holiday
+
+    national = np.zeros(len(days), dtype=bool)
+    for holiday_month, holiday_day in NATIONAL_HOLIDAYS:
+        national |= (month == holiday_month) & (day == holiday_day)
+    block[:, _COLUMN_INDEX["national_holiday"]] = national
+
+    # Continuous time axis, so the terms are smooth across year boundaries
+    angle = 2 * np.pi * epoch_days / ANNUAL_PERIOD
+    for k in range(1, MAX_FOURIER_ORDER + 1):
+        block[:, _COLUMN_INDEX[f"annual_sin_{k}"]] = np.sin(k * angle)
+        block[:, _COLUMN_INDEX[f"annual_cos_{k}"]] = np.cos(k * angle)
+
+    block.setflags(write=False)
+    return block
+
+
+def calendar_matrix_for_dates(dates, spec: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Feature matrix (len(dates) x len(feature_columns(spec))) for arbitrary dates"""
+    dates = np.asarray(dates).astype("datetime64[D]")
+    if dates.size == 0:
+        return np.zeros((0, len(feature_columns(spec))))
+    columns = [_COLUMN_INDEX[name] for name in feature_columns(spec)]
+
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    first_year, last_year = int(years.min()), int(years.max())
+    blocks = np.concatenate([_year_block(year) for year in range(first_year, last_year + 1)])
+    rows = (dates - np.datetime64(f"{first_year}-01-01", "D")).astype(np.int64)
+    return blocks[np.ix_(rows, columns)]
+
+
+def calendar_matrix(start: DateLike, periods: int, spec: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Feature matrix for `periods` consecutive days starting at `start`"""
+    first = _to_day(start)
+    return calendar_matrix_for_dates(first + np.arange(periods), spec)
+
+
+def calendar_frame(index, spec: Optional[Dict[str, Any]] = None):
+    """Feature matrix as a DataFrame on a DatetimeIndex (training side)"""
+    import pandas as pd
+
+    return pd.DataFrame(
+        calendar_matrix_for_dates(np.asarray(index.values), spec),
+        index=index,
+        columns=feature_columns(spec)
+    )
@@ -0,0 +1,189 @@
+# backend/ml/capacity_scenarios.py
+"""
+Capacity Scenarios - batch what-if projections of BOR/TOI per ward
+
+"What if Geriatri gets 10 more beds" or "what if discharges rise 15%" used
+to mean editing Bangsal.kapasitas_total and re-querying. `project_scenarios`
+evaluates many such scenarios at once, read-only, from the current occupancy
+snapshot and the admission forecast:
+
+- every scenario is one row of (n_scenarios, n_wards) arrays for capacity,
+  admission multiplier and discharge multiplier; one loop over the horizon
+  advances all scenarios and wards together;
+- the expected census follows the flow identity of
+  IndikatorCalculator.hitung_indikator_harian
+  (pasien_akhir = pasien_awal + masuk - keluar), with discharges at the
+  fitted daily discharge probability (see ml/patient_flow_sim.py);
+- admissions per day come from the trained jml_masuk forecast when it
+  covers the date, scaled from the sensus bed count to the capacity of the
+  projected wards (the forecast counts the whole hospital, a ward subset
+  only gets its share), else from the fitted weekday rate; they are split
+  over wards by current capacity (extra beds do not create extra patients);
+- BOR/TOI are computed like IndikatorCalculator and graded with
+  MedicalStandards. The expected census is not capped at capacity: BOR may
+  exceed 100% and `overflow` reports the patients beyond the beds of their
+  ward.
+
+A projection is an expected value, not a probability: use
+/prediksi/bed-shortage for P(full).
+"""
+
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.medical_standards import MedicalStandards
+from ml.patient_flow_sim import FlowParameters
+
+MAX_SCENARIOS = 200
+MAX_DAYS = 30
+
+BASELINE_NAME = "baseline"
+
+
+def _statuses(values: np.ndarray, evaluate: Callable[[float], dict]) -> np.ndarray:
+    """MedicalStandards status per value, evaluated once per distinct (rounded) value"""
+    rounded = np.round(values, 1)
+    distinct, inverse = np.unique(rounded, return_inverse=True)
+    labels = np.array([evaluate(float(value))["status"] for value in distinct], dtype=object)
+    return labels[inverse].reshape(values.shape)
+
+
+def _scenario_arrays(scenarios: List[Dict[str, Any]], wards: List[Dict[str, Any]]):
+    """Capacity and multipliers as (n_scenarios, n_wards) arrays"""
+    ward_index = {ward["id"]: i for i, ward in enumerate(wards)}
+    base_capacity = np.array([max(int(ward["kapasitas_total"] or 0), 0) for ward in wards])
+    n_scenarios, n_wards = len(scenarios), len(wards)
+
+    capacity = np.tile(base_capacity, (n_scenarios, 1))
+    admission = np.ones((n_scenarios, n_wards))
+    discharge = np.ones((n_scenarios, n_wards))
+    for s, scenario in enumerate(scenarios):
+        admission[s] *= scenario.get("admission_multiplier", 1.0)
+        discharge[s] *= scenario.get("discharge_multiplier", 1.0)
+        for bangsal_id, adjustment in (scenario.get("wards") or {}).items():
+            if bangsal_id not in ward_index:
+                raise ValueError(f"Skenario '{scenario['name']}': bangsal {bangsal_id} tidak ditemukan atau tidak aktif")
+            w = ward_index[bangsal_id]
+            capacity[s, w] = max(capacity[s, w] + adjustment.get("capacity_delta", 0), 0)
+            admission[s, w] *= adjustment.get("admission_multiplier", 1.0)
+            discharge[s, w] *= adjustment.get("discharge_multiplier", 1.0)
+    return base_capacity, capacity, admission, discharge
+
+
+def project_scenarios(
+    params: FlowParameters,
+    wards: List[Dict[str, Any]],
+    scenarios: List[Dict[str, Any]],
+    start_date: date,
+    days: int,
+    admission_forecast: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Expected BOR/TOI per scenario, ward and day for `days` days from start_date
+
+    scenarios: dicts with name, admission_multiplier, discharge_multiplier and
+    wards {bangsal_id: {capacity_delta, admission_multiplier,
+    discharge_multiplier}}. A baseline (no changes) is always evaluated first.
+    admission_forecast maps ISO date -> forecast hospital admissions for
+    params.sensus_beds beds.
+    """
+    if not wards:
+        raise ValueError("Tidak ada bangsal untuk diproyeksikan")
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f"Horizon harus antara 1 dan {MAX_DAYS} hari")
+    scenarios = [{"name": BASELINE_NAME}] + [
+        scenario for scenario in scenarios if scenario.get("name") != BASELINE_NAME
+    ]
+    if len(scenarios) > MAX_SCENARIOS + 1:
+        raise ValueError(f"Maksimum {MAX_SCENARIOS} skenario per permintaan")
+
+    base_capacity, capacity, admission_multiplier, discharge_multiplier = _scenario_arrays(scenarios, wards)
+    share = base_capacity / base_capacity.sum() if base_capacity.sum() > 0 else np.full(len(wards), 1.0 / len(wards))
+    discharge_probability = np.minimum(params.discharge_probability * discharge_multiplier, 1.0)
+    hospital_capacity = capacity.sum(axis=1)
+    # Hospital forecast -> admissions of the projected wards (same per-bed rate)
+    forecast_scale = base_capacity.sum() / params.sensus_beds if params.sensus_beds > 0 else 1.0
+
+    census = np.tile(np.array([max(int(ward["tempat_tidur_terisi"] or 0), 0) for ward in wards], dtype=float),
+                     (len(scenarios), 1))
+    dates, admission_source = [], []
+    ward_bor, ward_toi, ward_overflow, hospital_bor, hospital_toi, hospital_census = [], [], [], [], [], []
+    for h in range(days):
+        day = start_date + timedelta(days=h)
+        dates.append(day.isoformat())
+        forecast = (admission_forecast or {}).get(day.isoformat())
+        if forecast is not None:
+            total_admissions = max(float(forecast), 0.0) * forecast_scale
+            admission_source.append("forecast")
+        else:
+            total_admissions = float(params.admission_rate[day.weekday()] * base_capacity.sum())
+            admission_source.append("weekday_rate")
+
+        present = census + total_admissions * share * admission_multiplier
+        discharges = present * discharge_probability
+        census = present - discharges
+
+        # Same definitions as IndikatorCalculator.hitung_indikator_harian
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bor = np.where(capacity > 0, census / capacity * 100, 0.0)
+            toi = np.where(discharges > 0, np.maximum(capacity - census, 0) / discharges, 0.0)
+            total_census, total_discharges = census.sum(axis=1), discharges.sum(axis=1)
+            hospital_bor.append(np.where(hospital_capacity > 0, total_census / hospital_capacity * 100, 0.0))
+            hospital_toi.append(np.where(
+                total_discharges > 0, np.maximum(hospital_capacity - total_census, 0) / total_discharges, 0.0
+            ))
+        ward_bor.append(bor)
+        ward_toi.append(toi)
+        ward_overflow.append(np.maximum(census - capacity, 0))
+        hospital_census.append(total_census)
+
+    # (n_scenarios, days[, n_wards])
+    ward_bor, ward_toi = np.stack(ward_bor, axis=1).round(1), np.stack(ward_toi, axis=1).round(1)
+    hospital_bor, hospital_toi = np.stack(hospital_bor, axis=1).round(1), np.stack(hospital_toi, axis=1).round(1)
+    hospital_census = np.stack(hospital_census, axis=1).round(1)
+    ward_overflow = np.stack(ward_overflow, axis=1)
+    hospital_overflow = ward_overflow.sum(axis=2).round(1)
+    ward_overflow = ward_overflow.round(1)
+    ward_bor_status = _statuses(ward_bor, MedicalStandards.evaluate_bor)
+    ward_toi_status = _statuses(ward_toi, MedicalStandards.evaluate_toi)
+    hospital_bor_status = _statuses(hospital_bor, MedicalStandards.evaluate_bor)
+    hospital_toi_status = _statuses(hospital_toi, MedicalStandards.evaluate_toi)
+
+    results = []
+    for s, scenario in enumerate(scenarios):
+        results.append({
+            "name": scenario["name"],
+            "hospital": {
+                "kapasitas_total": int(hospital_capacity[s]),
+                "census": hospital_census[s].tolist(),
+                "overflow": hospital_overflow[s].tolist(),
+                "bor": hospital_bor[s].tolist(),
+                "bor_status": hospital_bor_status[s].tolist(),
+                "toi": hospital_toi[s].tolist(),
+                "toi_status": hospital_toi_status[s].tolist()
+            },
+            "wards": [
+                {
+                    "bangsal_id": ward.get("id"),
+                    "nama_bangsal": ward.get("nama_bangsal"),
+                    "kapasitas_total": int(capacity[s, w]),
+                    "overflow": ward_overflow[s, :, w].tolist(),
+                    "bor": ward_bor[s, :, w].tolist(),
+                    "bor_status": ward_bor_status[s, :, w].tolist(),
+                    "toi": ward_toi[s, :, w].tolist(),
+                    "toi_status": ward_toi_status[s, :, w].tolist()
+                }
+                for w, ward in enumerate(wards)
+            ]
+        })
+
+    return {
+        "days": days,
+        "dates": dates,
+        "admission_source": admission_source,
+        "forecast_scale": round(float(forecast_scale), 4),
+        "parameters": params.to_dict(),
+        "scenarios": results
+    }
@@ -0,0 +1,216 @@
+"""
+Diagnostics Artifact - residual diagnostics computed once per model version
+
+Residual diagnostics used to be recomputed and returned as plain JSON lists
+(the full residual series, ACF/PACF) on every /sarima/diagnostics request, so
+response size and encoding time grew with the training history. Training now
+builds a DiagnosticsArtifact once with `build_diagnostics`:
+
+- residuals and their dates are kept as NumPy arrays (8 bytes per point);
+- summary statistics, Ljung-Box, ACF/PACF and a histogram are precomputed;
+- `save` / `load` persist it as a single .npz next to the forecast state.
+
+Serving reads the summary and a downsampled residual series by default, and
+the full array only on request, paged (`page`) or as raw .npy bytes
+(`to_npy_bytes`). Loading and serving need NumPy only; statsmodels is
+imported by `build_diagnostics` at training time.
+"""
+
+import io
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Version of the .npz layout written by DiagnosticsArtifact.save
+FORMAT_VERSION = 1
+
+ACF_LAGS = 40
+LJUNG_BOX_LAGS = 10
+HISTOGRAM_BINS = 20
+
+# Residual points returned by default (min/max per bucket keeps the spikes)
+DEFAULT_MAX_POINTS = 200
+MAX_PAGE_SIZE = 1000
+
+# Structured dtype of the binary residual download
+RESIDUAL_DTYPE = np.dtype([("tanggal", "datetime64[D]"), ("residual", "f8")])
+
+
+def build_diagnostics(fitted_model, series=None, metadata: Optional[Dict[str, Any]] = None) -> "DiagnosticsArtifact":
+    """
+    Compute all residual diagnostics of a fitted SARIMAX once
+
+    `series` is the training series; its ACF/PACF (model identification)
+    are stored alongside the residual ACF.
+    """
+    import pandas as pd
+    from statsmodels.stats.diagnostic import acorr_ljungbox
+    from statsmodels.tsa.stattools import acf, pacf
+
+    residuals = pd.Series(np.asarray(fitted_model.resid, dtype=float))
+    index = getattr(fitted_model.model, "_index", None)
+    if isinstance(index, pd.DatetimeIndex) and len(index) == len(residuals):
+        dates = index.values.astype("datetime64[D]")
+    else:
+        dates = np.full(len(residuals), np.datetime64("NaT"), dtype="datetime64[D]")
+
+    ljung_box = acorr_ljungbox(residuals, lags=LJUNG_BOX_LAGS, return_df=True)
+
+    # pacf needs nlags < nobs / 2
+    def lags_for(n: int) -> int:
+        return max(1, min(ACF_LAGS, n // 2 - 1))
+
+    arrays = {
+        "lb_stat": ljung_box["lb_stat"].to_numpy(dtype=float),
+        "lb_pvalue": ljung_box["lb_pvalue"].to_numpy(dtype=float),
+        "resid_acf": acf(residuals, nlags=lags_for(len(residuals)))
+    }
+    if series is not None:
+        values = pd.Series(series).dropna()
+        arrays["acf"] = acf(values, nlags=lags_for(len(values)))
+        arrays["pacf"] = pacf(values, nlags=lags_for(len(values)))
+
+    counts, edges = np.histogram(residuals.to_numpy(), bins=HISTOGRAM_BINS)
+    arrays["hist_counts"] = counts.astype(np.int64)
+    arrays["hist_edges"] = edges
+
+    std = float(residuals.std())
+    quantiles = np.quantile(residuals.to_numpy(), [0.05, 0.25, 0.5, 0.75, 0.95])
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "nobs": int(len(residuals)),
+        "residual_statistics": {
+            "mean": float(residuals.mean()),
+            "std": std,
+            "skewness": float(residuals.skew()),
+            "kurtosis": float(residuals.kurtosis()),
+            "min": float(residuals.min()),
+            "max": float(residuals.max()),
+            "quantiles": dict(zip(("p05", "p25", "p50", "p75", "p95"), quantiles.tolist())),
+            "outliers_3sigma": int((np.abs(residuals - residuals.mean()) > 3 * std).sum()) if std > 0 else 0
+        },
+        # Simplified check: no significant autocorrelation up to LJUNG_BOX_LAGS
+        "white_noise": bool((arrays["lb_pvalue"] > 0.05).all()),
+        **(metadata or {})
+    }
+    return DiagnosticsArtifact(dates, residuals.to_numpy(), arrays, meta)
+
+
+class DiagnosticsArtifact:
+    """Precomputed residual diagnostics of one model version"""
+
+    def __init__(self, dates: np.ndarray, residuals: np.ndarray, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.dates = dates
+        self.residuals = residuals
+        self.arrays = arrays
+        self.meta = meta
+        self._npy_bytes: Optional[bytes] = None
+
+    def save(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                dates=self.dates,
+                residuals=self.residuals,
+                meta=np.array(json.dumps(self.meta)),
+                **self.arrays
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "DiagnosticsArtifact":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported diagnostics format: {meta.get('format_version')}")
+            arrays = {name: data[name] for name in data.files if name not in ("dates", "residuals", "meta")}
+            return cls(data["dates"], data["residuals"], arrays, meta)
+
+    @property
+    def nobs(self) -> int:
+        return len(self.residuals)
+
+    def _dates_as_str(self, dates: np.ndarray) -> list:
+        return [None if np.isnat(d) else str(d) for d in dates]
+
+    def downsample(self, max_points: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+        """
+        Indices of at most max_points residuals: min and max of each bucket
+
+        Keeps the largest positive and negative residuals visible, which
+        plain striding would drop.
+        """
+        n = self.nobs
+        if max_points >= n:
+            return np.arange(n)
+        buckets = max(1, max_points // 2)
+        edges = np.linspace(0, n, buckets + 1).astype(int)
+        picked = []
+        for start, end in zip(edges[:-1], edges[1:]):
+            if end <= start:
+                continue
+            chunk = self.residuals[start:end]
+            picked.extend((start + int(np.argmin(chunk)), start + int(np.argmax(chunk))))
+        return np.unique(np.array(picked, dtype=int))
+
+    def summary(self, max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, Any]:
+        """Statistics, tests and a downsampled residual series (JSON-ready)"""
+        indices = self.downsample(max_points)
+        acf_block = {
+            name: self.arrays[name].tolist()
+            for name in ("acf", "pacf", "resid_acf") if name in self.arrays
+        }
+        return {
+            "ljung_box_test": {
+                "statistics": self.arrays["lb_stat"].tolist(),
+                "p_values": self.arrays["lb_pvalue"].tolist(),
+                "white_noise": self.meta["white_noise"]
+            },
+            "residual_statistics": self.meta["residual_statistics"],
+            "residual_histogram": {
+                "counts": self.arrays["hist_counts"].tolist(),
+                "edges": self.arrays["hist_edges"].tolist()
+            },
+            "autocorrelation": acf_block,
+            "residuals": {
+                "total_points": self.nobs,
+                "returned_points": int(len(indices)),
+                "downsampled": bool(len(indices) < self.nobs),
+                "dates": self._dates_as_str(self.dates[indices]),
+                "values": self.residuals[indices].tolist()
+            }
+        }
+
+    def page(self, offset: int = 0, limit: int = MAX_PAGE_SIZE) -> Dict[str, Any]:
+        """Full-resolution residuals [offset, offset + limit)"""
+        offset = max(0, offset)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        end = min(offset + limit, self.nobs)
+        return {
+            "total_points": self.nobs,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": end if end < self.nobs else None,
+            "dates": self._dates_as_str(self.dates[offset:end]),
+            "values": self.residuals[offset:end].tolist()
+        }
+
+    def to_npy_bytes(self) -> bytes:
+        """All residuals as a .npy structured array (tanggal, residual), built once"""
+        if self._npy_bytes is None:
+            records = np.empty(self.nobs, dtype=RESIDUAL_DTYPE)
+            records["tanggal"] = self.dates
+            records["residual"] = self.residuals
+            buffer = io.BytesIO()
+            np.save(buffer, records, allow_pickle=False)
+            self._npy_bytes = buffer.getvalue()
+        return self._npy_bytes
@@ -0,0 +1,110 @@
+"""
+Engine Selector - ETS or SARIMA per series, from data length, fit budget and backtest
+
+SARIMA only pays off on series long enough to identify it and only when it
+beats the cheap ETS engine (ml/ets_engine.py) by a margin. `select_engine`
+decides per series, cheapest checks first:
+
+1. fewer than MIN_SARIMA_POINTS days           -> ets ("short_series")
+2. ETS fit + holdout backtest (milliseconds)
+3. SARIMA fit time estimated from one likelihood evaluation; over the
+   fit budget                                  -> ets ("fit_budget")
+4. SARIMA fit + the same holdout backtest; SARIMA is chosen only if its
+   holdout MAE is at least SARIMA_MIN_GAIN better, else ets ("accuracy").
+
+The selection fits on the series without the holdout; the caller refits
+the chosen engine on the full series.
+"""
+
+import logging
+import os
+import time
+import warnings
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from ml.ets_engine import fit_ets
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("auto", "sarima", "ets")
+
+MIN_SARIMA_POINTS = 60
+HOLDOUT_DAYS = 14
+FIT_BUDGET_SECONDS = float(os.getenv("FORECAST_FIT_BUDGET_SECONDS", "30"))
+SARIMA_MIN_GAIN = 0.05
+
+# Optimizer iterations x (parameters + 1) likelihood evaluations (numerical gradient)
+EXPECTED_ITERATIONS = 50
+
+
+def _mae(forecast: np.ndarray, actual: np.ndarray) -> float:
+    mask = ~np.isnan(actual)
+    return float(np.abs(forecast[mask] - actual[mask]).mean()) if mask.any() else float("nan")
+
+
+def estimate_sarima_seconds(series, order: Sequence[int], seasonal_order: Sequence[int]) -> float:
+    """Approximate SARIMA MLE time: one timed log-likelihood evaluation scaled by the expected evaluations"""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = SARIMAX(series, order=tuple(order), seasonal_order=tuple(seasonal_order),
+                        enforce_stationarity=False, enforce_invertibility=False)
+        params = model.start_params
+        started = time.perf_counter()
+        model.loglike(params)
+        elapsed = time.perf_counter() - started
+    return elapsed * (len(params) + 1) * EXPECTED_ITERATIONS
+
+
+def select_engine(
+    series,
+    order: Sequence[int] = (1, 1, 1),
+    seasonal_order: Sequence[int] = (1, 1, 1, 7),
+    fit_budget_seconds: Optional[float] = None,
+    holdout: int = HOLDOUT_DAYS
+) -> Dict[str, Any]:
+    """
+    Choose "ets" or "sarima" for one daily series (pandas Series on a DatetimeIndex)
+
+    Returns the engine, the reason and the measurements behind it.
+    """
+    fit_budget_seconds = FIT_BUDGET_SECONDS if fit_budget_seconds is None else fit_budget_seconds
+    values = np.asarray(series, dtype=float)
+    n = int(np.count_nonzero(~np.isnan(values)))
+    decision: Dict[str, Any] = {"data_points": n, "fit_budget_seconds": fit_budget_seconds}
+
+    if n < MIN_SARIMA_POINTS:
+        return {**decision, "engine": "ets", "reason": "short_series"}
+
+    started = time.perf_counter()
+    ets_fit = fit_ets(values[:-holdout])
+    decision["ets_holdout_mae"] = round(_mae(ets_fit.forecast(holdout), values[-holdout:]), 4)
+    decision["ets_seconds"] = round(time.perf_counter() - started, 4)
+
+    estimate = estimate_sarima_seconds(series.iloc[:-holdout], order, seasonal_order)
+    decision["sarima_estimated_seconds"] = round(estimate, 2)
+    if estimate > fit_budget_seconds:
+        return {**decision, "engine": "ets", "reason": "fit_budget"}
+
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    from ml.fit_cache import cached_fit
+
+    started = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = SARIMAX(series.iloc[:-holdout], order=tuple(order), seasonal_order=tuple(seasonal_order),
+                            enforce_stationarity=False, enforce_invertibility=False)
+            sarima_forecast = np.asarray(cached_fit(model, disp=False, maxiter=100).forecast(holdout))
+    except Exception as e:
+        logger.warning(f"SARIMA backtest gagal, memakai ETS: {e}")
+        return {**decision, "engine": "ets", "reason": "sarima_failed"}
+    decision["sarima_seconds"] = round(time.perf_counter() - started, 2)
+    decision["sarima_holdout_mae"] = round(_mae(sarima_forecast, values[-holdout:]), 4)
+
+    if decision["sarima_holdout_mae"] < decision["ets_holdout_mae"] * (1 - SARIMA_MIN_GAIN):
+        return {**decision, "engine": "sarima", "reason": "accuracy"}
+    return {**decision, "engine": "ets", "reason": "accuracy"}
@@ -0,0 +1,405 @@
+"""
+Ensemble Forecaster - naive, MA(7), ARIMA and SARIMA combined with backtest weights
+
+The members are the ones models/baseline_models.py compares (BaselineModels):
+
+- naive: last observed value;
+- moving_avg: mean of the last MA_WINDOW days;
+- arima: non-seasonal ARIMA, order chosen once by AIC on the full series;
+- sarima: the order of the model currently served by /prediksi.
+
+`build_ensemble` runs a rolling-origin backtest (BACKTEST_FOLDS origins, one
+week apart, each forecasting `horizon` days) with every member in its own
+worker process, then learns the weights from the backtest forecasts:
+
+- inverse_mse: w_i proportional to 1 / MSE_i;
+- stacking: non-negative least squares of the actuals on the member
+  forecasts, normalized to sum to 1.
+
+The interval of the combined forecast comes from the backtest errors of the
+combined forecast per horizon step, so it reflects how the ensemble actually
+performed. Members are then refit on the full series and saved: ARIMA/SARIMA
+as forecast states (ml/forecast_engine.py), naive/MA as their last value in
+the ensemble metadata. Serving (`EnsembleForecaster`) needs NumPy only and
+caches forecasts per model version.
+
+Publishing: every build writes its member states and weights into a new
+directory under ENSEMBLE_DIR/versions/ and then switches the CURRENT pointer
+file to it with one atomic rename. Readers follow the pointer, so they see
+either the old or the new ensemble, never new member states with old weights;
+a failed build leaves the live ensemble untouched and removes its directory.
+The previous KEEP_VERSIONS builds are kept for workers still serving them.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import get_context
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MEMBERS = ("naive", "moving_avg", "arima", "sarima")
+WEIGHTING_METHODS = ("inverse_mse", "stacking")
+
+ENSEMBLE_DIR = os.getenv(
+    "ENSEMBLE_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "ensemble")
+)
+ENSEMBLE_FILE = "ensemble_state.npz"
+POINTER_FILE = "CURRENT"        # Name of the published version directory
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 3
+
+# Version of the .npz layout written by build_ensemble
+FORMAT_VERSION = 1
+
+MA_WINDOW = 7
+BACKTEST_FOLDS = 8
+BACKTEST_STEP = 7
+DEFAULT_HORIZON = 30
+MIN_TRAINING_POINTS = 60
+
+DEFAULT_SARIMA_ORDER = ((1, 1, 1), (1, 1, 1, 7))
+ARIMA_GRID = [(p, d, q) for p in range(3) for d in range(2) for q in range(3)]
+
+
+def state_path(member: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or ENSEMBLE_DIR, f"{member}_forecast_state.npz")
+
+
+def published_dir(directory: Optional[str] = None) -> Optional[str]:
+    """Version directory the CURRENT pointer refers to (None before the first build)"""
+    directory = directory or ENSEMBLE_DIR
+    try:
+        with open(os.path.join(directory, POINTER_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        # Layout before versioned publishing: everything in ENSEMBLE_DIR itself
+        return directory if os.path.exists(os.path.join(directory, ENSEMBLE_FILE)) else None
+    return os.path.join(directory, VERSIONS_DIR, name)
+
+
+def _publish(directory: str, version_dir: str):
+    """Point CURRENT at version_dir (atomic rename), then drop old versions"""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{POINTER_FILE}-")
+    with os.fdopen(fd, "w") as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(tmp_path, os.path.join(directory, POINTER_FILE))
+
+    versions_root = os.path.join(directory, VERSIONS_DIR)
+    builds = sorted(name for name in os.listdir(versions_root) if not name.startswith("."))
+    for name in builds[:-KEEP_VERSIONS]:
+        if name == os.path.basename(version_dir):
+            continue
+        shutil.rmtree(os.path.join(versions_root, name), ignore_errors=True)
+
+
+def _fit_member(member: str, series, spec: Dict[str, Any]):
+    """Fitted statsmodels results for arima/sarima on a training series"""
+    from ml.fit_cache import cached_fit
+
+    if member == "arima":
+        from statsmodels.tsa.arima.model import ARIMA
+        return cached_fit(ARIMA(series, order=tuple(spec["order"])))
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    return cached_fit(
+        SARIMAX(series, order=tuple(spec["order"]), seasonal_order=tuple(spec["seasonal_order"]),
+                enforce_stationarity=False, enforce_invertibility=False),
+        disp=False, maxiter=100
+    )
+
+
+def _select_arima_order(series) -> Tuple[int, int, int]:
+    import warnings
+
+    best_aic, best_order = np.inf, (1, 1, 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for order in ARIMA_GRID:
+            try:
+                fitted = _fit_member("arima", series, {"order": order})
+            except Exception:
+                continue
+            if np.isfinite(fitted.aic) and fitted.aic < best_aic:
+                best_aic, best_order = fitted.aic, order
+    return best_order
+
+
+def _backtest_member(
+    member: str,
+    series,
+    origins: List[int],
+    horizon: int,
+    spec: Dict[str, Any],
+    output_dir: str
+) -> Dict[str, Any]:
+    """
+    Forecasts of one member from every backtest origin, then the full-series fit
+
+    Runs in a worker process. Returns the (folds, horizon) forecast matrix
+    and what serving needs (spec, last value or exported state file).
+    """
+    import warnings
+
+    started = time.perf_counter()
+    values = np.asarray(series, dtype=float)
+    if member == "arima" and spec.get("order") is None:
+        spec = {"order": list(_select_arima_order(series))}
+
+    forecasts = np.empty((len(origins), horizon))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for i, origin in enumerate(origins):
+            if member == "naive":
+                forecasts[i] = values[origin - 1]
+            elif member == "moving_avg":
+                forecasts[i] = values[max(0, origin - MA_WINDOW):origin].mean()
+            else:
+                forecasts[i] = np.asarray(_fit_member(member, series.iloc[:origin], spec).forecast(horizon))
+
+        result = {"member": member, "forecasts": forecasts, "spec": spec}
+        if member == "naive":
+            result["level"] = float(values[-1])
+        elif member == "moving_avg":
+            result["level"] = float(values[-MA_WINDOW:].mean())
+        else:
+            from ml.forecast_engine import export_forecast_state
+            result["state_file"] = export_forecast_state(
+                _fit_member(member, series, spec), state_path(member, output_dir), metadata={"member": member, **spec}
+            )
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def _stacking_weights(forecasts: np.ndarray, actuals: np.ndarray) -> Optional[np.ndarray]:
+    """Non-negative least squares weights summing to 1 (None if degenerate)"""
+    from scipy.optimize import nnls
+
+    weights, _ = nnls(forecasts, actuals)
+    return weights / weights.sum() if weights.sum() > 0 else None
+
+
+def build_ensemble(
+    series,
+    sarima_order: Optional[Tuple[Sequence[int], Sequence[int]]] = None,
+    weighting: str = "inverse_mse",
+    horizon: int = DEFAULT_HORIZON,
+    folds: int = BACKTEST_FOLDS,
+    members: Sequence[str] = MEMBERS,
+    max_workers: Optional[int] = None,
+    output_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Backtest the members, learn weights and save the ensemble
+
+    series: daily BOR as a pandas Series on a DatetimeIndex. Returns the
+    ensemble metadata (weights, backtest errors, version).
+    """
+    if weighting not in WEIGHTING_METHODS:
+        raise ValueError(f"weighting harus salah satu dari {list(WEIGHTING_METHODS)}")
+    unknown = [member for member in members if member not in MEMBERS]
+    if unknown or not members:
+        raise ValueError(f"Member ensemble tidak dikenal {unknown}; pilihan: {list(MEMBERS)}")
+    members = [member for member in MEMBERS if member in members]
+
+    series = series.astype(float).dropna()
+    n = len(series)
+    origins = [n - horizon - k * BACKTEST_STEP for k in reversed(range(folds))]
+    origins = [origin for origin in origins if origin >= MIN_TRAINING_POINTS]
+    if len(origins) < 2:
+        raise ValueError(
+            f"Data tidak mencukupi untuk backtest: {n} hari (minimum {MIN_TRAINING_POINTS + horizon + BACKTEST_STEP})"
+        )
+
+    order, seasonal_order = sarima_order or DEFAULT_SARIMA_ORDER
+    specs = {
+        "naive": {},
+        "moving_avg": {"window": MA_WINDOW},
+        "arima": {"order": None},
+        "sarima": {"order": list(order), "seasonal_order": list(seasonal_order)}
+    }
+    output_dir = output_dir or ENSEMBLE_DIR
+    versions_root = os.path.join(output_dir, VERSIONS_DIR)
+    os.makedirs(versions_root, exist_ok=True)
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(members)))
+
+    started = time.perf_counter()
+    trained_at = datetime.now()
+    # Sortable, unique name; dot prefix until the build is complete
+    build_dir = tempfile.mkdtemp(dir=versions_root, prefix=f".{trained_at.strftime('%Y%m%dT%H%M%S%f')}-")
+    try:
+        meta = _build_version(
+            series, members, specs, origins, horizon, weighting, max_workers, build_dir, trained_at, started
+        )
+        version_dir = os.path.join(versions_root, os.path.basename(build_dir)[1:])
+        os.rename(build_dir, version_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    _publish(output_dir, version_dir)
+    return meta
+
+
+def _build_version(
+    series,
+    members: List[str],
+    specs: Dict[str, Dict[str, Any]],
+    origins: List[int],
+    horizon: int,
+    weighting: str,
+    max_workers: int,
+    build_dir: str,
+    trained_at: datetime,
+    started: float
+) -> Dict[str, Any]:
+    """Backtest, weights and every file of one ensemble version, written into build_dir"""
+    n = len(series)
+    results: Dict[str, Dict[str, Any]] = {}
+    if max_workers == 1:
+        for member in members:
+            results[member] = _backtest_member(member, series, origins, horizon, specs[member], build_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as executor:
+            futures = {
+                executor.submit(_backtest_member, member, series, origins, horizon, specs[member], build_dir): member
+                for member in members
+            }
+            for future in as_completed(futures):
+                member = futures[future]
+                try:
+                    results[member] = future.result()
+                except Exception as e:
+                    raise RuntimeError(f"Member ensemble {member} gagal: {e}") from e
+
+    values = series.to_numpy()
+    actuals = np.stack([values[origin:origin + horizon] for origin in origins])            # (folds, horizon)
+    forecasts = np.stack([results[member]["forecasts"] for member in members], axis=-1)    # (folds, horizon, members)
+    mse = ((forecasts - actuals[..., None]) ** 2).mean(axis=(0, 1))
+
+    weights = None
+    if weighting == "stacking":
+        weights = _stacking_weights(forecasts.reshape(-1, len(members)), actuals.ravel())
+        if weights is None:
+            logger.warning("Stacking menghasilkan bobot nol, memakai inverse-MSE")
+            weighting = "inverse_mse"
+    if weights is None:
+        inverse = 1.0 / np.maximum(mse, 1e-12)
+        weights = inverse / inverse.sum()
+
+    combined_errors = forecasts @ weights - actuals
+    # Error spread per horizon step, non-decreasing with the horizon
+    sigma = np.maximum.accumulate(np.sqrt((combined_errors ** 2).mean(axis=0)))
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "version": f"ensemble@{trained_at.isoformat(timespec='seconds')}",
+        "trained_at": trained_at.isoformat(),
+        "weighting": weighting,
+        "members": members,
+        "weights": dict(zip(members, np.round(weights, 6).tolist())),
+        "specs": {member: results[member]["spec"] for member in members},
+        "levels": {member: results[member]["level"] for member in members if "level" in results[member]},
+        "last_date": str(series.index[-1].date()),
+        "training_points": n,
+        "backtest": {
+            "folds": len(origins),
+            "horizon": horizon,
+            "member_rmse": dict(zip(members, np.sqrt(mse).round(4).tolist())),
+            "ensemble_rmse": round(float(np.sqrt((combined_errors ** 2).mean())), 4),
+            "ensemble_mae": round(float(np.abs(combined_errors).mean()), 4),
+            "ensemble_mape": round(float(
+                np.mean(np.abs(combined_errors[actuals != 0] / actuals[actuals != 0])) * 100
+            ), 4),
+            "member_seconds": {member: results[member]["seconds"] for member in members}
+        },
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+    with open(os.path.join(build_dir, ENSEMBLE_FILE), "wb") as f:
+        np.savez(f, weights=weights, sigma=sigma, meta=np.array(json.dumps(meta)))
+    return meta
+
+
+class EnsembleForecaster:
+    """Weighted combination of the saved member forecasts"""
+
+    def __init__(self, weights: np.ndarray, sigma: np.ndarray, meta: Dict[str, Any], directory: str):
+        from ml.forecast_engine import ForecastEngine
+
+        self.weights = weights
+        self.sigma = sigma
+        self.meta = meta
+        self.engines = {
+            member: ForecastEngine.load(state_path(member, directory), shared=True)
+            for member in meta["members"] if member not in meta["levels"]
+        }
+        self._forecasts = lru_cache(maxsize=64)(self._forecast_uncached)
+
+    @classmethod
+    def load(cls, directory: Optional[str] = None) -> "EnsembleForecaster":
+        """The published ensemble, cached per version directory (path + modification time)"""
+        version_dir = published_dir(directory)
+        path = os.path.join(version_dir, ENSEMBLE_FILE) if version_dir else None
+        if path is None or not os.path.exists(path):
+            raise FileNotFoundError("Model ensemble belum dilatih. Jalankan /prediksi/ensemble/train")
+        return _load_cached(os.path.abspath(path), os.path.getmtime(path))
+
+    @property
+    def version(self) -> str:
+        return self.meta["version"]
+
+    def _member_forecast(self, member: str, steps: int) -> np.ndarray:
+        if member in self.meta["levels"]:
+            return np.full(steps, self.meta["levels"][member])
+        return self.engines[member].forecast(steps)
+
+    def _forecast_uncached(self, steps: int, alpha: float) -> Dict[str, Any]:
+        members = self.meta["members"]
+        with ThreadPoolExecutor(max_workers=len(members)) as executor:
+            member_forecasts = dict(zip(members, executor.map(lambda m: self._member_forecast(m, steps), members)))
+
+        mean = np.stack([member_forecasts[member] for member in members], axis=-1) @ self.weights
+        # Beyond the backtest horizon the spread grows like a random walk
+        horizon = len(self.sigma)
+        steps_ahead = np.arange(1, steps + 1)
+        sigma = np.where(
+            steps_ahead <= horizon,
+            self.sigma[np.minimum(steps_ahead, horizon) - 1],
+            self.sigma[-1] * np.sqrt(steps_ahead / horizon)
+        )
+        half_width = NormalDist().inv_cdf(1 - alpha / 2) * sigma
+        result = {
+            "mean": mean,
+            "variance": sigma ** 2,
+            "lower": mean - half_width,
+            "upper": mean + half_width,
+            "members": member_forecasts
+        }
+        for array in (mean, sigma, result["lower"], result["upper"], *member_forecasts.values()):
+            array.setflags(write=False)
+        return result
+
+    def forecast_with_intervals(self, steps: int = 7, alpha: float = 0.05) -> Dict[str, Any]:
+        """Combined forecast with (1 - alpha) intervals; cached per (steps, alpha)"""
+        if steps < 1:
+            raise ValueError("steps must be >= 1")
+        return self._forecasts(int(steps), round(float(alpha), 6))
+
+
+@lru_cache(maxsize=4)
+def _load_cached(path: str, mtime: float) -> EnsembleForecaster:
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported ensemble format: {meta.get('format_version')}")
+        return EnsembleForecaster(data["weights"], data["sigma"], meta, os.path.dirname(path))
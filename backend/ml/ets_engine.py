@@ -0,0 +1,248 @@
+"""
+ETS Engine - additive Holt-Winters (damped trend, weekly season) in pure NumPy
+
+SARIMA needs a few seconds per fit, does not always converge on short
+series and ml/train.py gives up below 30 days. ETS(A,Ad,A) is the cheap
+alternative:
+
+    y_t = l_{t-1} + phi b_{t-1} + s_{t-m} + e_t
+    l_t = l_{t-1} + phi b_{t-1} + alpha e_t
+    b_t = phi b_{t-1} + beta e_t
+    s_t = s_{t-m} + gamma e_t
+
+`fit_ets` evaluates a grid of (alpha, beta, gamma, phi) for all candidates
+at once, one pass over the series with (candidates,) arrays, then refines
+around the best; a year of daily data fits in a few milliseconds. Series
+shorter than two seasons are fitted without the seasonal component.
+
+ETS is a linear state-space model, so `export_ets_state` writes the same
+.npz layout as export_forecast_state and the forecast is served by
+ForecastEngine unchanged (intervals included): the innovation enters as
+observation noise sigma^2 and state noise sigma^2 g g', which gives the
+ETS forecast variance sigma^2 (1 + sum c_j^2).
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ml.forecast_engine import FORMAT_VERSION
+
+SEASON_LENGTH = 7
+MIN_POINTS = 7
+
+ALPHA_GRID = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+BETA_GRID = (0.0, 0.01, 0.05, 0.1, 0.2)
+GAMMA_GRID = (0.0, 0.05, 0.1, 0.2, 0.4)
+PHI_GRID = (0.9, 0.98)
+
+
+@dataclass
+class ETSFit:
+    """Fitted ETS(A,Ad,A): smoothing parameters and the state after the last observation"""
+    alpha: float
+    beta: float
+    gamma: float
+    phi: float
+    season_length: int          # 0 = no seasonal component
+    state: np.ndarray           # [level, trend, s_t, s_{t-1}, ..., s_{t-m+1}]
+    sigma2: float
+    sse: float
+    nobs: int
+    aic: float
+    fitted_values: Optional[np.ndarray] = None   # in-sample one-step forecasts
+
+    @property
+    def order_label(self) -> str:
+        return f"ETS(A,Ad,{'A' if self.season_length else 'N'})"
+
+    def system_matrices(self) -> Dict[str, np.ndarray]:
+        """design w, transition F and innovation gain g of the state-space form"""
+        m = self.season_length
+        k = 2 + m
+        design = np.zeros((1, k))
+        design[0, :2] = (1.0, self.phi)
+        transition = np.zeros((k, k))
+        transition[0, :2] = (1.0, self.phi)
+        transition[1, 1] = self.phi
+        gain = np.zeros(k)
+        gain[:2] = (self.alpha, self.beta)
+        if m:
+            design[0, k - 1] = 1.0
+            transition[2, k - 1] = 1.0
+            for i in range(1, m):
+                transition[2 + i, 1 + i] = 1.0
+            gain[2] = self.gamma
+        return {"design": design, "transition": transition, "gain": gain}
+
+    def forecast(self, steps: int) -> np.ndarray:
+        """Point forecasts (the same recursion ForecastEngine runs)"""
+        matrices = self.system_matrices()
+        state, forecasts = self.state.copy(), np.empty(steps)
+        for h in range(steps):
+            forecasts[h] = (matrices["design"] @ state)[0]
+            state = matrices["transition"] @ state
+        return forecasts
+
+
+def _initial_state(values: np.ndarray, m: int):
+    """Classical decomposition of the first seasons: level, trend, seasonal by position"""
+    if not m:
+        half = max(len(values) // 2, 1)
+        level = np.nanmean(values[:half])
+        trend = (np.nanmean(values[half:]) - level) / half if len(values) > 1 else 0.0
+        return level, trend, np.zeros(0)
+    first, second = values[:m], values[m:2 * m]
+    level = first.mean()
+    trend = (second.mean() - first.mean()) / m
+    return level, trend, first - level
+
+
+def _run_grid(values: np.ndarray, m: int, alpha, beta, gamma, phi, fitted: Optional[np.ndarray] = None):
+    """
+    SSE and final state of every candidate (arrays of shape (candidates,))
+
+    fitted, if given, receives the one-step forecasts of a single candidate.
+    """
+    level0, trend0, seasonal0 = _initial_state(values, m)
+    candidates = len(alpha)
+    level = np.full(candidates, level0)
+    trend = np.full(candidates, trend0)
+    # Circular buffer: column t % m holds s_{t-m} while y_t is processed
+    seasonal = np.tile(seasonal0, (candidates, 1)) if m else None
+    sse = np.zeros(candidates)
+
+    for t, y in enumerate(values):
+        damped = phi * trend
+        forecast = level + damped + (seasonal[:, t % m] if m else 0.0)
+        if fitted is not None:
+            fitted[t] = forecast[0]
+        if np.isnan(y):
+            error = np.zeros(candidates)
+        else:
+            error = y - forecast
+            sse += error * error
+        level = level + damped + alpha * error
+        trend = damped + beta * error
+        if m:
+            seasonal[:, t % m] += gamma * error
+    return sse, level, trend, seasonal
+
+
+def fit_ets(values, season_length: int = SEASON_LENGTH) -> ETSFit:
+    """
+    Fit ETS(A,Ad,A) by grid search on the one-step SSE
+
+    NaN observations are skipped (the state is propagated without update).
+    """
+    values = np.asarray(values, dtype=float)
+    n_valid = int(np.count_nonzero(~np.isnan(values)))
+    if n_valid < MIN_POINTS:
+        raise ValueError(f"Minimum {MIN_POINTS} data points diperlukan untuk ETS, tersedia {n_valid}")
+    m = season_length if len(values) >= 2 * season_length and season_length > 1 else 0
+    head = max(2 * m, 1)
+    if np.isnan(values[:head]).any():
+        # Initial decomposition needs complete first seasons
+        values = values.copy()
+        values[:head] = np.where(np.isnan(values[:head]), np.nanmean(values), values[:head])
+
+    grid = np.array([
+        (a, b, g, p) for a, b, g, p in product(ALPHA_GRID, BETA_GRID, GAMMA_GRID if m else (0.0,), PHI_GRID)
+        if a + g <= 1.0
+    ])
+    sse = _run_grid(values, m, *grid.T)[0]
+    best = grid[np.nanargmin(sse)]
+
+    # Refine around the best candidate
+    refine = np.array([
+        (a, b, g, best[3])
+        for a in np.clip(best[0] * np.array([0.7, 1.0, 1.3]), 0.01, 0.99)
+        for b in np.clip(best[1] * np.array([0.5, 1.0, 1.5]), 0.0, 0.5)
+        for g in (np.clip(best[2] * np.array([0.5, 1.0, 1.5]), 0.0, 0.9) if m else (0.0,))
+        if a + g <= 1.0
+    ])
+    sse, level, trend, seasonal = _run_grid(values, m, *refine.T)
+    i = int(np.nanargmin(sse))
+    alpha, beta, gamma, phi = refine[i]
+
+    n = len(values)
+    fitted = np.empty(n)
+    _run_grid(values, m, *refine[i:i + 1].T, fitted=fitted)
+    seasonal_state = seasonal[i, [(n - k) % m for k in range(1, m + 1)]] if m else np.zeros(0)
+    n_params = 4 + 2 + m
+    sigma2 = float(sse[i] / max(n_valid - n_params, 1))
+    return ETSFit(
+        alpha=float(alpha),
+        beta=float(beta),
+        gamma=float(gamma),
+        phi=float(phi),
+        season_length=m,
+        state=np.concatenate([[level[i], trend[i]], seasonal_state]),
+        sigma2=sigma2,
+        sse=float(sse[i]),
+        nobs=n_valid,
+        aic=float(n_valid * np.log(max(sse[i], 1e-12) / n_valid) + 2 * n_params),
+        fitted_values=fitted
+    )
+
+
+def export_ets_state(
+    fit: ETSFit,
+    path: str,
+    last_date: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> str:
+    """Persist an ETS fit in the ForecastEngine .npz layout"""
+    matrices = fit.system_matrices()
+    k = len(fit.state)
+    gain = matrices["gain"]
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "engine": "ets",
+        "order": [],
+        "seasonal_order": [],
+        "ets": {
+            "model": fit.order_label,
+            "alpha": fit.alpha,
+            "beta": fit.beta,
+            "gamma": fit.gamma,
+            "phi": fit.phi,
+            "season_length": fit.season_length,
+            "sigma2": fit.sigma2,
+            "aic": fit.aic
+        },
+        "nobs": fit.nobs,
+        "last_date": last_date,
+        "exog_names": [],
+        **(metadata or {})
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write then rename so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            params=np.array([fit.alpha, fit.beta, fit.gamma, fit.phi, fit.sigma2]),
+            exog_params=np.zeros(0),
+            predicted_state=fit.state,
+            predicted_state_cov=np.zeros((k, k)),
+            design=matrices["design"],
+            obs_intercept=np.zeros(1),
+            obs_cov=np.array([[fit.sigma2]]),
+            transition=matrices["transition"],
+            state_intercept=np.zeros(k),
+            selection=np.eye(k),
+            state_cov=fit.sigma2 * np.outer(gain, gain),
+            meta=np.array(json.dumps(meta))
+        )
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,222 @@
+"""
+SARIMAX Fit Cache - content-addressed memoization of fitted models on disk
+
+Training, model comparison and figure scripts refit the same SARIMA/ARIMA
+models on the same data over and over. `cached_fit(model, **fit_kwargs)` is a
+drop-in replacement for `model.fit(**fit_kwargs)`:
+
+- the key is a sha256 of the input series (values, exog and date index), the
+  model class and all its init arguments, the fit options and the
+  statsmodels version;
+- an entry is a small JSON file with the fitted parameters, the optimizer
+  return values and summary stats (AIC, BIC, log-likelihood);
+- on a hit the results object is rebuilt with `model.smooth(params)`, a
+  single Kalman pass instead of the full MLE, so forecasts, residuals and
+  summaries are the same as from the original fit;
+- the cache directory is trimmed to FIT_CACHE_MAX_BYTES by evicting the
+  least recently used entries.
+
+The cache is shared by the API (ml/), the research tools (models/) and the
+figure scripts (docs/). Set SARIMA_FIT_CACHE=0 to bypass it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FIT_CACHE_DIR = os.getenv(
+    "SARIMA_FIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sensus_rs", "sarima_fits")
+)
+FIT_CACHE_MAX_BYTES = int(float(os.getenv("SARIMA_FIT_CACHE_MAX_MB", "32")) * 1024 * 1024)
+FIT_CACHE_ENABLED = os.getenv("SARIMA_FIT_CACHE", "1").lower() not in ("0", "false", "no")
+
+# Bump when the key or entry layout changes
+CACHE_FORMAT_VERSION = 1
+
+_lock = threading.Lock()
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+def _array_digest(hasher, array) -> None:
+    array = np.ascontiguousarray(np.asarray(array, dtype=float))
+    hasher.update(str(array.shape).encode())
+    hasher.update(array.tobytes())
+
+
+def fit_key(model, fit_kwargs: Dict[str, Any]) -> str:
+    """sha256 of the data, model specification, fit options and statsmodels version"""
+    import statsmodels
+
+    hasher = hashlib.sha256()
+    _array_digest(hasher, model.data.endog)
+    if model.data.exog is not None:
+        _array_digest(hasher, model.data.exog)
+
+    index = getattr(model, "_index", None)
+    if index is not None:
+        hasher.update(np.asarray(index.astype("int64") if hasattr(index, "asi8") else index).tobytes())
+        hasher.update(str(getattr(index, "freqstr", None)).encode())
+
+    spec = {
+        "format": CACHE_FORMAT_VERSION,
+        "statsmodels": statsmodels.__version__,
+        "model": f"{type(model).__module__}.{type(model).__name__}",
+        "init": model._get_init_kwds(),
+        "fit": fit_kwargs
+    }
+    hasher.update(json.dumps(spec, sort_keys=True, default=_json_default).encode())
+    return hasher.hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(FIT_CACHE_DIR, f"{key}.json")
+
+
+def _read_entry(key: str) -> Optional[Dict[str, Any]]:
+    path = _entry_path(key)
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Mark as recently used for LRU eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry
+
+
+def _write_entry(key: str, entry: Dict[str, Any]) -> None:
+    os.makedirs(FIT_CACHE_DIR, exist_ok=True)
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f, default=_json_default)
+    os.replace(tmp_path, path)
+    _evict()
+
+
+def _evict() -> None:
+    """Remove least recently used entries until the cache fits FIT_CACHE_MAX_BYTES"""
+    entries = []
+    for name in os.listdir(FIT_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(FIT_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= FIT_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _restore_results(model, entry: Dict[str, Any], fit_kwargs: Dict[str, Any]):
+    smooth_kwargs = {name: fit_kwargs[name] for name in ("cov_type", "cov_kwds") if name in fit_kwargs}
+    results = model.smooth(np.asarray(entry["params"], dtype=float), **smooth_kwargs)
+    # Code that checks mle_retvals['converged'] behaves as after a real fit
+    results.mle_retvals = entry.get("mle_retvals")
+    results.mle_settings = entry.get("mle_settings")
+    return results
+
+
+def _summarize(results) -> Dict[str, Any]:
+    retvals = results.mle_retvals or {}
+    return {
+        "format": CACHE_FORMAT_VERSION,
+        "params": np.asarray(results.params, dtype=float).tolist(),
+        "param_names": list(results.model.param_names),
+        "mle_retvals": {
+            name: value for name, value in retvals.items()
+            if name in ("converged", "iterations", "fopt", "warnflag", "fcalls")
+        },
+        "mle_settings": {
+            name: value for name, value in (results.mle_settings or {}).items()
+            if name in ("optimizer", "start_params", "maxiter", "disp")
+        },
+        "stats": {
+            "aic": float(results.aic),
+            "bic": float(results.bic),
+            "llf": float(results.llf),
+            "nobs": int(results.nobs)
+        }
+    }
+
+
+def cached_fit(model, **fit_kwargs):
+    """
+    model.fit(**fit_kwargs), reusing the fitted parameters of an identical earlier fit
+
+    Works for statsmodels state-space models (SARIMAX, ARIMA). Cache errors
+    never fail the fit; they only fall back to a normal fit.
+    """
+    if not FIT_CACHE_ENABLED:
+        return model.fit(**fit_kwargs)
+
+    try:
+        key = fit_key(model, fit_kwargs)
+    except Exception as e:
+        logger.debug(f"Fit cache key failed, fitting without cache: {e}")
+        return model.fit(**fit_kwargs)
+
+    with _lock:
+        entry = _read_entry(key)
+    if entry is not None and entry.get("format") == CACHE_FORMAT_VERSION:
+        try:
+            return _restore_results(model, entry, fit_kwargs)
+        except Exception as e:
+            logger.debug(f"Fit cache entry {key[:12]} unusable, refitting: {e}")
+
+    results = model.fit(**fit_kwargs)
+    try:
+        with _lock:
+            _write_entry(key, _summarize(results))
+    except Exception as e:
+        logger.debug(f"Fit cache write failed: {e}")
+    return results
+
+
+def cache_info() -> Dict[str, Any]:
+    """Number and total size of cached fits"""
+    if not os.path.isdir(FIT_CACHE_DIR):
+        return {"directory": FIT_CACHE_DIR, "entries": 0, "bytes": 0, "max_bytes": FIT_CACHE_MAX_BYTES}
+    sizes = [
+        os.path.getsize(os.path.join(FIT_CACHE_DIR, name))
+        for name in os.listdir(FIT_CACHE_DIR) if name.endswith(".json")
+    ]
+    return {"directory": FIT_CACHE_DIR, "entries": len(sizes), "bytes": sum(sizes), "max_bytes": FIT_CACHE_MAX_BYTES}
+
+
+def clear_cache() -> int:
+    """Remove all cached fits; returns the number removed"""
+    removed = 0
+    if os.path.isdir(FIT_CACHE_DIR):
+        for name in os.listdir(FIT_CACHE_DIR):
+            if name.endswith(".json"):
+                os.remove(os.path.join(FIT_CACHE_DIR, name))
+                removed += 1
+    return removed
@@ -0,0 +1,202 @@
+"""
+Forecast Engine - SARIMA forecasting in pure NumPy
+
+Serving only needs h-step forecasts from an already-fitted model. A fitted
+SARIMAX is a linear Gaussian state-space model, so forecasting is just the
+Kalman prediction recursion started from the final predicted state:
+
+    y_hat[h] = Z a_h + d_h          Var(y[h]) = Z P_h Z' + H
+    a_{h+1}  = T a_h + c            P_{h+1}   = T P_h T' + R Q R'
+
+Training exports the system matrices, parameter vector and final predicted
+state (a, P) to a .npz file with `export_forecast_state`. API workers load it
+with `ForecastEngine.load` and never import statsmodels, matplotlib or
+seaborn. Results match `get_forecast` / `conf_int` of statsmodels to
+floating-point tolerance.
+"""
+
+import json
+import os
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Version of the .npz layout written by export_forecast_state
+FORMAT_VERSION = 1
+
+_MATRICES = ("design", "obs_intercept", "obs_cov", "transition", "state_intercept", "selection", "state_cov")
+
+
+def export_forecast_state(fitted_model, path: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Persist what ForecastEngine needs from a fitted statsmodels SARIMAX
+
+    Works only with attributes of the results object, so it does not import
+    statsmodels itself. Exogenous regressors are supported through their
+    coefficients (future exog values are supplied at forecast time).
+    """
+    filter_results = fitted_model.filter_results
+    model = fitted_model.model
+
+    arrays = {}
+    for name in _MATRICES:
+        matrix = np.asarray(getattr(filter_results, name))
+        # Time-invariant matrices carry a trailing time axis of length 1
+        if matrix.shape[-1] != 1 and name != "obs_intercept":
+            raise ValueError(f"Time-varying '{name}' is not supported by ForecastEngine")
+        arrays[name] = matrix[..., -1].copy()
+
+    k_exog = int(getattr(model, "k_exog", 0) or 0)
+    exog_params = np.zeros(k_exog)
+    if k_exog:
+        if getattr(model, "state_regression", False):
+            raise ValueError("State-space regression is not supported by ForecastEngine")
+        exog_params = np.asarray(fitted_model.params)[model.k_trend:model.k_trend + k_exog]
+        # Regression effect is added back per forecast step
+        arrays["obs_intercept"] = np.zeros_like(arrays["obs_intercept"])
+
+    index = getattr(model, "_index", None)
+    last_date = str(index[-1].date()) if index is not None and hasattr(index[-1], "date") else None
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "order": list(getattr(model, "order", ())),
+        "seasonal_order": list(getattr(model, "seasonal_order", ())),
+        "nobs": int(fitted_model.nobs),
+        "last_date": last_date,
+        "exog_names": list(getattr(model, "exog_names", None) or []),
+        **(metadata or {})
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write then rename so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            params=np.asarray(fitted_model.params, dtype=float),
+            exog_params=exog_params,
+            predicted_state=np.asarray(filter_results.predicted_state[:, -1]),
+            predicted_state_cov=np.asarray(filter_results.predicted_state_cov[:, :, -1]),
+            meta=np.array(json.dumps(meta)),
+            **arrays
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read_state(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files if name != "meta"}
+        meta = json.loads(str(data["meta"]))
+    return arrays, meta
+
+
+class ForecastEngine:
+    """Kalman forecast recursion for a persisted SARIMA state"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.meta = meta
+        self.params = arrays["params"]
+        self.exog_params = arrays["exog_params"]
+        self.state = arrays["predicted_state"]
+        self.state_cov = arrays["predicted_state_cov"]
+
+        self.design = arrays["design"]
+        self.obs_intercept = arrays["obs_intercept"]
+        self.obs_cov = arrays["obs_cov"]
+        self.transition = arrays["transition"]
+        self.state_intercept = arrays["state_intercept"]
+        # R Q R' is constant over the horizon
+        selection = arrays["selection"]
+        self.state_noise_cov = selection @ arrays["state_cov"] @ selection.T
+
+    @classmethod
+    def load(cls, path: str, shared: bool = False) -> "ForecastEngine":
+        """
+        Load a persisted forecast state
+
+        shared=True maps the arrays from the cross-worker cache
+        (ml/shared_cache.py) instead of giving each process its own copy.
+        """
+        if shared:
+            from ml.shared_cache import shared_arrays
+            arrays, meta = shared_arrays("forecast_state", path, lambda: _read_state(path))
+        else:
+            arrays, meta = _read_state(path)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported forecast state format: {meta.get('format_version')}")
+        return cls(arrays, meta)
+
+    @property
+    def order(self) -> Tuple[int, ...]:
+        return tuple(self.meta.get("order", ()))
+
+    @property
+    def seasonal_order(self) -> Tuple[int, ...]:
+        return tuple(self.meta.get("seasonal_order", ()))
+
+    @property
+    def k_exog(self) -> int:
+        return len(self.exog_params)
+
+    def calendar_exog(self, steps: int) -> Optional[np.ndarray]:
+        """
+        Future exog for models trained on calendar features (ml/calendar_features.py)
+
+        The spec is stored in the metadata as "calendar_features"; rows start
+        the day after the last training date.
+        """
+        spec = self.meta.get("calendar_features")
+        last_date = self.meta.get("last_date")
+        if not spec or not last_date:
+            return None
+        from ml.calendar_features import calendar_matrix
+        return calendar_matrix(np.datetime64(last_date, "D") + 1, steps, spec)
+
+    def _run(self, steps: int, exog: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        if steps < 1:
+            raise ValueError("steps must be >= 1")
+
+        regression = np.zeros(steps)
+        if self.k_exog:
+            if exog is None:
+                exog = self.calendar_exog(steps)
+            if exog is None:
+                raise ValueError(f"Model needs {self.k_exog} exogenous values per forecast step")
+            exog = np.asarray(exog, dtype=float).reshape(steps, self.k_exog)
+            regression = exog @ self.exog_params
+
+        mean = np.empty(steps)
+        variance = np.empty(steps)
+        a = self.state
+        P = self.state_cov
+        Z, T = self.design, self.transition
+        for h in range(steps):
+            mean[h] = (Z @ a + self.obs_intercept)[0] + regression[h]
+            variance[h] = (Z @ P @ Z.T + self.obs_cov)[0, 0]
+            a = T @ a + self.state_intercept
+            P = T @ P @ T.T + self.state_noise_cov
+        return mean, variance
+
+    def forecast(self, steps: int = 7, exog: Optional[np.ndarray] = None) -> np.ndarray:
+        """Point forecasts for the next `steps` periods"""
+        return self._run(steps, exog)[0]
+
+    def forecast_with_intervals(
+        self, steps: int = 7, alpha: float = 0.05, exog: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """Point forecasts with (1 - alpha) normal prediction intervals"""
+        mean, variance = self._run(steps, exog)
+        z = NormalDist().inv_cdf(1 - alpha / 2)
+        half_width = z * np.sqrt(np.maximum(variance, 0.0))
+        return {
+            "mean": mean,
+            "variance": variance,
+            "lower": mean - half_width,
+            "upper": mean + half_width
+        }
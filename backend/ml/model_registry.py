@@ -0,0 +1,117 @@
+"""
+Model Registry - immutable SARIMA model snapshots for serving
+
+Training builds a complete, private SARIMAPredictor off to the side and then
+publishes it as a ModelSnapshot with a single reference assignment. Serving
+code reads `model_registry.current()` once per request and uses only that
+snapshot, so it never waits for training and never sees a half-trained model.
+Previous snapshots are kept for instant rollback.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Mapping, Optional
+
+if TYPE_CHECKING:
+    # Only for annotations: importing it pulls in statsmodels
+    from ml.diagnostics_artifact import DiagnosticsArtifact
+    from ml.sarima_model import SARIMAPredictor
+
+# Number of previous snapshots kept for rollback
+SNAPSHOT_HISTORY = 3
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """
+    One trained SARIMA model, never mutated after publish
+
+    The wrapped predictor is owned by the snapshot; nothing else holds a
+    reference that could retrain it in place.
+    """
+    version: int
+    predictor: "SARIMAPredictor" = field(repr=False)
+    order: tuple
+    seasonal_order: tuple
+    performance_metrics: Mapping[str, Any]
+    diagnostics: Mapping[str, Any] = field(repr=False)
+    training_info: Mapping[str, Any]
+    trained_at: datetime
+    # Residual diagnostics precomputed at training time (ml/diagnostics_artifact.py)
+    diagnostics_artifact: Optional["DiagnosticsArtifact"] = field(default=None, repr=False)
+
+    @property
+    def fitted_model(self):
+        return self.predictor.fitted_model
+
+    def predict(self, steps: int = 7, return_conf_int: bool = True) -> Dict[str, Any]:
+        return self.predictor.predict(steps=steps, return_conf_int=return_conf_int)
+
+    def get_model_summary(self) -> Dict[str, Any]:
+        return self.predictor.get_model_summary()
+
+    def to_status(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "trained_at": self.trained_at.isoformat(),
+            "order": self.order,
+            "seasonal_order": self.seasonal_order,
+            "mape": self.performance_metrics.get('mape')
+        }
+
+
+class ModelRegistry:
+    """Holds the current snapshot and a short history for rollback"""
+
+    def __init__(self, history: int = SNAPSHOT_HISTORY):
+        # Writers (publish/rollback) serialize on this lock; readers never take it
+        self._write_lock = threading.Lock()
+        self._current: Optional[ModelSnapshot] = None
+        self._previous: Deque[ModelSnapshot] = deque(maxlen=history)
+        self._version = 0
+
+    def current(self) -> Optional[ModelSnapshot]:
+        """Snapshot currently served (a single atomic reference read)"""
+        return self._current
+
+    def publish(self, predictor: "SARIMAPredictor", training_info: Optional[Dict[str, Any]] = None) -> ModelSnapshot:
+        """Freeze a freshly trained predictor and swap it in as current"""
+        if predictor.fitted_model is None:
+            raise ValueError("Model has not been fitted yet")
+
+        with self._write_lock:
+            self._version += 1
+            snapshot = ModelSnapshot(
+                version=self._version,
+                predictor=predictor,
+                order=tuple(predictor.order),
+                seasonal_order=tuple(predictor.seasonal_order),
+                performance_metrics=MappingProxyType(dict(predictor.performance_metrics)),
+                diagnostics=MappingProxyType(dict(predictor.diagnostics)),
+                training_info=MappingProxyType(dict(training_info or {})),
+                trained_at=datetime.now(),
+                diagnostics_artifact=predictor.diagnostics_artifact
+            )
+            if self._current is not None:
+                self._previous.append(self._current)
+            self._current = snapshot
+        return snapshot
+
+    def rollback(self) -> ModelSnapshot:
+        """Restore the previous snapshot as current"""
+        with self._write_lock:
+            if not self._previous:
+                raise ValueError("Tidak ada snapshot model sebelumnya untuk rollback")
+            self._current = self._previous.pop()
+            return self._current
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Previous snapshots available for rollback, newest first"""
+        return [snapshot.to_status() for snapshot in reversed(list(self._previous))]
+
+
+# Singleton instance for global use
+model_registry = ModelRegistry()
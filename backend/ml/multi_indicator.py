@@ -0,0 +1,347 @@
+# backend/ml/multi_indicator.py
+"""
+Multi-Indicator Forecasting - BOR, LOS, BTO, TOI, pasien masuk/keluar in one job
+
+Management reports need forecasts for all daily indicators, not only BOR.
+`train_indicators` loads the sensus history once (one query for all columns)
+and fits one model per indicator in parallel worker processes: SARIMA, or
+the ETS engine (ml/ets_engine.py) when ml/engine_selector.py finds the series
+too short, SARIMA over the fit budget or not more accurate. Each worker
+exports its model as a forecast state (.npz, see ml/forecast_engine.py) in
+MULTI_INDICATOR_DIR, so serving (`forecast_indicators`) only needs NumPy and
+the mapped arrays are shared between API workers.
+
+Workers are started with the "spawn" method: the API process runs threads
+(uvicorn, scheduler), which makes fork unsafe.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.sensus import SensusHarian
+from services import sensus_anomaly
+
+logger = logging.getLogger(__name__)
+
+# Indicator -> SensusHarian column, label and valid range for forecasts
+INDICATORS: Dict[str, Dict[str, Any]] = {
+    "bor": {"label": "BOR (%)", "lower": 0.0, "upper": 100.0},
+    "los": {"label": "LOS (hari)", "lower": 0.0, "upper": None},
+    "bto": {"label": "BTO (kali)", "lower": 0.0, "upper": None},
+    "toi": {"label": "TOI (hari)", "lower": 0.0, "upper": None},
+    "jml_masuk": {"label": "Pasien masuk", "lower": 0.0, "upper": None},
+    "jml_keluar": {"label": "Pasien keluar", "lower": 0.0, "upper": None},
+}
+
+MULTI_INDICATOR_DIR = os.getenv(
+    "MULTI_INDICATOR_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "indicators")
+)
+MAX_WORKERS = int(os.getenv("MULTI_INDICATOR_WORKERS", "0")) or min(len(INDICATORS), os.cpu_count() or 1)
+
+# ETS needs two weeks; SARIMA (engine="sarima") keeps the old minimum
+MIN_TRAINING_POINTS = 14
+MIN_SARIMA_TRAINING_POINTS = 30
+
+
+def state_path(indicator: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or MULTI_INDICATOR_DIR, f"{indicator}_forecast_state.npz")
+
+
+def validate_indicators(indicators: Optional[Sequence[str]]) -> List[str]:
+    """Requested indicators in canonical order (all when empty)"""
+    if not indicators:
+        return list(INDICATORS)
+    unknown = [name for name in indicators if name not in INDICATORS]
+    if unknown:
+        raise ValueError(f"Indikator tidak dikenal {unknown}; pilihan: {list(INDICATORS)}")
+    return [name for name in INDICATORS if name in indicators]
+
+
+def load_indicator_history(db: Session, days_back: int, indicators: Sequence[str]) -> Dict[str, Any]:
+    """
+    One query for every requested column over the last `days_back` days of data
+
+    The window ends at the latest sensus date (not today), so a late import
+    still trains on a full window. Missing values stay None and are filled
+    per indicator by SARIMAPredictor.prepare_data. "anomalies" holds the
+    dates flagged by the sensus anomaly detector for the indicators it covers.
+    """
+    latest = db.query(SensusHarian.tanggal).order_by(SensusHarian.tanggal.desc()).limit(1).scalar()
+    if latest is None:
+        return {"dates": [], "columns": {name: [] for name in indicators}, "anomalies": {}}
+
+    columns = [getattr(SensusHarian, name) for name in indicators]
+    rows = db.query(SensusHarian.tanggal, *columns).filter(
+        SensusHarian.tanggal > latest - timedelta(days=days_back)
+    ).order_by(SensusHarian.tanggal).all()
+
+    return {
+        "dates": [row[0] for row in rows],
+        "columns": {
+            name: [None if row[i + 1] is None else float(row[i + 1]) for row in rows]
+            for i, name in enumerate(indicators)
+        },
+        "anomalies": {
+            name: sorted(dates) for name, dates in
+            sensus_anomaly.anomaly_dates(db, indicators, start_date=rows[0][0] if rows else None).items()
+        }
+    }
+
+
+def _train_indicator(
+    indicator: str,
+    dates: List[date],
+    values: List[Optional[float]],
+    optimize: bool,
+    exog_features: Optional[Dict[str, Any]],
+    output_dir: str,
+    engine: str = "auto",
+    fit_budget_seconds: Optional[float] = None,
+    outlier_dates: Optional[List[date]] = None
+) -> Dict[str, Any]:
+    """
+    Fit and export one indicator model (runs in a worker process)
+
+    engine "auto" lets ml/engine_selector.py pick ETS or SARIMA; the fit
+    budget applies to one SARIMA fit (optimize=True runs a grid of them).
+    outlier_dates (anomaly flags) replace the IQR outlier pass when given.
+    """
+    from ml.forecast_engine import export_forecast_state
+    from ml.sarima_model import SARIMAPredictor
+
+    started = time.perf_counter()
+    usable = sum(value is not None for value in values)
+    minimum = MIN_SARIMA_TRAINING_POINTS if engine == "sarima" else MIN_TRAINING_POINTS
+    if usable < minimum:
+        raise ValueError(f"Data {indicator} tidak mencukupi: {usable} nilai (minimum {minimum})")
+
+    predictor = SARIMAPredictor()
+    series = predictor.prepare_data(
+        [{"tanggal": day, indicator: np.nan if value is None else value} for day, value in zip(dates, values)],
+        indicator,
+        outlier_dates=outlier_dates
+    )
+
+    if engine == "auto":
+        from ml.engine_selector import select_engine
+        selection = select_engine(series, predictor.order, predictor.seasonal_order, fit_budget_seconds)
+    else:
+        selection = {"engine": engine, "reason": "requested"}
+
+    if selection["engine"] == "ets":
+        return _train_indicator_ets(indicator, series, predictor, selection, output_dir, started)
+
+    model_info = predictor.fit_model(series, optimize=optimize, exog_features=exog_features)
+    performance = predictor.evaluate_performance(series, predictor.fitted_model.fittedvalues)
+
+    model_info = {
+        "engine": "sarima",
+        "selection": selection,
+        "order": list(predictor.order),
+        "seasonal_order": list(predictor.seasonal_order),
+        "aic": float(model_info["aic"]),
+        "bic": float(model_info["bic"]),
+        "converged": bool(model_info["converged"]),
+        "exog_features": model_info.get("exog_features", [])
+    }
+    path = export_forecast_state(
+        predictor.fitted_model,
+        state_path(indicator, output_dir),
+        metadata={
+            "indicator": indicator,
+            "trained_at": datetime.now().isoformat(),
+            "calendar_features": predictor.exog_spec,
+            "training_points": len(series),
+            "model_info": model_info,
+            "performance": performance
+        }
+    )
+    return {
+        "indicator": indicator,
+        "status": "success",
+        "state_file": path,
+        "training_points": len(series),
+        "model_info": model_info,
+        "performance": performance,
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def _train_indicator_ets(indicator: str, series, predictor, selection: Dict[str, Any],
+                         output_dir: str, started: float) -> Dict[str, Any]:
+    """ETS branch of _train_indicator: fit and export in the same forecast state layout"""
+    import pandas as pd
+    from ml.ets_engine import export_ets_state, fit_ets
+
+    fit = fit_ets(series.to_numpy())
+    performance = predictor.evaluate_performance(series, pd.Series(fit.fitted_values, index=series.index))
+    model_info = {
+        "engine": "ets",
+        "selection": selection,
+        "model": fit.order_label,
+        "alpha": round(fit.alpha, 4),
+        "beta": round(fit.beta, 4),
+        "gamma": round(fit.gamma, 4),
+        "phi": fit.phi,
+        "aic": fit.aic
+    }
+    path = export_ets_state(
+        fit,
+        state_path(indicator, output_dir),
+        last_date=str(series.index[-1].date()),
+        metadata={
+            "indicator": indicator,
+            "trained_at": datetime.now().isoformat(),
+            "training_points": len(series),
+            "model_info": model_info,
+            "performance": performance
+        }
+    )
+    return {
+        "indicator": indicator,
+        "status": "success",
+        "state_file": path,
+        "training_points": len(series),
+        "model_info": model_info,
+        "performance": performance,
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def train_indicators(
+    history: Dict[str, Any],
+    indicators: Sequence[str],
+    optimize: bool = False,
+    exog_features: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+    output_dir: Optional[str] = None,
+    engine: str = "auto",
+    fit_budget_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Train all indicators from one loaded history, in parallel
+
+    engine: "auto" (ETS or SARIMA per indicator), "sarima" or "ets".
+
+    A failing indicator is reported with status "error"; the others are
+    still trained and published.
+    """
+    output_dir = output_dir or MULTI_INDICATOR_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    max_workers = max(1, min(max_workers or MAX_WORKERS, len(indicators)))
+    dates = history["dates"]
+    anomalies = history.get("anomalies") or {}
+
+    started = time.perf_counter()
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def failed(indicator: str, error: Exception) -> Dict[str, Any]:
+        logger.error(f"Training indikator {indicator} gagal: {error}")
+        return {"indicator": indicator, "status": "error", "error": str(error)}
+
+    if max_workers == 1:
+        for indicator in indicators:
+            try:
+                results[indicator] = _train_indicator(
+                    indicator, dates, history["columns"][indicator], optimize, exog_features, output_dir,
+                    engine, fit_budget_seconds, anomalies.get(indicator)
+                )
+            except Exception as e:
+                results[indicator] = failed(indicator, e)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as executor:
+            futures = {
+                executor.submit(
+                    _train_indicator, indicator, dates, history["columns"][indicator],
+                    optimize, exog_features, output_dir, engine, fit_budget_seconds, anomalies.get(indicator)
+                ): indicator
+                for indicator in indicators
+            }
+            for future in as_completed(futures):
+                indicator = futures[future]
+                try:
+                    results[indicator] = future.result()
+                except Exception as e:
+                    results[indicator] = failed(indicator, e)
+
+    return {
+        "indicators": [results[indicator] for indicator in indicators],
+        "trained": sum(result["status"] == "success" for result in results.values()),
+        "failed": sum(result["status"] == "error" for result in results.values()),
+        "workers": max_workers,
+        "data_points": len(dates),
+        "date_range": {
+            "start": dates[0].isoformat() if dates else None,
+            "end": dates[-1].isoformat() if dates else None
+        },
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def available_indicators(directory: Optional[str] = None) -> List[str]:
+    """Indicators with a trained forecast state"""
+    return [name for name in INDICATORS if os.path.exists(state_path(name, directory))]
+
+
+def forecast_indicators(
+    steps: int,
+    indicators: Optional[Sequence[str]] = None,
+    alpha: float = 0.05,
+    directory: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Forecasts with prediction intervals for every trained indicator
+
+    Values are clipped to each indicator's valid range. Indicators that
+    were requested but never trained are listed under "missing".
+    """
+    from ml.forecast_engine import ForecastEngine
+
+    requested = validate_indicators(indicators)
+    trained = set(available_indicators(directory))
+
+    forecasts = {}
+    for indicator in requested:
+        if indicator not in trained:
+            continue
+        engine = ForecastEngine.load(state_path(indicator, directory), shared=True)
+        result = engine.forecast_with_intervals(steps=steps, alpha=alpha)
+        bounds = INDICATORS[indicator]
+        lower_bound = bounds["lower"] if bounds["lower"] is not None else -np.inf
+        upper_bound = bounds["upper"] if bounds["upper"] is not None else np.inf
+
+        last_date = engine.meta.get("last_date")
+        dates = [
+            (date.fromisoformat(last_date) + timedelta(days=h)).isoformat() for h in range(1, steps + 1)
+        ] if last_date else []
+        forecasts[indicator] = {
+            "label": bounds["label"],
+            "dates": dates,
+            "values": np.clip(result["mean"], lower_bound, upper_bound).round(3).tolist(),
+            "lower": np.clip(result["lower"], lower_bound, upper_bound).round(3).tolist(),
+            "upper": np.clip(result["upper"], lower_bound, upper_bound).round(3).tolist(),
+            "model": {
+                "engine": engine.meta.get("engine", "sarima"),
+                "order": engine.meta.get("order"),
+                "seasonal_order": engine.meta.get("seasonal_order"),
+                "trained_at": engine.meta.get("trained_at"),
+                "last_training_date": last_date,
+                "mape": (engine.meta.get("performance") or {}).get("mape")
+            }
+        }
+
+    return {
+        "forecast_period": steps,
+        "confidence_level": 1 - alpha,
+        "forecasts": forecasts,
+        "missing": [indicator for indicator in requested if indicator not in trained]
+    }
@@ -1,11 +1,12 @@
 # backend/ml/predict.py
-import joblib
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any, Tuple
 import os
 from datetime import datetime
 
+from ml.shared_cache import load_pickle
+
 class ModelValidationError(Exception):
     """Custom exception untuk model validation error"""
     pass
@@ -79,7 +80,7 @@ def predict_bor(hari: int = 7) -> Dict[str, Any]:
     
     try:
         # Load model SARIMA
-        model = joblib.load(model_path)
+        model = load_pickle(model_path)
         
         # Validate model quality
         validation_result = validate_model_quality(model)
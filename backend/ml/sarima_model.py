@@ -22,9 +22,9 @@ from statsmodels.tsa.stattools import adfuller, acf, pacf
 from statsmodels.stats.diagnostic import acorr_ljungbox
 from statsmodels.tsa.seasonal import seasonal_decompose
 
-# Visualization
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ml.fit_cache import cached_fit
+from ml.diagnostics_artifact import build_diagnostics
+from ml.calendar_features import calendar_frame, calendar_matrix, feature_columns, normalize_spec, spec_for_order
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
@@ -56,17 +56,25 @@ class SARIMAPredictor:
         self.order = (1, 1, 1)  # (p,d,q)
         self.seasonal_order = (1, 1, 1, 7)  # (P,D,Q,s) - pola mingguan
         
+        # Regressor kalender (ml/calendar_features.py): spec diminta dan spec efektif model
+        self.calendar_spec = None
+        self.exog_spec = None
+        
         # Model diagnostics
         self.diagnostics = {}
+        self.diagnostics_artifact = None
         self.performance_metrics = {}
         
-    def prepare_data(self, data: List[Dict], target_column: str = 'bor') -> pd.Series:
+    def prepare_data(self, data: List[Dict], target_column: str = 'bor', outlier_dates=None) -> pd.Series:
         """
         Persiapkan data SHRI untuk analisis time series
         
         Args:
             data: List of dictionaries dengan kolom tanggal dan target
             target_column: Kolom target untuk prediksi (default: 'bor')
+            outlier_dates: Tanggal yang sudah ditandai detektor anomali
+                (services/sensus_anomaly.py); jika diberikan, dipakai sebagai
+                pengganti deteksi outlier IQR atas seluruh histori
             
         Returns:
             pd.Series: Data time series yang sudah diproses
@@ -89,25 +97,32 @@ class SARIMAPredictor:
                 
             series = df[target_column].copy()
             
-            # Remove outliers using IQR method
-            Q1 = series.quantile(0.25)
-            Q3 = series.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            # Replace outliers with median
-            median_value = series.median()
-            series = series.where(
-                (series >= lower_bound) & (series <= upper_bound), 
-                median_value
-            )
+            if outlier_dates is not None:
+                # Flagged values become gaps, filled below like missing days
+                flagged = series.index.isin(pd.to_datetime(list(outlier_dates)))
+                series = series.mask(flagged)
+                if flagged.any():
+                    logger.info(f"{int(flagged.sum())} flagged outliers masked")
+            else:
+                # Remove outliers using IQR method
+                Q1 = series.quantile(0.25)
+                Q3 = series.quantile(0.75)
+                IQR = Q3 - Q1
+                lower_bound = Q1 - 1.5 * IQR
+                upper_bound = Q3 + 1.5 * IQR
+                
+                # Replace outliers with median
+                median_value = series.median()
+                series = series.where(
+                    (series >= lower_bound) & (series <= upper_bound), 
+                    median_value
+                )
             
             # Forward fill missing values
-            series = series.fillna(method='ffill')
+            series = series.ffill()
             
             # Backward fill any remaining
-            series = series.fillna(method='bfill')
+            series = series.bfill()
             
             self.data_series = series
             logger.info(f"Data prepared successfully. Shape: {series.shape}")
@@ -159,6 +174,14 @@ class SARIMAPredictor:
         Sesuai metodologi Box-Jenkins
         """
         if data is None:
+            artifact = self.diagnostics_artifact
+            if artifact is not None and len(artifact.arrays.get('pacf', ())) > lags:
+                # Precomputed at training time
+                return {
+                    'acf_values': artifact.arrays['acf'][:lags + 1].tolist(),
+                    'pacf_values': artifact.arrays['pacf'][:lags + 1].tolist(),
+                    'lags': list(range(lags + 1))
+                }
             data = self.data_series
             
         if data is None:
@@ -174,6 +197,15 @@ class SARIMAPredictor:
             'lags': list(range(lags + 1))
         }
     
+    def _calendar_exog(self, index: pd.DatetimeIndex, seasonal_order: Tuple[int, int, int, int]):
+        """Matriks exog kalender untuk index ini, atau (None, None) jika model univariat"""
+        if self.calendar_spec is None:
+            return None, None
+        spec = spec_for_order(self.calendar_spec, seasonal_order)
+        if not feature_columns(spec):
+            return None, None
+        return calendar_frame(index, spec), spec
+    
     def optimize_parameters(self, data: pd.Series = None, 
                           max_p: int = 3, max_d: int = 2, max_q: int = 3,
                           max_P: int = 2, max_D: int = 1, max_Q: int = 2) -> Dict[str, Any]:
@@ -200,15 +232,17 @@ class SARIMAPredictor:
                         for D in range(max_D + 1):
                             for Q in range(max_Q + 1):
                                 try:
+                                    exog, _ = self._calendar_exog(data.index, (P, D, Q, 7))
                                     model = SARIMAX(
                                         data,
+                                        exog=exog,
                                         order=(p, d, q),
                                         seasonal_order=(P, D, Q, 7),
                                         enforce_stationarity=False,
                                         enforce_invertibility=False
                                     )
                                     
-                                    fitted_model = model.fit(disp=False)
+                                    fitted_model = cached_fit(model, disp=False)
                                     aic = fitted_model.aic
                                     
                                     results.append({
@@ -238,10 +272,14 @@ class SARIMAPredictor:
             'all_results': sorted(results, key=lambda x: x['aic'])[:10]  # Top 10
         }
     
-    def fit_model(self, data: pd.Series = None, optimize: bool = True) -> Dict[str, Any]:
+    def fit_model(self, data: pd.Series = None, optimize: bool = True,
+                  exog_features: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Fit model SARIMA menggunakan Maximum Likelihood Estimation
         Sesuai metodologi penelitian
+        
+        exog_features: spec regressor kalender {"features": [...], "fourier_order": K}
+        (hari dalam minggu, libur, Fourier tahunan); None = SARIMA univariat
         """
         if data is None:
             data = self.data_series
@@ -249,6 +287,8 @@ class SARIMAPredictor:
         if data is None:
             raise ValueError("No data available for model fitting")
         
+        self.calendar_spec = normalize_spec(exog_features) if exog_features is not None else None
+        
         try:
             # Optimize parameters if requested
             if optimize:
@@ -258,15 +298,19 @@ class SARIMAPredictor:
             # Fit SARIMA model
             logger.info(f"Fitting SARIMA{self.order}x{self.seasonal_order} model...")
             
+            exog, self.exog_spec = self._calendar_exog(data.index, self.seasonal_order)
+            
             self.model = SARIMAX(
                 data,
+                exog=exog,
                 order=self.order,
                 seasonal_order=self.seasonal_order,
                 enforce_stationarity=False,
                 enforce_invertibility=False
             )
             
-            self.fitted_model = self.model.fit(
+            self.fitted_model = cached_fit(
+                self.model,
                 disp=False,
                 method='lbfgs',  # Limited-memory BFGS
                 maxiter=1000
@@ -279,7 +323,8 @@ class SARIMAPredictor:
                 'aic': self.fitted_model.aic,
                 'bic': self.fitted_model.bic,
                 'log_likelihood': self.fitted_model.llf,
-                'converged': self.fitted_model.mle_retvals['converged']
+                'converged': self.fitted_model.mle_retvals['converged'],
+                'exog_features': feature_columns(self.exog_spec) if self.exog_spec else []
             }
             
             logger.info(f"Model fitted successfully. AIC: {model_info['aic']:.2f}")
@@ -295,34 +340,23 @@ class SARIMAPredictor:
         Uji diagnostik residual untuk validasi model
         - Ljung-Box test untuk white noise
         - Residual analysis
+        
+        Residual lengkap, ACF/PACF dan histogram disimpan di
+        self.diagnostics_artifact (NumPy), bukan sebagai list di dict ini.
         """
         if not self.fitted_model:
             raise ValueError("Model has not been fitted yet")
         
-        residuals = self.fitted_model.resid
-        
-        # Ljung-Box test for white noise
-        ljung_box = acorr_ljungbox(residuals, lags=10, return_df=True)
-        
-        # Basic residual statistics
-        residual_stats = {
-            'mean': float(residuals.mean()),
-            'std': float(residuals.std()),
-            'skewness': float(residuals.skew()),
-            'kurtosis': float(residuals.kurtosis())
-        }
-        
-        # Normality test (simplified)
-        residual_normalized = (residuals - residuals.mean()) / residuals.std()
+        # Computed once per model version; endpoints serve from the artifact
+        self.diagnostics_artifact = build_diagnostics(self.fitted_model, self.data_series)
         
         diagnostics = {
             'ljung_box_test': {
-                'statistics': ljung_box['lb_stat'].tolist(),
-                'p_values': ljung_box['lb_pvalue'].tolist(),
-                'white_noise': all(ljung_box['lb_pvalue'] > 0.05)  # Simplified check
+                'statistics': self.diagnostics_artifact.arrays['lb_stat'].tolist(),
+                'p_values': self.diagnostics_artifact.arrays['lb_pvalue'].tolist(),
+                'white_noise': self.diagnostics_artifact.meta['white_noise']
             },
-            'residual_statistics': residual_stats,
-            'residuals': residuals.tolist()
+            'residual_statistics': self.diagnostics_artifact.meta['residual_statistics']
         }
         
         self.diagnostics = diagnostics
@@ -403,8 +437,11 @@ class SARIMAPredictor:
             raise ValueError("Model has not been fitted yet")
         
         try:
-            # Generate forecast
-            forecast_result = self.fitted_model.get_forecast(steps=steps)
+            # Generate forecast; regressor kalender untuk tanggal prediksi
+            exog = None
+            if self.exog_spec is not None:
+                exog = calendar_matrix(self.data_series.index[-1] + timedelta(days=1), steps, self.exog_spec)
+            forecast_result = self.fitted_model.get_forecast(steps=steps, exog=exog)
             predictions = forecast_result.predicted_mean
             
             result = {
@@ -488,7 +525,8 @@ class SARIMAPredictor:
                 'seasonal_order': self.seasonal_order,
                 'aic': float(self.fitted_model.aic),
                 'bic': float(self.fitted_model.bic),
-                'log_likelihood': float(self.fitted_model.llf)
+                'log_likelihood': float(self.fitted_model.llf),
+                'exog_features': feature_columns(self.exog_spec) if self.exog_spec else []
             },
             'performance_metrics': self.performance_metrics,
             'diagnostics': self.diagnostics,
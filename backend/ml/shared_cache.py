@@ -0,0 +1,212 @@
+"""
+Shared model cache - one copy of model arrays for all API worker processes
+
+Every uvicorn/gunicorn worker used to unpickle its own copy of the model
+(and would hold its own copy of every per-ward model). This module keeps
+model arrays in files that all workers memory-map, so the OS page cache
+holds a single physical copy that every worker shares:
+
+- `shared_arrays` builds a set of named arrays once (first worker to need
+  them), writes them as .npy files under SHARED_CACHE_DIR and returns
+  read-only memory maps. Entries are keyed by the source file's mtime and
+  size, so a retrained model gets a new entry; old ones are pruned once the
+  new entry is PRUNE_GRACE_SECONDS old, so workers still opening them are
+  not cut off.
+- `load_pickle` loads joblib pickles with mmap_mode="c": numpy arrays inside
+  the pickle are mapped copy-on-write from the file instead of copied, and
+  the object is reused within the process until the file changes.
+- `process_memory_mb` reports RSS/PSS/private memory of a process, used by
+  scripts/report_worker_memory.py.
+
+Each process memoizes at most MAX_LOADED objects (one per source, least
+recently used dropped first), so old model versions are released.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# Shared by all workers of one deployment
+SHARED_CACHE_DIR = os.getenv(
+    "SHARED_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sensus_shared_cache")
+)
+
+_META_FILE = "meta.json"
+
+# Objects memoized per process (one per source file and key)
+MAX_LOADED = 32
+
+# Age of the newest entry before older entries of the same source are removed
+PRUNE_GRACE_SECONDS = 600
+
+_lock = threading.Lock()
+# Per-process LRU memo: source -> (source version, loaded value)
+_loaded: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+
+
+def _memo_get(memo_key: str, version: str) -> Optional[Any]:
+    cached = _loaded.get(memo_key)
+    if cached is None or cached[0] != version:
+        return None
+    _loaded.move_to_end(memo_key)
+    return cached[1]
+
+
+def _memo_put(memo_key: str, version: str, value: Any):
+    """Replaces the previous version of the source; evicts the least recently used source"""
+    _loaded[memo_key] = (version, value)
+    _loaded.move_to_end(memo_key)
+    while len(_loaded) > MAX_LOADED:
+        _loaded.popitem(last=False)
+
+
+def _source_version(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _entry_prefix(key: str, source_path: str) -> str:
+    path_hash = hashlib.sha1(os.path.abspath(source_path).encode()).hexdigest()[:10]
+    return f"{key}-{path_hash}-"
+
+
+def _write_entry(entry: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Write into a temporary directory, then rename so readers never see a partial entry"""
+    os.makedirs(SHARED_CACHE_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=SHARED_CACHE_DIR, prefix=".building-")
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+        with open(os.path.join(tmp_dir, _META_FILE), "w") as f:
+            json.dump({"arrays": sorted(arrays), "meta": meta}, f)
+        os.rename(tmp_dir, entry)
+    except OSError:
+        # Another worker published the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(entry, _META_FILE)):
+            raise
+
+
+def _read_entry(entry: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    with open(os.path.join(entry, _META_FILE)) as f:
+        content = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+        for name in content["arrays"]
+    }
+    return arrays, content["meta"]
+
+
+def _prune_entries(prefix: str, keep: str):
+    """
+    Remove entries of other source versions once `keep` is older than the grace period
+
+    Mapped pages stay valid until unmapped; the grace period covers workers
+    that found an old entry on disk but have not opened its files yet.
+    """
+    try:
+        age = time.time() - os.path.getmtime(os.path.join(keep, _META_FILE))
+    except OSError:
+        return
+    if age < PRUNE_GRACE_SECONDS:
+        return
+    for name in os.listdir(SHARED_CACHE_DIR):
+        path = os.path.join(SHARED_CACHE_DIR, name)
+        if name.startswith(prefix) and path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def shared_arrays(
+    key: str,
+    source_path: str,
+    loader: Callable[[], Tuple[Dict[str, np.ndarray], Dict[str, Any]]]
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Arrays derived from source_path as read-only memory maps shared by all workers
+
+    loader() -> (arrays, meta) only runs in the first process that needs the
+    current version of source_path; meta must be JSON serializable.
+    """
+    version = _source_version(source_path)
+    prefix = _entry_prefix(key, source_path)
+    entry = os.path.join(SHARED_CACHE_DIR, prefix + version)
+
+    with _lock:
+        cached = _memo_get(prefix, version)
+        if cached is not None:
+            return cached
+
+        if not os.path.exists(os.path.join(entry, _META_FILE)):
+            arrays, meta = loader()
+            _write_entry(entry, arrays, meta)
+        # Also on reads: entries superseded by another worker are pruned after the grace period
+        _prune_entries(prefix, keep=entry)
+
+        result = _read_entry(entry)
+        _memo_put(prefix, version, result)
+        return result
+
+
+def load_pickle(path: str) -> Any:
+    """
+    joblib.load with numpy arrays memory-mapped copy-on-write from the file
+
+    Pages stay shared between workers until a worker writes to them
+    (statsmodels needs writable buffers, so read-only maps are not an
+    option). Compressed pickles cannot be mapped and are loaded normally.
+    """
+    import joblib
+
+    version = _source_version(path)
+    memo_key = os.path.abspath(path)
+    with _lock:
+        cached = _memo_get(memo_key, version)
+        if cached is not None:
+            return cached
+
+        obj = joblib.load(path, mmap_mode="c")
+        _memo_put(memo_key, version, obj)
+        return obj
+
+
+def clear_process_cache():
+    """Forget objects loaded in this process (files on disk are kept)"""
+    with _lock:
+        _loaded.clear()
+
+
+def process_memory_mb(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    RSS, PSS and private (USS) memory of a process in MB
+
+    PSS splits shared pages between the processes mapping them, so summing
+    PSS over workers gives their real combined footprint. Needs Linux
+    /proc/<pid>/smaps_rollup; elsewhere only the peak RSS of this process.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+        return {
+            "rss": round(fields.get("Rss", 0.0), 1),
+            "pss": round(fields.get("Pss", 0.0), 1),
+            "shared": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+            "private": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1)
+        }
+    except OSError:
+        import resource
+        import sys
+        # ru_maxrss is KB on Linux, bytes on macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return {"rss": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)}
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from database.session import SessionLocal
 from models.sensus import SensusHarian
+from ml.fit_cache import cached_fit
 
 def load_data_from_db(db: Session = None):
     """Ambil data BOR dari database dengan error handling"""
@@ -80,7 +81,7 @@ def train_sarima_and_save():
                               seasonal_order=seasonal_order,
                               enforce_stationarity=False,
                               enforce_invertibility=False)
-                fitted_model = model.fit(disp=False, maxiter=100)
+                fitted_model = cached_fit(model, disp=False, maxiter=100)
                 
                 if fitted_model.aic < best_aic:
                     best_aic = fitted_model.aic
@@ -0,0 +1,43 @@
+# backend/models/backfill_checkpoint.py
+"""
+Backfill Checkpoint Model
+Progress of resumable batch jobs over sensus_harian (keyset position and counters)
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from datetime import datetime
+from .base import Base
+
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoint"
+
+    job_name = Column(String(50), primary_key=True)
+    status = Column(String(20), default="running")  # running, completed, failed, interrupted
+    last_id = Column(Integer, default=0)             # Highest sensus_harian.id processed
+    rows_scanned = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    rows_skipped = Column(Integer, default=0)        # Rows with missing counts, left untouched
+    chunks = Column(Integer, default=0)
+    seconds = Column(Float, default=0.0)             # Processing time summed over all runs
+    last_error = Column(Text)
+
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "job_name": self.job_name,
+            "status": self.status,
+            "last_id": self.last_id,
+            "rows_scanned": self.rows_scanned,
+            "rows_updated": self.rows_updated,
+            "rows_skipped": self.rows_skipped,
+            "chunks": self.chunks,
+            "seconds": round(self.seconds or 0.0, 3),
+            "rows_per_second": round(self.rows_scanned / self.seconds, 1) if self.seconds else None,
+            "last_error": self.last_error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -34,6 +34,8 @@ import sqlite3
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+from ml.fit_cache import cached_fit
+
 # Metrics
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 
@@ -284,7 +286,7 @@ class BaselineModels:
                         
                         try:
                             model = ARIMA(self.train_data, order=(p, d, q))
-                            fitted_model = model.fit()
+                            fitted_model = cached_fit(model)
                             
                             if fitted_model.aic < best_aic:
                                 best_aic = fitted_model.aic
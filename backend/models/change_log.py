@@ -0,0 +1,54 @@
+# backend/models/change_log.py
+"""
+Change Log Models
+Row-level changes of sensus_harian, bangsal and kamar_bangsal with monotonic sequence numbers
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from datetime import datetime
+from .base import Base
+
+class ChangeLogEntry(Base):
+    """One insert/update/delete, written in the same transaction as the change itself"""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_table_seq", "table_name", "seq"),
+        Index("ix_change_log_row", "table_name", "row_id"),
+        {"sqlite_autoincrement": True},  # Sequence numbers are never reused
+    )
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)       # insert, update, delete
+    changes = Column(Text)                               # JSON {field: [old, new]} (update)
+    data = Column(Text)                                  # JSON row after insert/update, before delete
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ChangeConsumerOffset(Base):
+    """Last processed sequence number per durable change feed consumer"""
+    __tablename__ = "change_consumer_offset"
+
+    consumer = Column(String(100), primary_key=True)
+    last_seq = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    last_error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "consumer": self.consumer,
+            "last_seq": self.last_seq,
+            "processed": self.processed,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ChangeLogRetention(Base):
+    """Single row: change_log is compacted up to pruned_seq (see ChangeFeed.prune)"""
+    __tablename__ = "change_log_retention"
+
+    id = Column(Integer, primary_key=True, default=1)
+    pruned_seq = Column(Integer, default=0)
+    pruned_rows = Column(Integer, default=0)
+    pruned_at = Column(DateTime)
@@ -0,0 +1,68 @@
+# backend/models/forecast_ledger.py
+"""
+Forecast Ledger Models
+Every issued BOR forecast and the running accuracy per model version and horizon
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint, Index
+from datetime import datetime
+from .base import Base
+
+class ForecastLedgerEntry(Base):
+    """One forecasted value: (source, model version, origin) -> target date"""
+    __tablename__ = "forecast_ledger"
+    __table_args__ = (
+        UniqueConstraint("source", "model_version", "origin_date", "target_date", name="uq_forecast_ledger_issue"),
+        Index("ix_forecast_ledger_target", "target_date"),
+        # Recent MAE: latest scored targets per (source, model version, horizon)
+        Index("ix_forecast_ledger_recent", "source", "model_version", "horizon", "target_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(20), nullable=False)          # prediksi (model file) or sarima (registry)
+    model_version = Column(String(100), nullable=False)
+    origin_date = Column(Date, nullable=False)           # Forecast dibuat dari tanggal ini
+    target_date = Column(Date, nullable=False)
+    horizon = Column(Integer, nullable=False)            # target_date - origin_date (hari)
+
+    predicted = Column(Float, nullable=False)
+    lower = Column(Float)
+    upper = Column(Float)
+    interval_level = Column(Float)                       # e.g. 0.95
+
+    issued_at = Column(DateTime, default=datetime.utcnow)
+    actual = Column(Float)                               # BOR aktual setelah sensus masuk
+    scored_at = Column(DateTime)
+
+class ForecastAccuracy(Base):
+    """Running error sums per (source, model version, horizon), updated per new actual"""
+    __tablename__ = "forecast_accuracy"
+
+    source = Column(String(20), primary_key=True)
+    model_version = Column(String(100), primary_key=True)
+    horizon = Column(Integer, primary_key=True)
+
+    n = Column(Integer, default=0)
+    abs_error_sum = Column(Float, default=0.0)
+    sq_error_sum = Column(Float, default=0.0)
+    ape_sum = Column(Float, default=0.0)                 # Absolute percentage error (actual != 0)
+    ape_count = Column(Integer, default=0)
+    interval_count = Column(Integer, default=0)
+    covered_count = Column(Integer, default=0)
+    nominal_level_sum = Column(Float, default=0.0)       # Sum of interval levels -> expected coverage
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        n = self.n or 0
+        return {
+            "source": self.source,
+            "model_version": self.model_version,
+            "horizon": self.horizon,
+            "n": n,
+            "mae": round(self.abs_error_sum / n, 4) if n else None,
+            "rmse": round((self.sq_error_sum / n) ** 0.5, 4) if n else None,
+            "mape": round(self.ape_sum / self.ape_count, 4) if self.ape_count else None,
+            "coverage": round(self.covered_count / self.interval_count, 4) if self.interval_count else None,
+            "nominal_coverage": round(self.nominal_level_sum / self.interval_count, 4) if self.interval_count else None
+        }
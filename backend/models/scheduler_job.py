@@ -0,0 +1,42 @@
+# backend/models/scheduler_job.py
+"""
+Scheduler Job State Model
+Last/next run, duration and outcome of each background job
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from datetime import datetime
+from .base import Base
+
+class SchedulerJobState(Base):
+    __tablename__ = "scheduler_job_state"
+
+    job_name = Column(String(50), primary_key=True)
+    schedule_description = Column(String(100))
+
+    last_started_at = Column(DateTime)
+    last_finished_at = Column(DateTime)
+    next_run_at = Column(DateTime)
+    last_duration_seconds = Column(Float)
+    last_outcome = Column(String(20))  # success, failed, skipped
+    last_message = Column(Text)
+    last_runner = Column(String(100))  # host:pid of the leader that ran it
+
+    run_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "job_name": self.job_name,
+            "schedule": self.schedule_description,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_outcome": self.last_outcome,
+            "last_message": self.last_message,
+            "last_runner": self.last_runner,
+            "run_count": self.run_count,
+            "failure_count": self.failure_count
+        }
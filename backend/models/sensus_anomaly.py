@@ -0,0 +1,67 @@
+# backend/models/sensus_anomaly.py
+"""
+Sensus Anomaly Models
+Running robust statistics per indicator and the anomaly flags raised on sensus writes
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint, Index
+from datetime import datetime
+from .base import Base
+
+class SensusAnomalyState(Base):
+    """Robust EWMA location/scale of one indicator, updated per new sensus day"""
+    __tablename__ = "sensus_anomaly_state"
+
+    scope = Column(String(30), primary_key=True)         # "rs" (sensus harian is hospital-level)
+    indicator = Column(String(20), primary_key=True)
+
+    n = Column(Integer, default=0)                       # Days absorbed into the statistics
+    mean = Column(Float)                                 # EWMA of the (clipped) value
+    mean_abs_dev = Column(Float)                         # EWMA of the (clipped) |residual|
+    last_tanggal = Column(Date)                          # Newest day absorbed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "scope": self.scope,
+            "indicator": self.indicator,
+            "n": self.n,
+            "mean": round(self.mean, 4) if self.mean is not None else None,
+            "mean_abs_dev": round(self.mean_abs_dev, 4) if self.mean_abs_dev is not None else None,
+            "last_tanggal": self.last_tanggal.isoformat() if self.last_tanggal else None
+        }
+
+class SensusAnomalyFlag(Base):
+    """One suspicious value: (tanggal, scope, indicator) with its robust z-score"""
+    __tablename__ = "sensus_anomaly_flag"
+    __table_args__ = (
+        UniqueConstraint("tanggal", "scope", "indicator", name="uq_sensus_anomaly_flag"),
+        Index("ix_sensus_anomaly_flag_indicator", "indicator", "tanggal"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tanggal = Column(Date, nullable=False)
+    sensus_id = Column(Integer)
+    scope = Column(String(30), nullable=False, default="rs")
+    indicator = Column(String(20), nullable=False)
+
+    value = Column(Float, nullable=False)
+    expected = Column(Float, nullable=False)             # EWMA mean before this value
+    score = Column(Float, nullable=False)                # Robust z: (value - expected) / scale
+    method = Column(String(20), default="robust_ewma")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "tanggal": self.tanggal.isoformat(),
+            "sensus_id": self.sensus_id,
+            "scope": self.scope,
+            "indicator": self.indicator,
+            "value": self.value,
+            "expected": round(self.expected, 4),
+            "score": round(self.score, 2),
+            "direction": "high" if self.score > 0 else "low",
+            "method": self.method,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,21 @@
+# backend/models/sync_upload.py
+"""
+Sync Upload Model
+Idempotency keys of applied offline uploads (POST /sync/sensus/upload)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+from .base import Base
+
+class SyncUploadKey(Base):
+    """Result of one applied upload item, committed together with the write itself"""
+    __tablename__ = "sync_upload_key"
+
+    idempotency_key = Column(String(100), primary_key=True)
+    request_hash = Column(String(64), nullable=False)   # sha256 of the item without its key
+    status = Column(String(20), nullable=False)         # created, updated, deleted
+    row_id = Column(Integer)
+    result = Column(Text)                               # JSON item result returned on replay
+    uploaded_by = Column(String(100))
+    created_at = Column(DateTime, default=datetime.utcnow)
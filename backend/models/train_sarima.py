@@ -20,6 +20,7 @@ import os
 import sys
 import json
 import pickle
+import time
 import yaml
 import warnings
 from datetime import datetime, timedelta
@@ -43,6 +44,11 @@ from statsmodels.tsa.seasonal import seasonal_decompose
 # Metrics
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 
+from ml.forecast_engine import export_forecast_state
+from ml.diagnostics_artifact import build_diagnostics
+from ml.fit_cache import cached_fit
+from ml.calendar_features import calendar_frame, feature_columns, normalize_spec, spec_for_order
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
@@ -73,12 +79,18 @@ class SARIMATrainer:
         self.test_data = None
         self.best_model = None
         self.best_params = None
+        self.screening_report = None
+        self.exog_spec = None
         self.training_history = []
         self.performance_metrics = {}
         
         # Setup output directory
         self.model_dir = os.path.dirname(os.path.abspath(__file__))
         
+        # Regressor kalender (SARIMAX exog) jika diaktifkan di config
+        exog_config = self.config.get('exog', {})
+        self.calendar_spec = normalize_spec(exog_config) if exog_config.get('enabled', False) else None
+        
         logger.info("SARIMA Training Pipeline Initialized")
         logger.info(f"Configuration loaded from: {config_path}")
     
@@ -214,7 +226,7 @@ class SARIMATrainer:
             
             # Handle missing values
             if self.config['data']['missing_value_strategy'] == 'forward_fill':
-                series = series.fillna(method='ffill').fillna(method='bfill')
+                series = series.ffill().bfill()
             
             # Remove outliers using IQR method
             if self.config['data']['outlier_method'] == 'iqr':
@@ -290,10 +302,134 @@ class SARIMATrainer:
             logger.error(f"Error in stationarity test: {e}")
             raise
     
-    def grid_search_sarima(self) -> Dict[str, Any]:
+    def _candidate_grid(self) -> List[Tuple[Tuple[int, int, int], Tuple[int, int, int, int]]]:
+        """Semua kombinasi (order, seasonal_order) dari config"""
+        sarima_config = self.config['sarima']
+        return [
+            ((p, d, q), (P, D, Q, s))
+            for s in sarima_config['seasonal_periods']
+            for p in sarima_config['p_range']
+            for d in sarima_config['d_range']
+            for q in sarima_config['q_range']
+            for P in sarima_config['P_range']
+            for D in sarima_config['D_range']
+            for Q in sarima_config['Q_range']
+        ]
+    
+    def _calendar_exog(self, index: pd.DatetimeIndex, seasonal_order):
+        """(exog DataFrame, spec efektif) untuk kandidat ini, atau (None, None) tanpa exog"""
+        if self.calendar_spec is None:
+            return None, None
+        spec = spec_for_order(self.calendar_spec, seasonal_order)
+        if not feature_columns(spec):
+            return None, None
+        return calendar_frame(index, spec), spec
+    
+    def _fit_candidate(self, order, seasonal_order, data: pd.Series, maxiter: int):
+        sarima_config = self.config['sarima']
+        exog, _ = self._calendar_exog(data.index, seasonal_order)
+        model = SARIMAX(
+            data,
+            exog=exog,
+            order=order,
+            seasonal_order=seasonal_order,
+            enforce_stationarity=sarima_config['enforce_stationarity'],
+            enforce_invertibility=sarima_config['enforce_invertibility']
+        )
+        return cached_fit(
+            model,
+            disp=False,
+            method=sarima_config['method'],
+            maxiter=maxiter
+        )
+    
+    def _evaluate_candidate(self, order, seasonal_order) -> Dict[str, Any]:
+        """Full MLE (maxiter dari config) + MAE pada test set"""
+        fitted_model = self._fit_candidate(order, seasonal_order, self.train_data, self.config['sarima']['maxiter'])
+        
+        # Calculate MAE on test set for better evaluation
+        try:
+            test_exog, _ = self._calendar_exog(self.test_data.index, seasonal_order)
+            test_predictions = fitted_model.forecast(steps=len(self.test_data), exog=test_exog)
+            mae = mean_absolute_error(self.test_data, test_predictions)
+        except Exception as e:
+            logger.warning(f"Test-set forecast failed for SARIMA{order}x{seasonal_order}: {e}")
+            mae = float('inf')
+        
+        return {
+            'order': order,
+            'seasonal_order': seasonal_order,
+            'aic': fitted_model.aic,
+            'bic': fitted_model.bic,
+            'mae': mae,
+            'converged': fitted_model.mle_retvals['converged']
+        }
+    
+    def _screen_candidates(self, candidates: List) -> Tuple[List, List[Dict[str, Any]]]:
+        """
+        Multi-fidelity screening (successive halving)
+        
+        Setiap ronde mem-fit semua kandidat tersisa secara murah (maxiter kecil,
+        subsample bagian akhir data training) dan hanya mempromosikan fraksi
+        terbaik berdasarkan AIC ke ronde berikutnya. AIC antar kandidat dalam
+        satu ronde sebanding karena semua kandidat memakai subsample dan
+        maxiter yang sama (panjang subsample minimal 4 musim dari periode
+        musiman terbesar di antara kandidat).
+        
+        Returns:
+            (kandidat yang lolos ke full MLE, laporan per ronde)
+        """
+        screening_config = self.config['screening']
+        keep_fraction = screening_config['keep_fraction']
+        min_candidates = screening_config['min_candidates']
+        
+        rounds = []
+        for round_number, rung in enumerate(screening_config['rungs'], 1):
+            if len(candidates) <= min_candidates:
+                break
+            
+            started = time.perf_counter()
+            # Subsample: bagian paling akhir (paling mirip periode test), satu panjang per ronde
+            max_period = max(seasonal_order[3] for _, seasonal_order in candidates)
+            n_points = min(max(int(len(self.train_data) * rung['subsample']), 4 * max_period), len(self.train_data))
+            data = self.train_data.iloc[-n_points:]
+            scored = []
+            for order, seasonal_order in candidates:
+                try:
+                    aic = self._fit_candidate(order, seasonal_order, data, rung['maxiter']).aic
+                    scored.append((aic if np.isfinite(aic) else float('inf'), order, seasonal_order))
+                except Exception as e:
+                    logger.debug(f"Screening fit failed for SARIMA{order}x{seasonal_order}: {e}")
+                    scored.append((float('inf'), order, seasonal_order))
+            
+            scored.sort(key=lambda item: item[0])
+            n_promoted = min(len(scored), max(min_candidates, int(np.ceil(len(scored) * keep_fraction))))
+            promoted = [(order, seasonal_order) for aic, order, seasonal_order in scored[:n_promoted] if np.isfinite(aic)]
+            rounds.append({
+                'round': round_number,
+                'maxiter': rung['maxiter'],
+                'subsample': rung['subsample'],
+                'points': n_points,
+                'candidates': len(candidates),
+                'promoted': len(promoted),
+                'seconds': round(time.perf_counter() - started, 2)
+            })
+            logger.info(
+                f"Screening round {round_number} (maxiter={rung['maxiter']}, {n_points} points): "
+                f"{len(candidates)} -> {len(promoted)} candidates in {rounds[-1]['seconds']:.1f}s"
+            )
+            candidates = promoted
+        
+        return candidates, rounds
+    
+    def grid_search_sarima(self, screening: Optional[bool] = None) -> Dict[str, Any]:
         """
         Grid search untuk parameter SARIMA terbaik
         
+        Args:
+            screening: True = successive halving (config 'screening') sebelum
+                full MLE, False = exhaustive; None = ikut config
+        
         Returns:
             Dict: Best parameters dan hasil grid search
         """
@@ -301,93 +437,71 @@ class SARIMATrainer:
             if self.train_data is None:
                 raise ValueError("Training data not available. Call preprocess_data() first.")
             
-            logger.info("Starting SARIMA Grid Search...")
+            screening_config = self.config.get('screening', {})
+            if screening is None:
+                screening = screening_config.get('enabled', False)
             
-            # Get parameter ranges from config
-            sarima_config = self.config['sarima']
-            p_range = sarima_config['p_range']
-            d_range = sarima_config['d_range']
-            q_range = sarima_config['q_range']
-            P_range = sarima_config['P_range']
-            D_range = sarima_config['D_range']
-            Q_range = sarima_config['Q_range']
-            seasonal_periods = sarima_config['seasonal_periods']
+            logger.info(f"Starting SARIMA Grid Search{' with multi-fidelity screening' if screening else ''}...")
+            
+            candidates = self._candidate_grid()
+            total_combinations = len(candidates)
+            logger.info(f"Testing {total_combinations} parameter combinations...")
+            
+            screening_report = None
+            if screening:
+                candidates, screening_rounds = self._screen_candidates(candidates)
+                screening_report = {'rounds': screening_rounds}
             
             best_aic = float('inf')
             best_params = None
             search_results = []
-            total_combinations = len(p_range) * len(d_range) * len(q_range) * len(P_range) * len(D_range) * len(Q_range) * len(seasonal_periods)
-            
-            logger.info(f"Testing {total_combinations} parameter combinations...")
+            full_started = time.perf_counter()
+            
+            for combination_count, (order, seasonal_order) in enumerate(candidates, 1):
+                try:
+                    result = self._evaluate_candidate(order, seasonal_order)
+                    search_results.append(result)
+                    
+                    # Check if this is the best model (by AIC, but track MAE too)
+                    if result['aic'] < best_aic and result['converged']:
+                        best_aic = result['aic']
+                        best_params = result.copy()
+                    
+                    # Progress logging (every 10% of combinations)
+                    if combination_count % max(1, len(candidates) // 10) == 0:
+                        progress = (combination_count / len(candidates)) * 100
+                        logger.info(f"Grid search progress: {progress:.1f}% - Current best AIC: {best_aic:.2f}")
+                
+                except Exception as model_error:
+                    # Skip this combination if model fails
+                    continue
             
-            combination_count = 0
-            
-            for s in seasonal_periods:
-                for p in p_range:
-                    for d in d_range:
-                        for q in q_range:
-                            for P in P_range:
-                                for D in D_range:
-                                    for Q in Q_range:
-                                        combination_count += 1
-                                        
-                                        try:
-                                            # Create and fit model
-                                            model = SARIMAX(
-                                                self.train_data,
-                                                order=(p, d, q),
-                                                seasonal_order=(P, D, Q, s),
-                                                enforce_stationarity=sarima_config['enforce_stationarity'],
-                                                enforce_invertibility=sarima_config['enforce_invertibility']
-                                            )
-                                            
-                                            fitted_model = model.fit(
-                                                disp=False,
-                                                method=sarima_config['method'],
-                                                maxiter=sarima_config['maxiter']
-                                            )
-                                            
-                                            # Get AIC/BIC metrics
-                                            aic = fitted_model.aic
-                                            bic = fitted_model.bic
-                                            
-                                            # Calculate MAE on test set for better evaluation
-                                            try:
-                                                test_predictions = fitted_model.forecast(steps=len(self.test_data))
-                                                mae = mean_absolute_error(self.test_data, test_predictions)
-                                            except:
-                                                mae = float('inf')
-                                            
-                                            # Store result
-                                            result = {
-                                                'order': (p, d, q),
-                                                'seasonal_order': (P, D, Q, s),
-                                                'aic': aic,
-                                                'bic': bic,
-                                                'mae': mae,
-                                                'converged': fitted_model.mle_retvals['converged']
-                                            }
-                                            search_results.append(result)
-                                            
-                                            # Check if this is the best model (by AIC, but track MAE too)
-                                            if aic < best_aic and fitted_model.mle_retvals['converged']:
-                                                best_aic = aic
-                                                best_params = result.copy()
-                                            
-                                            # Progress logging (every 10% of combinations)
-                                            if combination_count % max(1, total_combinations // 10) == 0:
-                                                progress = (combination_count / total_combinations) * 100
-                                                logger.info(f"Grid search progress: {progress:.1f}% - Current best AIC: {best_aic:.2f}")
-                                        
-                                        except Exception as model_error:
-                                            # Skip this combination if model fails
-                                            continue
+            full_seconds = time.perf_counter() - full_started
             
             if best_params is None:
                 raise ValueError("No valid SARIMA model found in grid search")
             
             self.best_params = best_params
             
+            if screening_report is not None:
+                # Kandidat yang gugur di suatu ronde tidak perlu full MLE + holdout
+                seconds_per_full_fit = full_seconds / max(len(candidates), 1)
+                for report in screening_report['rounds']:
+                    eliminated = report['candidates'] - report['promoted']
+                    report['saved_seconds'] = round(eliminated * seconds_per_full_fit - report['seconds'], 2)
+                screening_report.update({
+                    'full_mle_candidates': len(candidates),
+                    'full_mle_seconds': round(full_seconds, 2),
+                    'total_seconds': round(full_seconds + sum(r['seconds'] for r in screening_report['rounds']), 2),
+                    'estimated_exhaustive_seconds': round(total_combinations * seconds_per_full_fit, 2)
+                })
+                for report in screening_report['rounds']:
+                    logger.info(f"Screening round {report['round']}: ~{report['saved_seconds']:.1f}s saved")
+                logger.info(
+                    f"Screening total: {screening_report['total_seconds']:.1f}s "
+                    f"(exhaustive est. {screening_report['estimated_exhaustive_seconds']:.1f}s)"
+                )
+            
             # Sort results by AIC (primary) and MAE (secondary)
             search_results.sort(key=lambda x: (x['aic'], x.get('mae', float('inf'))))
             
@@ -404,10 +518,14 @@ class SARIMATrainer:
                 mae_str = f", MAE: {result['mae']:.4f}" if result.get('mae') != float('inf') else ""
                 logger.info(f"  {i}. SARIMA{result['order']}x{result['seasonal_order']} - AIC: {result['aic']:.2f}{mae_str}")
             
+            self.screening_report = screening_report
+            
             return {
                 'best_params': best_params,
                 'search_results': search_results[:20],  # Top 20 models
-                'total_models_tested': len(search_results)
+                'total_models_tested': len(search_results),
+                'total_combinations': total_combinations,
+                'screening': screening_report
             }
             
         except Exception as e:
@@ -428,8 +546,10 @@ class SARIMATrainer:
             logger.info("Training final SARIMA model...")
             
             # Create final model
+            exog, self.exog_spec = self._calendar_exog(self.train_data.index, self.best_params['seasonal_order'])
             final_model = SARIMAX(
                 self.train_data,
+                exog=exog,
                 order=self.best_params['order'],
                 seasonal_order=self.best_params['seasonal_order'],
                 enforce_stationarity=self.config['sarima']['enforce_stationarity'],
@@ -437,7 +557,9 @@ class SARIMATrainer:
             )
             
             # Fit model
-            self.best_model = final_model.fit(
+            # Same spec and data as the grid search winner: served from the fit cache
+            self.best_model = cached_fit(
+                final_model,
                 disp=False,
                 method=self.config['sarima']['method'],
                 maxiter=self.config['sarima']['maxiter']
@@ -458,6 +580,7 @@ class SARIMATrainer:
                 'log_likelihood': float(self.best_model.llf),
                 'converged': self.best_model.mle_retvals['converged'],
                 'residuals_white_noise': white_noise,
+                'exog_features': feature_columns(self.exog_spec) if self.exog_spec else [],
                 'ljung_box_p_values': ljung_box['lb_pvalue'].tolist()
             }
             
@@ -488,7 +611,8 @@ class SARIMATrainer:
             
             # Generate predictions for test period
             forecast_steps = len(self.test_data)
-            forecast_result = self.best_model.get_forecast(steps=forecast_steps)
+            test_exog, _ = self._calendar_exog(self.test_data.index, self.best_params['seasonal_order'])
+            forecast_result = self.best_model.get_forecast(steps=forecast_steps, exog=test_exog)
             predictions = forecast_result.predicted_mean
             
             # Align predictions with test data
@@ -591,6 +715,31 @@ class SARIMATrainer:
                 pickle.dump(self.best_model, f)
             
             logger.info(f"Model saved successfully: {model_path}")
+            
+            # Forecast state untuk serving tanpa statsmodels
+            state_file = self.config['output'].get('forecast_state_file', 'sarima_forecast_state.npz')
+            state_path = export_forecast_state(
+                self.best_model,
+                os.path.join(self.model_dir, state_file),
+                metadata={'trained_at': datetime.now().isoformat(), 'calendar_features': self.exog_spec}
+            )
+            logger.info(f"Forecast state saved: {state_path}")
+
+            # Diagnostik residual (dibaca /sarima/diagnostics selama registry kosong, tanpa statsmodels)
+            diagnostics_file = self.config['output'].get('diagnostics_file', 'sarima_diagnostics.npz')
+            diagnostics_path = build_diagnostics(
+                self.best_model,
+                self.train_data,
+                metadata={
+                    'trained_at': datetime.now().isoformat(),
+                    'order': list(self.best_params['order']) if self.best_params else None,
+                    'seasonal_order': list(self.best_params['seasonal_order']) if self.best_params else None,
+                    'aic': float(self.best_model.aic),
+                    'bic': float(self.best_model.bic)
+                }
+            ).save(os.path.join(self.model_dir, diagnostics_file))
+            logger.info(f"Diagnostics saved: {diagnostics_path}")
+            
             return model_path
             
         except Exception as e:
@@ -613,7 +762,8 @@ class SARIMATrainer:
                 'model_info': {
                     'order': self.best_params['order'] if self.best_params else None,
                     'seasonal_order': self.best_params['seasonal_order'] if self.best_params else None,
-                    'model_formula': f"SARIMA{self.best_params['order']}x{self.best_params['seasonal_order']}" if self.best_params else None
+                    'model_formula': f"SARIMA{self.best_params['order']}x{self.best_params['seasonal_order']}" if self.best_params else None,
+                    'exog_features': feature_columns(self.exog_spec) if self.exog_spec else []
                 },
                 'data_info': {
                     'total_data_points': len(self.data) if self.data is not None else 0,
@@ -631,6 +781,7 @@ class SARIMATrainer:
                     'log_likelihood': float(self.best_model.llf) if self.best_model else None,
                     'converged': self.best_model.mle_retvals['converged'] if self.best_model else None
                 },
+                'screening': self.screening_report,
                 'configuration': self.config
             }
             
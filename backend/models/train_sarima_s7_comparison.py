@@ -3,12 +3,16 @@ Quick script: Train SARIMA s=7 dan buat comparison dengan s=30
 """
 
 import json
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 import pickle
 
+sys.path.append(str(Path(__file__).parent.parent))
+from ml.fit_cache import cached_fit
+
 # Load data
 data_path = Path(__file__).parent.parent.parent / "data" / "shri_training_data.csv"
 df = pd.read_csv(data_path)
@@ -31,7 +35,7 @@ try:
                        enforce_stationarity=False,
                        enforce_invertibility=False)
     
-    fitted_s7 = model_s7.fit(disp=False, maxiter=200, method='lbfgs')
+    fitted_s7 = cached_fit(model_s7, disp=False, maxiter=200, method='lbfgs')
     print(f"✅ SARIMA s=7 trained successfully")
     print(f"   AIC: {fitted_s7.aic:.2f}")
     
@@ -4,16 +4,26 @@ Bangsal Repository
 Database operations for bangsal (hospital ward) management
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import and_, or_, desc, asc, func, case, select, text
 from models.bangsal import Bangsal, KamarBangsal
+from database.bangsal_search import (
+    FTS_TABLE, MIN_FTS_TERM_LENGTH, ensure_bangsal_search_index, fts_match_expression
+)
 from schemas.bangsal import BangsalCreate, BangsalUpdate, KamarBangsalCreate, KamarBangsalUpdate
 from repositories.base_repository import BaseRepository
+from services.occupancy_index import occupancy_index
+from services.occupancy_stream import occupancy_stream
+
+# Maximum number of bangsal per bulk UPDATE statement (keeps bound parameters
+# well below SQLite's variable limit)
+BULK_UPDATE_BATCH_SIZE = 500
 
 class BangsalRepository(BaseRepository):
     def __init__(self, db: Session):
-        super().__init__(db, Bangsal)
+        super().__init__(Bangsal, db)
 
     # Core CRUD Operations
     def create_bangsal(self, bangsal_data: BangsalCreate, created_by: Optional[int] = None) -> Bangsal:
@@ -27,6 +37,7 @@ class BangsalRepository(BaseRepository):
         self.db.add(bangsal)
         self.db.commit()
         self.db.refresh(bangsal)
+        occupancy_index.apply_bangsal([bangsal])
         return bangsal
 
     def get_bangsal_by_id(self, bangsal_id: int, include_rooms: bool = False) -> Optional[Bangsal]:
@@ -85,6 +96,7 @@ class BangsalRepository(BaseRepository):
         
         self.db.commit()
         self.db.refresh(bangsal)
+        occupancy_index.apply_bangsal([bangsal])
         return bangsal
 
     def delete_bangsal(self, bangsal_id: int) -> bool:
@@ -95,6 +107,7 @@ class BangsalRepository(BaseRepository):
         
         bangsal.is_active = False
         self.db.commit()
+        occupancy_index.apply_bangsal([bangsal])
         return True
 
     def hard_delete_bangsal(self, bangsal_id: int) -> bool:
@@ -105,42 +118,30 @@ class BangsalRepository(BaseRepository):
         
         self.db.delete(bangsal)
         self.db.commit()
+        occupancy_index.remove_bangsal(bangsal_id)
         return True
 
     # Advanced Query Operations
-    def search_bangsal(
-        self,
-        search_term: str,
-        skip: int = 0,
-        limit: int = 100,
-        include_inactive: bool = False
-    ) -> List[Bangsal]:
-        """Search bangsal by name, code, or department"""
-        query = self.db.query(Bangsal)
-        
-        if not include_inactive:
-            query = query.filter(Bangsal.is_active == True)
-        
-        # Search in multiple fields
-        search_filter = or_(
+    def _apply_search(self, query, search_term: str):
+        """Search nama/kode/departemen: FTS5 trigram index, ilike fallback"""
+        if (len(search_term) >= MIN_FTS_TERM_LENGTH
+                and ensure_bangsal_search_index(self.db.get_bind())):
+            matches = select(text("rowid")).select_from(text(FTS_TABLE)).where(
+                text(f"{FTS_TABLE} MATCH :fts_term")
+            )
+            return query.filter(Bangsal.id.in_(matches)).params(
+                fts_term=fts_match_expression(search_term)
+            )
+
+        return query.filter(or_(
             Bangsal.nama_bangsal.ilike(f"%{search_term}%"),
             Bangsal.kode_bangsal.ilike(f"%{search_term}%"),
             Bangsal.departemen.ilike(f"%{search_term}%")
-        )
-        
-        query = query.filter(search_filter)
-        return query.order_by(Bangsal.nama_bangsal).offset(skip).limit(limit).all()
+        ))
 
-    def filter_bangsal(
-        self,
-        filters: Dict[str, Any],
-        skip: int = 0,
-        limit: int = 100
-    ) -> List[Bangsal]:
-        """Filter bangsal by multiple criteria"""
-        query = self.db.query(Bangsal)
-        
-        # Apply filters
+    @staticmethod
+    def _apply_filters(query, filters: Dict[str, Any]):
+        """Apply BangsalFilter criteria"""
         if 'jenis_bangsal' in filters and filters['jenis_bangsal']:
             query = query.filter(Bangsal.jenis_bangsal == filters['jenis_bangsal'])
         
@@ -168,7 +169,85 @@ class BangsalRepository(BaseRepository):
                 (Bangsal.tempat_tidur_terisi * 100.0 / Bangsal.kapasitas_total) <= filters['max_occupancy_rate']
             ).filter(Bangsal.kapasitas_total > 0)
         
-        return query.order_by(Bangsal.nama_bangsal).offset(skip).limit(limit).all()
+        return query
+
+    def search_bangsal(
+        self,
+        search_term: str,
+        skip: int = 0,
+        limit: int = 100,
+        include_inactive: bool = False
+    ) -> List[Bangsal]:
+        """Search bangsal by name, code, or department"""
+        query = self.db.query(Bangsal)
+        
+        if not include_inactive:
+            query = query.filter(Bangsal.is_active == True)
+        
+        query = self._apply_search(query, search_term)
+        return query.order_by(Bangsal.nama_bangsal, Bangsal.id).offset(skip).limit(limit).all()
+
+    def filter_bangsal(
+        self,
+        filters: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Bangsal]:
+        """Filter bangsal by multiple criteria"""
+        query = self._apply_filters(self.db.query(Bangsal), filters)
+        return query.order_by(Bangsal.nama_bangsal, Bangsal.id).offset(skip).limit(limit).all()
+
+    def list_bangsal_page(
+        self,
+        limit: int = 20,
+        after: Optional[Tuple[str, int]] = None,
+        skip: int = 0,
+        search_term: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        include_inactive: bool = False
+    ) -> Tuple[List[Bangsal], int]:
+        """
+        One page of bangsal ordered by (nama_bangsal, id) plus the total
+        number of matching rows, in a single round trip
+
+        With `after` (the last (nama_bangsal, id) of the previous page) the
+        page is fetched by keyset, so cost does not grow with page depth;
+        `skip` is only used for legacy page-number requests.
+
+        Filter-only listings (no search term) include inactive wards, as
+        filter_bangsal does; plain and search listings honour include_inactive.
+        """
+        query = self.db.query(Bangsal)
+        
+        filter_only = bool(filters) and not search_term
+        if filters:
+            query = self._apply_filters(query, filters)
+        if not include_inactive and not filter_only and not (filters and 'is_active' in filters):
+            query = query.filter(Bangsal.is_active == True)
+        if search_term:
+            query = self._apply_search(query, search_term)
+        
+        # COUNT(*) over the same filter, evaluated as a scalar subquery
+        total_query = (query.with_entities(func.count(Bangsal.id))
+                       .order_by(None).scalar_subquery().label('total'))
+        
+        page_query = query.add_columns(total_query)
+        if after is not None:
+            after_nama, after_id = after
+            page_query = page_query.filter(or_(
+                Bangsal.nama_bangsal > after_nama,
+                and_(Bangsal.nama_bangsal == after_nama, Bangsal.id > after_id)
+            ))
+        page_query = page_query.order_by(Bangsal.nama_bangsal, Bangsal.id)
+        if after is None and skip:
+            page_query = page_query.offset(skip)
+        
+        rows = page_query.limit(limit).all()
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        
+        # Past the last page: no row carried the count
+        return [], query.order_by(None).count()
 
     def get_bangsal_by_department(self, departemen: str) -> List[Bangsal]:
         """Get all bangsal in a specific department"""
@@ -214,21 +293,87 @@ class BangsalRepository(BaseRepository):
         
         self.db.commit()
         self.db.refresh(bangsal)
+        occupancy_index.apply_bangsal([bangsal])
         return bangsal
 
     def bulk_update_capacity(self, capacity_updates: List[Dict[str, Any]]) -> List[Bangsal]:
-        """Bulk update bed capacity for multiple bangsal"""
-        updated_bangsal = []
-        
+        """
+        Bulk update bed occupancy for multiple bangsal in one transaction.
+
+        All capacities are fetched with a single query and every update is
+        validated before anything is written, so the whole batch is applied
+        or nothing is (all-or-nothing). Rows are written with one CASE-based
+        UPDATE per batch instead of one commit per bangsal.
+        """
+        # Last update per bangsal wins, same as applying them sequentially
+        occupancy_by_id: Dict[int, int] = {}
         for update in capacity_updates:
             bangsal_id = update.get('bangsal_id')
             tempat_tidur_terisi = update.get('tempat_tidur_terisi')
             
             if bangsal_id and tempat_tidur_terisi is not None:
-                bangsal = self.update_bed_capacity(bangsal_id, tempat_tidur_terisi)
-                if bangsal:
-                    updated_bangsal.append(bangsal)
+                occupancy_by_id[int(bangsal_id)] = int(tempat_tidur_terisi)
+        
+        if not occupancy_by_id:
+            return []
         
+        try:
+            capacities = dict(
+                self.db.query(Bangsal.id, Bangsal.kapasitas_total)
+                .filter(Bangsal.id.in_(list(occupancy_by_id)))
+                .all()
+            )
+            
+            # Unknown bangsal are skipped, as in the single update path
+            occupancy_by_id = {
+                bangsal_id: terisi
+                for bangsal_id, terisi in occupancy_by_id.items()
+                if bangsal_id in capacities
+            }
+            
+            # Validate every update before writing anything
+            errors = []
+            for bangsal_id, terisi in occupancy_by_id.items():
+                if terisi < 0:
+                    errors.append(f"Bangsal {bangsal_id}: Tempat tidur terisi tidak boleh negatif")
+                elif terisi > capacities[bangsal_id]:
+                    errors.append(
+                        f"Bangsal {bangsal_id}: Tempat tidur terisi tidak boleh melebihi "
+                        f"kapasitas total ({capacities[bangsal_id]})"
+                    )
+            
+            if errors:
+                raise ValueError("; ".join(errors))
+            
+            now = datetime.utcnow()
+            bangsal_ids = list(occupancy_by_id)
+            for start in range(0, len(bangsal_ids), BULK_UPDATE_BATCH_SIZE):
+                batch = {
+                    bangsal_id: occupancy_by_id[bangsal_id]
+                    for bangsal_id in bangsal_ids[start:start + BULK_UPDATE_BATCH_SIZE]
+                }
+                terisi_case = case(batch, value=Bangsal.id)
+                
+                (self.db.query(Bangsal)
+                 .filter(Bangsal.id.in_(list(batch)))
+                 .update({
+                     Bangsal.tempat_tidur_terisi: terisi_case,
+                     Bangsal.tempat_tidur_tersedia: Bangsal.kapasitas_total - terisi_case,
+                     Bangsal.updated_at: now
+                 }, synchronize_session=False))
+            
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        # Return updated rows in request order with a single query
+        updated = {
+            bangsal.id: bangsal
+            for bangsal in self.db.query(Bangsal).filter(Bangsal.id.in_(bangsal_ids)).all()
+        }
+        updated_bangsal = [updated[bangsal_id] for bangsal_id in bangsal_ids if bangsal_id in updated]
+        occupancy_index.apply_bangsal(updated_bangsal)
         return updated_bangsal
 
     # Statistics and Analytics
@@ -236,11 +381,11 @@ class BangsalRepository(BaseRepository):
         """Get overall occupancy statistics"""
         result = (self.db.query(
             func.count(Bangsal.id).label('total_bangsal'),
-            func.sum(func.case((Bangsal.is_active == True, 1), else_=0)).label('active_bangsal'),
-            func.sum(func.case((Bangsal.is_active == True, Bangsal.kapasitas_total), else_=0)).label('total_capacity'),
-            func.sum(func.case((Bangsal.is_active == True, Bangsal.tempat_tidur_terisi), else_=0)).label('total_occupied'),
-            func.sum(func.case((Bangsal.is_active == True, Bangsal.tempat_tidur_tersedia), else_=0)).label('total_available'),
-            func.sum(func.case((Bangsal.is_emergency_ready == True, 1), else_=0)).label('emergency_ready_bangsal')
+            func.sum(case((Bangsal.is_active == True, 1), else_=0)).label('active_bangsal'),
+            func.sum(case((Bangsal.is_active == True, Bangsal.kapasitas_total), else_=0)).label('total_capacity'),
+            func.sum(case((Bangsal.is_active == True, Bangsal.tempat_tidur_terisi), else_=0)).label('total_occupied'),
+            func.sum(case((Bangsal.is_active == True, Bangsal.tempat_tidur_tersedia), else_=0)).label('total_available'),
+            func.sum(case((Bangsal.is_emergency_ready == True, 1), else_=0)).label('emergency_ready_bangsal')
         ).first())
         
         total_capacity = result.total_capacity or 0
@@ -302,7 +447,7 @@ class BangsalRepository(BaseRepository):
 
 class KamarBangsalRepository(BaseRepository):
     def __init__(self, db: Session):
-        super().__init__(db, KamarBangsal)
+        super().__init__(KamarBangsal, db)
 
     def create_kamar(self, kamar_data: KamarBangsalCreate) -> KamarBangsal:
         """Create new kamar in bangsal"""
@@ -310,6 +455,7 @@ class KamarBangsalRepository(BaseRepository):
         self.db.add(kamar)
         self.db.commit()
         self.db.refresh(kamar)
+        occupancy_stream.publish_room(kamar)
         return kamar
 
     def get_kamar_by_bangsal(self, bangsal_id: int) -> List[KamarBangsal]:
@@ -343,4 +489,5 @@ class KamarBangsalRepository(BaseRepository):
         
         self.db.commit()
         self.db.refresh(kamar)
+        occupancy_stream.publish_room(kamar)
         return kamar
\ No newline at end of file
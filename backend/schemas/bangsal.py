@@ -81,10 +81,11 @@ class BangsalResponse(BangsalBase):
 class BangsalList(BaseModel):
     """Schema for bangsal list with pagination"""
     total: int
-    page: int
+    page: Optional[int] = None  # None for cursor requests
     per_page: int
     pages: int
     bangsal: List[BangsalResponse]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 class BangsalSummary(BaseModel):
     """Schema for bangsal summary/dashboard"""
@@ -4,7 +4,7 @@ Sesuai dengan penelitian: "Peramalan Indikator Rumah Sakit Berbasis Sensus Haria
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime, date
 
 # Legacy schemas (keep for compatibility)
@@ -43,13 +43,103 @@ class SARIMATrainingRequest(BaseModel):
         "bor", 
         description="Kolom target untuk prediksi (bor, alos, etc)"
     )
+    exog_features: Optional[List[str]] = Field(
+        None,
+        description="Regressor kalender SARIMAX: day_of_week, weekend, holiday, fourier (kosong = SARIMA univariat)"
+    )
+    fourier_order: Optional[int] = Field(
+        3,
+        ge=0,
+        le=10,
+        description="Jumlah pasangan sin/cos untuk musiman tahunan (fitur fourier)"
+    )
     
     class Config:
         schema_extra = {
             "example": {
                 "days_back": 90,
                 "optimize_parameters": True,
-                "target_column": "bor"
+                "target_column": "bor",
+                "exog_features": ["holiday", "fourier"],
+                "fourier_order": 3
+            }
+        }
+
+class MultiIndicatorTrainingRequest(BaseModel):
+    """Request schema untuk training semua indikator (BOR, LOS, BTO, TOI, masuk, keluar) sekaligus"""
+    days_back: Optional[int] = Field(
+        365,
+        ge=30,
+        le=1095,
+        description="Jumlah hari data terakhir untuk training"
+    )
+    indicators: Optional[List[str]] = Field(
+        None,
+        description="Subset indikator: bor, los, bto, toi, jml_masuk, jml_keluar (kosong = semua)"
+    )
+    optimize_parameters: Optional[bool] = Field(
+        False,
+        description="Grid search parameter per indikator (jauh lebih lama)"
+    )
+    exog_features: Optional[List[str]] = Field(
+        None,
+        description="Regressor kalender SARIMAX untuk semua indikator"
+    )
+    fourier_order: Optional[int] = Field(
+        3,
+        ge=0,
+        le=10,
+        description="Jumlah pasangan sin/cos untuk musiman tahunan (fitur fourier)"
+    )
+    engine: Literal["auto", "sarima", "ets"] = Field(
+        "auto",
+        description="auto: ETS untuk seri pendek/SARIMA lambat/tidak lebih akurat, selain itu SARIMA"
+    )
+    fit_budget_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        le=3600,
+        description="Batas estimasi waktu fit SARIMA per indikator (default FORECAST_FIT_BUDGET_SECONDS)"
+    )
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "days_back": 365,
+                "indicators": ["bor", "los", "toi"],
+                "optimize_parameters": False,
+                "exog_features": ["holiday", "fourier"]
+            }
+        }
+
+class WardAdjustment(BaseModel):
+    """Perubahan untuk satu bangsal dalam skenario what-if"""
+    capacity_delta: int = Field(0, ge=-1000, le=1000, description="Tambahan (+) atau pengurangan (-) tempat tidur")
+    admission_multiplier: float = Field(1.0, ge=0, le=5, description="Pengali pasien masuk bangsal ini")
+    discharge_multiplier: float = Field(1.0, ge=0, le=5, description="Pengali laju pasien keluar bangsal ini")
+
+class CapacityScenario(BaseModel):
+    """Satu skenario what-if kapasitas"""
+    name: str = Field(..., min_length=1, max_length=100, description="Nama skenario")
+    admission_multiplier: float = Field(1.0, ge=0, le=5, description="Pengali pasien masuk semua bangsal")
+    discharge_multiplier: float = Field(1.0, ge=0, le=5, description="Pengali laju pasien keluar semua bangsal")
+    wards: Dict[int, WardAdjustment] = Field(default_factory=dict, description="Perubahan per bangsal_id")
+
+class WhatIfRequest(BaseModel):
+    """Request schema untuk proyeksi banyak skenario kapasitas sekaligus (tanpa menulis ke database)"""
+    scenarios: List[CapacityScenario] = Field(..., min_length=1, max_length=200, description="Daftar skenario")
+    days: int = Field(7, ge=1, le=30, description="Horizon proyeksi (hari)")
+    bangsal_id: Optional[List[int]] = Field(None, description="Subset bangsal (default: semua bangsal aktif)")
+    history_days: int = Field(180, ge=28, le=1095, description="Hari sensus untuk fitting laju masuk/keluar")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "days": 7,
+                "scenarios": [
+                    {"name": "Geriatri +10 TT", "wards": {"3": {"capacity_delta": 10}}},
+                    {"name": "Discharge +15%", "discharge_multiplier": 1.15}
+                ]
             }
         }
 
@@ -79,6 +169,7 @@ class ModelPerformance(BaseModel):
     last_training_mape: float = Field(description="MAPE terakhir (%)")
     meets_journal_criteria: bool = Field(description="Memenuhi kriteria jurnal (MAPE < 10%)")
     model_parameters: Dict[str, Any] = Field(description="Parameter model")
+    model_version: Optional[int] = Field(None, description="Versi snapshot model yang melayani prediksi")
 
 class ClinicalAlerts(BaseModel):
     """Alert klinis berdasarkan prediksi"""
@@ -0,0 +1,25 @@
+# backend/schemas/sync.py
+"""
+Sync Schemas
+Batch upload of offline-entered sensus data from ward workstations
+"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+class SensusUploadItem(BaseModel):
+    """
+    One offline write
+
+    upsert tanpa id membuat data baru untuk data.tanggal; upsert dengan id
+    mengubah baris tersebut. Update dan delete wajib menyertakan base_version
+    (versi baris saat terakhir disinkronkan) untuk deteksi konflik.
+    """
+    idempotency_key: str = Field(..., min_length=8, max_length=100, description="Kunci unik per penulisan (mis. UUID), sama saat upload diulang")
+    operation: Literal["upsert", "delete"] = "upsert"
+    id: Optional[int] = Field(None, gt=0, description="ID sensus_harian untuk update/delete")
+    base_version: Optional[int] = Field(None, ge=0, description="Versi baris (_version) yang diubah oleh client")
+    data: Optional[Dict[str, Any]] = Field(None, description="Field SensusCreate; divalidasi per item")
+
+class SensusUploadRequest(BaseModel):
+    items: List[SensusUploadItem] = Field(..., min_length=1, max_length=500)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Profil waktu import saat startup API (python -X importtime)
+
+Menjalankan `import main` di interpreter baru lalu menampilkan:
+- modul dengan waktu import kumulatif terbesar
+- total waktu import (self) per paket top-level
+- paket berat (statsmodels, pandas, ...) yang ikut termuat saat startup
+
+Usage:
+    python scripts/profile_startup.py [--module main] [--top 25]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Paket yang seharusnya baru dimuat saat fitur ML/export dipakai
+HEAVY_PACKAGES = (
+    "statsmodels", "scipy", "pandas", "matplotlib", "seaborn",
+    "sklearn", "joblib", "xlsxwriter", "openpyxl"
+)
+
+
+def run_importtime(module: str):
+    """Import modul di interpreter baru dan parse output -X importtime"""
+    env = dict(os.environ)
+    env.setdefault("ENABLE_SCHEDULER", "false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} gagal:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:  <self us> | <cumulative us> | <indented module name>"
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def print_report(module: str, top: int):
+    entries = run_importtime(module)
+    total_us = max(cumulative for _, _, cumulative in entries)
+
+    print(f"📦 Import-time profile: import {module}")
+    print("=" * 70)
+    print(f"Total: {total_us / 1e6:.2f} s, {len(entries)} modules")
+
+    print(f"\n⏱️  Top {top} modules (cumulative)")
+    for name, _, cumulative in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"  {cumulative / 1e3:9.1f} ms  {name}")
+
+    per_package = defaultdict(int)
+    for name, self_us, _ in entries:
+        per_package[name.split(".")[0]] += self_us
+
+    print(f"\n📊 Top {top} packages (self time)")
+    for package, self_us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_us / 1e3:9.1f} ms  {package}")
+
+    loaded_heavy = sorted(set(per_package) & set(HEAVY_PACKAGES))
+    print("\n🧪 Heavy packages loaded at startup:", ", ".join(loaded_heavy) if loaded_heavy else "none ✅")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil waktu import startup API")
+    parser.add_argument("--module", default="main", help="Modul yang di-import (default: main)")
+    parser.add_argument("--top", type=int, default=25, help="Jumlah baris per tabel")
+    args = parser.parse_args()
+    print_report(args.module, args.top)
+
+
+if __name__ == "__main__":
+    main()
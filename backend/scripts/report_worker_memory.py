@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Laporan memori per worker: model di-copy per proses vs shared cache
+
+Menjalankan N proses worker yang masing-masing memuat K model (salinan file
+model, mensimulasikan model per bangsal) dengan dua cara:
+- copy:   ForecastEngine.load / joblib.load biasa (tiap worker punya salinan)
+- shared: ml/shared_cache.py (memory map, satu salinan fisik di page cache)
+
+Setelah semua worker memuat model, dilaporkan tambahan RSS, PSS dan memori
+private (USS) per worker akibat model, plus total PSS semua worker.
+Butuh Linux (/proc/<pid>/smaps_rollup).
+
+Usage:
+    python scripts/report_worker_memory.py [--model PATH] [--workers 4] [--models 10]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from ml.shared_cache import process_memory_mb  # noqa: E402
+
+DEFAULT_MODELS = ("models/sarima_forecast_state.npz", "ml/model.pkl")
+
+_WORKER = """
+import json, sys
+sys.path.insert(0, {backend_dir!r})
+mode, paths = sys.argv[1], sys.argv[2:]
+is_state = paths[0].endswith(".npz")
+
+from ml.shared_cache import process_memory_mb, load_pickle
+from ml.forecast_engine import ForecastEngine
+if not is_state:
+    import joblib, statsmodels.api  # import cost bukan bagian dari model
+
+before = process_memory_mb()
+models = []
+for path in paths:
+    if is_state:
+        model = ForecastEngine.load(path, shared=(mode == "shared"))
+        model.forecast(7, exog=[[0.0] * model.k_exog] * 7 if model.k_exog else None)
+    else:
+        model = load_pickle(path) if mode == "shared" else joblib.load(path)
+        model.forecast(steps=7)
+    models.append(model)
+print(json.dumps({{"before": before}}), flush=True)
+sys.stdin.read()  # tetap hidup sampai parent selesai mengukur
+"""
+
+
+def run_workers(mode: str, paths, workers: int):
+    """Jalankan worker, ukur memori saat semua worker hidup bersamaan"""
+    code = _WORKER.format(backend_dir=backend_dir)
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", code, mode, *paths],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=backend_dir
+        )
+        for _ in range(workers)
+    ]
+    try:
+        results = []
+        for proc in procs:
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Worker {mode} gagal memuat model")
+            results.append(json.loads(line))
+        for proc, result in zip(procs, results):
+            result["after"] = process_memory_mb(proc.pid)
+        return results
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+
+def summarize(results):
+    def avg_delta(field):
+        return sum(r["after"][field] - r["before"][field] for r in results) / len(results)
+
+    return {
+        "rss": avg_delta("rss"),
+        "pss": avg_delta("pss"),
+        "private": avg_delta("private"),
+        "total_pss": sum(r["after"]["pss"] for r in results)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memori model per worker: copy vs shared cache")
+    parser.add_argument("--model", help="File model (.npz forecast state atau pickle joblib)")
+    parser.add_argument("--workers", type=int, default=4, help="Jumlah proses worker")
+    parser.add_argument("--models", type=int, default=10, help="Jumlah model per worker (salinan file)")
+    args = parser.parse_args()
+
+    model_path = args.model or next(
+        (os.path.join(backend_dir, p) for p in DEFAULT_MODELS if os.path.exists(os.path.join(backend_dir, p))),
+        None
+    )
+    if model_path is None:
+        sys.exit("Model tidak ditemukan; latih model dulu atau pakai --model")
+
+    work_dir = tempfile.mkdtemp(prefix="worker_memory_")
+    # Cache terpisah supaya hasil tidak dipengaruhi entry lama
+    os.environ["SHARED_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    try:
+        extension = os.path.splitext(model_path)[1]
+        paths = []
+        for i in range(args.models):
+            path = os.path.join(work_dir, f"model_{i}{extension}")
+            shutil.copyfile(model_path, path)
+            paths.append(path)
+
+        print(f"🧠 Worker memory report: {os.path.relpath(model_path, backend_dir)}")
+        print(f"   {args.workers} workers x {args.models} models")
+        print("=" * 70)
+        print(f"{'mode':8} {'RSS +MB/worker':>15} {'PSS +MB/worker':>15} {'private +MB/worker':>19} {'total PSS MB':>13}")
+        for mode in ("copy", "shared"):
+            summary = summarize(run_workers(mode, paths, args.workers))
+            print(
+                f"{mode:8} {summary['rss']:15.1f} {summary['pss']:15.1f} "
+                f"{summary['private']:19.1f} {summary['total_pss']:13.1f}"
+            )
+        print("\nPSS/private = memori yang benar-benar ditambahkan tiap worker; halaman shared dihitung sekali")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
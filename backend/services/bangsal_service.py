@@ -4,6 +4,8 @@ Bangsal Service
 Business logic for bangsal (hospital ward) management
 """
 
+import base64
+import binascii
 import json
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
@@ -14,8 +16,23 @@ from schemas.bangsal import (
     CapacityUpdate, OccupancyStats, BangsalFilter
 )
 from models.bangsal import Bangsal, KamarBangsal
+from services.occupancy_index import occupancy_index
 from core.logging_config import logger
 
+def _encode_cursor(nama_bangsal: str, bangsal_id: int) -> str:
+    """Opaque keyset cursor for the (nama_bangsal, id) listing order"""
+    raw = json.dumps([nama_bangsal, bangsal_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        nama_bangsal, bangsal_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValueError("Cursor tidak valid")
+    if not isinstance(nama_bangsal, str) or not isinstance(bangsal_id, int):
+        raise ValueError("Cursor tidak valid")
+    return nama_bangsal, bangsal_id
+
 class BangsalService:
     def __init__(self, db: Session):
         self.db = db
@@ -100,26 +117,29 @@ class BangsalService:
         per_page: int = 20,
         include_inactive: bool = False,
         search: Optional[str] = None,
-        filters: Optional[BangsalFilter] = None
+        filters: Optional[BangsalFilter] = None,
+        cursor: Optional[str] = None
     ) -> BangsalList:
-        """Get paginated list of bangsal"""
+        """
+        Get paginated list of bangsal
+
+        Pages are ordered by (nama_bangsal, id). When `cursor` (the
+        next_cursor of the previous response) is given, the page is fetched
+        by keyset instead of OFFSET; `page` is then unknown and returned as
+        None (`pages` is still the total page count).
+        """
         try:
-            skip = (page - 1) * per_page
-            
-            if search:
-                bangsal_list = self.bangsal_repo.search_bangsal(
-                    search, skip=skip, limit=per_page, include_inactive=include_inactive
-                )
-                total = len(self.bangsal_repo.search_bangsal(search, skip=0, limit=1000, include_inactive=include_inactive))
-            elif filters:
-                filter_dict = filters.model_dump(exclude_unset=True)
-                bangsal_list = self.bangsal_repo.filter_bangsal(filter_dict, skip=skip, limit=per_page)
-                total = len(self.bangsal_repo.filter_bangsal(filter_dict, skip=0, limit=1000))
-            else:
-                bangsal_list = self.bangsal_repo.get_all_bangsal(
-                    skip=skip, limit=per_page, include_inactive=include_inactive
-                )
-                total = self.bangsal_repo.count_bangsal({'is_active': True} if not include_inactive else {})
+            after = _decode_cursor(cursor) if cursor else None
+            filter_dict = filters.model_dump(exclude_unset=True, exclude_none=True) if filters else None
+            
+            bangsal_list, total = self.bangsal_repo.list_bangsal_page(
+                limit=per_page,
+                after=after,
+                skip=0 if after else (page - 1) * per_page,
+                search_term=search,
+                filters=filter_dict,
+                include_inactive=include_inactive
+            )
             
             # Convert to response format
             bangsal_responses = []
@@ -131,12 +151,18 @@ class BangsalService:
             
             pages = (total + per_page - 1) // per_page
             
+            next_cursor = None
+            if len(bangsal_list) == per_page:
+                last = bangsal_list[-1]
+                next_cursor = _encode_cursor(last.nama_bangsal, last.id)
+            
             return BangsalList(
                 total=total,
-                page=page,
+                page=None if after else page,
                 per_page=per_page,
                 pages=pages,
-                bangsal=bangsal_responses
+                bangsal=bangsal_responses,
+                next_cursor=next_cursor
             )
             
         except Exception as e:
@@ -261,52 +287,20 @@ class BangsalService:
 
     # Specialized Queries
     async def get_emergency_ready_bangsal(self) -> List[BangsalSummary]:
-        """Get bangsal ready for emergency admissions"""
+        """Get bangsal ready for emergency admissions (served from the occupancy index)"""
         try:
-            bangsal_list = self.bangsal_repo.get_emergency_ready_bangsal()
-            
-            summaries = []
-            for bangsal in bangsal_list:
-                summaries.append(BangsalSummary(
-                    id=bangsal.id,
-                    nama_bangsal=bangsal.nama_bangsal,
-                    kode_bangsal=bangsal.kode_bangsal,
-                    kapasitas_total=bangsal.kapasitas_total,
-                    tempat_tidur_tersedia=bangsal.tempat_tidur_tersedia,
-                    tempat_tidur_terisi=bangsal.tempat_tidur_terisi,
-                    occupancy_rate=bangsal.occupancy_rate,
-                    jenis_bangsal=bangsal.jenis_bangsal,
-                    is_active=bangsal.is_active,
-                    is_emergency_ready=bangsal.is_emergency_ready
-                ))
-            
-            return summaries
+            occupancy_index.ensure_loaded(self.db)
+            return [BangsalSummary(**ward) for ward in occupancy_index.get_emergency_ready_bangsal()]
             
         except Exception as e:
             logger.error(f"Error getting emergency ready bangsal: {str(e)}")
             raise
 
     async def get_available_bangsal(self, min_beds: int = 1) -> List[BangsalSummary]:
-        """Get bangsal with available beds"""
+        """Get bangsal with available beds (served from the occupancy index)"""
         try:
-            bangsal_list = self.bangsal_repo.get_available_bangsal(min_beds)
-            
-            summaries = []
-            for bangsal in bangsal_list:
-                summaries.append(BangsalSummary(
-                    id=bangsal.id,
-                    nama_bangsal=bangsal.nama_bangsal,
-                    kode_bangsal=bangsal.kode_bangsal,
-                    kapasitas_total=bangsal.kapasitas_total,
-                    tempat_tidur_tersedia=bangsal.tempat_tidur_tersedia,
-                    tempat_tidur_terisi=bangsal.tempat_tidur_terisi,
-                    occupancy_rate=bangsal.occupancy_rate,
-                    jenis_bangsal=bangsal.jenis_bangsal,
-                    is_active=bangsal.is_active,
-                    is_emergency_ready=bangsal.is_emergency_ready
-                ))
-            
-            return summaries
+            occupancy_index.ensure_loaded(self.db)
+            return [BangsalSummary(**ward) for ward in occupancy_index.get_available_bangsal(min_beds)]
             
         except Exception as e:
             logger.error(f"Error getting available bangsal: {str(e)}")
@@ -342,8 +336,8 @@ class BangsalService:
     async def get_occupancy_statistics(self) -> OccupancyStats:
         """Get overall occupancy statistics"""
         try:
-            stats = self.bangsal_repo.get_occupancy_statistics()
-            return OccupancyStats(**stats)
+            occupancy_index.ensure_loaded(self.db)
+            return OccupancyStats(**occupancy_index.get_occupancy_statistics())
             
         except Exception as e:
             logger.error(f"Error getting occupancy statistics: {str(e)}")
@@ -352,7 +346,8 @@ class BangsalService:
     async def get_department_statistics(self) -> List[Dict[str, Any]]:
         """Get statistics by department"""
         try:
-            return self.bangsal_repo.get_department_statistics()
+            occupancy_index.ensure_loaded(self.db)
+            return occupancy_index.get_department_statistics()
             
         except Exception as e:
             logger.error(f"Error getting department statistics: {str(e)}")
@@ -403,6 +398,7 @@ class BangsalService:
             if bangsal and bangsal.kamar_list:
                 bangsal.update_capacity_from_rooms()
                 self.db.commit()
+                occupancy_index.apply_bangsal([bangsal])
                 
         except Exception as e:
             logger.error(f"Error syncing room capacities for bangsal {bangsal_id}: {str(e)}")
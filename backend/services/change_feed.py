@@ -0,0 +1,302 @@
+# backend/services/change_feed.py
+"""
+Change Feed Service
+In-process consumers of change_log (see database/change_capture.py)
+
+Derived structures (caches, in-memory indexes, aggregates, incremental
+models) subscribe instead of rescanning their tables:
+
+    change_feed.subscribe("my_cache", handler, tables=("sensus_harian",))
+
+`handler(db, changes)` receives batches of changes in sequence order, each
+a dict with seq, table, row_id, operation, changes ({field: [old, new]},
+unit-of-work updates only) and data (row after insert/update, before
+delete). The consumer's offset advances only after the handler returns,
+so delivery is at-least-once and handlers must be idempotent.
+
+Durable consumers keep their offset in change_consumer_offset and resume
+from it after a restart. Non-durable consumers (per-process caches that are
+rebuilt on start) begin at the newest sequence number when the dispatcher
+starts and keep their offset in memory.
+
+The dispatcher thread polls every POLL_SECONDS and is woken right after
+any commit in this process that wrote change_log rows; changes committed by
+other workers arrive with the next poll.
+
+Retention: `ChangeFeed.prune` compacts the log up to a watermark below every
+durable consumer's offset and older than RETENTION_DAYS (the margin for the
+in-memory offsets of other workers). Entries superseded by a newer change of
+the same row, and tombstones, are deleted; the latest change of every live
+row is kept, so row versions (services/sync_service.py) stay stable. A
+reader positioned before the watermark (`pruned_seq`) may have missed
+changes and must resync from a snapshot; a new durable consumer replays the
+compacted log.
+"""
+
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import exists, func, or_
+from sqlalchemy.orm import Session, aliased
+
+from core.logging_config import log_error, logger
+from database.change_capture import ID_BATCH_SIZE, add_commit_listener
+from database.session import SessionLocal
+from models.change_log import ChangeConsumerOffset, ChangeLogEntry, ChangeLogRetention
+
+BATCH_SIZE = 500
+POLL_SECONDS = 5.0
+
+# Minimum age of change_log entries before they may be compacted
+RETENTION_DAYS = 7
+
+ChangeHandler = Callable[[Session, List[Dict[str, Any]]], None]
+
+
+def _change_dict(entry: ChangeLogEntry) -> Dict[str, Any]:
+    return {
+        "seq": entry.seq,
+        "table": entry.table_name,
+        "row_id": entry.row_id,
+        "operation": entry.operation,
+        "changes": json.loads(entry.changes) if entry.changes else None,
+        "data": json.loads(entry.data) if entry.data else None,
+        "created_at": entry.created_at.isoformat() if entry.created_at else None
+    }
+
+
+def pruned_seq(db: Session) -> int:
+    """Watermark of the last compaction; changes up to it may be missing from the log"""
+    row = db.get(ChangeLogRetention, 1)
+    return (row.pruned_seq or 0) if row is not None else 0
+
+
+def latest_seq(db: Session) -> int:
+    # The newest entry may be a pruned tombstone; the watermark still counts as issued
+    return max(db.query(func.max(ChangeLogEntry.seq)).scalar() or 0, pruned_seq(db))
+
+
+def read_changes(
+    db: Session,
+    after_seq: int = 0,
+    tables: Optional[Sequence[str]] = None,
+    limit: int = BATCH_SIZE
+) -> List[Dict[str, Any]]:
+    """Changes with seq > after_seq, oldest first"""
+    query = db.query(ChangeLogEntry).filter(ChangeLogEntry.seq > after_seq)
+    if tables:
+        query = query.filter(ChangeLogEntry.table_name.in_(list(tables)))
+    return [_change_dict(entry) for entry in query.order_by(ChangeLogEntry.seq).limit(limit)]
+
+
+@dataclass
+class Subscription:
+    name: str
+    handler: ChangeHandler
+    tables: Optional[Sequence[str]]
+    batch_size: int
+    durable: bool
+    offset: Optional[int] = None      # In-memory offset of non-durable consumers
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ChangeFeed:
+    """Registry of consumers plus the dispatcher thread"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        add_commit_listener(self._wakeup.set)
+
+    def subscribe(
+        self,
+        name: str,
+        handler: ChangeHandler,
+        tables: Optional[Sequence[str]] = None,
+        batch_size: int = BATCH_SIZE,
+        durable: bool = True
+    ) -> Subscription:
+        if name in self._subscriptions:
+            raise ValueError(f"Consumer '{name}' sudah terdaftar")
+        subscription = Subscription(name, handler, tuple(tables) if tables else None, batch_size, durable)
+        self._subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name: str):
+        self._subscriptions.pop(name, None)
+
+    def _offset_row(self, db: Session, name: str) -> ChangeConsumerOffset:
+        row = db.get(ChangeConsumerOffset, name)
+        if row is None:
+            row = ChangeConsumerOffset(consumer=name, last_seq=0, processed=0)
+            db.add(row)
+            db.flush()
+        return row
+
+    def poll(self, name: str, max_batches: Optional[int] = None) -> int:
+        """
+        Deliver pending changes to one consumer until it is caught up
+
+        Returns the number of changes processed. A failing handler stops the
+        poll; its batch is delivered again on the next poll.
+        """
+        subscription = self._subscriptions[name]
+        if not subscription.lock.acquire(blocking=False):
+            return 0  # Already being polled by another thread
+
+        db = self._session_factory()
+        processed, batches = 0, 0
+        try:
+            if subscription.durable:
+                offset_row = self._offset_row(db, name)
+                offset = offset_row.last_seq or 0
+            else:
+                if subscription.offset is None:
+                    subscription.offset = latest_seq(db)
+                offset = subscription.offset
+
+            while max_batches is None or batches < max_batches:
+                changes = read_changes(db, offset, subscription.tables, subscription.batch_size)
+                if not changes:
+                    break
+                try:
+                    subscription.handler(db, changes)
+                except Exception as e:
+                    db.rollback()
+                    log_error("CHANGE_FEED", f"Consumer {name} gagal pada seq {changes[0]['seq']}: {str(e)}")
+                    if subscription.durable:
+                        offset_row = self._offset_row(db, name)
+                        offset_row.last_error = str(e)
+                        db.commit()
+                    break
+
+                offset = changes[-1]["seq"]
+                processed += len(changes)
+                batches += 1
+                if subscription.durable:
+                    offset_row = self._offset_row(db, name)
+                    offset_row.last_seq = offset
+                    offset_row.processed = (offset_row.processed or 0) + len(changes)
+                    offset_row.last_error = None
+                    db.commit()
+                else:
+                    subscription.offset = offset
+            return processed
+        finally:
+            db.close()
+            subscription.lock.release()
+
+    def poll_all(self) -> Dict[str, int]:
+        results = {}
+        for name in list(self._subscriptions):
+            try:
+                results[name] = self.poll(name)
+            except Exception as e:
+                log_error("CHANGE_FEED", f"Poll {name} gagal: {str(e)}")
+        return results
+
+    def offsets(self, db: Session) -> List[Dict[str, Any]]:
+        """Position of every registered consumer relative to the newest change"""
+        latest = latest_seq(db)
+        stored = {row.consumer: row for row in db.query(ChangeConsumerOffset).all()}
+        result = []
+        for name, subscription in self._subscriptions.items():
+            last = (stored[name].last_seq if name in stored else 0) if subscription.durable else subscription.offset
+            result.append({
+                "consumer": name,
+                "durable": subscription.durable,
+                "tables": list(subscription.tables) if subscription.tables else None,
+                "last_seq": last,
+                "lag": latest - last if last is not None else None,
+                "last_error": stored[name].last_error if name in stored else None
+            })
+        return result
+
+    def prune(self, db: Session, retention_days: int = RETENTION_DAYS, batch_size: int = ID_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Compact change_log up to the minimum durable offset and the retention cutoff
+
+        Deletes, in batches of one commit each, entries at or below the
+        watermark that are superseded by a newer change of the same row, and
+        tombstones. Durable consumers registered in this process but without
+        a stored offset yet hold the watermark at 0.
+        """
+        stored = {row.consumer: row.last_seq or 0 for row in db.query(ChangeConsumerOffset).all()}
+        for name, subscription in self._subscriptions.items():
+            if subscription.durable:
+                stored.setdefault(name, 0)
+
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        bound = db.query(func.max(ChangeLogEntry.seq)).filter(ChangeLogEntry.created_at < cutoff).scalar() or 0
+        if stored:
+            bound = min(bound, min(stored.values()))
+
+        retention = db.get(ChangeLogRetention, 1)
+        if retention is None:
+            retention = ChangeLogRetention(id=1, pruned_seq=0, pruned_rows=0)
+            db.add(retention)
+        if bound <= (retention.pruned_seq or 0):
+            db.commit()
+            return {"pruned_seq": retention.pruned_seq or 0, "deleted": 0}
+
+        newer = aliased(ChangeLogEntry)
+        superseded = exists().where(
+            newer.table_name == ChangeLogEntry.table_name,
+            newer.row_id == ChangeLogEntry.row_id,
+            newer.seq > ChangeLogEntry.seq
+        )
+        query = (
+            db.query(ChangeLogEntry.seq)
+            .filter(ChangeLogEntry.seq <= bound, or_(ChangeLogEntry.operation == "delete", superseded))
+            .order_by(ChangeLogEntry.seq)
+        )
+        # Publish the watermark first: a reader between two batches must already resync
+        retention.pruned_seq = bound
+        retention.pruned_at = datetime.utcnow()
+        db.commit()
+
+        deleted = 0
+        while True:
+            seqs = [seq for (seq,) in query.limit(batch_size).all()]
+            if not seqs:
+                break
+            db.query(ChangeLogEntry).filter(ChangeLogEntry.seq.in_(seqs)).delete(synchronize_session=False)
+            retention = db.get(ChangeLogRetention, 1)
+            retention.pruned_rows = (retention.pruned_rows or 0) + len(seqs)
+            db.commit()
+            deleted += len(seqs)
+        return {"pruned_seq": bound, "deleted": deleted}
+
+    # Dispatcher
+    def _run(self):
+        # Non-durable consumers start at the current end of the log
+        for name in list(self._subscriptions):
+            self.poll(name, max_batches=0)
+        while not self._stop.is_set():
+            self._wakeup.wait(POLL_SECONDS)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            self.poll_all()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+        logger.info(f"Change feed dispatcher started: {len(self._subscriptions)} consumers")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+
+# Singleton instance for global use
+change_feed = ChangeFeed()
@@ -0,0 +1,264 @@
+# backend/services/forecast_ledger.py
+"""
+Forecast accuracy ledger
+
+Every forecast served by /prediksi, /sarima/predict and the scheduler is
+recorded once per (source, model version, origin date, target date). When the
+SensusHarian row for a target date is written, the matching ledger entries are
+scored and the running sums in forecast_accuracy are updated in place, so the
+cost per new actual is O(forecasts for that date), independent of history.
+A corrected actual first reverses its earlier contribution.
+
+Drift: per horizon, the recent MAE is compared with the model version's
+lifetime MAE, and interval coverage with its nominal level. The recent MAE is
+read from the ledger (the RECENT_WINDOW latest scored target dates), so
+corrected and deleted actuals and late imports never leave stale errors in it.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.forecast_ledger import ForecastAccuracy, ForecastLedgerEntry
+from models.sensus import SensusHarian
+
+# Scored target dates (latest first) in the recent MAE
+RECENT_WINDOW = 14
+
+# Drift rules (per horizon, only with enough scored forecasts)
+DRIFT_MIN_SAMPLES = 14
+DRIFT_MAE_RATIO = 1.5          # recent MAE > 1.5x lifetime MAE
+DRIFT_COVERAGE_TOLERANCE = 0.15  # coverage more than 15 points below nominal
+
+SOURCES = ("prediksi", "sarima")
+
+
+def record_forecast(
+    db: Session,
+    source: str,
+    model_version: str,
+    origin_date: date,
+    values: Sequence[float],
+    lower: Optional[Sequence[float]] = None,
+    upper: Optional[Sequence[float]] = None,
+    interval_level: Optional[float] = None
+) -> int:
+    """
+    Store a forecast for origin_date + 1 .. origin_date + len(values)
+
+    Re-issuing the same forecast (same model version and origin) is a no-op.
+    Targets whose actual already exists are scored right away.
+    Returns the number of new entries.
+    """
+    targets = [origin_date + timedelta(days=h) for h in range(1, len(values) + 1)]
+    existing = {
+        row.target_date for row in db.query(ForecastLedgerEntry.target_date).filter(
+            ForecastLedgerEntry.source == source,
+            ForecastLedgerEntry.model_version == model_version,
+            ForecastLedgerEntry.origin_date == origin_date,
+            ForecastLedgerEntry.target_date.in_(targets)
+        )
+    }
+
+    new_entries = []
+    for i, target in enumerate(targets):
+        if target in existing:
+            continue
+        new_entries.append(ForecastLedgerEntry(
+            source=source,
+            model_version=model_version,
+            origin_date=origin_date,
+            target_date=target,
+            horizon=i + 1,
+            predicted=float(values[i]),
+            lower=float(lower[i]) if lower is not None else None,
+            upper=float(upper[i]) if upper is not None else None,
+            interval_level=interval_level if lower is not None else None
+        ))
+
+    if new_entries:
+        db.add_all(new_entries)
+        db.flush()
+        actuals = dict(
+            db.query(SensusHarian.tanggal, SensusHarian.bor).filter(
+                SensusHarian.tanggal.in_([entry.target_date for entry in new_entries]),
+                SensusHarian.bor.isnot(None)
+            ).all()
+        )
+        stats_cache = {}
+        for entry in new_entries:
+            if entry.target_date in actuals:
+                _score_entry(db, entry, actuals[entry.target_date], stats_cache)
+    db.commit()
+    return len(new_entries)
+
+
+def _get_stats(db: Session, entry: ForecastLedgerEntry, cache: Dict) -> ForecastAccuracy:
+    key = (entry.source, entry.model_version, entry.horizon)
+    stats = cache.get(key)
+    if stats is None:
+        stats = db.get(ForecastAccuracy, key)
+        if stats is None:
+            stats = ForecastAccuracy(
+                source=entry.source, model_version=entry.model_version, horizon=entry.horizon,
+                n=0, abs_error_sum=0.0, sq_error_sum=0.0, ape_sum=0.0, ape_count=0,
+                interval_count=0, covered_count=0, nominal_level_sum=0.0
+            )
+            db.add(stats)
+        cache[key] = stats
+    return stats
+
+
+def _accumulate(stats: ForecastAccuracy, entry: ForecastLedgerEntry, actual: float, sign: int):
+    """Add (sign=1) or remove (sign=-1) one scored forecast from the running sums"""
+    error = actual - entry.predicted
+    stats.n += sign
+    stats.abs_error_sum += sign * abs(error)
+    stats.sq_error_sum += sign * error * error
+    if actual != 0:
+        stats.ape_sum += sign * abs(error) / abs(actual) * 100
+        stats.ape_count += sign
+    if entry.lower is not None and entry.upper is not None:
+        stats.interval_count += sign
+        stats.covered_count += sign * int(entry.lower <= actual <= entry.upper)
+        stats.nominal_level_sum += sign * (entry.interval_level or 0.0)
+
+
+def _score_entry(db: Session, entry: ForecastLedgerEntry, actual: float, cache: Dict):
+    stats = _get_stats(db, entry, cache)
+    if entry.actual is not None:
+        if entry.actual == actual:
+            return
+        # Corrected actual: reverse the earlier contribution first
+        _accumulate(stats, entry, entry.actual, -1)
+    _accumulate(stats, entry, actual, 1)
+    entry.actual = actual
+    entry.scored_at = datetime.utcnow()
+
+
+def score_actual(db: Session, tanggal: date, actual: Optional[float]) -> int:
+    """Score every forecast for `tanggal` against a newly written actual BOR"""
+    if actual is None:
+        return unscore_actual(db, tanggal)
+
+    entries = db.query(ForecastLedgerEntry).filter(ForecastLedgerEntry.target_date == tanggal).all()
+    stats_cache = {}
+    for entry in entries:
+        _score_entry(db, entry, float(actual), stats_cache)
+    db.commit()
+    return len(entries)
+
+
+def unscore_actual(db: Session, tanggal: date) -> int:
+    """Remove the scores for `tanggal` (sensus row deleted or BOR cleared)"""
+    entries = db.query(ForecastLedgerEntry).filter(
+        ForecastLedgerEntry.target_date == tanggal,
+        ForecastLedgerEntry.actual.isnot(None)
+    ).all()
+    stats_cache = {}
+    for entry in entries:
+        _accumulate(_get_stats(db, entry, stats_cache), entry, entry.actual, -1)
+        entry.actual = None
+        entry.scored_at = None
+    db.commit()
+    return len(entries)
+
+
+def score_pending(db: Session) -> int:
+    """
+    Score entries whose actual exists but was not (or differently) scored
+
+    Catches sensus rows written outside the API (imports, scripts).
+    """
+    rows = db.query(ForecastLedgerEntry, SensusHarian.bor).join(
+        SensusHarian, SensusHarian.tanggal == ForecastLedgerEntry.target_date
+    ).filter(
+        SensusHarian.bor.isnot(None),
+        (ForecastLedgerEntry.actual.is_(None)) | (ForecastLedgerEntry.actual != SensusHarian.bor)
+    ).all()
+    stats_cache = {}
+    for entry, actual in rows:
+        _score_entry(db, entry, float(actual), stats_cache)
+    db.commit()
+    return len(rows)
+
+
+def _latest_versions(db: Session) -> Dict[str, str]:
+    """Most recently issued model version per source"""
+    latest = {}
+    rows = db.query(
+        ForecastLedgerEntry.source, ForecastLedgerEntry.model_version, func.max(ForecastLedgerEntry.issued_at)
+    ).group_by(ForecastLedgerEntry.source, ForecastLedgerEntry.model_version).all()
+    for source, model_version, issued_at in rows:
+        if source not in latest or issued_at > latest[source][1]:
+            latest[source] = (model_version, issued_at)
+    return {source: value[0] for source, value in latest.items()}
+
+
+def _recent_errors(db: Session, source: str, model_version: str, horizon: int) -> Dict[str, Any]:
+    """MAE of the RECENT_WINDOW latest scored target dates, and the latest one"""
+    rows = db.query(
+        ForecastLedgerEntry.target_date, ForecastLedgerEntry.predicted, ForecastLedgerEntry.actual
+    ).filter(
+        ForecastLedgerEntry.source == source,
+        ForecastLedgerEntry.model_version == model_version,
+        ForecastLedgerEntry.horizon == horizon,
+        ForecastLedgerEntry.actual.isnot(None)
+    ).order_by(ForecastLedgerEntry.target_date.desc()).limit(RECENT_WINDOW).all()
+    if not rows:
+        return {"recent_mae": None, "last_target_date": None}
+    return {
+        "recent_mae": round(sum(abs(actual - predicted) for _, predicted, actual in rows) / len(rows), 4),
+        "last_target_date": rows[0].target_date.isoformat()
+    }
+
+
+def _drift_reasons(stats: Dict[str, Any]) -> List[str]:
+    reasons = []
+    if stats["n"] < DRIFT_MIN_SAMPLES:
+        return reasons
+    if stats["recent_mae"] is not None and stats["mae"] and stats["recent_mae"] > DRIFT_MAE_RATIO * stats["mae"]:
+        reasons.append(f"recent MAE {stats['recent_mae']:.2f} > {DRIFT_MAE_RATIO}x lifetime MAE {stats['mae']:.2f}")
+    if stats["coverage"] is not None and stats["coverage"] < stats["nominal_coverage"] - DRIFT_COVERAGE_TOLERANCE:
+        reasons.append(f"coverage {stats['coverage']:.0%} below nominal {stats['nominal_coverage']:.0%}")
+    return reasons
+
+
+def get_accuracy(db: Session, source: Optional[str] = None, model_version: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Realized accuracy per horizon, grouped per source and model version
+
+    Without model_version only the latest version of each source is reported.
+    """
+    versions = {source: model_version} if (source and model_version) else _latest_versions(db)
+    if source:
+        versions = {source: versions[source]} if source in versions else {}
+
+    report = []
+    for report_source, version in sorted(versions.items()):
+        horizons = [
+            stats.to_dict() for stats in db.query(ForecastAccuracy).filter(
+                ForecastAccuracy.source == report_source,
+                ForecastAccuracy.model_version == version,
+                ForecastAccuracy.n > 0
+            ).order_by(ForecastAccuracy.horizon)
+        ]
+        for stats in horizons:
+            stats.update(_recent_errors(db, report_source, version, stats["horizon"]))
+            stats["drift"] = _drift_reasons(stats)
+        pending = db.query(func.count(ForecastLedgerEntry.id)).filter(
+            ForecastLedgerEntry.source == report_source,
+            ForecastLedgerEntry.model_version == version,
+            ForecastLedgerEntry.actual.is_(None)
+        ).scalar()
+        report.append({
+            "source": report_source,
+            "model_version": version,
+            "scored_forecasts": sum(stats["n"] for stats in horizons),
+            "pending_forecasts": pending,
+            "drift_detected": any(stats["drift"] for stats in horizons),
+            "horizons": horizons
+        })
+    return report
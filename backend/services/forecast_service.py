@@ -0,0 +1,267 @@
+# backend/services/forecast_service.py
+"""
+Forecast Service
+Model BOR yang dilayani /prediksi (cache per proses), forecast + interval dan pencatatan ke forecast ledger
+
+Dipakai oleh prediksi_router dan job scheduler (record_daily_forecast).
+Diagnostik residual dari training offline (models/train_sarima.py) dibaca
+oleh sarima_router selama model_registry masih kosong.
+"""
+
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from core.logging_config import log_error
+from ml import ensemble
+from ml.diagnostics_artifact import DiagnosticsArtifact
+from ml.forecast_engine import ForecastEngine
+from ml.shared_cache import load_pickle
+from services import forecast_ledger
+
+# Global model cache untuk menghindari load berulang
+_MODEL_CACHE = {
+    "model": None,
+    "model_info": None,
+    "loaded_at": None
+}
+
+# Diagnostik training offline, dibaca ulang hanya jika file berubah
+_DIAGNOSTICS_CACHE = {
+    "version": None,
+    "artifact": None
+}
+
+
+def _find_model_file(filename: str) -> Optional[str]:
+    """Cari file model (support relative dan absolute path)"""
+    possible_paths = [
+        os.path.join("backend/models", filename),
+        os.path.join("models", filename),
+        os.path.join(os.path.dirname(__file__), "../models", filename)
+    ]
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_model_with_cache():
+    """
+    Load SARIMA model dengan caching untuk performa optimal
+    
+    Memakai forecast state (.npz) via ForecastEngine jika ada, sehingga
+    worker API tidak perlu meng-import statsmodels; pickle statsmodels
+    hanya sebagai fallback untuk model lama.
+    """
+    # Cek apakah model sudah di-cache
+    if _MODEL_CACHE["model"] is not None:
+        return _MODEL_CACHE["model"], _MODEL_CACHE["model_info"]
+    
+    state_path = _find_model_file("sarima_forecast_state.npz")
+    model_path = state_path or _find_model_file("sarima_model.pkl")
+    
+    if model_path is None:
+        raise FileNotFoundError("Model SARIMA belum dilatih. Jalankan training terlebih dahulu.")
+    
+    # Training log path
+    training_log_path = os.path.join(os.path.dirname(model_path), "training_log.json")
+    
+    # Load model
+    # Array model dibagi antar worker lewat memory map (ml/shared_cache.py)
+    if state_path:
+        model = ForecastEngine.load(state_path, shared=True)
+    else:
+        # Legacy pickle: unpickling imports statsmodels
+        model = load_pickle(model_path)
+    
+    # Load model info dari training log
+    model_info = None
+    if os.path.exists(training_log_path):
+        with open(training_log_path, 'r') as f:
+            training_log = json.load(f)
+            model_info = {
+                "model_type": training_log.get("model_info", {}).get("model_formula", "SARIMA"),
+                "mape": round(training_log.get("model_performance", {}).get("mape", 0), 2),
+                "rmse": round(training_log.get("model_performance", {}).get("rmse", 0), 2),
+                "mae": round(training_log.get("model_performance", {}).get("mae", 0), 2),
+                "last_trained": training_log.get("training_timestamp", "unknown"),
+                "aic": round(training_log.get("model_statistics", {}).get("aic", 0), 2),
+                "bic": round(training_log.get("model_statistics", {}).get("bic", 0), 2)
+            }
+    else:
+        # Default model info jika training log tidak ada
+        model_info = {
+            "model_type": "SARIMA(1,1,1)(1,0,1)7",
+            "mape": 0.0,
+            "rmse": 0.0,
+            "mae": 0.0,
+            "last_trained": datetime.now().isoformat(),
+            "aic": 0.0,
+            "bic": 0.0
+        }
+    
+    model_info["forecast_origin"] = forecast_origin(model).isoformat()
+    # Versi model untuk forecast ledger: file + waktu modifikasi
+    model_info["model_version"] = (
+        f"{os.path.basename(model_path)}@{datetime.fromtimestamp(os.path.getmtime(model_path)).isoformat(timespec='seconds')}"
+    )
+    
+    # Cache model dan info
+    _MODEL_CACHE["model"] = model
+    _MODEL_CACHE["model_info"] = model_info
+    _MODEL_CACHE["loaded_at"] = datetime.now()
+    
+    return model, model_info
+
+
+def preload_model(include_legacy: bool = False) -> bool:
+    """Muat model ke cache saat startup; False jika belum ada model yang bisa dimuat"""
+    if _find_model_file("sarima_forecast_state.npz") is None:
+        if not include_legacy or _find_model_file("sarima_model.pkl") is None:
+            return False
+    load_model_with_cache()
+    return True
+
+
+def load_ensemble_with_cache():
+    """Ensemble (ml/ensemble.py) + model_info dalam format yang sama dengan load_model_with_cache"""
+    forecaster = ensemble.EnsembleForecaster.load()
+    meta = forecaster.meta
+    weights = ", ".join(f"{member} {weight:.2f}" for member, weight in meta["weights"].items())
+    model_info = {
+        "model_type": f"Ensemble[{meta['weighting']}]({weights})",
+        "mape": round(meta["backtest"]["ensemble_mape"], 2),
+        "rmse": round(meta["backtest"]["ensemble_rmse"], 2),
+        "mae": round(meta["backtest"]["ensemble_mae"], 2),
+        "last_trained": meta["trained_at"],
+        "model_version": forecaster.version,
+        "forecast_origin": forecast_origin(forecaster).isoformat()
+    }
+    return forecaster, model_info
+
+
+def forecast_origin(model) -> date:
+    """
+    Hari terakhir data training: langkah forecast ke-1 adalah hari sesudahnya
+
+    Model hanya dilatih ulang mingguan, jadi origin bukan hari ini.
+    """
+    if isinstance(model, (ForecastEngine, ensemble.EnsembleForecaster)):
+        last_date = model.meta.get("last_date")
+        if last_date:
+            return date.fromisoformat(last_date)
+    else:
+        index = getattr(getattr(model, "model", None), "_index", None)
+        if index is not None and len(index) and hasattr(index[-1], "date"):
+            return index[-1].date()
+    # Model lama tanpa tanggal data: anggap dilatih sampai kemarin
+    return date.today() - timedelta(days=1)
+
+
+def forecast_with_interval(model, steps: int, alpha: float = 0.05):
+    """Prediksi + confidence interval sebagai array, untuk ForecastEngine, ensemble maupun model statsmodels"""
+    if isinstance(model, (ForecastEngine, ensemble.EnsembleForecaster)):
+        result = model.forecast_with_intervals(steps=steps, alpha=alpha)
+        return result["mean"], result["lower"], result["upper"]
+    
+    forecast_result = model.get_forecast(steps=steps)
+    conf_int = np.asarray(forecast_result.conf_int(alpha=alpha))
+    return np.asarray(forecast_result.predicted_mean), conf_int[:, 0], conf_int[:, 1]
+
+
+def record_forecast_safely(db: Session, model_info: Dict[str, Any], values, lower=None, upper=None,
+                           interval_level: Optional[float] = None):
+    """Catat forecast ke ledger dengan origin = hari terakhir data training; kegagalan tidak boleh menggagalkan prediksi"""
+    try:
+        forecast_ledger.record_forecast(
+            db, "prediksi", model_info["model_version"], date.fromisoformat(model_info["forecast_origin"]),
+            values, lower, upper, interval_level
+        )
+    except Exception as e:
+        db.rollback()
+        log_error("FORECAST_LEDGER", f"Failed to record forecast: {str(e)}")
+
+
+def forecast_dates(model_info: Dict[str, Any], steps: int) -> List[str]:
+    """Tanggal prediksi mulai sehari setelah origin forecast (YYYY-MM-DD)"""
+    origin = date.fromisoformat(model_info["forecast_origin"])
+    return [(origin + timedelta(days=i + 1)).strftime("%Y-%m-%d") for i in range(steps)]
+
+
+def load_offline_diagnostics() -> Optional[DiagnosticsArtifact]:
+    """Diagnostik residual yang ditulis models/train_sarima.py, atau None jika tidak ada/rusak"""
+    path = _find_model_file("sarima_diagnostics.npz")
+    if path is None:
+        return None
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    if _DIAGNOSTICS_CACHE["version"] != version:
+        try:
+            artifact = DiagnosticsArtifact.load(path)
+        except Exception as e:
+            log_error("SARIMA_DIAGNOSTICS", f"Failed to load {path}: {str(e)}")
+            artifact = None
+        _DIAGNOSTICS_CACHE.update(version=version, artifact=artifact)
+    return _DIAGNOSTICS_CACHE["artifact"]
+
+
+def clear_model_cache():
+    """Lupakan model yang di-cache (setelah retrain); load berikutnya membaca file baru"""
+    _MODEL_CACHE.update(model=None, model_info=None, loaded_at=None)
+
+
+def retrain_served_model(db: Session) -> Dict[str, Any]:
+    """
+    Latih ulang model yang dilayani /prediksi dengan data sensus terbaru
+
+    Spesifikasi model (order, seasonal_order, fitur kalender) tetap sama; fit
+    ulang memakai pipeline offline (models/train_sarima.py) dan menimpa forecast
+    state, pickle dan training log di direktori model yang sedang dilayani.
+    Cache dikosongkan sehingga request berikutnya memakai versi baru.
+    """
+    # Imported here: training needs statsmodels, the API workers do not
+    from ml.train import load_data_from_db
+    from models import train_sarima
+
+    model, _ = load_model_with_cache()
+    model_path = _find_model_file("sarima_forecast_state.npz") or _find_model_file("sarima_model.pkl")
+    if isinstance(model, ForecastEngine):
+        order, seasonal_order = model.order, model.seasonal_order
+        calendar_spec = model.meta.get("calendar_features")
+    else:
+        order, seasonal_order = tuple(model.model.order), tuple(model.model.seasonal_order)
+        calendar_spec = None
+
+    trainer = train_sarima.SARIMATrainer(os.path.join(os.path.dirname(train_sarima.__file__), "config.yaml"))
+    trainer.model_dir = os.path.dirname(os.path.abspath(model_path))
+    trainer.calendar_spec = calendar_spec
+    trainer.data = load_data_from_db(db)
+    min_points = trainer.config['data']['min_data_points']
+    if trainer.data is None or len(trainer.data) < min_points:
+        raise ValueError(f"Minimum {min_points} hari data BOR diperlukan untuk retrain")
+
+    trainer.preprocess_data()
+    trainer.best_params = {"order": tuple(order), "seasonal_order": tuple(seasonal_order)}
+    trainer.train_final_model()
+    trainer.evaluate_model()
+    trainer.save_model()
+    trainer.save_training_log()
+
+    clear_model_cache()
+    _, model_info = load_model_with_cache()
+    return {
+        "status": "success",
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "model_version": model_info["model_version"],
+        "metrics": trainer.performance_metrics
+    }
+
+
+def model_loaded_at() -> Optional[datetime]:
+    return _MODEL_CACHE["loaded_at"]
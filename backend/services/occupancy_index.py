@@ -0,0 +1,311 @@
+# backend/services/occupancy_index.py
+"""
+Occupancy Index Service
+In-memory per-ward occupancy with department and hospital rollups
+
+Answers the admission-desk queries (available beds, emergency-ready wards,
+occupancy and department statistics) without scanning the bangsal table.
+
+The index lives in each worker's memory. Writes through BangsalRepository
+update the writing worker's index immediately; every other worker (and
+writes from scripts or bulk statements) catches up through the change feed
+(services/change_feed.py) within one dispatcher poll, so a worker may serve
+counts that are a few seconds stale. A full load runs at startup and the
+periodic consistency check repairs drift from raw SQL, which bypasses change
+capture. Listeners receive a delta for every ward that changed, whichever of
+these paths changed it.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.bangsal import Bangsal
+from core.logging_config import logger
+from services.change_feed import change_feed
+
+# Fields tracked per ward
+WARD_FIELDS = (
+    "nama_bangsal", "kode_bangsal", "departemen", "jenis_bangsal",
+    "kapasitas_total", "tempat_tidur_terisi", "tempat_tidur_tersedia",
+    "is_active", "is_emergency_ready"
+)
+
+# Listener signature: (changed wards, hospital rollup)
+OccupancyListener = Callable[[List[Dict[str, Any]], Dict[str, Any]], None]
+
+
+class OccupancyIndex:
+    """
+    Per-ward capacity/occupancy counts kept in memory
+
+    Active wards are also kept in lists sorted by (available beds, id) so
+    "wards with >= N free beds" is a bisect plus a slice instead of a scan.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._listeners: List[OccupancyListener] = []
+        self._reset()
+
+    def _reset(self):
+        self._wards: Dict[int, Dict[str, Any]] = {}
+        self._available: List[Tuple[int, int]] = []        # active wards
+        self._emergency_ready: List[Tuple[int, int]] = []  # active + emergency ready
+        self._departments: Dict[str, Dict[str, int]] = {}
+        self._hospital = {
+            "total_bangsal": 0,
+            "active_bangsal": 0,
+            "total_capacity": 0,
+            "total_occupied": 0,
+            "total_available": 0,
+            "emergency_ready_bangsal": 0
+        }
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def add_listener(self, listener: OccupancyListener):
+        """Register a callback invoked with ward deltas after each change"""
+        self._listeners.append(listener)
+
+    # Loading and consistency
+    @staticmethod
+    def _ward_state(bangsal: Bangsal) -> Dict[str, Any]:
+        state = {field: getattr(bangsal, field) for field in WARD_FIELDS}
+        for field in ("kapasitas_total", "tempat_tidur_terisi", "tempat_tidur_tersedia"):
+            state[field] = state[field] or 0
+        state["is_active"] = bool(state["is_active"])
+        state["is_emergency_ready"] = bool(state["is_emergency_ready"])
+        return state
+
+    @classmethod
+    def _load_states(cls, db: Session) -> Dict[int, Dict[str, Any]]:
+        return {bangsal.id: cls._ward_state(bangsal) for bangsal in db.query(Bangsal).all()}
+
+    def load(self, db: Session):
+        """Full re-sync from the database (single query)"""
+        states = self._load_states(db)
+        with self._lock:
+            self._reset()
+            for ward_id, state in states.items():
+                self._add(ward_id, state)
+            self._loaded = True
+        logger.info(f"Occupancy index loaded: {len(states)} bangsal")
+
+    def ensure_loaded(self, db: Session):
+        """Load the index on first use"""
+        if not self._loaded:
+            self.load(db)
+
+    def check_consistency(self, db: Session, repair: bool = True) -> Dict[str, Any]:
+        """
+        Compare the index against the database
+
+        Returns the wards that drifted; with repair=True the drifted wards
+        are re-synced from the database and listeners get their deltas.
+        """
+        states = self._load_states(db)
+        deltas = []
+        with self._lock:
+            drifted = []
+            for ward_id in set(states) | set(self._wards):
+                expected = states.get(ward_id)
+                actual = self._wards.get(ward_id)
+                if expected != actual:
+                    drifted.append({"id": ward_id, "database": expected, "index": actual})
+
+            if drifted and repair:
+                for ward in drifted:
+                    delta = self._replace(ward["id"], ward["database"])
+                    if delta:
+                        deltas.append(delta)
+                self._loaded = True
+            hospital = self.get_occupancy_statistics()
+
+        if deltas:
+            self._notify(deltas, hospital)
+        if drifted:
+            logger.warning(f"Occupancy index drift detected for {len(drifted)} bangsal (repaired={repair})")
+
+        return {
+            "checked": len(states),
+            "drifted": drifted,
+            "repaired": bool(drifted) and repair
+        }
+
+    # Incremental maintenance (caller holds the lock)
+    def _add(self, ward_id: int, state: Dict[str, Any]):
+        self._wards[ward_id] = state
+        self._apply_rollups(state, sign=1)
+        if state["is_active"]:
+            insort(self._available, (state["tempat_tidur_tersedia"], ward_id))
+            if state["is_emergency_ready"]:
+                insort(self._emergency_ready, (state["tempat_tidur_tersedia"], ward_id))
+
+    def _remove(self, ward_id: int) -> Optional[Dict[str, Any]]:
+        state = self._wards.pop(ward_id, None)
+        if state is None:
+            return None
+        self._apply_rollups(state, sign=-1)
+        key = (state["tempat_tidur_tersedia"], ward_id)
+        for sorted_list in (self._available, self._emergency_ready):
+            position = bisect_left(sorted_list, key)
+            if position < len(sorted_list) and sorted_list[position] == key:
+                sorted_list.pop(position)
+        return state
+
+    def _replace(self, ward_id: int, new_state: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Swap in a ward's new state (None: deleted); returns its delta for listeners, if any"""
+        old_state = self._remove(ward_id)
+        if new_state is None:
+            return {"id": ward_id, "deleted": True} if old_state is not None else None
+        self._add(ward_id, new_state)
+        old_state = old_state or {}
+        changed = {field: value for field, value in new_state.items() if old_state.get(field) != value}
+        return {"id": ward_id, **changed} if changed else None
+
+    def _apply_rollups(self, state: Dict[str, Any], sign: int):
+        hospital = self._hospital
+        hospital["total_bangsal"] += sign
+        if state["is_emergency_ready"]:
+            hospital["emergency_ready_bangsal"] += sign
+
+        if not state["is_active"]:
+            return
+
+        hospital["active_bangsal"] += sign
+        hospital["total_capacity"] += sign * state["kapasitas_total"]
+        hospital["total_occupied"] += sign * state["tempat_tidur_terisi"]
+        hospital["total_available"] += sign * state["tempat_tidur_tersedia"]
+
+        departemen = state["departemen"]
+        if departemen is None:
+            return
+        department = self._departments.setdefault(departemen, {
+            "total_bangsal": 0, "total_capacity": 0, "total_occupied": 0, "total_available": 0
+        })
+        department["total_bangsal"] += sign
+        department["total_capacity"] += sign * state["kapasitas_total"]
+        department["total_occupied"] += sign * state["tempat_tidur_terisi"]
+        department["total_available"] += sign * state["tempat_tidur_tersedia"]
+        if department["total_bangsal"] == 0:
+            del self._departments[departemen]
+
+    # Write-through updates
+    def apply_bangsal(self, bangsal_list: Iterable[Bangsal]):
+        """Apply committed bangsal rows and notify listeners of the changes"""
+        if not self._loaded:
+            # Not loaded yet; the first reader loads fresh state from the DB
+            return
+
+        with self._lock:
+            deltas = []
+            for bangsal in bangsal_list:
+                delta = self._replace(bangsal.id, self._ward_state(bangsal))
+                if delta:
+                    deltas.append(delta)
+            hospital = self.get_occupancy_statistics()
+
+        if deltas:
+            self._notify(deltas, hospital)
+
+    def remove_bangsal(self, bangsal_id: int):
+        """Drop a hard-deleted bangsal and notify listeners"""
+        if not self._loaded:
+            return
+
+        with self._lock:
+            delta = self._replace(bangsal_id, None)
+            if delta is None:
+                return
+            hospital = self.get_occupancy_statistics()
+
+        self._notify([delta], hospital)
+
+    def _notify(self, deltas: List[Dict[str, Any]], hospital: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(deltas, hospital)
+            except Exception as e:
+                logger.error(f"Occupancy listener failed: {str(e)}")
+
+    # Queries
+    def _summary(self, ward_id: int) -> Dict[str, Any]:
+        state = self._wards[ward_id]
+        capacity = state["kapasitas_total"]
+        return {
+            "id": ward_id,
+            **state,
+            "occupancy_rate": (state["tempat_tidur_terisi"] / capacity) * 100 if capacity else 0.0
+        }
+
+    def get_available_bangsal(self, min_beds: int = 1) -> List[Dict[str, Any]]:
+        """Active wards with at least min_beds free, most free beds first"""
+        with self._lock:
+            start = bisect_left(self._available, (min_beds, -1))
+            return [self._summary(ward_id) for _, ward_id in reversed(self._available[start:])]
+
+    def get_emergency_ready_bangsal(self) -> List[Dict[str, Any]]:
+        """Active emergency-ready wards with free beds, most free beds first"""
+        with self._lock:
+            start = bisect_left(self._emergency_ready, (1, -1))
+            return [self._summary(ward_id) for _, ward_id in reversed(self._emergency_ready[start:])]
+
+    def get_occupancy_statistics(self) -> Dict[str, Any]:
+        """Hospital rollup in the same shape as BangsalRepository.get_occupancy_statistics"""
+        with self._lock:
+            hospital = dict(self._hospital)
+        total_capacity = hospital["total_capacity"]
+        occupancy_rate = (hospital["total_occupied"] / total_capacity * 100) if total_capacity > 0 else 0
+        hospital["overall_occupancy_rate"] = round(occupancy_rate, 2)
+        return hospital
+
+    def get_department_statistics(self) -> List[Dict[str, Any]]:
+        """Department rollups in the same shape as BangsalRepository.get_department_statistics"""
+        with self._lock:
+            departments = {name: dict(values) for name, values in self._departments.items()}
+
+        stats = []
+        for departemen, values in sorted(departments.items()):
+            capacity = values["total_capacity"]
+            occupancy_rate = (values["total_occupied"] / capacity * 100) if capacity > 0 else 0
+            stats.append({
+                "departemen": departemen,
+                **values,
+                "occupancy_rate": round(occupancy_rate, 2)
+            })
+        return stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All wards plus the hospital rollup"""
+        with self._lock:
+            return {
+                "wards": [
+                    {"id": ward_id, **state} for ward_id, state in sorted(self._wards.items())
+                ],
+                "hospital": self.get_occupancy_statistics()
+            }
+
+
+# Singleton instance for global use
+occupancy_index = OccupancyIndex()
+
+
+def _apply_bangsal_changes(db: Session, changes: List[Dict[str, Any]]):
+    """Change feed consumer: re-read the wards touched by bangsal writes of any worker"""
+    if not occupancy_index.is_loaded:
+        return
+    ids = {change["row_id"] for change in changes}
+    rows = db.query(Bangsal).filter(Bangsal.id.in_(ids)).all()
+    # Current rows rather than the logged values: redelivered or stale batches are harmless
+    occupancy_index.apply_bangsal(rows)
+    for bangsal_id in ids - {row.id for row in rows}:
+        occupancy_index.remove_bangsal(bangsal_id)
+
+
+change_feed.subscribe("occupancy_index", _apply_bangsal_changes, tables=("bangsal",), durable=False)
@@ -0,0 +1,155 @@
+# backend/services/occupancy_stream.py
+"""
+Occupancy Stream Service
+Real-time bed occupancy events for ward dashboards (Server-Sent Events)
+
+Listens to the in-memory occupancy index and fans out occupancy deltas to
+every connected subscriber. New subscribers receive the current snapshot
+from the index without a DB hit.
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from models.bangsal import KamarBangsal
+from services.occupancy_index import occupancy_index, OccupancyIndex
+
+# Seconds between keep-alive comments on idle streams
+HEARTBEAT_SECONDS = 15.0
+
+
+class _Subscriber:
+    """One connected dashboard: its event loop and bounded frame queue"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagging = False
+
+    def deliver(self, frame: str):
+        """Runs on the subscriber's loop; drops frames for slow consumers"""
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Consumer fell behind: it will be resynced with a fresh snapshot
+            self.lagging = True
+
+
+class OccupancyStream:
+    """Publish/subscribe fan-out of occupancy index changes"""
+
+    def __init__(self, index: OccupancyIndex, queue_size: int = 100):
+        self._lock = threading.Lock()
+        self._index = index
+        self._queue_size = queue_size
+        self._subscribers: List[_Subscriber] = []
+        self._sequence = 0
+        index.add_listener(self.publish_deltas)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current hospital occupancy snapshot"""
+        with self._lock:
+            sequence = self._sequence
+        return {
+            "sequence": sequence,
+            "timestamp": datetime.utcnow().isoformat(),
+            **self._index.snapshot()
+        }
+
+    # Publishing
+    def publish_deltas(self, deltas: List[Dict[str, Any]], hospital: Dict[str, Any]):
+        """Index listener: broadcast changed wards with the new hospital rollup"""
+        with self._lock:
+            self._sequence += 1
+            frame = self._encode("occupancy", {
+                "sequence": self._sequence,
+                "timestamp": datetime.utcnow().isoformat(),
+                "wards": deltas,
+                "hospital": hospital
+            })
+        self._broadcast(frame)
+
+    def publish_room(self, kamar: KamarBangsal):
+        """Broadcast a committed room change (availability per room)"""
+        if not self._subscribers:
+            return
+
+        with self._lock:
+            self._sequence += 1
+            frame = self._encode("room", {
+                "sequence": self._sequence,
+                "timestamp": datetime.utcnow().isoformat(),
+                "room": {
+                    "id": kamar.id,
+                    "bangsal_id": kamar.bangsal_id,
+                    "nomor_kamar": kamar.nomor_kamar,
+                    "kapasitas_kamar": kamar.kapasitas_kamar,
+                    "tempat_tidur_terisi": kamar.tempat_tidur_terisi,
+                    "is_available": kamar.is_available,
+                    "available_beds": kamar.available_beds
+                }
+            })
+        self._broadcast(frame)
+
+    def _broadcast(self, frame: str):
+        # Frame is encoded once and shared by every subscriber queue
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, frame)
+            except RuntimeError:
+                # Event loop already closed
+                self._unsubscribe(subscriber)
+
+    @staticmethod
+    def _encode(event: str, payload: Dict[str, Any]) -> str:
+        return f"id: {payload['sequence']}\nevent: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    # Subscribing
+    def _subscribe(self) -> _Subscriber:
+        subscriber = _Subscriber(asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def _unsubscribe(self, subscriber: _Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def event_stream(self, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+        """
+        SSE frames for one subscriber: the current snapshot first, then
+        occupancy deltas as writes commit
+        """
+        subscriber = self._subscribe()
+        try:
+            yield self._encode("snapshot", self.snapshot())
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if subscriber.lagging:
+                    # Skip queued deltas and resync from the snapshot
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.lagging = False
+                    yield self._encode("snapshot", self.snapshot())
+                    continue
+
+                yield frame
+        finally:
+            self._unsubscribe(subscriber)
+
+
+# Singleton instance for global use
+occupancy_stream = OccupancyStream(occupancy_index)
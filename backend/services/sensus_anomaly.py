@@ -0,0 +1,260 @@
+# backend/services/sensus_anomaly.py
+"""
+Streaming anomaly detector for sensus harian
+
+Every SensusHarian write is scored against running robust statistics per
+indicator, kept in sensus_anomaly_state: an EWMA of the value (location)
+and an EWMA of the absolute residual (scale, x1.2533 ~ standard deviation
+for normal data). The residual absorbed into both is Huber-clipped at
+CLIP_Z scales, so one typo does not drag the baseline along. Scoring and
+updating cost O(indicators) per write, independent of history.
+
+A value is flagged when |value - mean| / scale > THRESHOLD_Z after WARMUP
+days; flags land in sensus_anomaly_flag. Late entries and corrections
+(tanggal not after the newest absorbed day) are scored without touching the
+statistics. The first write with no state replays the whole history once.
+
+Training reads the flags (anomaly_dates) instead of running IQR outlier
+detection over the full series, see SARIMAPredictor.prepare_data.
+
+SensusHarian is hospital-level, so the only scope is "rs"; per-ward scopes
+fit the same tables once sensus carries a bangsal.
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy.orm import Session
+
+from models.sensus import SensusHarian
+from models.sensus_anomaly import SensusAnomalyFlag, SensusAnomalyState
+
+SCOPE = "rs"
+METHOD = "robust_ewma"
+
+# Indicator -> minimum scale (avoids infinite scores on flat stretches)
+INDICATORS: Dict[str, float] = {
+    "bor": 1.0,
+    "los": 0.5,
+    "bto": 0.01,
+    "toi": 0.5,
+    "jml_masuk": 1.0,
+    "jml_keluar": 1.0,
+}
+
+EWMA_ALPHA = 0.1
+WARMUP = 14
+THRESHOLD_Z = 4.0
+CLIP_Z = 2.5
+MAD_TO_SIGMA = 1.2533  # sqrt(pi / 2): E|X - mu| = sigma * sqrt(2 / pi)
+
+
+class _Stats:
+    """In-memory copy of one SensusAnomalyState row"""
+    __slots__ = ("n", "mean", "mean_abs_dev", "last_tanggal")
+
+    def __init__(self, n=0, mean=None, mean_abs_dev=None, last_tanggal=None):
+        self.n = n or 0
+        self.mean = mean
+        self.mean_abs_dev = mean_abs_dev
+        self.last_tanggal = last_tanggal
+
+    def scale(self, indicator: str) -> float:
+        return max(MAD_TO_SIGMA * (self.mean_abs_dev or 0.0), INDICATORS[indicator])
+
+    def score(self, indicator: str, value: float) -> Optional[float]:
+        """Robust z-score, or None during warmup"""
+        if self.n < WARMUP or self.mean is None:
+            return None
+        return (value - self.mean) / self.scale(indicator)
+
+    def absorb(self, indicator: str, value: float, tanggal: date):
+        if self.mean is None:
+            self.mean, self.mean_abs_dev = value, 0.0
+        else:
+            limit = CLIP_Z * self.scale(indicator)
+            residual = min(max(value - self.mean, -limit), limit)
+            self.mean += EWMA_ALPHA * residual
+            self.mean_abs_dev += EWMA_ALPHA * (abs(residual) - self.mean_abs_dev)
+        self.n += 1
+        self.last_tanggal = tanggal
+
+
+def _value(sensus, indicator: str) -> Optional[float]:
+    value = getattr(sensus, indicator, None)
+    return None if value is None else float(value)
+
+
+def _evaluate(stats: Dict[str, _Stats], sensus) -> List[Dict[str, Any]]:
+    """Score one sensus row, absorb it if it is newer than the statistics; returns flags"""
+    flags = []
+    for indicator, s in stats.items():
+        value = _value(sensus, indicator)
+        if value is None:
+            continue
+        score = s.score(indicator, value)
+        if score is not None and abs(score) > THRESHOLD_Z:
+            flags.append({
+                "tanggal": sensus.tanggal,
+                "sensus_id": sensus.id,
+                "indicator": indicator,
+                "value": value,
+                "expected": s.mean,
+                "score": score
+            })
+        if s.last_tanggal is None or sensus.tanggal > s.last_tanggal:
+            s.absorb(indicator, value, sensus.tanggal)
+    return flags
+
+
+def _save_flags(db: Session, flags: Iterable[Dict[str, Any]]):
+    db.add_all(SensusAnomalyFlag(scope=SCOPE, method=METHOD, **flag) for flag in flags)
+
+
+def _save_stats(db: Session, stats: Dict[str, _Stats], rows: Dict[str, SensusAnomalyState]):
+    for indicator, s in stats.items():
+        row = rows.get(indicator)
+        if row is None:
+            row = SensusAnomalyState(scope=SCOPE, indicator=indicator)
+            db.add(row)
+        row.n, row.mean, row.mean_abs_dev, row.last_tanggal = s.n, s.mean, s.mean_abs_dev, s.last_tanggal
+
+
+def rebuild(db: Session) -> Dict[str, Any]:
+    """Replay the whole sensus history: fresh statistics and flags (after bulk imports)"""
+    db.query(SensusAnomalyFlag).filter(SensusAnomalyFlag.scope == SCOPE).delete(synchronize_session=False)
+    db.query(SensusAnomalyState).filter(SensusAnomalyState.scope == SCOPE).delete(synchronize_session=False)
+
+    columns = [getattr(SensusHarian, indicator) for indicator in INDICATORS]
+    stats = {indicator: _Stats() for indicator in INDICATORS}
+    flags, days = [], 0
+    for row in db.query(SensusHarian.id, SensusHarian.tanggal, *columns).order_by(SensusHarian.tanggal).yield_per(1000):
+        flags.extend(_evaluate(stats, row))
+        days += 1
+
+    _save_flags(db, flags)
+    _save_stats(db, stats, {})
+    db.commit()
+    return {"days": days, "flags": len(flags)}
+
+
+def score_entry(db: Session, sensus: SensusHarian) -> List[Dict[str, Any]]:
+    """
+    Score a SensusHarian row that was just created or updated
+
+    Replaces earlier flags of the same date. Returns the flags of that date.
+    """
+    rows = {
+        row.indicator: row for row in
+        db.query(SensusAnomalyState).filter(SensusAnomalyState.scope == SCOPE).all()
+    }
+    if not rows:
+        rebuild(db)
+        return [flag.to_dict() for flag in flags_for_date(db, sensus.tanggal)]
+
+    stats = {
+        indicator: _Stats(row.n, row.mean, row.mean_abs_dev, row.last_tanggal)
+        for indicator, row in rows.items() if indicator in INDICATORS
+    }
+    # Indicators added after the state was built start their own warmup
+    for indicator in INDICATORS:
+        stats.setdefault(indicator, _Stats())
+
+    remove_entry(db, sensus.tanggal, commit=False)
+    flags = _evaluate(stats, sensus)
+    _save_flags(db, flags)
+    _save_stats(db, stats, rows)
+    db.commit()
+    return [flag.to_dict() for flag in flags_for_date(db, sensus.tanggal)]
+
+
+def remove_entry(db: Session, tanggal: date, commit: bool = True) -> int:
+    """
+    Drop the flags of a deleted or re-dated sensus day
+
+    Its contribution to the EWMA statistics decays away and is not reversed.
+    """
+    removed = db.query(SensusAnomalyFlag).filter(
+        SensusAnomalyFlag.scope == SCOPE,
+        SensusAnomalyFlag.tanggal == tanggal
+    ).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+    return removed
+
+
+def flags_for_date(db: Session, tanggal: date) -> List[SensusAnomalyFlag]:
+    return db.query(SensusAnomalyFlag).filter(
+        SensusAnomalyFlag.scope == SCOPE,
+        SensusAnomalyFlag.tanggal == tanggal
+    ).order_by(SensusAnomalyFlag.indicator).all()
+
+
+def list_flags(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    indicator: Optional[str] = None,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    query = db.query(SensusAnomalyFlag).filter(SensusAnomalyFlag.scope == SCOPE)
+    if start_date:
+        query = query.filter(SensusAnomalyFlag.tanggal >= start_date)
+    if end_date:
+        query = query.filter(SensusAnomalyFlag.tanggal <= end_date)
+    if indicator:
+        query = query.filter(SensusAnomalyFlag.indicator == indicator)
+    return [
+        flag.to_dict() for flag in
+        query.order_by(SensusAnomalyFlag.tanggal.desc(), SensusAnomalyFlag.indicator).limit(limit).all()
+    ]
+
+
+def anomaly_dates(
+    db: Session,
+    indicators: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[str, Set[date]]:
+    """
+    Flagged dates per indicator for training
+
+    Only indicators the detector has statistics for are returned; a missing
+    key means "not covered", and the caller falls back to its own outlier
+    handling.
+    """
+    covered = {
+        row.indicator for row in db.query(SensusAnomalyState.indicator).filter(
+            SensusAnomalyState.scope == SCOPE,
+            SensusAnomalyState.indicator.in_(list(indicators)),
+            SensusAnomalyState.n > 0
+        )
+    }
+    result: Dict[str, Set[date]] = {indicator: set() for indicator in covered}
+    if not covered:
+        return result
+
+    query = db.query(SensusAnomalyFlag.indicator, SensusAnomalyFlag.tanggal).filter(
+        SensusAnomalyFlag.scope == SCOPE,
+        SensusAnomalyFlag.indicator.in_(list(covered))
+    )
+    if start_date:
+        query = query.filter(SensusAnomalyFlag.tanggal >= start_date)
+    if end_date:
+        query = query.filter(SensusAnomalyFlag.tanggal <= end_date)
+    for indicator, tanggal in query:
+        result[indicator].add(tanggal)
+    return result
+
+
+def status(db: Session) -> Dict[str, Any]:
+    return {
+        "method": METHOD,
+        "threshold_z": THRESHOLD_Z,
+        "warmup": WARMUP,
+        "ewma_alpha": EWMA_ALPHA,
+        "states": [
+            row.to_dict() for row in
+            db.query(SensusAnomalyState).filter(SensusAnomalyState.scope == SCOPE).order_by(SensusAnomalyState.indicator)
+        ]
+    }
@@ -0,0 +1,264 @@
+# backend/services/sensus_audit.py
+"""
+Sensus Audit Service
+Consistency of the sensus harian time series, kept in memory per worker
+
+SensusCreate validates one row at a time; the census identities span rows:
+
+- continuity: jml_pasien_awal[t] == jml_pasien_akhir[t-1]
+- flow:       jml_pasien_akhir = jml_pasien_awal + jml_masuk - jml_keluar
+- capacity:   jml_pasien_akhir <= tempat_tidur_tersedia
+
+plus gaps (missing days), duplicate dates, missing and negative values.
+`audit_rows` checks a whole block of rows in one vectorized NumPy pass;
+SensusAudit runs it over the full history once and afterwards re-audits
+only the neighbourhood of each written or deleted date (the row itself and
+the next existing day, whose continuity and gap depend on it). Reports by
+date range are a bisect over the issue index, cheap enough for every
+dashboard load. Every ORM write, from any worker or script, arrives through
+the change feed (services/change_feed.py), which is the only incremental
+path; raw SQL that bypasses change capture is caught by the daily safety-net
+reload in tasks/scheduler.py.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.sensus import SensusHarian
+from core.logging_config import logger
+from services.change_feed import change_feed
+
+CHECKS = ("gap", "duplicate", "missing_value", "negative", "continuity", "flow", "capacity")
+
+COUNT_FIELDS = ("jml_pasien_awal", "jml_masuk", "jml_keluar", "jml_pasien_akhir", "tempat_tidur_tersedia")
+
+_COLUMNS = (SensusHarian.id, SensusHarian.tanggal) + tuple(getattr(SensusHarian, field) for field in COUNT_FIELDS)
+
+
+def _issue(day: date, check: str, sensus_id, **detail) -> Dict[str, Any]:
+    return {"tanggal": day.isoformat(), "check": check, "sensus_id": sensus_id, **detail}
+
+
+def _number(value: float):
+    return int(value) if np.isfinite(value) and float(value).is_integer() else float(value)
+
+
+def audit_rows(rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Check rows of (id, tanggal, *COUNT_FIELDS), sorted by tanggal
+
+    The first row is only compared as predecessor of the second; callers
+    auditing a window that starts mid-history drop its own issues.
+    """
+    if not rows:
+        return []
+    ids = [row[0] for row in rows]
+    days = [row[1] for row in rows]
+    ordinals = np.fromiter((day.toordinal() for day in days), dtype=np.int64, count=len(rows))
+    values = np.array(
+        [[np.nan if value is None else value for value in row[2:]] for row in rows], dtype=float
+    ).reshape(len(rows), len(COUNT_FIELDS))
+    awal, masuk, keluar, akhir, tersedia = values.T
+
+    issues: List[Dict[str, Any]] = []
+
+    step = np.diff(ordinals)
+    for i in np.flatnonzero(step > 1) + 1:
+        missing_from = date.fromordinal(int(ordinals[i - 1]) + 1)
+        issues.append(_issue(days[i], "gap", ids[i], missing_from=missing_from.isoformat(),
+                             missing_to=date.fromordinal(int(ordinals[i]) - 1).isoformat(),
+                             missing_days=int(step[i - 1] - 1)))
+    for i in np.flatnonzero(step == 0) + 1:
+        issues.append(_issue(days[i], "duplicate", ids[i], duplicate_of=ids[i - 1]))
+
+    missing = np.isnan(values)
+    for i in np.flatnonzero(missing.any(axis=1)):
+        issues.append(_issue(days[i], "missing_value", ids[i],
+                             fields=[COUNT_FIELDS[j] for j in np.flatnonzero(missing[i])]))
+    negative = values < 0
+    for i in np.flatnonzero(negative.any(axis=1)):
+        issues.append(_issue(days[i], "negative", ids[i],
+                             fields=[COUNT_FIELDS[j] for j in np.flatnonzero(negative[i])]))
+
+    # Comparisons with NaN are False, so rows with missing values are only reported above
+    with np.errstate(invalid="ignore"):
+        continuity = np.zeros(len(rows), dtype=bool)
+        continuity[1:] = (step == 1) & (awal[1:] != akhir[:-1])
+        for i in np.flatnonzero(continuity):
+            issues.append(_issue(days[i], "continuity", ids[i],
+                                 expected=_number(akhir[i - 1]), actual=_number(awal[i])))
+
+        expected_akhir = awal + masuk - keluar
+        for i in np.flatnonzero(akhir != expected_akhir):
+            if np.isnan(expected_akhir[i]) or np.isnan(akhir[i]):
+                continue
+            issues.append(_issue(days[i], "flow", ids[i],
+                                 expected=_number(expected_akhir[i]), actual=_number(akhir[i])))
+
+        for i in np.flatnonzero(akhir > tersedia):
+            issues.append(_issue(days[i], "capacity", ids[i],
+                                 pasien_akhir=_number(akhir[i]), tempat_tidur_tersedia=_number(tersedia[i])))
+    return issues
+
+
+class SensusAudit:
+    """
+    Issues of the sensus history indexed by date
+
+    _days holds every sensus date (sorted ordinals) for row counts per
+    range; _issues maps a date ordinal to its issues, _issue_days is the
+    sorted list of its keys.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._days: List[int] = []
+        self._issues: Dict[int, List[Dict[str, Any]]] = {}
+        self._issue_days: List[int] = []
+        self._loaded_at: Optional[datetime] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _add_issues(self, issues: Iterable[Dict[str, Any]], after: Optional[int] = None):
+        for issue in issues:
+            key = date.fromisoformat(issue["tanggal"]).toordinal()
+            if after is not None and key <= after:
+                continue
+            if key not in self._issues:
+                self._issues[key] = []
+                insort(self._issue_days, key)
+            self._issues[key].append(issue)
+
+    def load(self, db: Session):
+        """Full audit of the history (one query, one vectorized pass)"""
+        rows = db.query(*_COLUMNS).order_by(SensusHarian.tanggal, SensusHarian.id).all()
+        issues = audit_rows(rows)
+        with self._lock:
+            self._reset()
+            self._days = [row[1].toordinal() for row in rows]
+            self._add_issues(issues)
+            self._loaded_at = datetime.now()
+        logger.info(f"Sensus audit loaded: {len(rows)} hari, {len(issues)} temuan")
+
+    def ensure_loaded(self, db: Session):
+        if not self.is_loaded:
+            self.load(db)
+
+    def refresh(self, db: Session, *days: date):
+        """
+        Re-audit after a write or delete of the given dates
+
+        Only the rows between the previous and the next existing day are
+        queried; issues of those dates are replaced. Nothing to do before
+        the first load, which audits the full history anyway.
+        """
+        if not self.is_loaded:
+            return
+        for day in days:
+            if day is None:
+                continue
+            previous = db.query(func.max(SensusHarian.tanggal)).filter(SensusHarian.tanggal < day).scalar()
+            following = db.query(func.min(SensusHarian.tanggal)).filter(SensusHarian.tanggal > day).scalar()
+            query = db.query(*_COLUMNS)
+            if previous is not None:
+                query = query.filter(SensusHarian.tanggal >= previous)
+            if following is not None:
+                query = query.filter(SensusHarian.tanggal <= following)
+            rows = query.order_by(SensusHarian.tanggal, SensusHarian.id).all()
+
+            low = previous.toordinal() + 1 if previous is not None else None
+            high = following.toordinal() if following is not None else None
+            with self._lock:
+                start = bisect_left(self._issue_days, low) if low is not None else 0
+                end = bisect_right(self._issue_days, high) if high is not None else len(self._issue_days)
+                for key in self._issue_days[start:end]:
+                    del self._issues[key]
+                del self._issue_days[start:end]
+                self._add_issues(audit_rows(rows), after=previous.toordinal() if previous is not None else None)
+
+                key = day.toordinal()
+                i = bisect_left(self._days, key)
+                present = any(row[1] == day for row in rows)
+                if present and (i == len(self._days) or self._days[i] != key):
+                    self._days.insert(i, key)
+                elif not present and i < len(self._days) and self._days[i] == key:
+                    del self._days[i]
+
+    def _window(self, start_date: Optional[date], end_date: Optional[date]):
+        low = start_date.toordinal() if start_date else None
+        high = end_date.toordinal() if end_date else None
+        start = bisect_left(self._issue_days, low) if low is not None else 0
+        end = bisect_right(self._issue_days, high) if high is not None else len(self._issue_days)
+        day_start = bisect_left(self._days, low) if low is not None else 0
+        day_end = bisect_right(self._days, high) if high is not None else len(self._days)
+        return self._issue_days[start:end], day_end - day_start
+
+    def summary(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+        """Issue counts per check in a date range"""
+        with self._lock:
+            keys, rows = self._window(start_date, end_date)
+            counts = dict.fromkeys(CHECKS, 0)
+            for key in keys:
+                for issue in self._issues[key]:
+                    counts[issue["check"]] += 1
+        return {
+            "rows": rows,
+            "dates_with_issues": len(keys),
+            "issues": sum(counts.values()),
+            "counts": counts,
+            "consistent": not keys
+        }
+
+    def report(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        checks: Optional[Sequence[str]] = None,
+        limit: int = 500
+    ) -> Dict[str, Any]:
+        """Summary plus the issues (oldest first) of a date range"""
+        wanted = set(checks or CHECKS)
+        with self._lock:
+            keys, _ = self._window(start_date, end_date)
+            issues = [issue for key in keys for issue in self._issues[key] if issue["check"] in wanted]
+            first = date.fromordinal(self._days[0]).isoformat() if self._days else None
+            last = date.fromordinal(self._days[-1]).isoformat() if self._days else None
+        return {
+            "range": {
+                "start": start_date.isoformat() if start_date else first,
+                "end": end_date.isoformat() if end_date else last
+            },
+            **self.summary(start_date, end_date),
+            "returned": min(len(issues), limit),
+            "truncated": len(issues) > limit,
+            "details": issues[:limit],
+            "audited_at": self._loaded_at.isoformat() if self._loaded_at else None
+        }
+
+
+# Singleton instance for global use (one per worker process)
+sensus_audit = SensusAudit()
+
+
+def _apply_sensus_changes(db: Session, changes: List[Dict[str, Any]]):
+    """Change feed consumer: re-audit the dates touched by sensus writes"""
+    days = set()
+    for change in changes:
+        tanggal = (change["data"] or {}).get("tanggal")
+        old = ((change["changes"] or {}).get("tanggal") or [None])[0]
+        days.update(date.fromisoformat(value) for value in (tanggal, old) if value)
+    sensus_audit.refresh(db, *sorted(days))
+
+
+change_feed.subscribe("sensus_audit", _apply_sensus_changes, tables=("sensus_harian",), durable=False)
@@ -0,0 +1,81 @@
+# backend/services/sensus_service.py
+"""
+Sensus Service
+Logika tulis sensus harian yang dipakai bersama oleh sensus_router dan sync_router
+"""
+
+from datetime import date
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from core.logging_config import log_sensus_activity, log_error
+from models.sensus import SensusHarian
+from schemas.sensus import SensusCreate
+from utils.indikator_calculator import indikator_calculator
+from services import forecast_ledger, sensus_anomaly
+
+
+def sensus_values(data: SensusCreate) -> Dict[str, Any]:
+    """Nilai kolom sensus_harian dari input, termasuk indikator hasil kalkulator"""
+    indikator = indikator_calculator.hitung_indikator_harian(
+        data.jml_pasien_awal,
+        data.jml_masuk,
+        data.jml_keluar,
+        data.tempat_tidur_tersedia,
+        data.hari_rawat
+    )
+    return {
+        "tanggal": date.fromisoformat(data.tanggal),
+        "jml_pasien_awal": data.jml_pasien_awal,
+        "jml_masuk": data.jml_masuk,
+        "jml_keluar": data.jml_keluar,
+        "jml_pasien_akhir": indikator["pasien_akhir"],
+        "tempat_tidur_tersedia": data.tempat_tidur_tersedia,
+        "hari_rawat": data.hari_rawat,  # Simpan hari_rawat untuk LOS
+        "bor": indikator["bor"],
+        "los": indikator["los"],
+        "bto": indikator["bto"],
+        "toi": indikator["toi"]
+    }
+
+
+def _update_forecast_ledger(db: Session, scored=None, removed=None):
+    """Skor forecast untuk BOR aktual yang baru ditulis; tidak pernah menggagalkan request"""
+    try:
+        if removed is not None:
+            forecast_ledger.unscore_actual(db, removed)
+        if scored is not None:
+            forecast_ledger.score_actual(db, scored.tanggal, scored.bor)
+    except Exception as e:
+        db.rollback()
+        log_error("FORECAST_LEDGER", str(e))
+
+
+def _score_anomalies(db: Session, scored=None, removed=None):
+    """Skor data sensus baru pada detektor anomali; tidak pernah menggagalkan request"""
+    try:
+        if removed is not None:
+            sensus_anomaly.remove_entry(db, removed)
+        if scored is not None:
+            flags = sensus_anomaly.score_entry(db, scored)
+            if flags:
+                log_sensus_activity("ANOMALY", {
+                    "tanggal": scored.tanggal.isoformat(),
+                    "indikator": {flag["indicator"]: flag["score"] for flag in flags}
+                })
+    except Exception as e:
+        db.rollback()
+        log_error("SENSUS_ANOMALY", str(e))
+
+
+def after_write(db: Session, scored: Optional[SensusHarian] = None, removed: Optional[date] = None):
+    """
+    Perbarui data turunan setelah commit sensus (forecast ledger, anomali)
+
+    scored: baris yang baru dibuat/diubah; removed: tanggal yang tidak lagi
+    berisi data (hapus, atau tanggal lama saat tanggal diubah). Audit sensus
+    diperbarui lewat change feed, tidak di sini.
+    """
+    _update_forecast_ledger(db, scored=scored, removed=removed)
+    _score_anomalies(db, scored=scored, removed=removed)
@@ -0,0 +1,317 @@
+# backend/services/sync_service.py
+"""
+Sync Service
+Delta sync for ward workstations on top of change_log (see database/change_capture.py)
+
+Pull: a client keeps the sync token of its last pull and asks only for the
+rows changed after it. Changes are collapsed per row, so a row edited ten
+times since the last pull is sent once, in its current state; deleted rows
+come back as tombstones. Work per pull is proportional to the number of
+changes, not to the table size. Without a token (first sync), with a token
+newer than the log (e.g. after a database reset) or older than the change_log
+compaction watermark (its changes may have been pruned, see
+services/change_feed.py) the client gets a full snapshot plus the token to
+continue from.
+
+Row versions: every synced row carries `_version`, the sequence number of
+its latest change (0 for rows untouched since change capture was enabled).
+Offline updates and deletes send it back as base_version; a mismatch means
+the row changed on the server in the meantime and the item is reported as a
+conflict with the current row instead of being applied.
+
+Upload: offline-entered sensus data arrives in batches. Each item has a
+client-generated idempotency key; an applied item stores its key and result
+in the same transaction as the write, so a retried upload (e.g. after a
+lost response) returns the stored result instead of writing twice.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.logging_config import log_error
+from database.change_capture import ID_BATCH_SIZE, TRACKED
+from models.change_log import ChangeLogEntry
+from models.sensus import SensusHarian
+from models.sync_upload import SyncUploadKey
+from schemas.sensus import SensusCreate
+from schemas.sync import SensusUploadItem
+from services.change_feed import latest_seq, pruned_seq
+from services.sensus_service import after_write, sensus_values
+
+TABLES = {model.__tablename__: model for model in TRACKED}
+PULL_LIMIT = 500
+APPLIED = ("created", "updated", "deleted")
+
+
+# Tokens
+def encode_token(seq: int) -> str:
+    return str(seq)
+
+
+def decode_token(token: Optional[str]) -> Optional[int]:
+    """Sequence number of a sync token; None means no previous sync"""
+    if token is None or token == "":
+        return None
+    if not token.isdigit():
+        raise ValueError("Sync token tidak valid")
+    return int(token)
+
+
+def _resolve_tables(tables: Optional[Sequence[str]]) -> List[str]:
+    if not tables:
+        return list(TABLES)
+    unknown = sorted(set(tables) - set(TABLES))
+    if unknown:
+        raise ValueError(f"Tabel tidak dikenal: {unknown}. Pilihan: {list(TABLES)}")
+    return list(dict.fromkeys(tables))
+
+
+# Row versions
+def row_versions(db: Session, table: str, ids: Optional[List[int]] = None) -> Dict[int, int]:
+    """Latest change_log sequence number per row (all rows of the table when ids is None)"""
+    query = db.query(ChangeLogEntry.row_id, func.max(ChangeLogEntry.seq)).filter(ChangeLogEntry.table_name == table)
+    if ids is None:
+        return dict(query.group_by(ChangeLogEntry.row_id).all())
+    versions = {}
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        batch = ids[start:start + ID_BATCH_SIZE]
+        versions.update(query.filter(ChangeLogEntry.row_id.in_(batch)).group_by(ChangeLogEntry.row_id).all())
+    return versions
+
+
+def _row_dict(row, version: int) -> Dict[str, Any]:
+    data = {attr.key: getattr(row, attr.key) for attr in row.__mapper__.column_attrs}
+    data["_version"] = version
+    return jsonable_encoder(data)
+
+
+def _rows_by_ids(db: Session, model, ids: List[int]) -> list:
+    rows = []
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        rows.extend(db.query(model).filter(model.id.in_(ids[start:start + ID_BATCH_SIZE])).order_by(model.id).all())
+    return rows
+
+
+# Pull
+def snapshot(db: Session, tables: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """All rows of the requested tables plus the token to continue from"""
+    tables = _resolve_tables(tables)
+    # Read the token first: writes committed while the rows are read come again with the next pull
+    token = latest_seq(db)
+    result = {}
+    for table in tables:
+        model = TABLES[table]
+        versions = row_versions(db, table)
+        rows = db.query(model).order_by(model.id).all()
+        result[table] = {
+            "upserts": [_row_dict(row, versions.get(row.id, 0)) for row in rows],
+            "deletes": []
+        }
+    return {"mode": "full", "token": encode_token(token), "has_more": False, "tables": result}
+
+
+def pull_changes(
+    db: Session,
+    token: Optional[str] = None,
+    tables: Optional[Sequence[str]] = None,
+    limit: int = PULL_LIMIT
+) -> Dict[str, Any]:
+    """
+    Rows changed after the sync token, collapsed per row
+
+    Reads at most `limit` change_log entries; with has_more the client pulls
+    again with the returned token until it is caught up.
+    """
+    since = decode_token(token)
+    tables = _resolve_tables(tables)
+    if since is None or since > latest_seq(db) or since < pruned_seq(db):
+        return snapshot(db, tables)
+
+    entries = (
+        db.query(ChangeLogEntry.seq, ChangeLogEntry.table_name, ChangeLogEntry.row_id, ChangeLogEntry.operation)
+        .filter(ChangeLogEntry.seq > since, ChangeLogEntry.table_name.in_(tables))
+        .order_by(ChangeLogEntry.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Last operation per row within this page
+    latest: Dict[str, Dict[int, Any]] = {table: {} for table in tables}
+    for entry in entries:
+        latest[entry.table_name][entry.row_id] = entry
+
+    result = {}
+    for table, row_entries in latest.items():
+        deletes = [
+            {"id": row_id, "_version": entry.seq}
+            for row_id, entry in row_entries.items() if entry.operation == "delete"
+        ]
+        ids = sorted(row_id for row_id, entry in row_entries.items() if entry.operation != "delete")
+        upserts = []
+        if ids:
+            versions = row_versions(db, table, ids)
+            # Rows deleted after this page are missing here; their tombstone follows in a later page
+            upserts = [_row_dict(row, versions.get(row.id, 0)) for row in _rows_by_ids(db, TABLES[table], ids)]
+        result[table] = {"upserts": upserts, "deletes": deletes}
+
+    return {
+        "mode": "delta",
+        "token": encode_token(entries[-1].seq if entries else since),
+        "has_more": has_more,
+        "changes": len(entries),
+        "tables": result
+    }
+
+
+# Upload
+def _request_hash(item: SensusUploadItem) -> str:
+    payload = json.dumps(item.model_dump(exclude={"idempotency_key"}), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(stored: SyncUploadKey, request_hash: str) -> Dict[str, Any]:
+    if stored.request_hash != request_hash:
+        return {
+            "idempotency_key": stored.idempotency_key,
+            "status": "invalid",
+            "detail": "idempotency_key sudah dipakai untuk data lain"
+        }
+    return {**json.loads(stored.result), "replayed": True}
+
+
+def _sensus_version(db: Session, sensus_id: int) -> int:
+    return row_versions(db, SensusHarian.__tablename__, [sensus_id]).get(sensus_id, 0)
+
+
+def _conflict(db: Session, sensus: Optional[SensusHarian], detail: str) -> Dict[str, Any]:
+    current = _row_dict(sensus, _sensus_version(db, sensus.id)) if sensus is not None else None
+    return {"status": "conflict", "detail": detail, "current": current}
+
+
+def _write_item(db: Session, item: SensusUploadItem) -> Dict[str, Any]:
+    """
+    Apply one item without committing
+
+    Returns the item result; applied results carry `scored`/`removed` for
+    after_write, which the caller strips before storing.
+    """
+    if item.operation == "delete" or item.id is not None:
+        if item.id is None or item.base_version is None:
+            return {"status": "invalid", "detail": "Update/delete membutuhkan id dan base_version"}
+
+    data = None
+    if item.operation == "upsert":
+        if item.data is None:
+            return {"status": "invalid", "detail": "Upsert membutuhkan data"}
+        try:
+            data = SensusCreate.model_validate(item.data)
+        except ValidationError as e:
+            errors = "; ".join(f"{' -> '.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+            return {"status": "invalid", "detail": f"Validasi gagal: {errors}"}
+
+    if item.id is None:
+        values = sensus_values(data)
+        exist = db.query(SensusHarian).filter(SensusHarian.tanggal == values["tanggal"]).first()
+        if exist:
+            return _conflict(db, exist, "Data untuk tanggal ini sudah ada")
+        sensus = SensusHarian(**values)
+        db.add(sensus)
+        db.flush()
+        return {"status": "created", "id": sensus.id, "scored": sensus, "removed": None}
+
+    sensus = db.get(SensusHarian, item.id)
+    if sensus is None:
+        if item.operation == "delete":
+            # Already gone on the server: the intent of the item is satisfied
+            return {"status": "deleted", "id": item.id, "scored": None, "removed": None}
+        return _conflict(db, None, "Data sudah dihapus di server")
+    if _sensus_version(db, sensus.id) != item.base_version:
+        return _conflict(db, sensus, "Data sudah diubah di server sejak sinkronisasi terakhir")
+
+    if item.operation == "delete":
+        tanggal = sensus.tanggal
+        db.delete(sensus)
+        db.flush()
+        return {"status": "deleted", "id": item.id, "scored": None, "removed": tanggal}
+
+    values = sensus_values(data)
+    exist = db.query(SensusHarian).filter(
+        SensusHarian.tanggal == values["tanggal"],
+        SensusHarian.id != sensus.id
+    ).first()
+    if exist:
+        return _conflict(db, exist, "Data untuk tanggal ini sudah ada")
+    old_tanggal = sensus.tanggal
+    for key, value in values.items():
+        setattr(sensus, key, value)
+    db.flush()
+    return {
+        "status": "updated",
+        "id": sensus.id,
+        "scored": sensus,
+        "removed": old_tanggal if old_tanggal != sensus.tanggal else None
+    }
+
+
+def _apply_item(db: Session, item: SensusUploadItem, uploaded_by: Optional[str]) -> Dict[str, Any]:
+    request_hash = _request_hash(item)
+    stored = db.get(SyncUploadKey, item.idempotency_key)
+    if stored is not None:
+        return _replay(stored, request_hash)
+
+    try:
+        result = _write_item(db, item)
+        if result["status"] not in APPLIED:
+            db.rollback()
+            return {"idempotency_key": item.idempotency_key, **result}
+
+        scored, removed = result.pop("scored"), result.pop("removed")
+        if scored is not None:
+            result["row"] = _row_dict(scored, _sensus_version(db, scored.id))
+        result = {"idempotency_key": item.idempotency_key, **result}
+        db.add(SyncUploadKey(
+            idempotency_key=item.idempotency_key,
+            request_hash=request_hash,
+            status=result["status"],
+            row_id=result["id"],
+            result=json.dumps(result),
+            uploaded_by=uploaded_by
+        ))
+        db.commit()
+    except IntegrityError:
+        # The same key committed concurrently by another request
+        db.rollback()
+        stored = db.get(SyncUploadKey, item.idempotency_key)
+        if stored is not None:
+            return _replay(stored, request_hash)
+        log_error("SYNC_UPLOAD", f"Item {item.idempotency_key}: integrity error")
+        return {"idempotency_key": item.idempotency_key, "status": "conflict", "detail": "Data bentrok dengan data lain", "current": None}
+    except Exception as e:
+        db.rollback()
+        log_error("SYNC_UPLOAD", f"Item {item.idempotency_key}: {str(e)}")
+        return {"idempotency_key": item.idempotency_key, "status": "error", "detail": "Gagal menyimpan data"}
+
+    after_write(db, scored=scored, removed=removed)
+    return result
+
+
+def upload_sensus(db: Session, items: List[SensusUploadItem], uploaded_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Apply offline sensus writes in order, one transaction per item
+
+    A conflicting or invalid item does not stop the batch; it is not stored
+    under its key, so the client can resolve it and upload again.
+    """
+    results = [_apply_item(db, item, uploaded_by) for item in items]
+    summary = Counter("replayed" if result.get("replayed") else result["status"] for result in results)
+    return {"results": results, "summary": dict(summary)}
@@ -0,0 +1,240 @@
+# backend/tasks/indikator_backfill.py
+"""
+Resumable indicator backfill
+
+bor/los/bto/toi in sensus_harian are computed once, when the row is
+written. After a formula change in IndikatorCalculator the stored values
+go stale; regenerating the data would wipe the table. `run_backfill`
+recomputes them in place instead:
+
+- rows are read in chunks by id (keyset pagination, id > last_id), and each
+  chunk is recomputed with IndikatorCalculator.hitung_indikator_harian_batch
+  (identical results to the per-row calculator);
+- only rows whose stored values differ are written, with one executemany
+  UPDATE by primary key per chunk;
+- the chunk's UPDATE and the checkpoint (backfill_checkpoint) are committed
+  together, so an interrupted run resumes after the last committed chunk
+  without redoing or skipping rows;
+- afterwards the forecast ledger re-scores corrected BOR actuals and the
+  anomaly detector replays the history.
+
+Run from backend/: python -m tasks.indikator_backfill [--chunk-size N] [--restart] [--dry-run]
+or through POST /indikator/backfill.
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from core.logging_config import log_error, logger
+from database.session import SessionLocal
+from models.backfill_checkpoint import BackfillCheckpoint
+from models.sensus import SensusHarian
+from utils.indikator_calculator import indikator_calculator
+
+JOB_NAME = "indikator_backfill"
+CHUNK_SIZE = 1000
+INDICATOR_FIELDS = ("bor", "los", "bto", "toi")
+
+# One backfill per process; a checkpoint updated this recently means another process is running it
+_run_lock = threading.Lock()
+STALE_SECONDS = 300
+
+_COLUMNS = (
+    SensusHarian.id, SensusHarian.jml_pasien_awal, SensusHarian.jml_masuk, SensusHarian.jml_keluar,
+    SensusHarian.tempat_tidur_tersedia, SensusHarian.hari_rawat,
+    SensusHarian.bor, SensusHarian.los, SensusHarian.bto, SensusHarian.toi
+)
+
+
+class BackfillRunning(RuntimeError):
+    """Another backfill run holds the checkpoint"""
+
+
+def get_checkpoint(db: Session) -> Optional[Dict[str, Any]]:
+    checkpoint = db.get(BackfillCheckpoint, JOB_NAME)
+    return checkpoint.to_dict() if checkpoint else None
+
+
+def _chunk_updates(rows) -> Dict[str, Any]:
+    """Recompute one chunk; returns the UPDATE parameters of changed rows and the skipped count"""
+    complete_rows = [row for row in rows if None not in row[1:5]]
+    if not complete_rows:
+        return {"updates": [], "skipped": len(rows)}
+
+    computed = indikator_calculator.hitung_indikator_harian_batch(
+        [row[1] for row in complete_rows],
+        [row[2] for row in complete_rows],
+        [row[3] for row in complete_rows],
+        [row[4] for row in complete_rows],
+        [row[5] for row in complete_rows]
+    )
+    stored = np.array(
+        [[np.nan if value is None else value for value in row[6:10]] for row in complete_rows], dtype=float
+    ).reshape(len(complete_rows), len(INDICATOR_FIELDS))
+    new = np.column_stack([computed[field] for field in INDICATOR_FIELDS])
+    changed = (np.isnan(stored) | (np.abs(stored - new) > 1e-9)).any(axis=1)
+
+    updates = [
+        {"id": complete_rows[i][0], **{field: float(new[i, j]) for j, field in enumerate(INDICATOR_FIELDS)}}
+        for i in np.flatnonzero(changed)
+    ]
+    return {"updates": updates, "skipped": len(rows) - len(complete_rows)}
+
+
+def _after_backfill(db: Session):
+    """Derived data that depends on the stored indicators"""
+    from services import forecast_ledger, sensus_anomaly
+
+    for name, step in (("FORECAST_LEDGER", forecast_ledger.score_pending), ("SENSUS_ANOMALY", sensus_anomaly.rebuild)):
+        try:
+            step(db)
+        except Exception as e:
+            db.rollback()
+            log_error(name, f"Refresh after indicator backfill failed: {str(e)}")
+
+
+def run_backfill(
+    chunk_size: int = CHUNK_SIZE,
+    restart: bool = False,
+    dry_run: bool = False,
+    max_chunks: Optional[int] = None,
+    session_factory: Callable[[], Session] = SessionLocal
+) -> Dict[str, Any]:
+    """
+    Recompute bor/los/bto/toi for all sensus_harian rows
+
+    Resumes from the checkpoint unless restart=True or the last run
+    completed. max_chunks stops early (status "interrupted", resumable).
+    dry_run counts the rows that would change without writing anything.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size minimal 1")
+    if not _run_lock.acquire(blocking=False):
+        raise BackfillRunning("Backfill indikator sedang berjalan")
+
+    db = session_factory()
+    try:
+        checkpoint = db.get(BackfillCheckpoint, JOB_NAME)
+        if (checkpoint is not None and checkpoint.status == "running" and checkpoint.updated_at
+                and (datetime.utcnow() - checkpoint.updated_at).total_seconds() < STALE_SECONDS):
+            raise BackfillRunning("Backfill indikator sedang berjalan di proses lain")
+
+        resumed = checkpoint is not None and not restart and checkpoint.status != "completed"
+        if checkpoint is None:
+            checkpoint = BackfillCheckpoint(job_name=JOB_NAME)
+            db.add(checkpoint)
+        if not resumed:
+            checkpoint.last_id = 0
+            checkpoint.rows_scanned = checkpoint.rows_updated = checkpoint.rows_skipped = checkpoint.chunks = 0
+            checkpoint.seconds = 0.0
+            checkpoint.started_at = datetime.utcnow()
+        resumed_from = checkpoint.last_id or 0
+        checkpoint.status, checkpoint.finished_at, checkpoint.last_error = "running", None, None
+        if dry_run:
+            db.expunge(checkpoint)
+        else:
+            db.commit()
+
+        last_id, run_scanned, run_updated, run_chunks = resumed_from, 0, 0, 0
+        started = time.perf_counter()
+        status = "completed"
+        while True:
+            if max_chunks is not None and run_chunks >= max_chunks:
+                status = "interrupted"
+                break
+            chunk_started = time.perf_counter()
+            rows = db.query(*_COLUMNS).filter(SensusHarian.id > last_id).order_by(SensusHarian.id).limit(chunk_size).all()
+            if not rows:
+                break
+            result = _chunk_updates(rows)
+            if result["updates"] and not dry_run:
+                db.execute(update(SensusHarian), result["updates"])
+
+            last_id = rows[-1][0]
+            run_scanned += len(rows)
+            run_updated += len(result["updates"])
+            run_chunks += 1
+            checkpoint.last_id = last_id
+            checkpoint.rows_scanned += len(rows)
+            checkpoint.rows_updated += len(result["updates"])
+            checkpoint.rows_skipped += result["skipped"]
+            checkpoint.chunks += 1
+            checkpoint.seconds += time.perf_counter() - chunk_started
+            if not dry_run:
+                db.commit()
+
+        seconds = time.perf_counter() - started
+        checkpoint.status = status
+        if status == "completed":
+            checkpoint.finished_at = datetime.utcnow()
+        if not dry_run:
+            db.commit()
+            if status == "completed" and checkpoint.rows_updated:
+                _after_backfill(db)
+
+        report = {
+            **checkpoint.to_dict(),
+            "dry_run": dry_run,
+            "resumed": resumed,
+            "resumed_from_id": resumed_from,
+            "run": {
+                "rows_scanned": run_scanned,
+                "rows_updated": run_updated,
+                "chunks": run_chunks,
+                "seconds": round(seconds, 3),
+                "rows_per_second": round(run_scanned / seconds, 1) if seconds > 0 else None
+            }
+        }
+        logger.info(
+            f"Indicator backfill {status}{' (dry run)' if dry_run else ''}: "
+            f"{run_scanned} rows scanned, {run_updated} changed, {report['run']['rows_per_second']} rows/s"
+        )
+        return report
+
+    except BackfillRunning:
+        raise
+    except BaseException as e:
+        db.rollback()
+        if not dry_run:
+            # Keep the last committed position; the next run resumes from it
+            checkpoint = db.get(BackfillCheckpoint, JOB_NAME)
+            if checkpoint is not None:
+                checkpoint.status = "interrupted" if isinstance(e, KeyboardInterrupt) else "failed"
+                checkpoint.last_error = str(e) or type(e).__name__
+                db.commit()
+        log_error("INDIKATOR_BACKFILL", str(e) or type(e).__name__)
+        raise
+    finally:
+        db.close()
+        _run_lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hitung ulang bor/los/bto/toi seluruh sensus_harian")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Mulai dari awal, abaikan checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya hitung baris yang akan berubah")
+    args = parser.parse_args()
+
+    # Outside the API the checkpoint table may not exist yet
+    from database.engine import engine
+    BackfillCheckpoint.__table__.create(bind=engine, checkfirst=True)
+
+    report = run_backfill(chunk_size=args.chunk_size, restart=args.restart, dry_run=args.dry_run)
+    run = report["run"]
+    print(f"Status: {report['status']}{' (dry run)' if report['dry_run'] else ''}")
+    if report["resumed"]:
+        print(f"Dilanjutkan dari id > {report['resumed_from_id']}")
+    print(f"Baris dipindai: {run['rows_scanned']}, berubah: {run['rows_updated']}, chunk: {run['chunks']}")
+    print(f"Durasi: {run['seconds']}s ({run['rows_per_second']} baris/detik)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# backend/tasks/leader_lock.py
+"""
+Leader election for background jobs across API workers
+
+Every uvicorn/gunicorn worker starts a scheduler thread, but only the worker
+holding an exclusive, non-blocking lock on a shared file runs jobs. The OS
+releases the lock when the leader process exits, so another worker takes
+over on its next attempt.
+"""
+
+import os
+import socket
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LeaderLock:
+    """Exclusive lock on a file, held for the lifetime of the process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def identity(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def is_leader(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """Become leader if no other process holds the lock (never blocks)"""
+        if self._file is not None:
+            return True
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+
+        # Record the current leader for operators
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(self.identity)
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
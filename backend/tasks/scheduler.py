@@ -1,37 +1,349 @@
 # backend/tasks/scheduler.py
+"""
+Background job scheduler
+
+Each API worker runs one scheduler thread. Cluster-wide jobs (retraining,
+session cleanup, ...) only run in the leader worker, elected through an
+exclusive file lock (tasks/leader_lock.py), so N workers do not retrain N
+times. Jobs that maintain per-process state, like the in-memory occupancy
+index, run in every worker.
+
+Jobs are registered with `register_job` together with their schedule and a
+concurrency limit; each run happens in its own thread and its last/next run,
+duration and outcome are persisted to scheduler_job_state.
+"""
+
+import os
 import schedule
 import time
 import threading
+from dataclasses import dataclass
 from datetime import datetime
-from ml.train import train_sarima_and_save
+from typing import Any, Callable, Dict, List, Optional
+
 from core.logging_config import log_error
+from database.session import SessionLocal
+from models.scheduler_job import SchedulerJobState
+from services.change_feed import change_feed
+from services.occupancy_index import occupancy_index
+from services.sensus_audit import sensus_audit
+from tasks.leader_lock import LeaderLock
 
-def retrain_model_weekly():
-    """Retrain model SARIMA otomatis setiap minggu"""
+# Interval of the occupancy index consistency check (repairs drift from raw SQL)
+OCCUPANCY_CHECK_MINUTES = 15
+
+# Time of the daily full sensus audit reload; writes normally arrive through the
+# change feed, the reload only catches raw SQL that bypasses change capture
+SENSUS_AUDIT_RELOAD_AT = "04:00"
+
+# Horizon of the daily forecast recorded in the forecast ledger
+LEDGER_FORECAST_DAYS = 7
+
+# History used by the weekly multi-indicator retraining
+INDICATOR_TRAINING_DAYS = 365
+
+# Shared by all workers of one deployment
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", "logs/scheduler.lock")
+
+# Seconds between run_pending ticks / attempts of followers to become leader
+TICK_SECONDS = 30
+LEADER_RETRY_SECONDS = 60
+
+
+@dataclass
+class JobSpec:
+    """
+    A background job
+
+    schedule_job configures a `schedule` job (e.g. lambda s: s.every().day.at("03:00")).
+    A job returning False counts as failed; any other return value is stored
+    as the run message.
+    """
+    name: str
+    func: Callable[[], Any]
+    schedule_job: Callable[[schedule.Scheduler], schedule.Job]
+    description: str
+    max_concurrent: int = 1
+    leader_only: bool = True
+
+
+_JOBS: Dict[str, JobSpec] = {}
+_running: Dict[str, threading.BoundedSemaphore] = {}
+leader_lock = LeaderLock(SCHEDULER_LOCK_FILE)
+
+
+def register_job(
+    name: str,
+    func: Callable[[], Any],
+    schedule_job: Callable[[schedule.Scheduler], schedule.Job],
+    description: str,
+    max_concurrent: int = 1,
+    leader_only: bool = True
+) -> JobSpec:
+    """Register a job; call before the scheduler thread starts"""
+    job = JobSpec(name, func, schedule_job, description, max_concurrent, leader_only)
+    _JOBS[name] = job
+    _running[name] = threading.BoundedSemaphore(max_concurrent)
+    return job
+
+
+def get_registered_jobs() -> List[JobSpec]:
+    return list(_JOBS.values())
+
+
+# Job state persistence
+def _save_job_state(job: JobSpec, failed: Optional[bool] = None, **values):
+    """Upsert the job's state row; failed=True/False also counts a finished run"""
+    db = SessionLocal()
     try:
-        log_error("SCHEDULER", "Starting weekly SARIMA model retraining...")
-        success = train_sarima_and_save()
-        
-        if success:
-            log_error("SCHEDULER", "Weekly SARIMA model retraining completed successfully")
-        else:
-            log_error("SCHEDULER", "Weekly SARIMA model retraining failed - insufficient data")
+        state = db.get(SchedulerJobState, job.name)
+        if state is None:
+            state = SchedulerJobState(job_name=job.name, run_count=0, failure_count=0)
+            db.add(state)
+        state.schedule_description = job.description
+        for key, value in values.items():
+            setattr(state, key, value)
+        if failed is not None:
+            state.run_count = (state.run_count or 0) + 1
+            state.failure_count = (state.failure_count or 0) + int(failed)
+        db.commit()
     except Exception as e:
-        log_error("SCHEDULER", f"Weekly SARIMA model retraining error: {str(e)}")
+        db.rollback()
+        log_error("SCHEDULER", f"Failed to save state of job {job.name}: {str(e)}")
+    finally:
+        db.close()
+
+
+def get_job_states() -> List[Dict[str, Any]]:
+    """Persisted state of all leader jobs"""
+    db = SessionLocal()
+    try:
+        return [state.to_dict() for state in db.query(SchedulerJobState).order_by(SchedulerJobState.job_name)]
+    finally:
+        db.close()
+
+
+# Job execution
+def _execute(job: JobSpec, scheduled: Optional[schedule.Job]):
+    semaphore = _running[job.name]
+    started = datetime.now()
+    try:
+        result = job.func()
+        outcome = "failed" if result is False else "success"
+        message = None if result in (None, True, False) else str(result)[:1000]
+    except Exception as e:
+        outcome, message = "failed", str(e)[:1000]
+        log_error("SCHEDULER", f"Job {job.name} error: {str(e)}")
+    finally:
+        semaphore.release()
+
+    duration = (datetime.now() - started).total_seconds()
+    if job.leader_only:
+        _save_job_state(
+            job,
+            failed=outcome == "failed",
+            last_finished_at=datetime.now(),
+            last_duration_seconds=round(duration, 3),
+            last_outcome=outcome,
+            last_message=message,
+            next_run_at=scheduled.next_run if scheduled else None
+        )
+    if outcome == "failed":
+        log_error("SCHEDULER", f"Job {job.name} failed after {duration:.1f}s")
+
+
+def run_job(job: JobSpec, scheduled: Optional[schedule.Job] = None) -> bool:
+    """Start one run in its own thread; skipped if the concurrency limit is reached"""
+    if not _running[job.name].acquire(blocking=False):
+        log_error("SCHEDULER", f"Job {job.name} skipped: {job.max_concurrent} run(s) still in progress")
+        if job.leader_only:
+            _save_job_state(job, last_outcome="skipped", last_message="Concurrency limit reached")
+        return False
+
+    if job.leader_only:
+        _save_job_state(job, last_started_at=datetime.now(), last_runner=leader_lock.identity)
+    threading.Thread(target=_execute, args=(job, scheduled), name=f"job-{job.name}", daemon=True).start()
+    return True
+
+
+def _schedule_jobs(scheduler: schedule.Scheduler, jobs: List[JobSpec]):
+    for job in jobs:
+        scheduled = job.schedule_job(scheduler)
+        scheduled.do(lambda job=job, scheduled=scheduled: run_job(job, scheduled))
+        if job.leader_only:
+            _save_job_state(job, next_run_at=scheduled.next_run)
+
 
 def start_scheduler():
-    """Start background scheduler"""
-    # Schedule retrain setiap Minggu jam 02:00
-    schedule.every().sunday.at("02:00").do(retrain_model_weekly)
-    
-    log_error("SCHEDULER", "Scheduler started - Weekly SARIMA retrain scheduled for Sunday 02:00")
-    
+    """Scheduler loop: per-worker jobs always, leader jobs once elected"""
+    scheduler = schedule.Scheduler()
+    _schedule_jobs(scheduler, [job for job in _JOBS.values() if not job.leader_only])
+
+    next_leader_attempt = 0.0
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+        if not leader_lock.is_leader and time.monotonic() >= next_leader_attempt:
+            if leader_lock.try_acquire():
+                _schedule_jobs(scheduler, [job for job in _JOBS.values() if job.leader_only])
+                log_error("SCHEDULER", f"Scheduler leader elected: {leader_lock.identity}")
+            else:
+                next_leader_attempt = time.monotonic() + LEADER_RETRY_SECONDS
+
+        scheduler.run_pending()
+        time.sleep(TICK_SECONDS)
+
 
 def start_scheduler_thread():
     """Start scheduler in background thread"""
-    scheduler_thread = threading.Thread(target=start_scheduler, daemon=True)
+    scheduler_thread = threading.Thread(target=start_scheduler, name="scheduler", daemon=True)
     scheduler_thread.start()
     log_error("SCHEDULER", "Background scheduler thread started")
+
+
+# Jobs
+def retrain_model_weekly():
+    """Retrain model SARIMA otomatis setiap minggu"""
+    # Imported here so starting the scheduler does not load statsmodels
+    from ml.train import train_sarima_and_save
+
+    log_error("SCHEDULER", "Starting weekly SARIMA model retraining...")
+    success = train_sarima_and_save()
+
+    if success:
+        log_error("SCHEDULER", "Weekly SARIMA model retraining completed successfully")
+    else:
+        log_error("SCHEDULER", "Weekly SARIMA model retraining failed - insufficient data")
+    return success
+
+def retrain_indicator_models():
+    """Retrain model semua indikator (BOR, LOS, BTO, TOI, masuk, keluar) dalam satu job"""
+    from ml import multi_indicator
+
+    indicators = list(multi_indicator.INDICATORS)
+    db = SessionLocal()
+    try:
+        history = multi_indicator.load_indicator_history(db, INDICATOR_TRAINING_DAYS, indicators)
+    finally:
+        db.close()
+    if len(history["dates"]) < multi_indicator.MIN_TRAINING_POINTS:
+        return False
+
+    result = multi_indicator.train_indicators(history, indicators)
+    failed = [item["indicator"] for item in result["indicators"] if item["status"] == "error"]
+    if failed:
+        log_error("SCHEDULER", f"Indicator retraining failed for {failed}")
+    return f"{result['trained']}/{len(indicators)} indicators trained in {result['seconds']:.0f}s"
+
+def check_occupancy_index():
+    """Compare the in-memory occupancy index with the database and repair drift"""
+    if not occupancy_index.is_loaded:
+        return
+
+    db = SessionLocal()
+    try:
+        result = occupancy_index.check_consistency(db, repair=True)
+        if result["drifted"]:
+            log_error("SCHEDULER", f"Occupancy index repaired: {len(result['drifted'])} bangsal drifted")
+        return f"{result['checked']} checked, {len(result['drifted'])} drifted"
+    finally:
+        db.close()
+
+def reload_sensus_audit():
+    """Safety net: full re-audit of the sensus history in this worker's memory"""
+    if not sensus_audit.is_loaded:
+        return
+
+    db = SessionLocal()
+    try:
+        sensus_audit.load(db)
+        summary = sensus_audit.summary()
+        return f"{summary['rows']} days audited, {summary['issues']} issues"
+    finally:
+        db.close()
+
+def cleanup_expired_sessions():
+    """Hapus session login yang sudah kedaluwarsa"""
+    from repositories.user_repository import UserSessionRepository
+
+    db = SessionLocal()
+    try:
+        removed = UserSessionRepository(db).cleanup_expired_sessions()
+        return f"{removed} expired sessions removed"
+    finally:
+        db.close()
+
+def prune_change_log():
+    """Compact change_log below the durable consumer offsets and the retention window"""
+    db = SessionLocal()
+    try:
+        result = change_feed.prune(db)
+        return f"{result['deleted']} change_log entries pruned up to seq {result['pruned_seq']}"
+    finally:
+        db.close()
+
+def record_daily_forecast():
+    """Forecast harian dari model yang dilayani /prediksi, dicatat ke forecast ledger"""
+    from services.forecast_service import forecast_with_interval, load_model_with_cache, record_forecast_safely
+
+    model, model_info = load_model_with_cache()
+    values, lower, upper = forecast_with_interval(model, LEDGER_FORECAST_DAYS, alpha=0.05)
+    db = SessionLocal()
+    try:
+        record_forecast_safely(db, model_info, values, lower, upper, 0.95)
+        return f"{LEDGER_FORECAST_DAYS}-day forecast recorded ({model_info['model_version']})"
+    finally:
+        db.close()
+
+def score_forecast_ledger():
+    """Skor forecast yang aktualnya masuk di luar API (import, script)"""
+    from services.forecast_ledger import score_pending
+
+    db = SessionLocal()
+    try:
+        return f"{score_pending(db)} forecasts scored"
+    finally:
+        db.close()
+
+
+register_job(
+    "retrain_sarima", retrain_model_weekly,
+    lambda s: s.every().sunday.at("02:00"),
+    "Weekly, Sunday 02:00"
+)
+register_job(
+    "retrain_indicators", retrain_indicator_models,
+    lambda s: s.every().sunday.at("02:30"),
+    "Weekly, Sunday 02:30"
+)
+register_job(
+    "cleanup_sessions", cleanup_expired_sessions,
+    lambda s: s.every().day.at("03:30"),
+    "Daily 03:30"
+)
+register_job(
+    "prune_change_log", prune_change_log,
+    lambda s: s.every().day.at("03:45"),
+    "Daily 03:45"
+)
+register_job(
+    "record_daily_forecast", record_daily_forecast,
+    lambda s: s.every().day.at("00:15"),
+    "Daily 00:15"
+)
+register_job(
+    "score_forecast_ledger", score_forecast_ledger,
+    lambda s: s.every().hour,
+    "Hourly"
+)
+# The occupancy index lives in each worker's memory, so every worker checks its own
+register_job(
+    "check_occupancy_index", check_occupancy_index,
+    lambda s: s.every(OCCUPANCY_CHECK_MINUTES).minutes,
+    f"Every {OCCUPANCY_CHECK_MINUTES} minutes",
+    leader_only=False
+)
+register_job(
+    "reload_sensus_audit", reload_sensus_audit,
+    lambda s: s.every().day.at(SENSUS_AUDIT_RELOAD_AT),
+    f"Daily {SENSUS_AUDIT_RELOAD_AT}",
+    leader_only=False
+)
@@ -0,0 +1,67 @@
+"""
+Test bangsal API: keyset pagination (cursor), nomor halaman, cursor tidak valid dan bangsal nonaktif
+
+Jalankan: python -m pytest test_bangsal_api.py
+"""
+
+from models.bangsal import Bangsal
+
+
+def _bangsal(db, nama, kode, kapasitas=20, terisi=5, **fields):
+    bangsal = Bangsal(
+        nama_bangsal=nama,
+        kode_bangsal=kode,
+        departemen="Penyakit Dalam",
+        jenis_bangsal="Kelas I",
+        kapasitas_total=kapasitas,
+        tempat_tidur_terisi=terisi,
+        tempat_tidur_tersedia=kapasitas - terisi,
+        **fields
+    )
+    db.add(bangsal)
+    db.commit()
+    return bangsal.id
+
+
+def test_cursor_walks_all_pages_in_name_id_order(client, db):
+    # Duplicate names: the id breaks the tie, so no row is skipped or repeated
+    ids = [_bangsal(db, nama, f"K{i}") for i, nama in enumerate(["Mawar", "Anggrek", "Mawar", "Melati", "Anggrek"])]
+    expected = [bangsal.id for bangsal in db.query(Bangsal).order_by(Bangsal.nama_bangsal, Bangsal.id)]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"per_page": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/v1/bangsal/", params=params).json()
+        assert body["total"] == 5
+        assert body["page"] == (1 if cursor is None else None)
+        seen.extend(item["id"] for item in body["bangsal"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert sorted(seen) == sorted(ids)
+    assert pages == 3
+
+
+def test_page_number_and_invalid_cursor(client, db):
+    for i, nama in enumerate(["A", "B", "C"]):
+        _bangsal(db, nama, f"K{i}")
+
+    body = client.get("/api/v1/bangsal/", params={"per_page": 2, "page": 2}).json()
+    assert [item["nama_bangsal"] for item in body["bangsal"]] == ["C"]
+    assert body["pages"] == 2
+
+    assert client.get("/api/v1/bangsal/", params={"cursor": "bukan-cursor"}).status_code == 400
+
+
+def test_filter_only_listing_includes_inactive_wards(client, db):
+    _bangsal(db, "Aktif", "K1")
+    _bangsal(db, "Nonaktif", "K2", is_active=False)
+
+    names = lambda params: [item["nama_bangsal"] for item in client.get("/api/v1/bangsal/", params=params).json()["bangsal"]]
+    assert names({}) == ["Aktif"]
+    assert names({"departemen": "Penyakit Dalam"}) == ["Aktif", "Nonaktif"]
+    assert names({"search": "aktif"}) == ["Aktif"]
+    assert names({"search": "aktif", "include_inactive": "true"}) == ["Aktif", "Nonaktif"]
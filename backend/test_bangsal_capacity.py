@@ -0,0 +1,59 @@
+"""
+Test bulk update kapasitas bangsal: satu transaksi, semua update divalidasi sebelum ditulis
+
+Jalankan: python -m pytest test_bangsal_capacity.py
+"""
+
+import pytest
+
+from models.bangsal import Bangsal
+from repositories.bangsal_repository import BangsalRepository
+
+
+def _bangsal(db, nama, kode, kapasitas=20, terisi=5):
+    bangsal = Bangsal(
+        nama_bangsal=nama,
+        kode_bangsal=kode,
+        departemen="Penyakit Dalam",
+        jenis_bangsal="Kelas I",
+        kapasitas_total=kapasitas,
+        tempat_tidur_terisi=terisi,
+        tempat_tidur_tersedia=kapasitas - terisi
+    )
+    db.add(bangsal)
+    db.commit()
+    return bangsal.id
+
+
+def test_bulk_capacity_applies_whole_batch(db):
+    first = _bangsal(db, "A", "K1", kapasitas=20)
+    second = _bangsal(db, "B", "K2", kapasitas=10)
+
+    updated = BangsalRepository(db).bulk_update_capacity([
+        {"bangsal_id": first, "tempat_tidur_terisi": 12},
+        {"bangsal_id": second, "tempat_tidur_terisi": 3},
+        {"bangsal_id": first, "tempat_tidur_terisi": 15},  # Last update per bangsal wins
+        {"bangsal_id": 9999, "tempat_tidur_terisi": 1}     # Unknown bangsal is skipped
+    ])
+
+    assert [(bangsal.id, bangsal.tempat_tidur_terisi, bangsal.tempat_tidur_tersedia) for bangsal in updated] == [
+        (first, 15, 5), (second, 3, 7)
+    ]
+
+
+def test_bulk_capacity_rejects_batch_with_invalid_update(db):
+    first = _bangsal(db, "A", "K1", kapasitas=20, terisi=5)
+    second = _bangsal(db, "B", "K2", kapasitas=10, terisi=5)
+
+    with pytest.raises(ValueError) as error:
+        BangsalRepository(db).bulk_update_capacity([
+            {"bangsal_id": first, "tempat_tidur_terisi": 12},
+            {"bangsal_id": second, "tempat_tidur_terisi": 11},
+            {"bangsal_id": first, "tempat_tidur_terisi": -1}
+        ])
+
+    detail = str(error.value)
+    assert f"Bangsal {second}" in detail and "kapasitas total (10)" in detail
+    assert "negatif" in detail
+    db.expire_all()
+    assert [db.get(Bangsal, bangsal_id).tempat_tidur_terisi for bangsal_id in (first, second)] == [5, 5]
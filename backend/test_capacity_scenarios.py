@@ -0,0 +1,65 @@
+"""
+Test proyeksi skenario kapasitas: forecast rumah sakit diskalakan ke bangsal, BOR di atas 100% dan overflow
+
+Jalankan: python -m pytest test_capacity_scenarios.py
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from ml.capacity_scenarios import project_scenarios
+from ml.patient_flow_sim import FlowParameters
+
+START = date(2026, 10, 5)
+
+
+def _params(discharge_probability=0.0, sensus_beds=100.0):
+    return FlowParameters(
+        admission_rate=np.full(7, 0.1),
+        dispersion=np.inf,
+        discharge_probability=discharge_probability,
+        history_days=90,
+        sensus_beds=sensus_beds
+    )
+
+
+def _ward(ward_id, kapasitas, terisi):
+    return {"id": ward_id, "nama_bangsal": f"Bangsal {ward_id}", "kapasitas_total": kapasitas, "tempat_tidur_terisi": terisi}
+
+
+def test_hospital_forecast_is_scaled_to_projected_wards():
+    forecast = {(START + timedelta(days=h)).isoformat(): 50.0 for h in range(2)}
+    result = project_scenarios(_params(), [_ward(1, 20, 0)], [], START, 2, admission_forecast=forecast)
+
+    assert result["admission_source"] == ["forecast", "forecast"]
+    assert result["forecast_scale"] == pytest.approx(0.2)
+    # 50 hospital admissions for 100 beds -> 10 for this 20-bed ward
+    assert result["scenarios"][0]["hospital"]["census"] == [10.0, 20.0]
+
+
+def test_weekday_rate_matches_scaled_forecast():
+    forecast = {START.isoformat(): 10.0}  # 0.1 per bed for 100 sensus beds
+    wards = [_ward(1, 20, 0), _ward(2, 30, 0)]
+    with_forecast = project_scenarios(_params(), wards, [], START, 1, admission_forecast=forecast)
+    with_rate = project_scenarios(_params(), wards, [], START, 1)
+
+    assert with_forecast["scenarios"][0]["hospital"]["census"] == with_rate["scenarios"][0]["hospital"]["census"]
+
+
+def test_bor_is_not_clipped_and_overflow_is_reported():
+    wards = [_ward(1, 10, 10), _ward(2, 40, 0)]
+    scenarios = [{"name": "Bangsal 1 +5 TT", "wards": {1: {"capacity_delta": 5}}}]
+    result = project_scenarios(_params(), wards, scenarios, START, 1)
+
+    baseline, extra_beds = result["scenarios"]
+    full_ward = baseline["wards"][0]
+    # 10 patients + 0.1 * 50 beds * 10/50 share = 11 in 10 beds
+    assert full_ward["bor"] == [110.0]
+    assert full_ward["overflow"] == [1.0]
+    assert full_ward["bor_status"] == ["critical"]
+    assert baseline["hospital"]["overflow"] == [1.0]
+
+    assert extra_beds["wards"][0]["overflow"] == [0.0]
+    assert extra_beds["hospital"]["overflow"] == [0.0]
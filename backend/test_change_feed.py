@@ -0,0 +1,127 @@
+"""
+Test change capture dan change feed: bulk UPDATE/DELETE tercatat per baris, audit sensus lewat feed, pemangkasan change log
+
+Jalankan: python -m pytest test_change_feed.py
+"""
+
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+
+from conftest import make_sensus
+from models.change_log import ChangeConsumerOffset, ChangeLogEntry
+from models.sensus import SensusHarian
+from services.change_feed import change_feed, latest_seq, pruned_seq, read_changes
+from services.sensus_audit import sensus_audit
+
+
+def _entries(db, after):
+    return db.query(ChangeLogEntry).filter(ChangeLogEntry.seq > after).order_by(ChangeLogEntry.seq).all()
+
+
+def test_query_update_logs_every_matched_row(db):
+    rows = make_sensus(db, 5)
+    start = latest_seq(db)
+
+    cutoff = rows[2].tanggal
+    updated = db.query(SensusHarian).filter(SensusHarian.tanggal >= cutoff).update(
+        {SensusHarian.tempat_tidur_tersedia: 150}, synchronize_session=False
+    )
+    db.commit()
+
+    entries = _entries(db, start)
+    assert updated == 3
+    assert [entry.operation for entry in entries] == ["update"] * 3
+    assert sorted(entry.row_id for entry in entries) == sorted(row.id for row in rows[2:])
+    # Rows are read back by id after the update
+    assert {json.loads(entry.data)["tempat_tidur_tersedia"] for entry in entries} == {150}
+
+
+def test_executemany_update_and_bulk_delete(db):
+    ids = [row.id for row in make_sensus(db, 4)]
+    deleted_day = db.get(SensusHarian, ids[3]).tanggal
+    start = latest_seq(db)
+
+    db.execute(update(SensusHarian), [{"id": row_id, "jml_masuk": 1} for row_id in ids[:2]])
+    db.query(SensusHarian).filter(SensusHarian.id == ids[3]).delete(synchronize_session=False)
+    db.commit()
+
+    changes = read_changes(db, start, ("sensus_harian",), 100)
+    assert [(change["operation"], change["row_id"]) for change in changes] == [
+        ("update", ids[0]), ("update", ids[1]), ("delete", ids[3])
+    ]
+    assert changes[0]["data"]["jml_masuk"] == 1
+    # Deleted rows carry their values from before the delete
+    assert changes[2]["data"]["tanggal"] == deleted_day.isoformat()
+
+
+def test_rolled_back_write_leaves_no_log_entry(db):
+    rows = make_sensus(db, 2)
+    start = latest_seq(db)
+
+    db.query(SensusHarian).filter(SensusHarian.id == rows[0].id).update({SensusHarian.jml_masuk: 0})
+    db.rollback()
+
+    assert _entries(db, start) == []
+
+
+def test_api_write_is_audited_through_the_feed_only(client, db):
+    make_sensus(db, 10, end=date.today() - timedelta(days=1))
+    sensus_audit.load(db)
+    change_feed.poll("sensus_audit")  # Consumer starts at the newest sequence number
+    assert sensus_audit.summary()["consistent"]
+
+    response = client.post("/api/v1/sensus/", json={
+        "tanggal": date.today().isoformat(),
+        "jml_pasien_awal": 1,  # Breaks continuity with yesterday's jml_pasien_akhir
+        "jml_masuk": 10,
+        "jml_keluar": 5,
+        "tempat_tidur_tersedia": 120
+    })
+    assert response.status_code == 200
+
+    # The request itself does not re-audit; the change feed consumer does
+    assert sensus_audit.summary()["consistent"]
+    assert change_feed.poll("sensus_audit") >= 1
+    report = sensus_audit.report()
+    assert report["rows"] == 11
+    assert [issue["check"] for issue in report["details"]] == ["continuity"]
+
+
+def _age_log(db, days=30):
+    db.query(ChangeLogEntry).update({ChangeLogEntry.created_at: datetime.utcnow() - timedelta(days=days)})
+    db.commit()
+
+
+def test_prune_keeps_latest_change_per_row(db):
+    rows = make_sensus(db, 3)
+    db.query(SensusHarian).update({SensusHarian.jml_masuk: 5}, synchronize_session=False)
+    db.query(SensusHarian).filter(SensusHarian.id == rows[0].id).delete(synchronize_session=False)
+    db.commit()
+    _age_log(db)
+    latest = latest_seq(db)
+
+    result = change_feed.prune(db)
+
+    # 3 inserts, the update of the deleted row and its tombstone
+    assert result == {"pruned_seq": latest, "deleted": 5}
+    remaining = _entries(db, 0)
+    assert [(entry.row_id, entry.operation) for entry in remaining] == [(row.id, "update") for row in rows[1:]]
+    assert pruned_seq(db) == latest
+    assert latest_seq(db) == latest
+
+
+def test_prune_respects_retention_and_durable_offsets(db):
+    make_sensus(db, 2)
+    db.query(SensusHarian).update({SensusHarian.jml_masuk: 5}, synchronize_session=False)
+    db.commit()
+
+    assert change_feed.prune(db)["deleted"] == 0  # Younger than RETENTION_DAYS
+
+    _age_log(db)
+    first_insert = _entries(db, 0)[0].seq
+    db.add(ChangeConsumerOffset(consumer="slow_consumer", last_seq=first_insert))
+    db.commit()
+    result = change_feed.prune(db)
+    assert result == {"pruned_seq": first_insert, "deleted": 1}
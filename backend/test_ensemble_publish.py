@@ -0,0 +1,66 @@
+"""
+Test publikasi ensemble: versi baru dipasang atomik, build gagal tidak mengubah ensemble aktif
+
+Jalankan: python -m pytest test_ensemble_publish.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import ensemble
+
+
+def _series(n=150, shift=0.0):
+    index = pd.date_range("2026-01-01", periods=n, freq="D")
+    values = 75 + shift + 5 * np.sin(2 * np.pi * np.arange(n) / 7) + np.random.default_rng(0).normal(0, 1, n)
+    return pd.Series(values, index=index)
+
+
+def _build(directory, **kwargs):
+    return ensemble.build_ensemble(
+        _series(**kwargs), horizon=14, folds=3, members=("naive", "moving_avg"), max_workers=1, output_dir=directory
+    )
+
+
+def test_build_publishes_version_directory(tmp_path):
+    meta = _build(str(tmp_path))
+
+    version_dir = ensemble.published_dir(str(tmp_path))
+    assert os.path.dirname(version_dir) == str(tmp_path / ensemble.VERSIONS_DIR)
+    assert os.path.exists(os.path.join(version_dir, ensemble.ENSEMBLE_FILE))
+    forecaster = ensemble.EnsembleForecaster.load(str(tmp_path))
+    assert forecaster.version == meta["version"]
+    assert len(forecaster.forecast_with_intervals(7)["mean"]) == 7
+
+
+def test_failed_build_keeps_live_ensemble(tmp_path, monkeypatch):
+    _build(str(tmp_path))
+    live_dir = ensemble.published_dir(str(tmp_path))
+    live_weights = ensemble.EnsembleForecaster.load(str(tmp_path)).weights.copy()
+
+    original = ensemble._backtest_member
+
+    def failing(member, *args, **kwargs):
+        if member == "moving_avg":
+            raise RuntimeError("fit gagal")
+        return original(member, *args, **kwargs)
+
+    monkeypatch.setattr(ensemble, "_backtest_member", failing)
+    with pytest.raises(RuntimeError):
+        _build(str(tmp_path), shift=10.0)
+
+    assert ensemble.published_dir(str(tmp_path)) == live_dir
+    assert os.listdir(tmp_path / ensemble.VERSIONS_DIR) == [os.path.basename(live_dir)]
+    np.testing.assert_array_equal(ensemble.EnsembleForecaster.load(str(tmp_path)).weights, live_weights)
+
+
+def test_old_versions_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(ensemble, "KEEP_VERSIONS", 2)
+    for shift in range(4):
+        _build(str(tmp_path), shift=float(shift))
+    versions = sorted(os.listdir(tmp_path / ensemble.VERSIONS_DIR))
+    assert len(versions) == 2
+    assert ensemble.published_dir(str(tmp_path)).endswith(versions[-1])
@@ -0,0 +1,62 @@
+"""
+Test ETS fallback: export state-space ke format ForecastEngine, forecast dan varians prediksi
+
+Jalankan: python -m pytest test_ets_engine.py
+"""
+
+import numpy as np
+import pytest
+
+from ml.ets_engine import MIN_POINTS, export_ets_state, fit_ets
+from ml.forecast_engine import ForecastEngine
+
+STEPS = 14
+
+
+def _series(n=120):
+    rng = np.random.default_rng(3)
+    t = np.arange(n)
+    return 70 + 0.05 * t + 5 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 1.5, n)
+
+
+def _ets_variance(fit, steps):
+    # sigma^2 * (1 + sum_{j<h} c_j^2), c_j = w F^(j-1) g
+    matrices = fit.system_matrices()
+    w, F, g = matrices["design"][0], matrices["transition"], matrices["gain"]
+    variance, total, power = np.empty(steps), 0.0, np.eye(len(g))
+    for h in range(steps):
+        variance[h] = fit.sigma2 * (1.0 + total)
+        total += float(w @ power @ g) ** 2
+        power = F @ power
+    return variance
+
+
+def test_exported_state_reproduces_ets_forecast_and_variance(tmp_path):
+    fit = fit_ets(_series())
+    path = export_ets_state(fit, str(tmp_path / "ets.npz"), last_date="2026-10-18", metadata={"series": "bor"})
+    engine = ForecastEngine.load(path)
+
+    assert fit.season_length == 7
+    assert engine.meta["engine"] == "ets"
+    assert engine.meta["ets"]["model"] == "ETS(A,Ad,A)"
+    assert engine.meta["series"] == "bor"
+
+    result = engine.forecast_with_intervals(STEPS, alpha=0.05)
+    np.testing.assert_allclose(result["mean"], fit.forecast(STEPS), rtol=1e-10)
+    np.testing.assert_allclose(result["variance"], _ets_variance(fit, STEPS), rtol=1e-10)
+    assert result["variance"][0] == pytest.approx(fit.sigma2)
+    assert np.all(np.diff(result["variance"]) >= 0)
+
+
+def test_short_series_fits_without_season(tmp_path):
+    fit = fit_ets(_series(10))
+    assert fit.season_length == 0
+    assert fit.order_label == "ETS(A,Ad,N)"
+
+    engine = ForecastEngine.load(export_ets_state(fit, str(tmp_path / "ets.npz")))
+    np.testing.assert_allclose(engine.forecast(STEPS), fit.forecast(STEPS), rtol=1e-10)
+
+
+def test_too_few_points_rejected():
+    with pytest.raises(ValueError):
+        fit_ets(_series(MIN_POINTS - 1))
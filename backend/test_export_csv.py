@@ -0,0 +1,65 @@
+"""
+Test export CSV streaming: header dan baris per rentang tanggal, gzip, NULL dan rentang kosong
+
+Jalankan: python -m pytest test_export_csv.py
+"""
+
+import gzip
+from datetime import date, timedelta
+
+from api.v1.export_router import CSV_COLUMNS, _iter_sensus_csv
+from conftest import make_sensus
+
+END = date(2026, 9, 30)
+
+
+def test_csv_rows_for_date_range(client, db):
+    rows = make_sensus(db, 40, end=END)
+    rows[-1].jml_masuk = None  # NULL count: empty field, other counts stay integers
+    db.commit()
+
+    params = {"start_date": "2026-09-25", "end_date": "2026-09-30"}
+    response = client.get("/api/v1/export/csv", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "sensus_20260925_20260930.csv" in response.headers["content-disposition"]
+
+    lines = response.content.decode("utf-8").splitlines()
+    assert lines[0] == ",".join(name for name, _ in CSV_COLUMNS)
+    assert len(lines) == 7
+    first = rows[-6]
+    assert lines[1] == (
+        f"2026-09-25,{first.jml_pasien_awal},{first.jml_masuk},{first.jml_keluar},"
+        f"{first.jml_pasien_akhir},{first.tempat_tidur_tersedia},{first.bor}"
+    )
+    assert lines[-1].split(",")[:3] == ["2026-09-30", str(rows[-1].jml_pasien_awal), ""]
+
+    compressed = client.get("/api/v1/export/csv", params={**params, "compress": "true"})
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(compressed.content) == response.content
+
+
+def test_stream_spans_several_fetch_batches(db, monkeypatch):
+    from api.v1 import export_router
+
+    make_sensus(db, 25, end=END)
+    monkeypatch.setattr(export_router, "CSV_FETCH_SIZE", 10)
+
+    chunks = list(_iter_sensus_csv(END - timedelta(days=24), END))
+    assert len(chunks) == 3
+    assert b"".join(chunks).count(b"\n") == 26
+
+    compressed = b"".join(_iter_sensus_csv(END - timedelta(days=24), END, compress=True))
+    assert gzip.decompress(compressed) == b"".join(chunks)
+
+
+def test_empty_range(client, db):
+    make_sensus(db, 10, end=END)
+    empty_start, empty_end = END + timedelta(days=1), END + timedelta(days=30)
+
+    header = (",".join(name for name, _ in CSV_COLUMNS) + "\n").encode()
+    assert b"".join(_iter_sensus_csv(empty_start, empty_end)) == header
+    assert gzip.decompress(b"".join(_iter_sensus_csv(empty_start, empty_end, compress=True))) == header
+
+    response = client.get("/api/v1/export/csv", params={"start_date": empty_start.isoformat(), "end_date": empty_end.isoformat()})
+    assert response.status_code == 404
@@ -0,0 +1,84 @@
+"""
+Test fit cache SARIMAX: cache hit identik dengan fit asli, key, eviction LRU dan entri rusak
+
+Jalankan: python -m pytest test_fit_cache.py
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import fit_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(fit_cache, "FIT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(fit_cache, "FIT_CACHE_ENABLED", True)
+    return tmp_path
+
+
+def _series(n=90, shift=0.0):
+    index = pd.date_range("2026-01-01", periods=n, freq="D")
+    rng = np.random.default_rng(11)
+    return pd.Series(75 + shift + 4 * np.sin(np.arange(n) * 2 * np.pi / 7) + rng.normal(0, 1, n), index=index)
+
+
+def _model(series=None, order=(1, 0, 1)):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    return SARIMAX(_series() if series is None else series, order=order, seasonal_order=(1, 0, 0, 7))
+
+
+def _no_fit(**kwargs):
+    raise AssertionError("expected a cache hit")
+
+
+def test_second_identical_fit_is_a_cache_hit():
+    fitted = fit_cache.cached_fit(_model(), disp=False, maxiter=50)
+    assert fit_cache.cache_info()["entries"] == 1
+
+    model = _model()
+    model.fit = _no_fit
+    cached = fit_cache.cached_fit(model, disp=False, maxiter=50)
+
+    np.testing.assert_allclose(cached.params, fitted.params)
+    assert cached.aic == pytest.approx(fitted.aic)
+    assert cached.mle_retvals["converged"] == fitted.mle_retvals["converged"]
+    np.testing.assert_allclose(cached.forecast(14), fitted.forecast(14))
+
+
+def test_key_depends_on_data_order_and_fit_options():
+    key = fit_cache.fit_key(_model(), {"disp": False, "maxiter": 50})
+    assert fit_cache.fit_key(_model(), {"disp": False, "maxiter": 50}) == key
+    assert fit_cache.fit_key(_model(_series(shift=0.1)), {"disp": False, "maxiter": 50}) != key
+    assert fit_cache.fit_key(_model(order=(2, 0, 1)), {"disp": False, "maxiter": 50}) != key
+    assert fit_cache.fit_key(_model(), {"disp": False, "maxiter": 51}) != key
+
+
+def test_evict_removes_least_recently_used_first(cache_dir, monkeypatch):
+    for i, name in enumerate(["old", "middle", "new"]):
+        path = cache_dir / f"{name}.json"
+        path.write_text("x" * 100)
+        os.utime(path, (1_000 + i, 1_000 + i))
+    monkeypatch.setattr(fit_cache, "FIT_CACHE_MAX_BYTES", 250)
+
+    fit_cache._evict()
+
+    assert sorted(os.listdir(cache_dir)) == ["middle.json", "new.json"]
+
+
+@pytest.mark.parametrize("content", ["{not json", json.dumps({"format": fit_cache.CACHE_FORMAT_VERSION, "params": [1.0]})])
+def test_corrupt_entry_falls_back_to_a_real_fit(cache_dir, content):
+    model = _model()
+    key = fit_cache.fit_key(model, {"disp": False})
+    (cache_dir / f"{key}.json").write_text(content)
+
+    fitted = fit_cache.cached_fit(model, disp=False)
+
+    reference = _model().fit(disp=False)
+    np.testing.assert_allclose(fitted.params, reference.params)
+    # The corrupt entry is replaced by the real fit
+    assert json.loads((cache_dir / f"{key}.json").read_text())["params"] == pytest.approx(list(reference.params))
@@ -0,0 +1,159 @@
+"""
+Test forecast ledger: scoring, koreksi aktual (reversal), unscore, recent MAE, retrain saat drift dan origin forecast /prediksi
+
+Jalankan: python -m pytest test_forecast_ledger.py
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.forecast_ledger import ForecastAccuracy, ForecastLedgerEntry
+from services import forecast_ledger
+
+ORIGIN = date(2026, 9, 30)
+
+
+def _stats(db, horizon):
+    return db.query(ForecastAccuracy).filter(ForecastAccuracy.horizon == horizon).one()
+
+
+def test_record_is_idempotent_per_origin(db):
+    assert forecast_ledger.record_forecast(db, "prediksi", "v1", ORIGIN, [80.0, 81.0, 82.0]) == 3
+    assert forecast_ledger.record_forecast(db, "prediksi", "v1", ORIGIN, [80.0, 81.0, 82.0]) == 0
+    targets = [row.target_date for row in db.query(ForecastLedgerEntry).order_by(ForecastLedgerEntry.horizon)]
+    assert targets == [ORIGIN + timedelta(days=h) for h in (1, 2, 3)]
+
+
+def test_score_correct_and_unscore(db):
+    forecast_ledger.record_forecast(db, "prediksi", "v1", ORIGIN, [80.0, 81.0], [75.0, 76.0], [85.0, 86.0], 0.95)
+    target = ORIGIN + timedelta(days=1)
+
+    assert forecast_ledger.score_actual(db, target, 84.0) == 1
+    stats = _stats(db, 1)
+    assert stats.n == 1
+    assert stats.abs_error_sum == pytest.approx(4.0)
+    assert stats.covered_count == 1
+
+    # Corrected actual replaces the earlier contribution instead of adding a second one
+    forecast_ledger.score_actual(db, target, 90.0)
+    db.refresh(stats)
+    assert stats.n == 1
+    assert stats.abs_error_sum == pytest.approx(10.0)
+    assert stats.sq_error_sum == pytest.approx(100.0)
+    assert stats.covered_count == 0
+
+    assert forecast_ledger.unscore_actual(db, target) == 1
+    db.refresh(stats)
+    assert stats.n == 0
+    assert stats.abs_error_sum == pytest.approx(0.0)
+    assert stats.interval_count == 0
+
+
+def test_accuracy_report_uses_latest_version(db):
+    forecast_ledger.record_forecast(db, "prediksi", "v1", ORIGIN, [80.0])
+    forecast_ledger.record_forecast(db, "prediksi", "v2", ORIGIN, [70.0])
+    forecast_ledger.score_actual(db, ORIGIN + timedelta(days=1), 75.0)
+
+    report = forecast_ledger.get_accuracy(db, "prediksi")
+    assert [item["model_version"] for item in report] == ["v2"]
+    assert report[0]["horizons"][0]["n"] == 1
+
+
+def test_prediksi_forecast_origin_is_last_training_date(db, tmp_path):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    from ml.forecast_engine import ForecastEngine, export_forecast_state
+    from services.forecast_service import forecast_dates, forecast_origin, record_forecast_safely
+
+    index = pd.date_range(end=pd.Timestamp(ORIGIN), periods=60, freq="D")
+    series = pd.Series(75 + 5 * np.sin(np.arange(60) * 2 * np.pi / 7), index=index)
+    fitted = SARIMAX(series, order=(1, 0, 0)).fit(disp=False)
+    engine = ForecastEngine.load(export_forecast_state(fitted, str(tmp_path / "state.npz")))
+
+    assert forecast_origin(engine) == ORIGIN
+    model_info = {"model_version": "state@test", "forecast_origin": ORIGIN.isoformat()}
+    assert forecast_dates(model_info, 2) == ["2026-10-01", "2026-10-02"]
+
+    record_forecast_safely(db, model_info, engine.forecast(3))
+    entries = db.query(ForecastLedgerEntry).order_by(ForecastLedgerEntry.horizon).all()
+    assert {entry.origin_date for entry in entries} == {ORIGIN}
+    assert entries[0].target_date == ORIGIN + timedelta(days=1)
+
+
+def _record_and_score(db, version, errors, start=ORIGIN):
+    """One horizon-1 forecast per day; actual = predicted + error"""
+    for i, error in enumerate(errors):
+        origin = start + timedelta(days=i)
+        forecast_ledger.record_forecast(db, "prediksi", version, origin, [80.0])
+        forecast_ledger.score_actual(db, origin + timedelta(days=1), 80.0 + error)
+
+
+def test_recent_mae_follows_corrections_and_deletions(db):
+    _record_and_score(db, "v1", [1.0] * 16 + [10.0] * 14)
+    horizon = forecast_ledger.get_accuracy(db, "prediksi")[0]["horizons"][0]
+    assert horizon["recent_mae"] == pytest.approx(10.0)
+    assert horizon["drift"]
+
+    # Typo fixed: the corrected error replaces the old one in the recent window
+    last = ORIGIN + timedelta(days=30)
+    forecast_ledger.score_actual(db, last, 81.0)
+    horizon = forecast_ledger.get_accuracy(db, "prediksi")[0]["horizons"][0]
+    assert horizon["recent_mae"] == pytest.approx((13 * 10.0 + 1.0) / 14, abs=1e-4)
+
+    # Deleted actual: the window moves back one target date
+    forecast_ledger.unscore_actual(db, last)
+    horizon = forecast_ledger.get_accuracy(db, "prediksi")[0]["horizons"][0]
+    assert horizon["recent_mae"] == pytest.approx((13 * 10.0 + 1.0) / 14, abs=1e-4)
+    assert horizon["last_target_date"] == (last - timedelta(days=1)).isoformat()
+
+
+def test_late_import_of_old_actuals_is_not_recent(db):
+    # Recent dates scored first, an old backlog imported afterwards
+    _record_and_score(db, "v1", [1.0] * 14, start=ORIGIN + timedelta(days=20))
+    _record_and_score(db, "v1", [10.0] * 20)
+
+    horizon = forecast_ledger.get_accuracy(db, "prediksi")[0]["horizons"][0]
+    assert horizon["recent_mae"] == pytest.approx(1.0)
+    assert horizon["drift"] == []
+
+
+def test_drift_retrain_replaces_served_forecast_state(client, db, tmp_path, monkeypatch):
+    import os
+
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    from conftest import make_sensus
+    from ml.forecast_engine import ForecastEngine, export_forecast_state
+    from services import forecast_service
+
+    rows = make_sensus(db, 120)
+    series = pd.Series([row.bor for row in rows], index=pd.DatetimeIndex([row.tanggal for row in rows]))
+    fitted = SARIMAX(series.iloc[:60], order=(1, 0, 0)).fit(disp=False)
+    state_path = export_forecast_state(fitted, str(tmp_path / "sarima_forecast_state.npz"))
+    os.utime(state_path, (0, 1_700_000_000))  # model_version changes even within the same second
+
+    monkeypatch.setattr(
+        forecast_service, "_find_model_file",
+        lambda filename: str(tmp_path / filename) if (tmp_path / filename).exists() else None
+    )
+    forecast_service.clear_model_cache()
+    old_version = forecast_service.load_model_with_cache()[1]["model_version"]
+
+    _record_and_score(db, old_version, [1.0] * 16 + [10.0] * 14, start=date(2025, 1, 1))
+    body = client.post("/api/v1/prediksi/accuracy/retrain").json()
+
+    assert body["drifted_sources"] == ["prediksi"]
+    retrained = body["retrained"]["prediksi"]
+    assert retrained["status"] == "success"
+    assert retrained["order"] == [1, 0, 0]
+    assert retrained["model_version"] != old_version
+
+    model, model_info = forecast_service.load_model_with_cache()
+    assert model_info["model_version"] == retrained["model_version"]
+    assert isinstance(model, ForecastEngine)
+    # Refit on the sensus table (80% training split), not the 60 days of the old state
+    assert model.meta["nobs"] == int(len(series) * 0.8)
+    forecast_service.clear_model_cache()
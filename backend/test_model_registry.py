@@ -0,0 +1,110 @@
+"""
+Test model registry SARIMA: prediksi tetap dari snapshot lama selama training, publish atomik, rollback dan batas history
+
+Jalankan: python -m pytest test_model_registry.py
+"""
+
+import dataclasses
+import math
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from api.v1 import sarima_router
+from conftest import make_sensus
+from ml.model_registry import SNAPSHOT_HISTORY, ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    start = date(2026, 6, 1)
+    data = [
+        {"tanggal": start + timedelta(days=i), "bor": 70 + 5 * math.sin(2 * math.pi * i / 7) + (i % 3)}
+        for i in range(60)
+    ]
+    return sarima_router._fit_new_predictor(data, "bor", False)[0]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ModelRegistry()
+    monkeypatch.setattr(sarima_router, "model_registry", registry)
+    return registry
+
+
+def test_predict_serves_old_snapshot_while_training(app, db, registry, predictor, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    make_sensus(db, 60)
+    registry.publish(predictor)
+    fit_new_predictor = sarima_router._fit_new_predictor
+    training, release = threading.Event(), threading.Event()
+
+    def slow_fit(*args, **kwargs):
+        result = fit_new_predictor(*args, **kwargs)
+        training.set()
+        assert release.wait(30)
+        return result
+
+    monkeypatch.setattr(sarima_router, "_fit_new_predictor", slow_fit)
+    responses = {}
+    trainer = threading.Thread(target=lambda: responses.update(
+        train=TestClient(app).post("/api/v1/sarima/train", json={"days_back": 90, "optimize_parameters": False})
+    ))
+    trainer.start()
+    try:
+        assert training.wait(60)
+        # Training is done but not yet published: predictions still come from version 1
+        response = TestClient(app).get("/api/v1/sarima/predict", params={"days_ahead": 3})
+        assert response.status_code == 200
+        assert response.json()["model_performance"]["model_version"] == 1
+        assert registry.current().version == 1
+    finally:
+        release.set()
+        trainer.join(60)
+
+    assert responses["train"].status_code == 200
+    assert responses["train"].json()["model_version"] == 2
+    response = TestClient(app).get("/api/v1/sarima/predict", params={"days_ahead": 3})
+    assert response.json()["model_performance"]["model_version"] == 2
+
+
+def test_publish_swaps_an_immutable_snapshot(registry, predictor):
+    first = registry.publish(predictor, {"data_points": 60})
+    held = registry.current()
+
+    second = registry.publish(predictor, {"data_points": 61})
+
+    assert registry.current() is second
+    # A reader holding the old snapshot keeps a consistent, unchanged view
+    assert held is first and held.version == 1
+    assert held.training_info["data_points"] == 60
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        held.version = 3
+    with pytest.raises(TypeError):
+        held.performance_metrics["mape"] = 0.0
+
+
+def test_rollback_endpoint_restores_previous_version(client, registry, predictor):
+    registry.publish(predictor)
+    registry.publish(predictor)
+
+    response = client.post("/api/v1/sarima/rollback")
+    assert response.status_code == 200
+    assert response.json()["model"]["version"] == 1
+    assert registry.current().version == 1
+
+    assert client.post("/api/v1/sarima/rollback").status_code == 400
+
+
+def test_history_is_capped(registry, predictor):
+    for _ in range(SNAPSHOT_HISTORY + 3):
+        registry.publish(predictor)
+
+    versions = [item["version"] for item in registry.history()]
+    assert versions == list(range(SNAPSHOT_HISTORY + 2, 2, -1))
+    for version in versions:
+        assert registry.rollback().version == version
+    with pytest.raises(ValueError):
+        registry.rollback()
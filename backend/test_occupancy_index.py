@@ -0,0 +1,105 @@
+"""
+Test occupancy index: delta ke listener dari write-through, change feed dan perbaikan drift
+
+Jalankan: python -m pytest test_occupancy_index.py
+"""
+
+import pytest
+from sqlalchemy import text
+
+from models.bangsal import Bangsal
+from services.change_feed import change_feed
+from services.occupancy_index import OccupancyIndex, occupancy_index
+
+
+def _bangsal(db, kode, kapasitas=20, terisi=5, **fields):
+    bangsal = Bangsal(
+        nama_bangsal=f"Bangsal {kode}",
+        kode_bangsal=kode,
+        departemen=fields.pop("departemen", "Penyakit Dalam"),
+        jenis_bangsal="Kelas I",
+        kapasitas_total=kapasitas,
+        tempat_tidur_terisi=terisi,
+        tempat_tidur_tersedia=kapasitas - terisi,
+        **fields
+    )
+    db.add(bangsal)
+    db.commit()
+    return bangsal
+
+
+@pytest.fixture
+def deltas():
+    """Deltas received by a listener on the global index"""
+    received = []
+
+    def listener(changed, hospital):
+        received.extend(changed)
+
+    occupancy_index.add_listener(listener)
+    try:
+        yield received
+    finally:
+        occupancy_index._listeners.remove(listener)
+
+
+def test_write_through_notifies_only_changed_fields(db):
+    index = OccupancyIndex()
+    received = []
+    index.add_listener(lambda changed, hospital: received.extend(changed))
+    bangsal = _bangsal(db, "A1")
+    index.load(db)
+
+    bangsal.tempat_tidur_terisi, bangsal.tempat_tidur_tersedia = 8, 12
+    db.commit()
+    index.apply_bangsal([bangsal])
+    index.apply_bangsal([bangsal])  # Same state again: nothing to report
+
+    assert received == [{"id": bangsal.id, "tempat_tidur_terisi": 8, "tempat_tidur_tersedia": 12}]
+    assert index.get_occupancy_statistics()["total_occupied"] == 8
+
+
+def test_repair_notifies_drifted_wards(db):
+    index = OccupancyIndex()
+    received = []
+    index.add_listener(lambda changed, hospital: received.extend(changed))
+    kept = _bangsal(db, "A1").id
+    removed = _bangsal(db, "B1", departemen="Bedah").id
+    index.load(db)
+
+    # Raw SQL bypasses the repository and change capture
+    db.execute(text("UPDATE bangsal SET tempat_tidur_terisi = 20, tempat_tidur_tersedia = 0 WHERE id = :id"), {"id": kept})
+    db.execute(text("DELETE FROM bangsal WHERE id = :id"), {"id": removed})
+    db.commit()
+
+    result = index.check_consistency(db, repair=True)
+
+    assert result["repaired"] and len(result["drifted"]) == 2
+    assert sorted(received, key=lambda delta: delta["id"]) == [
+        {"id": kept, "tempat_tidur_terisi": 20, "tempat_tidur_tersedia": 0},
+        {"id": removed, "deleted": True}
+    ]
+    assert index.get_available_bangsal() == []
+    assert [item["departemen"] for item in index.get_department_statistics()] == ["Penyakit Dalam"]
+    assert not index.check_consistency(db)["drifted"]
+
+
+def test_bulk_update_reaches_index_through_change_feed(db, deltas):
+    bangsal = _bangsal(db, "A1", is_emergency_ready=True)
+    occupancy_index.load(db)
+    change_feed.poll("occupancy_index")  # Consumer starts at the newest sequence number
+
+    # Bulk statement from another worker or a script: no write-through
+    db.query(Bangsal).filter(Bangsal.id == bangsal.id).update(
+        {Bangsal.tempat_tidur_terisi: 20, Bangsal.tempat_tidur_tersedia: 0}, synchronize_session=False
+    )
+    db.commit()
+    assert occupancy_index.get_emergency_ready_bangsal() != []
+
+    assert change_feed.poll("occupancy_index") == 1
+    assert deltas == [{"id": bangsal.id, "tempat_tidur_terisi": 20, "tempat_tidur_tersedia": 0}]
+    assert occupancy_index.get_emergency_ready_bangsal() == []
+
+    # Redelivery of the same change is harmless
+    occupancy_index.apply_bangsal([db.get(Bangsal, bangsal.id)])
+    assert len(deltas) == 1
@@ -0,0 +1,96 @@
+"""
+Test SSE occupancy stream: snapshot untuk subscriber baru, fan-out delta dan resync snapshot untuk subscriber lambat
+
+Jalankan: python -m pytest test_occupancy_stream.py
+"""
+
+import asyncio
+import json
+import threading
+
+from models.bangsal import Bangsal
+from services.occupancy_index import OccupancyIndex
+from services.occupancy_stream import OccupancyStream
+
+
+def _frame(text):
+    """(event, payload) of one SSE frame"""
+    fields = dict(line.split(": ", 1) for line in text.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+def _loaded_index(db, wards=(("A1", 20, 5), ("B1", 10, 9))):
+    for kode, kapasitas, terisi in wards:
+        db.add(Bangsal(
+            nama_bangsal=f"Bangsal {kode}", kode_bangsal=kode, departemen="Penyakit Dalam", jenis_bangsal="Kelas I",
+            kapasitas_total=kapasitas, tempat_tidur_terisi=terisi, tempat_tidur_tersedia=kapasitas - terisi
+        ))
+    db.commit()
+    index = OccupancyIndex()
+    index.load(db)
+    return index
+
+
+def test_new_subscriber_gets_snapshot_then_fanned_out_deltas(db):
+    index = _loaded_index(db)
+    stream = OccupancyStream(index)
+    bangsal = db.query(Bangsal).filter(Bangsal.kode_bangsal == "A1").one()
+
+    async def scenario():
+        first, second = stream.event_stream(heartbeat=5), stream.event_stream(heartbeat=5)
+        snapshots = [_frame(await first.__anext__()), _frame(await second.__anext__())]
+        assert stream.subscriber_count == 2
+
+        bangsal.tempat_tidur_terisi, bangsal.tempat_tidur_tersedia = 6, 14
+        index.apply_bangsal([bangsal])
+        deltas = [_frame(await first.__anext__()), _frame(await second.__anext__())]
+        await first.aclose()
+        await second.aclose()
+        return snapshots, deltas
+
+    snapshots, deltas = asyncio.run(scenario())
+
+    for event, payload in snapshots:
+        assert event == "snapshot"
+        assert payload["sequence"] == 0
+        assert {ward["kode_bangsal"]: ward["tempat_tidur_terisi"] for ward in payload["wards"]} == {"A1": 5, "B1": 9}
+        assert payload["hospital"]["total_occupied"] == 14
+    # One frame, shared by every subscriber
+    assert deltas[0] == deltas[1]
+    event, payload = deltas[0]
+    assert event == "occupancy"
+    assert payload["sequence"] == 1
+    assert payload["wards"] == [{"id": bangsal.id, "tempat_tidur_terisi": 6, "tempat_tidur_tersedia": 14}]
+    assert payload["hospital"]["total_occupied"] == 15
+    assert stream.subscriber_count == 0
+
+
+def test_slow_subscriber_is_resynced_without_blocking_publisher(db):
+    index = _loaded_index(db)
+    stream = OccupancyStream(index, queue_size=2)
+    hospital = index.get_occupancy_statistics()
+
+    async def scenario():
+        slow = stream.event_stream(heartbeat=5)
+        await slow.__anext__()
+
+        # Publisher runs in another thread (as the request that committed the write)
+        publisher = threading.Thread(target=lambda: [
+            stream.publish_deltas([{"id": 1, "tempat_tidur_terisi": 5 + i}], hospital) for i in range(10)
+        ])
+        publisher.start()
+        await asyncio.to_thread(publisher.join, 5)
+        assert not publisher.is_alive()
+        await asyncio.sleep(0.05)  # Deliveries scheduled on this loop
+
+        # Queue overflowed: the queued deltas are dropped for a fresh snapshot
+        resync = _frame(await slow.__anext__())
+        stream.publish_deltas([{"id": 1, "tempat_tidur_terisi": 99}], hospital)
+        after = _frame(await slow.__anext__())
+        await slow.aclose()
+        return resync, after
+
+    (event, payload), (next_event, next_payload) = asyncio.run(scenario())
+    assert event == "snapshot"
+    assert payload["sequence"] == 10
+    assert next_event == "occupancy" and next_payload["sequence"] == 11
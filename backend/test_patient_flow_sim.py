@@ -0,0 +1,107 @@
+"""
+Test simulasi patient flow: P(penuh) satu hari vs nilai analitik Poisson/binomial, latensi, bangsal tanpa kapasitas dan /prediksi/bed-shortage
+
+Jalankan: python -m pytest test_patient_flow_sim.py
+"""
+
+import math
+import time
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import make_sensus
+from ml.patient_flow_sim import FlowParameters, simulate_bed_shortage
+from models.bangsal import Bangsal
+
+START = date(2026, 10, 5)  # Monday
+
+
+def _params(rate=0.15, dispersion=np.inf, discharge_probability=0.2):
+    return FlowParameters(
+        admission_rate=np.full(7, rate),
+        dispersion=dispersion,
+        discharge_probability=discharge_probability,
+        history_days=90
+    )
+
+
+def _ward(ward_id, kapasitas, terisi):
+    return {"id": ward_id, "nama_bangsal": f"Bangsal {ward_id}", "kapasitas_total": kapasitas, "tempat_tidur_terisi": terisi}
+
+
+def _p_full_one_day(capacity, occupied, admission_mean, discharge_probability):
+    """P(Binomial(occupied + Poisson(mean), 1 - p) >= capacity)"""
+    stay = 1.0 - discharge_probability
+    total = 0.0
+    for k in range(200):
+        present = occupied + k
+        p_admissions = math.exp(-admission_mean + k * math.log(admission_mean) - math.lgamma(k + 1))
+        p_full = sum(
+            math.comb(present, c) * stay ** c * discharge_probability ** (present - c)
+            for c in range(capacity, present + 1)
+        )
+        total += p_admissions * p_full
+    return total
+
+
+def test_one_day_p_full_matches_analytic_value():
+    params = _params()
+    wards = [_ward(1, 20, 18), _ward(2, 10, 6)]
+
+    result = simulate_bed_shortage(params, wards, START, days=1, n_paths=200000, seed=42)
+
+    for ward in result["wards"]:
+        expected = _p_full_one_day(ward["kapasitas_total"], ward["tempat_tidur_terisi"], 0.15 * ward["kapasitas_total"], 0.2)
+        assert ward["days"][0]["p_full"] == pytest.approx(expected, abs=0.005)
+        assert ward["p_full_within_horizon"] == ward["days"][0]["p_full"]
+
+
+def test_same_seed_same_result():
+    wards = [_ward(1, 20, 18), _ward(2, 10, 6)]
+    first = simulate_bed_shortage(_params(dispersion=5.0), wards, START, days=7, n_paths=5000, seed=7)
+    second = simulate_bed_shortage(_params(dispersion=5.0), wards, START, days=7, n_paths=5000, seed=7)
+    assert first == second
+
+
+def test_default_run_latency():
+    # Documented: 20 000 paths x 10 wards x 7 days in about 0.3 s on one core
+    wards = [_ward(i, 20, 17) for i in range(10)]
+    simulate_bed_shortage(_params(dispersion=30.0), wards, START, days=7, n_paths=20000, seed=1)
+
+    started = time.perf_counter()
+    simulate_bed_shortage(_params(dispersion=30.0), wards, START, days=7, n_paths=20000, seed=1)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_ward_without_beds_is_not_ranked():
+    wards = [_ward(1, 0, 0), _ward(2, 10, 2), _ward(3, 10, 9)]
+
+    result = simulate_bed_shortage(_params(), wards, START, days=3, n_paths=2000, seed=1)
+
+    assert [ward["bangsal_id"] for ward in result["wards"]] == [3, 2, 1]
+    assert result["wards"][-1]["p_full_within_horizon"] is None
+    assert result["wards"][-1]["days"] == []
+    assert result["hospital"]["kapasitas_total"] == 20
+
+    with pytest.raises(ValueError):
+        simulate_bed_shortage(_params(), [_ward(1, 0, 0)], START, days=3, n_paths=2000, seed=1)
+
+
+def test_bed_shortage_endpoint(client, db):
+    make_sensus(db, 60)
+    for i, (kapasitas, terisi) in enumerate([(20, 19), (15, 3), (0, 0)]):
+        db.add(Bangsal(
+            nama_bangsal=f"Bangsal {i}", kode_bangsal=f"B{i}", departemen="Penyakit Dalam", jenis_bangsal="Kelas I",
+            kapasitas_total=kapasitas, tempat_tidur_terisi=terisi, tempat_tidur_tersedia=kapasitas - terisi
+        ))
+    db.commit()
+
+    params = {"days": 3, "paths": 2000, "seed": 3}
+    body = client.get("/api/v1/prediksi/bed-shortage", params=params).json()
+    assert body["status"] == "success"
+    assert [ward["kapasitas_total"] for ward in body["wards"]] == [20, 15, 0]
+    assert body["wards"][0]["p_full_within_horizon"] >= body["wards"][1]["p_full_within_horizon"]
+    assert body["wards"][2]["p_full_within_horizon"] is None
+    assert client.get("/api/v1/prediksi/bed-shortage", params=params).json() == body
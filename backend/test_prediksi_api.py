@@ -12,11 +12,8 @@ from datetime import datetime
 
 # Test import
 try:
-    from api.v1.prediksi_router import (
-        load_model_with_cache, 
-        PrediksiRequest,
-        _MODEL_CACHE
-    )
+    from api.v1.prediksi_router import PrediksiRequest
+    from services.forecast_service import load_model_with_cache
     print("✅ Import modules berhasil")
 except ImportError as e:
     print(f"❌ Import error: {e}")
@@ -0,0 +1,53 @@
+"""
+Test /sarima/diagnostics dari artifact training offline selama model_registry kosong
+
+Jalankan: python -m pytest test_sarima_diagnostics_api.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.model_registry import model_registry
+from services import forecast_service
+
+
+@pytest.fixture
+def offline_diagnostics(tmp_path, monkeypatch):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    from ml.diagnostics_artifact import build_diagnostics
+
+    index = pd.date_range("2026-01-01", periods=90, freq="D")
+    series = pd.Series(75 + 5 * np.sin(np.arange(90) * 2 * np.pi / 7), index=index)
+    fitted = SARIMAX(series, order=(1, 0, 0)).fit(disp=False)
+    path = build_diagnostics(fitted, series, metadata={
+        "trained_at": "2026-04-01T00:00:00", "order": [1, 0, 0], "seasonal_order": [0, 0, 0, 0], "aic": float(fitted.aic)
+    }).save(str(tmp_path / "sarima_diagnostics.npz"))
+
+    monkeypatch.setattr(forecast_service, "_find_model_file", lambda filename: path if filename == "sarima_diagnostics.npz" else None)
+    monkeypatch.setattr(model_registry, "_current", None)
+    return path
+
+
+def test_diagnostics_served_from_offline_training(client, offline_diagnostics):
+    response = client.get("/api/v1/sarima/diagnostics", params={"max_points": 20})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source"] == "offline_training"
+    assert body["model_identification"]["order"] == [1, 0, 0]
+    assert body["residual_diagnostics"]["residuals"]["total_points"] == 90
+    assert body["residual_diagnostics"]["residuals"]["returned_points"] <= 20
+
+    page = client.get("/api/v1/sarima/diagnostics/residuals", params={"offset": 80, "limit": 50}).json()
+    assert page["model_version"] == "offline"
+    assert page["total_points"] == 90
+    assert len(page["values"]) == 10
+
+
+def test_no_model_and_no_offline_diagnostics(client, monkeypatch):
+    monkeypatch.setattr(forecast_service, "_find_model_file", lambda filename: None)
+    monkeypatch.setattr(model_registry, "_current", None)
+
+    assert client.get("/api/v1/sarima/diagnostics").status_code == 400
+    assert client.get("/api/v1/sarima/diagnostics/residuals").status_code == 400
@@ -0,0 +1,37 @@
+"""
+Test endpoint multi-indikator: POST /sarima/indicators/train lalu GET /sarima/indicators/predict
+
+Jalankan: python -m pytest test_sarima_indicators_api.py
+"""
+
+from conftest import make_sensus
+
+
+def test_train_and_predict_indicators(client, db):
+    make_sensus(db, 90)
+
+    response = client.post("/api/v1/sarima/indicators/train", json={
+        "days_back": 120,
+        "indicators": ["bor", "jml_masuk"],
+        "engine": "ets"
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["trained"] == 2
+    assert [result["indicator"] for result in body["indicators"]] == ["bor", "jml_masuk"]
+    assert all(result["model_info"]["engine"] == "ets" for result in body["indicators"])
+
+    response = client.get("/api/v1/sarima/indicators/predict", params={"days_ahead": 5, "indicators": ["bor"]})
+    assert response.status_code == 200, response.text
+
+
+def test_train_indicators_rejects_unknown_indicator(client, db):
+    response = client.post("/api/v1/sarima/indicators/train", json={"indicators": ["suhu"]})
+    assert response.status_code == 400
+
+
+def test_train_indicators_needs_minimum_history(client, db):
+    make_sensus(db, 5)
+    response = client.post("/api/v1/sarima/indicators/train", json={"indicators": ["bor"], "engine": "ets"})
+    assert response.status_code == 400
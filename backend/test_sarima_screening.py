@@ -0,0 +1,67 @@
+"""
+Test screening SARIMA (successive halving): satu panjang subsample per ronde, fit gagal tidak menghentikan screening
+
+Jalankan: python -m pytest test_sarima_screening.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.train_sarima import SARIMATrainer
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "config.yaml")
+
+
+class _Fit:
+    def __init__(self, aic):
+        self.aic = aic
+
+
+@pytest.fixture
+def trainer():
+    trainer = SARIMATrainer(CONFIG_PATH)
+    trainer.config["screening"] = {
+        "keep_fraction": 0.5,
+        "min_candidates": 1,
+        "rungs": [{"maxiter": 5, "subsample": 0.2}, {"maxiter": 20, "subsample": 1.0}]
+    }
+    trainer.calendar_spec = None
+    index = pd.date_range("2025-01-01", periods=200, freq="D")
+    trainer.train_data = pd.Series(np.linspace(70, 80, 200), index=index)
+    return trainer
+
+
+def test_each_rung_fits_all_candidates_on_the_same_subsample(trainer, monkeypatch):
+    fitted = []
+
+    def fake_fit(order, seasonal_order, data, maxiter):
+        fitted.append((maxiter, len(data)))
+        return _Fit(float(order[0] + seasonal_order[3]))
+
+    monkeypatch.setattr(trainer, "_fit_candidate", fake_fit)
+    candidates = [((p, 1, 1), (1, 1, 1, s)) for p in (0, 1) for s in (7, 14)]
+
+    promoted, rounds = trainer._screen_candidates(candidates)
+
+    # 20% of 200 = 40 points, raised to 4 seasons of the largest period (s=14) for every candidate
+    assert {length for maxiter, length in fitted if maxiter == 5} == {56}
+    assert rounds[0]["points"] == 56
+    assert rounds[1]["points"] == 200
+    assert promoted == [((0, 1, 1), (1, 1, 1, 7))]
+
+
+def test_failed_fit_is_ranked_last(trainer, monkeypatch):
+    def fake_fit(order, seasonal_order, data, maxiter):
+        if order[0] == 0:
+            raise np.linalg.LinAlgError("singular")
+        return _Fit(100.0)
+
+    monkeypatch.setattr(trainer, "_fit_candidate", fake_fit)
+    trainer.config["screening"]["rungs"] = trainer.config["screening"]["rungs"][:1]
+
+    promoted, _ = trainer._screen_candidates([((0, 1, 1), (1, 1, 1, 7)), ((1, 1, 1), (1, 1, 1, 7))])
+
+    assert promoted == [((1, 1, 1), (1, 1, 1, 7))]
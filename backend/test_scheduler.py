@@ -0,0 +1,90 @@
+"""
+Test scheduler: leader lock, batas max_concurrent dan state job lewat /scheduler/jobs
+
+Jalankan: python -m pytest test_scheduler.py
+"""
+
+import threading
+
+import pytest
+
+from tasks import scheduler
+from tasks.leader_lock import LeaderLock
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """Test jobs are registered in copies of the job tables"""
+    monkeypatch.setattr(scheduler, "_JOBS", dict(scheduler._JOBS))
+    monkeypatch.setattr(scheduler, "_running", dict(scheduler._running))
+
+
+def _wait_for_runs(name):
+    for thread in threading.enumerate():
+        if thread.name == f"job-{name}":
+            thread.join(10)
+
+
+def test_second_lock_holder_stays_follower(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    leader, follower = LeaderLock(path), LeaderLock(path)
+    try:
+        assert leader.try_acquire()
+        assert not follower.try_acquire()
+        assert not follower.is_leader
+        assert open(path).read() == leader.identity
+
+        # Leader gone: the follower takes over on its next attempt
+        leader.release()
+        assert follower.try_acquire()
+        assert not leader.try_acquire()
+    finally:
+        leader.release()
+        follower.release()
+
+
+def test_max_concurrent_skips_extra_runs(db, jobs):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_job():
+        started.set()
+        assert release.wait(10)
+        return "done"
+
+    job = scheduler.register_job("test_slow_job", slow_job, lambda s: s.every().hour, "Hourly", max_concurrent=1)
+    try:
+        assert scheduler.run_job(job)
+        assert started.wait(10)
+        assert not scheduler.run_job(job)
+        state = {item["job_name"]: item for item in scheduler.get_job_states()}["test_slow_job"]
+        assert state["last_outcome"] == "skipped"
+    finally:
+        release.set()
+        _wait_for_runs("test_slow_job")
+
+    # The slot is free again once the run finished
+    started.clear()
+    assert scheduler.run_job(job)
+    _wait_for_runs("test_slow_job")
+    state = {item["job_name"]: item for item in scheduler.get_job_states()}["test_slow_job"]
+    assert state["last_outcome"] == "success"
+    assert state["last_message"] == "done"
+    assert state["run_count"] == 2 and state["failure_count"] == 0
+
+
+def test_jobs_endpoint_reports_schedule_and_state(client, jobs):
+    job = scheduler.register_job("test_failing_job", lambda: False, lambda s: s.every().day.at("01:00"), "Daily 01:00")
+    scheduler.run_job(job)
+    _wait_for_runs("test_failing_job")
+
+    body = client.get("/api/v1/scheduler/jobs").json()
+    listed = {item["name"]: item for item in body["jobs"]}
+    assert listed["reload_sensus_audit"]["leader_only"] is False
+    assert listed["reload_sensus_audit"]["state"] is None
+
+    failing = listed["test_failing_job"]
+    assert failing["schedule"] == "Daily 01:00"
+    assert failing["max_concurrent"] == 1
+    assert failing["state"]["last_outcome"] == "failed"
+    assert failing["state"]["failure_count"] == 1
+    assert failing["state"]["last_duration_seconds"] is not None
@@ -0,0 +1,102 @@
+"""
+Test detektor anomali sensus: warmup, outlier dengan Huber clipping, entri terlambat/koreksi, remove_entry dan masking di prepare_data
+
+Jalankan: python -m pytest test_sensus_anomaly.py
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from models.sensus import SensusHarian
+from models.sensus_anomaly import SensusAnomalyState
+from services import sensus_anomaly
+
+START = date(2026, 8, 1)
+
+
+def _day(db, offset, bor):
+    sensus = db.query(SensusHarian).filter(SensusHarian.tanggal == START + timedelta(days=offset)).first()
+    if sensus is None:
+        sensus = SensusHarian(tanggal=START + timedelta(days=offset))
+        db.add(sensus)
+    sensus.bor = bor
+    db.commit()
+    return sensus_anomaly.score_entry(db, sensus)
+
+
+def _bor_state(db):
+    db.expire_all()
+    state = db.get(SensusAnomalyState, (sensus_anomaly.SCOPE, "bor"))
+    return state.n, state.mean, state.mean_abs_dev, state.last_tanggal
+
+
+def _steady(db, days=30):
+    for i in range(days):
+        _day(db, i, 70.0 + 2.0 * (i % 2))
+
+
+def test_warmup_raises_no_flags(db):
+    for i in range(sensus_anomaly.WARMUP):
+        assert _day(db, i, 200.0 if i % 2 else 10.0) == []
+    assert _bor_state(db)[0] == sensus_anomaly.WARMUP
+
+
+def test_outlier_is_flagged_and_clipped(db):
+    _steady(db)
+    n, mean, _, _ = _bor_state(db)
+
+    flags = _day(db, 30, 99.0)
+    assert [flag["indicator"] for flag in flags] == ["bor"]
+    assert flags[0]["direction"] == "high"
+    assert flags[0]["score"] > sensus_anomaly.THRESHOLD_Z
+
+    new_n, new_mean, _, _ = _bor_state(db)
+    assert new_n == n + 1
+    # Clipped at CLIP_Z scales: far less than the unclipped EWMA_ALPHA * (99 - mean) ~ 2.8
+    assert new_mean - mean < 0.5
+    assert _day(db, 31, 71.0) == []
+
+
+def test_late_and_corrected_days_leave_statistics_unchanged(db):
+    _steady(db)
+    before = _bor_state(db)
+
+    # Correction of an old day: scored, not absorbed
+    flags = _day(db, 10, 99.0)
+    assert [flag["tanggal"] for flag in flags] == [(START + timedelta(days=10)).isoformat()]
+    assert _bor_state(db) == before
+
+    # Corrected back: the flag of that date is replaced
+    assert _day(db, 10, 70.0) == []
+    assert sensus_anomaly.list_flags(db) == []
+    assert _bor_state(db) == before
+
+
+def test_remove_entry_drops_flags(db):
+    _steady(db)
+    _day(db, 30, 99.0)
+    tanggal = START + timedelta(days=30)
+    assert sensus_anomaly.anomaly_dates(db, ["bor"]) == {"bor": {tanggal}}
+
+    assert sensus_anomaly.remove_entry(db, tanggal) == 1
+    assert sensus_anomaly.flags_for_date(db, tanggal) == []
+    assert sensus_anomaly.anomaly_dates(db, ["bor"]) == {"bor": set()}
+
+
+def test_prepare_data_masks_flagged_dates_instead_of_iqr():
+    from ml.sarima_model import SARIMAPredictor
+
+    values = [70.0, 71.0, 72.0, 71.0, 70.0, 71.0, 72.0, 150.0, 71.0, 70.0]
+    data = [{"tanggal": START + timedelta(days=i), "bor": value} for i, value in enumerate(values)]
+    flagged = START + timedelta(days=2)
+
+    series = SARIMAPredictor().prepare_data(data, outlier_dates={flagged})
+    # Flagged day filled from the previous day; the IQR outlier (150) is not touched
+    assert series[pd.Timestamp(flagged)] == 71.0
+    assert series.iloc[7] == 150.0
+
+    series = SARIMAPredictor().prepare_data(data)
+    assert series.iloc[2] == 72.0
+    assert series.iloc[7] == pytest.approx(71.0)
@@ -0,0 +1,78 @@
+"""
+Test shared model cache: memo per proses dibatasi (LRU) dan entry lama dipangkas setelah grace period
+
+Jalankan: python -m pytest test_shared_cache.py
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from ml import shared_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_DIR", str(tmp_path / "cache"))
+    shared_cache.clear_process_cache()
+    yield tmp_path / "cache"
+    shared_cache.clear_process_cache()
+
+
+def _source(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def _loader(value):
+    return lambda: ({"values": np.full(3, value)}, {"value": value})
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_new_source_version_replaces_memo_entry(tmp_path):
+    source = _source(tmp_path, "model.pkl", "v1")
+    arrays, meta = shared_cache.shared_arrays("state", source, _loader(1.0))
+    assert meta == {"value": 1.0}
+
+    source = _source(tmp_path, "model.pkl", "version 2")
+    arrays, meta = shared_cache.shared_arrays("state", source, _loader(2.0))
+
+    assert meta == {"value": 2.0}
+    np.testing.assert_array_equal(arrays["values"], np.full(3, 2.0))
+    assert len(shared_cache._loaded) == 1
+
+
+def test_memo_is_bounded_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "MAX_LOADED", 2)
+    sources = [_source(tmp_path, f"ward{i}.pkl", str(i)) for i in range(3)]
+    shared_cache.shared_arrays("state", sources[0], _loader(0.0))
+    shared_cache.shared_arrays("state", sources[1], _loader(1.0))
+    shared_cache.shared_arrays("state", sources[0], _loader(0.0))  # Most recently used again
+    shared_cache.shared_arrays("state", sources[2], _loader(2.0))
+
+    prefixes = [shared_cache._entry_prefix("state", source) for source in sources]
+    assert list(shared_cache._loaded) == [prefixes[0], prefixes[2]]
+
+
+def test_superseded_entry_is_pruned_after_grace_period(tmp_path, cache_dir):
+    source = _source(tmp_path, "model.pkl", "v1")
+    shared_cache.shared_arrays("state", source, _loader(1.0))
+    old_entries = os.listdir(cache_dir)
+
+    source = _source(tmp_path, "model.pkl", "version 2")
+    shared_cache.shared_arrays("state", source, _loader(2.0))
+    # The new entry is younger than the grace period: the old one may still be opened
+    assert len(os.listdir(cache_dir)) == 2
+
+    new_entry = next(name for name in os.listdir(cache_dir) if name not in old_entries)
+    _age(os.path.join(cache_dir, new_entry, "meta.json"), shared_cache.PRUNE_GRACE_SECONDS + 1)
+    shared_cache.clear_process_cache()
+    shared_cache.shared_arrays("state", source, _loader(2.0))
+    assert os.listdir(cache_dir) == [new_entry]
@@ -0,0 +1,70 @@
+"""
+Regression test untuk cold start API: `import main` harus tetap ringan
+
+- waktu import di interpreter baru di bawah budget (STARTUP_BUDGET_SECONDS)
+- paket ilmiah berat tidak ikut dimuat sebelum fitur ML/export dipakai
+
+Jalankan: python -m pytest test_startup_time.py  (atau python test_startup_time.py)
+Profil detail: python scripts/profile_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Budget cold start `import main` (detik); longgar terhadap variasi mesin CI
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0"))
+
+# Harus lazy: dimuat saat training/prediksi legacy/export Excel, bukan saat startup
+LAZY_PACKAGES = ["statsmodels", "scipy", "pandas", "matplotlib", "seaborn", "sklearn", "joblib", "xlsxwriter"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+loaded = sorted({name.split('.')[0] for name in sys.modules})
+print(json.dumps({"elapsed": elapsed, "loaded": loaded}))
+"""
+
+
+def _cold_import_main():
+    """Import main di interpreter baru dengan database sementara"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        env["ENABLE_SCHEDULER"] = "false"
+        env["PRELOAD_ML"] = "false"
+        env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        # cwd sementara supaya logs/ tidak ditulis ke repo
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            cwd=tmp, env=env, capture_output=True, text=True, timeout=120
+        )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_main_within_budget():
+    probe = _cold_import_main()
+    assert probe["elapsed"] < STARTUP_BUDGET_SECONDS, (
+        f"import main took {probe['elapsed']:.2f}s (budget {STARTUP_BUDGET_SECONDS:.1f}s); "
+        "run scripts/profile_startup.py to find the regression"
+    )
+
+
+def test_import_main_skips_heavy_packages():
+    probe = _cold_import_main()
+    eager = [package for package in LAZY_PACKAGES if package in probe["loaded"]]
+    assert not eager, f"Heavy packages imported at startup: {eager}"
+
+
+if __name__ == "__main__":
+    probe = _cold_import_main()
+    print(f"⏱️  import main: {probe['elapsed']:.2f}s (budget {STARTUP_BUDGET_SECONDS:.1f}s)")
+    eager = [package for package in LAZY_PACKAGES if package in probe["loaded"]]
+    print("✅ No heavy packages at startup" if not eager else f"❌ Heavy packages at startup: {eager}")
@@ -0,0 +1,104 @@
+"""
+Test sync API: upload idempoten, konflik base_version, tombstone dan token yang terlalu lama
+
+Jalankan: python -m pytest test_sync_api.py
+"""
+
+from datetime import date, datetime, timedelta
+
+from models.change_log import ChangeLogEntry
+from models.sensus import SensusHarian
+from services.change_feed import change_feed
+
+TODAY = date.today()
+
+
+def _data(day: date, masuk: int = 10):
+    return {
+        "tanggal": day.isoformat(),
+        "jml_pasien_awal": 80,
+        "jml_masuk": masuk,
+        "jml_keluar": 5,
+        "tempat_tidur_tersedia": 120
+    }
+
+
+def _upload(client, *items):
+    response = client.post("/api/v1/sync/sensus/upload", json={"items": list(items)})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _pull(client, token=None):
+    params = {"tables": ["sensus_harian"]}
+    if token is not None:
+        params["token"] = token
+    response = client.get("/api/v1/sync/changes", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_retried_upload_is_replayed(client, db):
+    item = {"idempotency_key": "offline-0001", "data": _data(TODAY)}
+
+    first = _upload(client, item)
+    retry = _upload(client, item)
+
+    assert first["summary"] == {"created": 1}
+    assert retry["summary"] == {"replayed": 1}
+    assert retry["results"][0]["id"] == first["results"][0]["id"]
+    assert db.query(SensusHarian).count() == 1
+
+    reused = _upload(client, {"idempotency_key": "offline-0001", "data": _data(TODAY, masuk=12)})
+    assert reused["results"][0]["status"] == "invalid"
+
+
+def test_stale_base_version_is_a_conflict(client, db):
+    created = _upload(client, {"idempotency_key": "offline-0001", "data": _data(TODAY)})["results"][0]
+    version = created["row"]["_version"]
+    updated = _upload(client, {
+        "idempotency_key": "offline-0002", "id": created["id"], "base_version": version, "data": _data(TODAY, masuk=12)
+    })["results"][0]
+    assert updated["status"] == "updated"
+    assert updated["row"]["_version"] > version
+
+    # A second workstation still holds the first version
+    stale = _upload(client, {
+        "idempotency_key": "offline-0003", "id": created["id"], "base_version": version, "data": _data(TODAY, masuk=15)
+    })["results"][0]
+    assert stale["status"] == "conflict"
+    assert stale["current"]["jml_masuk"] == 12
+    assert db.get(SensusHarian, created["id"]).jml_masuk == 12
+
+
+def test_delete_arrives_as_tombstone(client, db):
+    created = _upload(client, {"idempotency_key": "offline-0001", "data": _data(TODAY)})["results"][0]
+    token = _pull(client)["token"]
+
+    deleted = _upload(client, {
+        "idempotency_key": "offline-0002", "operation": "delete",
+        "id": created["id"], "base_version": created["row"]["_version"]
+    })
+    assert deleted["summary"] == {"deleted": 1}
+
+    delta = _pull(client, token)
+    assert delta["mode"] == "delta"
+    assert delta["tables"]["sensus_harian"]["upserts"] == []
+    assert [tombstone["id"] for tombstone in delta["tables"]["sensus_harian"]["deletes"]] == [created["id"]]
+
+
+def test_token_older_than_pruned_log_gets_snapshot(client, db):
+    _upload(client, {"idempotency_key": "offline-0001", "data": _data(TODAY - timedelta(days=1))})
+    old_token = _pull(client)["token"]
+    _upload(client, {"idempotency_key": "offline-0002", "data": _data(TODAY)})
+    current_token = _pull(client)["token"]
+
+    db.query(ChangeLogEntry).update({ChangeLogEntry.created_at: datetime.utcnow() - timedelta(days=30)})
+    db.commit()
+    change_feed.prune(db)
+
+    stale = _pull(client, old_token)
+    assert stale["mode"] == "full"
+    assert len(stale["tables"]["sensus_harian"]["upserts"]) == 2
+
+    assert _pull(client, current_token)["mode"] == "delta"
@@ -3,12 +3,31 @@
 Centralized Indikator Calculator
 Implementasi DRY untuk perhitungan indikator Kemenkes dengan standar terpusat
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from datetime import date
+
+import numpy as np
+
 from models.sensus import SensusHarian
 from core.medical_standards import MedicalStandards
 
 
+def _round1(values: np.ndarray) -> np.ndarray:
+    """
+    round(x, 1) per elemen, identik dengan round() Python
+
+    np.round berbeda dari round() hanya di dekat batas .x5; nilai tersebut
+    dibulatkan ulang dengan round() (sedikit sekali per batch).
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.round(values, 1)
+    scaled = values * 10
+    tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if tie.any():
+        result[tie] = [round(float(value), 1) for value in values[tie]]
+    return result
+
+
 class IndikatorCalculator:
     """
     Kelas untuk menghitung semua indikator rawat inap sesuai standar Kemenkes
@@ -77,7 +96,58 @@ class IndikatorCalculator:
             "bto": max(0.0, bto),
             "toi": max(0.0, toi)
         }
-    
+
+    @staticmethod
+    def hitung_indikator_harian_batch(
+        pasien_awal: Sequence[int],
+        masuk: Sequence[int],
+        keluar: Sequence[int],
+        tt: Sequence[int],
+        hari_rawat: Optional[Sequence[Optional[int]]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Versi vektor dari hitung_indikator_harian untuk banyak hari sekaligus
+
+        Hasil identik per elemen dengan versi skalar (termasuk pembulatan
+        round() Python); hari_rawat None/NaN berarti tidak diisi.
+
+        Returns:
+            Dict array dengan pasien_akhir, bor, los, bto, toi
+        """
+        pasien_awal = np.asarray(pasien_awal, dtype=np.int64)
+        masuk = np.asarray(masuk, dtype=np.int64)
+        keluar = np.asarray(keluar, dtype=np.int64)
+        tt = np.asarray(tt, dtype=np.int64)
+        if hari_rawat is None:
+            hari_rawat = np.full(len(tt), np.nan)
+        else:
+            hari_rawat = np.array([np.nan if h is None else h for h in hari_rawat], dtype=float)
+
+        valid = tt > 0
+        safe_tt = np.where(valid, tt, 1)
+        ada_keluar = keluar > 0
+        safe_keluar = np.where(ada_keluar, keluar, 1)
+
+        pasien_akhir = pasien_awal + masuk - keluar
+        bor = _round1(pasien_akhir / safe_tt * 100)
+
+        estimated_hari_rawat = (pasien_awal + masuk + keluar) // 2
+        hari = np.where(np.isnan(hari_rawat), estimated_hari_rawat, hari_rawat)
+        los = np.where(ada_keluar, _round1(hari / safe_keluar), 0.0)
+
+        bto = _round1((keluar / safe_tt) * 30)
+
+        tt_kosong = np.maximum(0, tt - pasien_akhir)
+        toi = np.where(ada_keluar, _round1(tt_kosong / safe_keluar), 0.0)
+
+        return {
+            "pasien_akhir": np.where(valid, pasien_akhir, 0),
+            "bor": np.where(valid, np.clip(bor, 0.0, 100.0), 0.0),
+            "los": np.where(valid, np.maximum(0.0, los), 0.0),
+            "bto": np.where(valid, np.maximum(0.0, bto), 0.0),
+            "toi": np.where(valid, np.maximum(0.0, toi), 0.0)
+        }
+
     @staticmethod
     def hitung_indikator_bulanan(
         data_bulanan: List[SensusHarian],
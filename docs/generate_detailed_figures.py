@@ -10,9 +10,14 @@ import numpy as np
 import pandas as pd
 from pathlib import Path
 import pickle
+import sys
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from statsmodels.tsa.arima.model import ARIMA
 
+# Fit cache bersama backend: model yang sama tidak di-fit ulang setiap generate
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+from ml.fit_cache import cached_fit
+
 # Set style untuk paper
 plt.rcParams['font.family'] = 'Times New Roman'
 plt.rcParams['font.size'] = 10
@@ -287,7 +292,7 @@ def create_actual_vs_predicted():
     # Train ARIMA model
     print("Training ARIMA model for prediction plot...")
     arima_model = ARIMA(train['bor'], order=(3, 0, 2))
-    arima_fit = arima_model.fit()
+    arima_fit = cached_fit(arima_model)
     
     # Generate predictions
     arima_pred = arima_fit.forecast(steps=len(test))
@@ -420,7 +425,7 @@ def create_forecast_with_ci():
                           seasonal_order=(1, 1, 2, 30),
                           enforce_stationarity=False,
                           enforce_invertibility=False)
-    sarima_full_fit = sarima_full.fit(disp=False, maxiter=200)
+    sarima_full_fit = cached_fit(sarima_full, disp=False, maxiter=200)
     
     # Forecast 30 hari
     forecast_steps = 30
@@ -488,7 +493,7 @@ def create_error_distribution():
     
     # Load models and predict
     sarima_model = load_sarima_model()
-    arima_model = ARIMA(train['bor'], order=(3, 0, 2)).fit()
+    arima_model = cached_fit(ARIMA(train['bor'], order=(3, 0, 2)))
     
     sarima_pred = sarima_model.forecast(steps=len(test))
     arima_pred = arima_model.forecast(steps=len(test))